@@ -23,6 +23,8 @@ from typing import Any, Callable, Dict, List, Optional
 
 import google.generativeai as genai
 
+from utils.history_log import get_history_log
+
 
 class OXCASHAgent:
     """Agente de IA inteligente com acesso total ao sistema OXCASH"""
@@ -366,14 +368,14 @@ class OXCASHAgent:
         def count_boletos(dia_key):
             boletos = boletos_data.get(dia_key, [])
             total = len(boletos)
-            emitidos = sum(1 for b in boletos if b.get('png_base64') or b.get('boleto_url'))
+            emitidos = sum(1 for b in boletos if b.get('png_base64') or b.get('screenshot_blob') or b.get('boleto_url'))
             concluidos = sum(1 for b in boletos if b.get('is_completed'))
             return {
                 "total": total,
                 "emitidos": emitidos,
                 "pendentes": total - emitidos,
                 "concluidos": concluidos,
-                "lista": [{"nome": b.get('nome'), "cotas": b.get('cotas'), "emitido": bool(b.get('png_base64') or b.get('boleto_url'))} for b in boletos[:5]]
+                "lista": [{"nome": b.get('nome'), "cotas": b.get('cotas'), "emitido": bool(b.get('png_base64') or b.get('screenshot_blob') or b.get('boleto_url'))} for b in boletos[:5]]
             }
         
         if dia == "all":
@@ -443,22 +445,17 @@ class OXCASHAgent:
         }
         
         if dia == "both":
-            history_dia8 = self._load_json_file('history_dia8.json')
-            history_dia16 = self._load_json_file('history_dia16.json')
-            
-            result["dia8"] = {
-                "total": len(history_dia8),
-                "ultimos": list(reversed(history_dia8[-limit:]))
-            }
-            result["dia16"] = {
-                "total": len(history_dia16),
-                "ultimos": list(reversed(history_dia16[-limit:]))
-            }
+            for d in ("dia8", "dia16"):
+                ultimos, total = get_history_log(self.project_root, d).read_page(0, limit, newest_first=True)
+                result[d] = {
+                    "total": total,
+                    "ultimos": ultimos
+                }
         else:
-            history = self._load_json_file(f'history_{dia}.json')
+            ultimos, total = get_history_log(self.project_root, dia).read_page(0, limit, newest_first=True)
             result["dados"] = {
-                "total": len(history),
-                "ultimos": list(reversed(history[-limit:]))
+                "total": total,
+                "ultimos": ultimos
             }
         
         return result
@@ -535,7 +532,7 @@ class OXCASHAgent:
                     "nome": boleto.get('nome'),
                     "cotas": boleto.get('cotas'),
                     "dia": dia,
-                    "ja_emitido": bool(boleto.get('png_base64') or boleto.get('boleto_url'))
+                    "ja_emitido": bool(boleto.get('png_base64') or boleto.get('screenshot_blob') or boleto.get('boleto_url'))
                 },
                 "warning": "Para gerar de verdade, use confirmar=True"
             }
@@ -604,7 +601,7 @@ class OXCASHAgent:
                 "boleto": {
                     "nome": boleto.get('nome'),
                     "celular": boleto.get('celular'),
-                    "tem_boleto": bool(boleto.get('png_base64') or boleto.get('boleto_url'))
+                    "tem_boleto": bool(boleto.get('png_base64') or boleto.get('screenshot_blob') or boleto.get('boleto_url'))
                 },
                 "warning": "Para enviar de verdade, use confirmar=True"
             }
@@ -635,7 +632,7 @@ class OXCASHAgent:
                         "cotas": boleto.get('cotas'),
                         "celular": boleto.get('celular'),
                         "dia": dia,
-                        "emitido": bool(boleto.get('png_base64') or boleto.get('boleto_url')),
+                        "emitido": bool(boleto.get('png_base64') or boleto.get('screenshot_blob') or boleto.get('boleto_url')),
                         "concluido": boleto.get('is_completed', False)
                     })
         
@@ -685,15 +682,17 @@ class OXCASHAgent:
         """Retorna status geral do sistema"""
         boletos_stats = self.get_boletos_stats("all")
         lances_stats = self.get_lances_stats("all")
-        history_dia8 = self._load_json_file('history_dia8.json')
-        history_dia16 = self._load_json_file('history_dia16.json')
+        history_dia8 = get_history_log(self.project_root, 'dia8')
+        history_dia16 = get_history_log(self.project_root, 'dia16')
         
         # Última execução
         last_execution = None
-        if history_dia8:
-            last_execution = history_dia8[-1]
-        elif history_dia16:
-            last_execution = history_dia16[-1]
+        ultimos_dia8 = history_dia8.tail(1)
+        ultimos_dia16 = history_dia16.tail(1)
+        if ultimos_dia8:
+            last_execution = ultimos_dia8[0]
+        elif ultimos_dia16:
+            last_execution = ultimos_dia16[0]
         
         return {
             "success": True,
@@ -709,8 +708,8 @@ class OXCASHAgent:
                 "pendentes": lances_stats.get("total_geral", 0) - lances_stats.get("concluidos_geral", 0)
             },
             "historico": {
-                "total_execucoes_dia8": len(history_dia8),
-                "total_execucoes_dia16": len(history_dia16),
+                "total_execucoes_dia8": history_dia8.count(),
+                "total_execucoes_dia16": history_dia16.count(),
                 "ultima_execucao": last_execution
             }
         }
@@ -34,7 +34,63 @@ def switch_to_window_with_url(driver, url_part, progress_callback=None):
         return False
 
 
-def executar_ciclo_completo(driver, board_data, progress_callback=None, history_callback=None, should_continue=None):
+def _fechar_uma_a_uma(todoist_api, task_ids, progress_callback=None):
+    """Tenta concluir cada tarefa pela REST API; retorna as que continuam abertas"""
+    abertas = []
+    for task_id in task_ids:
+        try:
+            if not todoist_api.close_task(task_id):
+                raise Exception("resposta inesperada da API")
+        except Exception as e:
+            abertas.append(task_id)
+            if progress_callback:
+                progress_callback(f"   ⚠️ Tarefa {task_id} não concluída: {e}")
+    
+    if progress_callback:
+        if abertas:
+            progress_callback(f"❌ [TODOIST API] {len(abertas)} tarefa(s) continuam abertas no Todoist: {', '.join(abertas)}")
+        else:
+            progress_callback(f"✅ [TODOIST API] {len(task_ids)} tarefa(s) concluídas individualmente")
+    return abertas
+
+
+def concluir_tarefas_api(todoist_api, task_ids, progress_callback=None, retry_individually=False):
+    """
+    Conclui as tarefas no Todoist em uma única requisição (lote da Sync API)
+    
+    Args:
+        todoist_api: Instância de TodoistRestAPI
+        task_ids: IDs das tarefas na API
+        progress_callback: Função para atualizar progresso na UI
+        retry_individually: Se o lote falhar (inteiro ou em parte), tenta cada
+            tarefa que sobrou com close_task em vez de propagar o erro
+        
+    Returns:
+        list: IDs que NÃO foram concluídos (vazia se tudo deu certo)
+    """
+    try:
+        results = todoist_api.close_tasks(task_ids)
+    except Exception as e:
+        if not retry_individually:
+            raise
+        if progress_callback:
+            progress_callback(f"⚠️ Erro ao concluir em lote pela API do Todoist: {e}")
+        falhas = list(task_ids)
+    else:
+        falhas = [r['task_id'] for r in results if not r['ok']]
+        if progress_callback:
+            progress_callback(f"✅ [TODOIST API] {len(results) - len(falhas)}/{len(results)} tarefas concluídas em lote")
+            for result in results:
+                if not result['ok']:
+                    progress_callback(f"   ⚠️ Tarefa {result['task_id']}: {result['error']}")
+    
+    if falhas and retry_individually:
+        falhas = _fechar_uma_a_uma(todoist_api, falhas, progress_callback)
+    return falhas
+
+
+def executar_ciclo_completo(driver, board_data, progress_callback=None, history_callback=None, should_continue=None,
+                            todoist_api=None):
     """
     Executa o ciclo completo coluna por coluna, linha por linha
     
@@ -53,12 +109,24 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
        3. Ao terminar a coluna: marca TODOS os checkboxes da coluna
        4. Próxima coluna
     
+    Com o board vindo da própria API (TodoistRestAPI.extract_lances_board)
+    e ``todoist_api``, basta a aba do Servopa: os passos f/g/3 viram uma
+    única requisição que conclui as tarefas da coluna ao fim dela (ou ao
+    parar no meio, só as que já tiveram lance). As que o lote não concluiu
+    são tentadas uma a uma pela API e as que continuarem abertas ficam em
+    stats['todoist_open']. O board extraído da aba do Todoist continua
+    marcando o checkbox de cada tarefa logo após o lance (os IDs do DOM não
+    são os da API).
+    
     Args:
         driver: Instância do WebDriver com ambas as abas abertas
-        board_data: Dados extraídos do board (retorno de extract_complete_board)
+        board_data: Dados extraídos do board (retorno de extract_complete_board,
+            ou {'sections': ...} com as colunas de extract_lances_board)
         progress_callback: Função para atualizar progresso na UI
         history_callback: Função para adicionar entrada ao histórico (grupo, cota, nome, valor, status, obs)
         should_continue: Função que retorna True se deve continuar, False se deve parar
+        todoist_api: TodoistRestAPI para concluir em lote as tarefas do board
+            vindo da API (opcional)
         
     Returns:
         dict: Estatísticas da execução
@@ -72,7 +140,8 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
         'completed': 0,
         'failed': 0,
         'skipped': 0,
-        'results': []
+        'results': [],
+        'todoist_open': []  # IDs que a API não conseguiu concluir (board sem aba do Todoist)
     }
     
     if progress_callback:
@@ -88,6 +157,25 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
         
         progress_callback("=" * 60)
     
+    # Board vindo da API (sem checkboxes): tarefas concluídas em lote pela API
+    board_da_api = todoist_api is not None and not any(
+        t.get('checkbox_element') for s in board_data['sections'] for t in s['tasks']
+    )
+    # Modo API: tarefas com lance feito na coluna atual, concluídas em lote
+    concluidas_na_coluna = []
+    
+    def encerrar_interrompido():
+        """Parada no meio da coluna: conclui as tarefas que já tiveram lance"""
+        if concluidas_na_coluna:
+            try:
+                stats['todoist_open'] += concluir_tarefas_api(
+                    todoist_api, concluidas_na_coluna, progress_callback, retry_individually=True
+                )
+            except Exception as e:
+                if progress_callback:
+                    progress_callback(f"⚠️ Erro ao concluir tarefas pela API do Todoist: {e}")
+        return stats
+    
     # Percorre cada coluna (seção)
     for section_index, section in enumerate(board_data['sections'], 1):
         # Verifica se deve continuar
@@ -122,17 +210,20 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
             stats['skipped'] += len(completed_tasks)
             continue
         
+        concluidas_na_coluna.clear()
+        
         # Percorre APENAS as tarefas PENDENTES (não flegadas)
         for task_index, task in enumerate(pending_tasks, 1):
             # Verifica se deve continuar
             if should_continue and not should_continue():
                 if progress_callback:
                     progress_callback("⏹️ Automação interrompida pelo usuário")
-                return stats
+                return encerrar_interrompido()
             
             cota = task['cota']
             nome = task['nome']
-            checkbox = task['checkbox_element']
+            checkbox = task.get('checkbox_element')  # ausente no board vindo da API
+            api_task_id = task.get('task_id') if board_da_api else None
             
             if progress_callback:
                 progress_callback("")
@@ -168,7 +259,7 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
                             pass
                     if progress_callback:
                         progress_callback("⏹️ Automação interrompida pelo usuário durante processamento")
-                    return stats
+                    return encerrar_interrompido()
                 
                 # ========== PARTE 1: SERVOPA ==========
                 if progress_callback:
@@ -188,7 +279,7 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
                             pass
                     if progress_callback:
                         progress_callback("⏹️ Automação interrompida pelo usuário durante processamento")
-                    return stats
+                    return encerrar_interrompido()
                 
                 # Processa lance completo no Servopa
                 if progress_callback:
@@ -216,23 +307,32 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
                             pass
                     if progress_callback:
                         progress_callback("⏹️ Automação interrompida pelo usuário durante processamento")
-                    return stats
+                    return encerrar_interrompido()
                 
                 # ========== PARTE 2: TODOIST ==========
-                if progress_callback:
-                    progress_callback("📋 [TODOIST] Mudando para aba do Todoist...")
-                
-                if not switch_to_window_with_url(driver, "todoist", progress_callback):
-                    raise Exception("Não foi possível mudar para aba do Todoist")
-                
-                time.sleep(1)
-                
-                # Marca tarefa como concluída
-                if progress_callback:
-                    progress_callback(f"✅ [TODOIST] Marcando tarefa como concluída...")
-                
-                if mark_task_completed(driver, checkbox, progress_callback):
+                if api_task_id:
+                    # Concluída pela API no lote do fim da coluna
+                    concluidas_na_coluna.append(api_task_id)
+                    if progress_callback:
+                        progress_callback("📋 [TODOIST] Tarefa será concluída pela API ao fim da coluna")
+                    marcada = True
+                else:
+                    if progress_callback:
+                        progress_callback("📋 [TODOIST] Mudando para aba do Todoist...")
+                    
+                    if not switch_to_window_with_url(driver, "todoist", progress_callback):
+                        raise Exception("Não foi possível mudar para aba do Todoist")
+                    
+                    time.sleep(1)
+                    
+                    # Marca tarefa como concluída
                     if progress_callback:
+                        progress_callback(f"✅ [TODOIST] Marcando tarefa como concluída...")
+                    
+                    marcada = mark_task_completed(driver, checkbox, progress_callback)
+                
+                if marcada:
+                    if progress_callback and not api_task_id:
                         progress_callback(f"✅ [TODOIST] Tarefa marcada com sucesso!")
                     
                     result['success'] = True
@@ -328,24 +428,33 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
             progress_callback(f"📋 FINALIZANDO COLUNA: {section_title}")
             progress_callback("=" * 60)
         
-        # Muda para Todoist para marcar todos os checkboxes
-        try:
-            if switch_to_window_with_url(driver, "todoist", progress_callback):
-                time.sleep(2)
+        # Board da API: uma requisição conclui todas as tarefas da coluna
+        if board_da_api:
+            column_task_ids = [t['task_id'] for t in pending_tasks if t.get('task_id')]
+            if column_task_ids:
+                stats['todoist_open'] += concluir_tarefas_api(
+                    todoist_api, column_task_ids, progress_callback, retry_individually=True
+                )
+            concluidas_na_coluna.clear()
+        else:
+            # Muda para Todoist para marcar todos os checkboxes
+            try:
+                if switch_to_window_with_url(driver, "todoist", progress_callback):
+                    time.sleep(2)
+                    
+                    # Marca todos os checkboxes da coluna
+                    marked_count = mark_all_section_tasks_completed(driver, section_title, progress_callback)
+                    
+                    if progress_callback:
+                        progress_callback(f"✅ {marked_count} checkboxes garantidos na coluna '{section_title}'")
                 
-                # Marca todos os checkboxes da coluna
-                marked_count = mark_all_section_tasks_completed(driver, section_title, progress_callback)
+                # Volta para Servopa para próxima coluna
+                switch_to_window_with_url(driver, "servopa", progress_callback)
+                time.sleep(1)
                 
+            except Exception as final_mark_error:
                 if progress_callback:
-                    progress_callback(f"✅ {marked_count} checkboxes garantidos na coluna '{section_title}'")
-            
-            # Volta para Servopa para próxima coluna
-            switch_to_window_with_url(driver, "servopa", progress_callback)
-            time.sleep(1)
-            
-        except Exception as final_mark_error:
-            if progress_callback:
-                progress_callback(f"⚠️ Erro ao marcar checkboxes finais: {final_mark_error}")
+                    progress_callback(f"⚠️ Erro ao marcar checkboxes finais: {final_mark_error}")
         
         # Fim da coluna
         if progress_callback:
@@ -363,6 +472,8 @@ def executar_ciclo_completo(driver, board_data, progress_callback=None, history_
             progress_callback(f"⏭️ Tarefas puladas (continuação): {stats['skipped']}")
         progress_callback(f"✅ Tarefas concluídas: {stats['completed']}/{stats['total_tasks']}")
         progress_callback(f"❌ Tarefas com falha: {stats['failed']}/{stats['total_tasks']}")
+        if stats['todoist_open']:
+            progress_callback(f"⚠️ Ainda abertas no Todoist (concluir manualmente): {', '.join(stats['todoist_open'])}")
         if stats['completed'] + stats['failed'] > 0:
             progress_callback(f"📊 Taxa de sucesso: {(stats['completed']/(stats['completed']+stats['failed'])*100):.1f}%")
         progress_callback("=" * 60)
@@ -8,7 +8,6 @@ captura em PNG (base64) para ser reutilizada no envio automatizado via WhatsApp.
 
 from __future__ import annotations
 
-import base64
 import json
 import re
 import time
@@ -23,6 +22,7 @@ from selenium.webdriver.support.ui import Select, WebDriverWait
 
 # Reutilizamos utilitários existentes dos módulos de lances/login
 from automation.servopa_lances import buscar_grupo, selecionar_cota
+from utils.blob_store import get_blob_store
 
 ProgressCallback = Optional[Callable[[str], None]]
 
@@ -50,7 +50,7 @@ class BoletoAutomationResult:
 
     tipo: str
     boleto_url: Optional[str]
-    png_base64: Optional[str]
+    screenshot_blob: Optional[str]  # identificador em utils.blob_store
     grupo: Optional[str]
     cota: Optional[str]
     metadata: Dict[str, Optional[str]]
@@ -226,7 +226,7 @@ def _capture_pdf_view(
         boleto_url = current_url
         
         png_bytes = driver.get_screenshot_as_png()
-        png_base64 = "data:image/png;base64," + base64.b64encode(png_bytes).decode("utf-8")
+        screenshot_blob = get_blob_store().put(png_bytes, "png")
 
         metadata.update(
             {
@@ -240,7 +240,7 @@ def _capture_pdf_view(
         return BoletoAutomationResult(
             tipo="unknown",
             boleto_url=boleto_url,  # Mantém URL com IP original do servidor
-            png_base64=png_base64,
+            screenshot_blob=screenshot_blob,
             grupo=None,
             cota=None,
             metadata=metadata,
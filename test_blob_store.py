@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do repositório de blobs endereçado por conteúdo (utils/blob_store.py)
+"""
+
+import base64
+import os
+import tempfile
+
+from utils.blob_store import BlobStore, migrate_stores
+from utils.data_store import JsonDocumentStore
+
+
+def test_blob_store():
+    """Valida gravação por hash, deduplicação e migração dos png_base64"""
+    print("🔍 Testando BlobStore...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        blobs = BlobStore(os.path.join(tmp, 'blobs'))
+        png = b'\x89PNG\r\n\x1a\n' + b'0' * 100
+
+        blob_id = blobs.put(png, 'png')
+        assert blob_id.endswith('.png') and blobs.put(png, 'png') == blob_id
+        with open(blobs.path_for(blob_id), 'rb') as f:
+            assert f.read() == png
+        assert blobs.path_for('../../etc/passwd') is None
+        print("✅ Blob gravado uma vez, identificado pelo SHA-256")
+
+        uri = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+        store = JsonDocumentStore(os.path.join(tmp, 'boletos_data.json'))
+        store.save({
+            'dia08': [
+                {'task_id': '1', 'png_base64': uri},
+                {'task_id': '2', 'png_base64': 'https://exemplo.com/boleto'},
+            ],
+            'dia16': [],
+        })
+
+        assert migrate_stores(blobs, store) == 1
+        data = store.load()
+        assert data['dia08'][0] == {'task_id': '1', 'screenshot_blob': blob_id}
+        assert data['dia08'][1]['png_base64'] == 'https://exemplo.com/boleto'
+        assert migrate_stores(blobs, store) == 0
+        print("✅ Migração move apenas data URIs e é idempotente")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_blob_store()
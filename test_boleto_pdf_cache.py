@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do cache de PDFs de boleto (utils/boleto_pdf_cache.py)
+"""
+
+import os
+import tempfile
+import threading
+
+from utils.boleto_pdf_cache import PdfCache, PdfFetchError
+
+
+class _RespostaFalsa:
+    """Resposta HTTP em blocos; o segundo bloco só sai quando ``liberar`` é sinalizado"""
+
+    def __init__(self, blocos, liberar, status_code=200, content_type='application/pdf', tamanho=None):
+        self.status_code = status_code
+        self.headers = {'Content-Type': content_type}
+        if tamanho is not None:
+            self.headers['Content-Length'] = str(tamanho)
+        self._blocos = blocos
+        self._liberar = liberar
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, _chunk_size):
+        for indice, bloco in enumerate(self._blocos):
+            if indice == 1:
+                self._liberar.wait(5)
+            yield bloco
+
+
+def test_boleto_pdf_cache():
+    """Valida download único, streaming, validação e apelidos do conteúdo"""
+    print("🔍 Testando PdfCache...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chamadas = []
+        liberar = threading.Event()
+
+        def http_get(url, **kwargs):
+            chamadas.append(url)
+            if 'html' in url:
+                return _RespostaFalsa([b'<html>login</html>'], liberar, content_type='text/html')
+            if 'disfarcado' in url:
+                return _RespostaFalsa([b'<!DOCTYPE html><p>erro</p>'], liberar)
+            if 'grande' in url:
+                return _RespostaFalsa([b'%PDF-1.4 ' + b'0' * 60, b'0' * 60], liberar)
+            if 'declarado' in url:
+                return _RespostaFalsa([b'%PDF-1.4'], liberar, tamanho=10 ** 6)
+            if 'truncado' in url:
+                return _RespostaFalsa([b'%PDF-1.4'], liberar, tamanho=50)
+            return _RespostaFalsa([b'%PDF-1.4 ', b'conteudo'], liberar)
+
+        legado = os.path.join(tmp, 'boletos_pdf')
+        cache = PdfCache(os.path.join(tmp, 'cache'), http_get=http_get, legacy_task_dir=legado)
+        assert cache.cached_path('abc') is None
+
+        primeiro = cache.fetch('https://servopa/pdf', code='abc')
+        segundo = cache.fetch('https://servopa/pdf', task_id='123')
+        assert primeiro is segundo and len(chamadas) == 1
+        primeiro.wait_started()
+        print("✅ Acessos simultâneos compartilham um download")
+
+        recebido = []
+        leitor = threading.Thread(target=lambda: recebido.extend(primeiro.iter_chunks()))
+        leitor.start()
+        liberar.set()
+        leitor.join(5)
+        assert b''.join(recebido) == b'%PDF-1.4 conteudo'
+        caminho = cache.cached_path('abc')
+        with open(caminho, 'rb') as f:
+            assert f.read() == b'%PDF-1.4 conteudo'
+        assert [n for n in os.listdir(cache.cache_dir) if n.endswith('.part')] == []
+        print("✅ PDF repassado em blocos e gravado no cache")
+
+        assert cache.cached_path(task_id='123') == caminho
+        assert cache.cached_path(url='https://servopa/pdf') == caminho
+        assert cache.cached_path('novo', url='https://servopa/pdf') == caminho
+        assert cache.cached_path('novo') == caminho
+        reaberto = PdfCache(cache.cache_dir, http_get=http_get)
+        assert reaberto.cached_path(task_id='123') == caminho
+        print("✅ Código curto, task_id e URL apontam para o mesmo arquivo")
+
+        # Mesmo conteúdo vindo de outra URL não duplica o arquivo
+        assert cache.fetch('https://servopa/pdf?outra', task_id='456').wait_done() == caminho
+        assert len([n for n in os.listdir(cache.cache_dir) if n.endswith('.pdf')]) == 1
+
+        # PDFs no formato antigo são incorporados na primeira consulta
+        os.makedirs(legado)
+        with open(os.path.join(legado, 'boleto_789.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4 antigo')
+        antigo = cache.cached_path('cod789', task_id='789')
+        assert antigo and os.path.dirname(antigo) == cache.cache_dir
+        assert not os.path.exists(os.path.join(legado, 'boleto_789.pdf'))
+        assert cache.cached_path('cod789') == antigo
+        print("✅ Conteúdo repetido e arquivos antigos deduplicados")
+
+        # Windows: arquivo ainda aberto por um leitor não pode ser renomeado/removido
+        replace_original, remove_original = os.replace, os.remove
+
+        def bloqueado(funcao):
+            def chamar(origem, *args):
+                if str(origem).endswith('boleto_790.pdf'):
+                    raise PermissionError(13, 'arquivo em uso', origem)
+                return funcao(origem, *args)
+            return chamar
+
+        with open(os.path.join(legado, 'boleto_790.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4 em uso')
+        os.replace, os.remove = bloqueado(replace_original), bloqueado(remove_original)
+        try:
+            em_uso = cache.cached_path(task_id='790')
+        finally:
+            os.replace, os.remove = replace_original, remove_original
+        with open(em_uso, 'rb') as f:
+            assert f.read() == b'%PDF-1.4 em uso'
+        assert os.path.exists(os.path.join(legado, 'boleto_790.pdf'))
+        assert cache.cached_path(task_id='790') == em_uso
+        print("✅ Arquivo em uso é copiado e o original fica para a limpeza")
+
+        falha = cache.fetch('https://servopa/html', code='xyz')
+        try:
+            falha.wait_started()
+            assert False, 'deveria falhar'
+        except PdfFetchError:
+            pass
+        assert cache.cached_path('xyz') is None
+        print("✅ Resposta que não é PDF não entra no cache")
+
+        limitado = PdfCache(os.path.join(tmp, 'limitado'), http_get=http_get, max_bytes=100)
+        for url in ('https://servopa/disfarcado', 'https://servopa/grande',
+                    'https://servopa/declarado', 'https://servopa/truncado'):
+            try:
+                limitado.fetch(url, code='lim').wait_done()
+                assert False, f'deveria falhar: {url}'
+            except PdfFetchError as e:
+                print(f"   {url}: {e}")
+        assert limitado.cached_path('lim') is None
+        assert [n for n in os.listdir(limitado.cache_dir) if n.endswith(('.part', '.pdf'))] == []
+        print("✅ Assinatura, tamanho máximo e downloads truncados validados")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_boleto_pdf_cache()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do gerenciador dos caches de PDF (utils/cache_manager.py)
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from utils.cache_manager import CacheManager
+
+
+def _criar(diretorio, nome, tamanho, idade_dias):
+    caminho = os.path.join(diretorio, nome)
+    with open(caminho, 'wb') as f:
+        f.write(b'%PDF' + b'0' * (tamanho - 4))
+    horario = time.time() - idade_dias * 86400
+    os.utime(caminho, (horario, horario))
+    return caminho
+
+
+def test_cache_manager():
+    """Valida remoção por idade, orçamento LRU e índice de acessos"""
+    print("🔍 Testando CacheManager...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_a = os.path.join(tmp, 'boletos_cache')
+        cache_b = os.path.join(tmp, 'boletos_pdf')
+        os.makedirs(cache_a)
+        os.makedirs(cache_b)
+
+        velho = _criar(cache_a, 'velho.pdf', 1000, idade_dias=100)
+        antigo = _criar(cache_b, 'antigo.pdf', 1000, idade_dias=10)
+        usado = _criar(cache_a, 'usado.pdf', 1000, idade_dias=20)
+        novo = _criar(cache_b, 'novo.pdf', 1000, idade_dias=1)
+        _criar(cache_a, 'ignorado.part', 5000, idade_dias=0)
+        abandonado = _criar(cache_b, 'abandonado.part', 5000, idade_dias=2)
+
+        index_path = os.path.join(tmp, 'cache_index.json')
+        manager = CacheManager([cache_a, cache_b], max_bytes=2500,
+                               max_age_days=90, index_path=index_path)
+        assert manager.usage() == (4, 4000)
+
+        manager.touch(usado)  # acesso recente protege o arquivo mais antigo
+        assert manager.sweep() == (2, 2000)
+        assert not os.path.exists(velho) and not os.path.exists(antigo)
+        assert os.path.exists(usado) and os.path.exists(novo)
+        assert os.path.exists(os.path.join(cache_a, 'ignorado.part'))
+        assert not os.path.exists(abandonado)
+        print("✅ Remove expirados e depois os menos usados até caber no orçamento")
+        print("✅ Temporário de download abandonado removido; o recente é mantido")
+
+        with open(index_path, 'r', encoding='utf-8') as f:
+            assert list(json.load(f)) == [os.path.abspath(usado)]
+        # Sem o índice, 'usado' (mtime de 20 dias) expiraria com 5 dias
+        reaberto = CacheManager([cache_a, cache_b], max_age_days=5, index_path=index_path)
+        assert reaberto.sweep() == (0, 0)
+        assert reaberto.sweep(max_age_days=0.5) == (1, 1000)
+        assert os.path.exists(usado) and not os.path.exists(novo)
+        print("✅ Índice de acessos persistido entre instâncias")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_cache_manager()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do repositório em memória dos arquivos JSON (utils/data_store.py)
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from utils.data_store import JsonDocumentStore
+
+
+def test_data_store():
+    """Valida cache, revalidação por mtime/tamanho e escrita atômica"""
+    print("🔍 Testando JsonDocumentStore...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, 'boletos_data.json')
+        store = JsonDocumentStore(filepath, default={'dia08': [], 'dia16': []})
+
+        # Arquivo inexistente → estrutura padrão (cópia, não o próprio default)
+        data = store.load()
+        assert data == {'dia08': [], 'dia16': []}
+        assert data is not store.default
+        print("✅ Arquivo inexistente retorna estrutura padrão")
+
+        # Salva e confirma que o cache é reaproveitado
+        with store.locked():
+            data = store.load()
+            data['dia08'].append({'task_id': '1', 'nome': 'João'})
+            store.save(data)
+
+        assert store.load() is store.load()
+        with open(filepath, 'r', encoding='utf-8') as f:
+            assert json.load(f)['dia08'][0]['nome'] == 'João'
+        print("✅ Leituras repetidas usam o documento em cache")
+
+        # Alteração externa do arquivo é detectada
+        generation = store.generation
+        time.sleep(0.01)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump({'dia08': [], 'dia16': [{'task_id': '2'}]}, f)
+
+        assert store.load()['dia16'][0]['task_id'] == '2'
+        assert store.generation > generation
+        print("✅ Alteração externa no arquivo invalida o cache")
+
+        # Exceção dentro de locked() descarta alterações não salvas
+        try:
+            with store.locked():
+                store.load()['dia16'].clear()
+                raise RuntimeError('falha simulada')
+        except RuntimeError:
+            pass
+
+        assert store.load()['dia16'][0]['task_id'] == '2'
+        print("✅ Alterações não salvas são descartadas após erro")
+
+        # Busca indexada por task_id/client_id
+        with store.locked():
+            data = store.load()
+            data['dia08'].append({'task_id': '3', 'client_id': 'c3'})
+            store.save(data)
+        assert store.find_record('client_id', 'c3') == ('dia08', 0, data['dia08'][0])
+        assert store.find_record('task_id', '2')[:2] == ('dia16', 0)
+        assert store.find_record('task_id', '2', dia_key='dia08') == (None, None, None)
+
+        with store.locked():
+            data = store.load()
+            del data['dia08'][0]
+            store.save(data)
+        assert store.find_record('client_id', 'c3')[2] is None
+        print("✅ Índice por task_id/client_id acompanha as gravações")
+
+        # Nenhum arquivo temporário sobra no diretório
+        assert os.listdir(tmp) == ['boletos_data.json']
+        print("✅ Escrita atômica não deixa arquivos temporários")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_data_store()
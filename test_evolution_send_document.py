@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do envio de documentos da Evolution API (utils/evolution_api.py):
+URL pública, multipart e base64 reaproveitado por hash do arquivo
+"""
+
+import base64
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.evolution_api import EncodedFileCache, EvolutionAPI
+
+
+class _EvolutionLocal(BaseHTTPRequestHandler):
+    """Registra cada envio; recusa a URL /inacessivel.pdf como a Evolution faria"""
+    recebidos = []
+
+    def do_POST(self):
+        corpo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        tipo = self.headers.get('Content-Type', '')
+        _EvolutionLocal.recebidos.append((tipo, corpo))
+        status = 200
+        if tipo.startswith('application/json') and json.loads(corpo).get('media', '').endswith('/inacessivel.pdf'):
+            status = 400
+        resposta = json.dumps({'status': 'PENDING' if status == 200 else 'erro'}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(resposta)))
+        self.end_headers()
+        self.wfile.write(resposta)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_evolution_send_document():
+    """Valida os três caminhos de upload e o cache de base64"""
+    print("🔍 Testando EncodedFileCache...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = os.path.join(tmp, 'boleto.pdf')
+        copia = os.path.join(tmp, 'copia.pdf')
+        for caminho in (pdf, copia):
+            with open(caminho, 'wb') as f:
+                f.write(b'%PDF-1.4 boleto de teste')
+
+        cache = EncodedFileCache(max_bytes=1024)
+        esperado = base64.b64encode(b'%PDF-1.4 boleto de teste').decode()
+        assert cache.get(pdf) == esperado and cache.get(pdf) == esperado
+        assert cache.get(copia) == esperado  # mesmo conteúdo, mesma entrada
+        assert cache.stats() == {'entries': 1, 'bytes': len(esperado), 'hits': 2, 'misses': 1}
+        print("✅ Codificado uma vez, reaproveitado por hash")
+
+        with open(pdf, 'wb') as f:
+            f.write(b'%PDF-1.4 boleto alterado, bem maior que o anterior')
+        assert base64.b64decode(cache.get(pdf)).endswith(b'alterado, bem maior que o anterior')
+        print("✅ Arquivo alterado é recodificado")
+
+        print("\n🔍 Testando send_document...\n")
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), _EvolutionLocal)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{servidor.server_address[1]}'
+
+        try:
+            api = EvolutionAPI(base, 'teste', 'chave')
+            ok, _ = api.send_document('5519999999999', copia, caption='Seu boleto',
+                                      media_url='https://oxcash.local/boleto/abc123')
+            tipo, corpo = _EvolutionLocal.recebidos[-1]
+            assert ok and json.loads(corpo)['media'] == 'https://oxcash.local/boleto/abc123'
+            print("✅ URL pública enviada sem codificar o arquivo")
+
+            _EvolutionLocal.recebidos.clear()
+            ok, _ = api.send_document('5519999999999', copia,
+                                      media_url='https://oxcash.local/inacessivel.pdf')
+            assert ok and len(_EvolutionLocal.recebidos) == 2
+            assert json.loads(_EvolutionLocal.recebidos[-1][1])['media'] == esperado
+            print("✅ Falha pela URL cai no envio do arquivo local (base64)")
+
+            multipart = EvolutionAPI(base, 'teste', 'chave', upload_mode='multipart')
+            ok, _ = multipart.send_document('5519999999999', copia, caption='Seu boleto', filename='Boleto.pdf')
+            tipo, corpo = _EvolutionLocal.recebidos[-1]
+            assert ok and tipo.startswith('multipart/form-data')
+            assert b'%PDF-1.4 boleto de teste' in corpo and b'Boleto.pdf' in corpo
+            assert esperado.encode() not in corpo
+            print("✅ Multipart envia o arquivo bruto")
+        finally:
+            servidor.shutdown()
+            servidor.server_close()
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_evolution_send_document()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do histórico append-only em JSONL (utils/history_log.py)
+"""
+
+import json
+import os
+import tempfile
+
+from utils.history_log import HistoryLog, get_history_log
+
+
+def test_history_log():
+    """Valida append, paginação, migração do formato antigo e compactação"""
+    print("🔍 Testando HistoryLog...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Migração automática do history_dia8.json antigo
+        legacy = [{'cota': str(i), 'status': '✅ Sucesso'} for i in range(3)]
+        with open(os.path.join(tmp, 'history_dia8.json'), 'w', encoding='utf-8') as f:
+            json.dump(legacy, f)
+
+        log = get_history_log(tmp, 'dia8')
+        assert log.count() == 3
+        print("✅ Histórico antigo migrado para JSONL")
+
+        # Append não reescreve o arquivo
+        size_before = os.path.getsize(log.filepath)
+        log.append({'cota': '3', 'status': '❌ Erro'})
+        log.append({'cota': '4', 'status': '✅ Sucesso'})
+        assert os.path.getsize(log.filepath) > size_before
+        assert log.count() == 5
+        print("✅ Entradas anexadas ao final do log")
+
+        # Paginação
+        page, total = log.read_page(offset=1, limit=2)
+        assert total == 5
+        assert [e['cota'] for e in page] == ['1', '2']
+
+        page, total = log.read_page(offset=0, limit=2, newest_first=True)
+        assert [e['cota'] for e in page] == ['4', '3']
+        assert [e['cota'] for e in log.tail(1)] == ['4']
+        print("✅ Paginação cronológica e reversa")
+
+        # Consulta filtrada pelo índice (classe do status, grupo e data)
+        page, total = log.query(status='failed')
+        assert total == 1 and page[0]['cota'] == '3'
+        log.append({'cota': '9', 'grupo': '1550', 'data': '2025-10-08', 'status': '✅ Sucesso'})
+        page, total = log.query(grupo='1550', data_inicio='2025-10-01', data_fim='2025-10-31')
+        assert total == 1 and page[0]['cota'] == '9'
+        page, total = log.query(offset=1, limit=2, newest_first=True, status='success')
+        assert total == 5 and [e['cota'] for e in page] == ['4', '2']
+        print("✅ Filtros por status, grupo e intervalo de datas")
+
+        # Linha incompleta (escrita interrompida) é ignorada e fechada no próximo append
+        with open(log.filepath, 'ab') as f:
+            f.write(b'{"cota": "quebrada"')
+        fresh = HistoryLog(log.filepath)
+        assert fresh.count() == 6
+        fresh.append({'cota': '5', 'status': '✅ Sucesso'})
+        assert [e['cota'] for e in fresh.tail(2)] == ['5', '9']
+        print("✅ Linha corrompida não afeta o índice")
+
+        # Outro processo anexa uma linha completa logo antes do append
+        refresh = fresh._refresh_index
+
+        def refresh_e_outro_processo():
+            refresh()
+            fresh._refresh_index = refresh
+            with open(fresh.filepath, 'ab') as f:
+                f.write(b'{"cota": "outro", "status": "\\u2705 Sucesso"}\n')
+
+        fresh._refresh_index = refresh_e_outro_processo
+        fresh.append({'cota': '6', 'status': '✅ Sucesso'})
+        assert [e['cota'] for e in fresh.tail(3)] == ['6', 'outro', '5']
+        assert fresh.count() == HistoryLog(fresh.filepath).count() == 9
+        with open(fresh.filepath, 'rb') as f:
+            assert b'\n\n' not in f.read()
+        print("✅ Linhas anexadas por outro processo entram no índice")
+
+        # Compactação removendo erros (e a linha corrompida)
+        removed = fresh.compact(keep=lambda e: '❌' not in e.get('status', ''))
+        assert removed == 1
+        assert [e['cota'] for e in fresh.iter_entries()] == ['0', '1', '2', '4', '9', '5', 'outro', '6']
+        print("✅ Compactação remove entradas filtradas")
+
+        fresh.clear()
+        assert fresh.count() == 0
+        print("✅ Limpeza do histórico")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_history_log()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste das estatísticas incrementais do histórico (utils/history_stats.py)
+"""
+
+import json
+import os
+import tempfile
+
+from utils.history_log import HistoryLog
+from utils.history_stats import HistoryStats, classify_status
+
+
+def test_history_stats():
+    """Valida classificação, contagem incremental, persistência e recontagem"""
+    print("🔍 Testando HistoryStats...\n")
+
+    assert classify_status('✅ Sucesso') == 'success'
+    assert classify_status('❌ Erro no lance') == 'failed'
+    assert classify_status('⏹️ Parado pelo usuário') == 'stopped'
+    assert classify_status('Processado') == 'other'
+    print("✅ Classificação dos status")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = HistoryLog(os.path.join(tmp, 'history_dia8.jsonl'))
+        stats_path = os.path.join(tmp, 'history_dia8.stats.json')
+        stats = HistoryStats(log, stats_path)
+
+        log.append({'grupo': '1550', 'data': '2025-10-08', 'status': '✅ Sucesso'})
+        log.append({'grupo': '1550', 'data': '2025-10-08', 'status': '❌ Erro'})
+        assert stats.refresh() == 2
+        log.append({'grupo': '1600', 'data': '2025-10-09', 'status': '⏹️ Parado'})
+        assert stats.refresh() == 1
+        assert stats.refresh() == 0
+
+        snap = stats.snapshot()
+        assert (snap['total'], snap['success'], snap['failed'], snap['stopped']) == (3, 1, 1, 1)
+        assert snap['por_grupo']['1550'] == {'total': 2, 'success': 1, 'failed': 1, 'stopped': 0}
+        assert snap['por_data']['2025-10-09']['stopped'] == 1
+        print("✅ Contadores atualizados apenas com entradas novas")
+
+        # Contadores persistidos são reaproveitados por uma nova instância
+        with open(stats_path, 'r', encoding='utf-8') as f:
+            assert json.load(f)['entries'] == 3
+        assert HistoryStats(HistoryLog(log.filepath), stats_path).refresh() == 0
+        print("✅ Contadores gravados ao lado do histórico")
+
+        # Compactação do log é detectada e provoca recontagem
+        log.compact(keep=lambda e: '❌' not in e['status'])
+        log.append({'grupo': '1600', 'data': '2025-10-09', 'status': '✅ Sucesso'})
+        snap = stats.snapshot()
+        assert (snap['total'], snap['success'], snap['failed']) == (3, 2, 0)
+        print("✅ Log compactado → recontagem automática")
+
+        log.clear()
+        assert stats.rebuild() == 0
+        assert stats.snapshot()['total'] == 0
+        print("✅ Reconstrução manual")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_history_stats()
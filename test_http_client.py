@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do cliente HTTP compartilhado (utils/http_client.py)
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib3.util.retry import Retry
+
+from utils.http_client import PooledSession
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    conexoes = set()
+    falhas_restantes = 0
+
+    def do_GET(self):
+        _Handler.conexoes.add(self.client_address)
+        if self.path == '/instavel' and _Handler.falhas_restantes > 0:
+            _Handler.falhas_restantes -= 1
+            return self._responder(503, b'indisponivel')
+        self._responder(200, b'ok')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        _Handler.conexoes.add(self.client_address)
+        self._responder(503, b'indisponivel')
+
+    def _responder(self, status, corpo):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.send_header('Set-Cookie', 'sessao=abc')
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_client():
+    """Valida reaproveitamento de conexão, retry, timeout padrão e métricas"""
+    print("🔍 Testando PooledSession...\n")
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{servidor.server_address[1]}'
+    host = base.split('//', 1)[1]
+
+    try:
+        sessao = PooledSession(
+            timeout=3,
+            retries=Retry(total=2, backoff_factor=0, status_forcelist=(503,),
+                          allowed_methods=Retry.DEFAULT_ALLOWED_METHODS, raise_on_status=False),
+        )
+
+        for _ in range(5):
+            assert sessao.get(f'{base}/ok').text == 'ok'
+        assert len(_Handler.conexoes) == 1
+        assert len(sessao.cookies) == 0
+        print("✅ Cinco requisições na mesma conexão, sem guardar cookies")
+
+        _Handler.falhas_restantes = 2
+        assert sessao.get(f'{base}/instavel').status_code == 200
+        assert sessao.post(f'{base}/envio', json={'a': 1}).status_code == 503
+        print("✅ GET repetido após 503; POST não é repetido")
+
+        metricas = sessao.metrics()[host]
+        assert metricas['requests'] == 7
+        assert metricas['retries'] == 2
+        assert metricas['errors'] == 1
+        assert metricas['status'] == {'200': 6, '503': 1}
+        print(f"✅ Métricas por host: {metricas}")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_http_client()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da compressão das respostas (utils/http_compression.py)
+"""
+
+import gzip
+import os
+import tempfile
+
+from flask import Flask, jsonify
+
+from utils.http_compression import init_compression
+
+
+def test_http_compression():
+    """Valida negociação gzip, tamanho mínimo e estáticos pré-comprimidos"""
+    print("🔍 Testando compressão HTTP...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'app.js'), 'w', encoding='utf-8') as f:
+            f.write('console.log("oxcash");\n' * 200)
+
+        app = Flask(__name__, static_folder=tmp, static_url_path='/static')
+
+        @app.route('/grande')
+        def grande():
+            return jsonify({'data': ['cota'] * 1000})
+
+        @app.route('/pequena')
+        def pequena():
+            return jsonify({'ok': True})
+
+        static_cache = init_compression(app)
+        client = app.test_client()
+
+        response = client.get('/grande', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert gzip.decompress(response.data).startswith(b'{')
+        print("✅ JSON grande comprimido com gzip")
+
+        assert 'Content-Encoding' not in client.get('/grande').headers
+        assert 'Content-Encoding' not in client.get(
+            '/pequena', headers={'Accept-Encoding': 'gzip'}).headers
+        print("✅ Sem Accept-Encoding ou abaixo do limite → sem compressão")
+
+        identidade = client.get('/static/app.js')
+        comprimido = client.get('/static/app.js', headers={'Accept-Encoding': 'gzip'})
+        etag = identidade.headers['ETag']
+        assert comprimido.headers['ETag'] == etag[:-1] + '-gzip"'
+        revalidado = client.get('/static/app.js', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': comprimido.headers['ETag']})
+        assert revalidado.status_code == 304 and revalidado.headers['ETag'] == comprimido.headers['ETag']
+        assert client.get('/static/app.js', headers={'If-None-Match': comprimido.headers['ETag']}).status_code == 200
+        for resposta in (identidade, comprimido, revalidado):
+            resposta.close()
+        print("✅ ETag própria para cada codificação (e 304 da versão comprimida)")
+
+        filepath = os.path.join(tmp, 'app.js')
+        precomputed = static_cache.get(filepath, 'gzip')
+        response = client.get('/static/app.js', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.data == precomputed
+        assert gzip.decompress(response.data).startswith(b'console.log')
+        response.close()
+        print("✅ Estático servido a partir da versão pré-comprimida")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_http_compression()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da fila persistente de envios (utils/job_queue.py)
+"""
+
+import json
+import os
+import tempfile
+
+from utils.data_store import JsonDocumentStore
+from utils.job_queue import JobQueue, PermanentJobError
+
+
+def test_job_queue():
+    """Valida idempotência, novas tentativas, falha definitiva e retomada"""
+    print("🔍 Testando JobQueue...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'fila.json')
+        eventos = []
+        tentativas = {'instavel': 0}
+
+        def instavel(payload):
+            tentativas['instavel'] += 1
+            if tentativas['instavel'] < 3:
+                return {'success': False, 'error': 'Status 500'}
+            return {'success': True, 'message': f"enviado para {payload['nome']}"}
+
+        def invalido(payload):
+            raise PermanentJobError('Configuração da Evolution API incompleta')
+
+        fila = JobQueue(JsonDocumentStore(path, default={'jobs': {}}), workers=2,
+                        base_delay=0.01, on_change=eventos.append)
+        fila.register('instavel', instavel)
+        fila.register('invalido', invalido)
+
+        job, criado = fila.enqueue('instavel', {'nome': 'Maria'}, key='boleto:1')
+        duplicado, criado_de_novo = fila.enqueue('instavel', {'nome': 'Maria'}, key='boleto:1')
+        assert criado and not criado_de_novo and duplicado['id'] == job['id']
+        print("✅ Mesma chave pendente não duplica o job")
+
+        fila.start()
+        final = fila.wait(job['id'], timeout=5)
+        assert final['status'] == 'sent' and final['attempts'] == 3
+        assert final['result']['message'] == 'enviado para Maria'
+        assert [e['status'] for e in eventos if e['id'] == job['id']].count('retrying') == 2
+        assert not fila.enqueue('instavel', {'nome': 'Maria'}, key='boleto:1')[1]
+        print("✅ Duas falhas, backoff e sucesso na 3ª tentativa")
+
+        falha, _ = fila.enqueue('invalido', {}, key='boleto:2')
+        final = fila.wait(falha['id'], timeout=5)
+        assert final['status'] == 'failed' and final['attempts'] == 1
+        assert 'incompleta' in final['last_error']
+        print("✅ PermanentJobError encerra sem novas tentativas")
+        fila.stop(timeout=2)
+
+        # Servidor parou com um job pendente: é retomado pela nova instância
+        parada = JobQueue(JsonDocumentStore(path), base_delay=0.01)
+        parada.register('instavel', instavel)
+        pendente, _ = parada.enqueue('instavel', {'nome': 'João'}, key='boleto:3')
+
+        retomada = JobQueue(JsonDocumentStore(path), base_delay=0.01)
+        retomada.register('instavel', instavel)
+        assert retomada.get(pendente['id'])['status'] == 'queued'
+        assert len(retomada.list(status='sent')) == 1
+        retomada.start()
+        assert retomada.wait(pendente['id'], timeout=5)['status'] == 'sent'
+        retomada.stop(timeout=2)
+        print("✅ Job pendente retomado após reinício")
+
+        # Servidor parou durante um envio sem novas tentativas: não repete
+        morta = JobQueue(JsonDocumentStore(path), base_delay=0.01)
+        morta.register('instavel', instavel, max_attempts=1)
+        unico, _ = morta.enqueue('instavel', {'nome': 'Ana'}, key='lote:1')
+        morta._next_job()  # worker pegou o job e o processo morreu
+
+        reiniciada = JobQueue(JsonDocumentStore(path), base_delay=0.01)
+        reiniciada.register('instavel', instavel)
+        final = reiniciada.get(unico['id'])
+        assert final['status'] == 'failed' and final['attempts'] == 1
+        assert 'interrompido' in final['last_error']
+        assert not any(job_id == unico['id'] for _t, _s, job_id in reiniciada._heap)
+        print("✅ Job interrompido sem tentativas restantes termina como falha")
+
+        # Transições vão para o journal; o retrato só é regravado ao compactar
+        caminho = os.path.join(tmp, 'diario.json')
+        diario = JobQueue(JsonDocumentStore(caminho), compact_every=4, keep_days=0)
+        diario.register('ok', lambda payload: {'success': True})
+
+        def linhas():
+            with open(diario.journal_path, 'rb') as f:
+                return sum(1 for _ in f)
+
+        def retrato():
+            with open(caminho, 'r', encoding='utf-8') as f:
+                return json.load(f)['jobs']
+
+        a, _ = diario.enqueue('ok', {'n': 1}, key='a')
+        diario._run(diario._next_job())
+        assert linhas() == 3 and not os.path.exists(caminho)
+        b, _ = diario.enqueue('ok', {'n': 2}, key='b')
+        assert linhas() == 0 and diario.get(a['id']) is None
+        assert list(retrato()) == [b['id']]
+        print("✅ Journal compactado descarta jobs finalizados antigos")
+
+        diario._next_job()  # envio começou e o processo morreu
+        relida = JobQueue(JsonDocumentStore(caminho))
+        assert relida.get(b['id'])['status'] == 'retrying' and linhas() == 0
+        print("✅ Estado reconstruído pelo journal após reinício")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_job_queue()
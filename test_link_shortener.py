@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do encurtador de links em memória (utils/link_shortener.py)
+"""
+
+import json
+import os
+import tempfile
+
+from utils import link_shortener
+
+
+def _usar_diretorio(tmp):
+    """Aponta o módulo para arquivos temporários e descarta o cache"""
+    link_shortener.DATA_DIR = tmp
+    link_shortener.SHORT_LINKS_FILE = os.path.join(tmp, 'short_links.json')
+    link_shortener.HITS_JOURNAL_FILE = os.path.join(tmp, 'short_links_hits.jsonl')
+    link_shortener.TASK_INDEX_FILE = os.path.join(tmp, 'short_links_index.json')
+    link_shortener._links = None
+    link_shortener._pending_hits = {}
+
+
+def test_link_shortener():
+    """Valida resolução em memória, journal de acessos e consolidação"""
+    print("🔍 Testando link_shortener...\n")
+
+    originais = (link_shortener.DATA_DIR, link_shortener.SHORT_LINKS_FILE,
+                 link_shortener.HITS_JOURNAL_FILE, link_shortener.TASK_INDEX_FILE)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            _usar_diretorio(tmp)
+            code = link_shortener.create_short_link('t1', 'https://servopa/boleto/1')
+            assert link_shortener.create_short_link('t1', 'https://servopa/boleto/1') == code
+
+            # Resolução não escreve em disco
+            mtime = os.stat(link_shortener.SHORT_LINKS_FILE).st_mtime_ns
+            for _ in range(3):
+                assert link_shortener.resolve_short_link(code) == 'https://servopa/boleto/1'
+            assert link_shortener.resolve_short_link('inexistente') is None
+            assert os.stat(link_shortener.SHORT_LINKS_FILE).st_mtime_ns == mtime
+            assert not os.path.exists(link_shortener.HITS_JOURNAL_FILE)
+            print("✅ Resolução apenas em memória")
+
+            # Acessos vão para o journal e são reaplicados ao recarregar
+            assert link_shortener.flush_hits() == 1
+            link_shortener.resolve_short_link(code)
+            link_shortener.reload_short_links()
+            with open(link_shortener.HITS_JOURNAL_FILE, 'r', encoding='utf-8') as f:
+                assert len(f.readlines()) == 2
+            link_shortener.get_short_code_for_task('t1')
+            assert link_shortener._links[code]['hits'] == 4
+            print("✅ Journal de acessos reaplicado na carga")
+
+            # Regravação do mapeamento consolida os acessos e zera o journal
+            link_shortener.update_short_link(code, 'https://servopa/boleto/2')
+            with open(link_shortener.SHORT_LINKS_FILE, 'r', encoding='utf-8') as f:
+                assert json.load(f)[code]['hits'] == 4
+            assert not os.path.exists(link_shortener.HITS_JOURNAL_FILE)
+            print("✅ Acessos consolidados em short_links.json")
+
+            # Acessos já gravados no journal sobrevivem a uma escrita não relacionada
+            for _ in range(5):
+                link_shortener.resolve_short_link(code)
+            assert link_shortener.flush_hits() == 1
+            link_shortener.create_short_link('t9', 'https://servopa/boleto/9')
+            assert link_shortener._links[code]['hits'] == 9
+            with open(link_shortener.SHORT_LINKS_FILE, 'r', encoding='utf-8') as f:
+                assert json.load(f)[code]['hits'] == 9
+            print("✅ Acessos do journal preservados após flush + nova gravação")
+
+            # Índice reverso task_id → código persistido e reaproveitado
+            outro = link_shortener.create_short_link('t2', 'https://servopa/boleto/3')
+            link_shortener._links = None
+            build_task_index = link_shortener._build_task_index
+            link_shortener._build_task_index = None  # recarga não pode reconstruir
+            try:
+                assert link_shortener.get_short_code_for_task('t1') == code
+                assert link_shortener.get_short_code_for_task('t2') == outro
+                assert link_shortener.get_short_code_for_task('t3') is None
+            finally:
+                link_shortener._build_task_index = build_task_index
+            print("✅ Índice reverso reaproveitado após recarga")
+    finally:
+        (link_shortener.DATA_DIR, link_shortener.SHORT_LINKS_FILE,
+         link_shortener.HITS_JOURNAL_FILE, link_shortener.TASK_INDEX_FILE) = originais
+        link_shortener._links = None
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_link_shortener()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do token bucket (utils/rate_limiter.py) e do envio em massa
+concorrente da Evolution API
+"""
+
+import threading
+import time
+
+from utils.evolution_api import EvolutionAPI
+from utils.rate_limiter import TokenBucket
+
+
+class _EvolutionFalsa(EvolutionAPI):
+    """Simula a Evolution API: 429 na primeira tentativa do número 555"""
+
+    def __init__(self):
+        super().__init__('http://evolution.local', 'teste', 'chave')
+        self.lock = threading.Lock()
+        self.em_andamento = 0
+        self.pico = 0
+        self.envios = []
+
+    def send_text_message(self, phone, text):
+        with self.lock:
+            self.em_andamento += 1
+            self.pico = max(self.pico, self.em_andamento)
+            self.envios.append(phone)
+            primeira_555 = phone == '555' and self.envios.count('555') == 1
+        time.sleep(0.05)
+        with self.lock:
+            self.em_andamento -= 1
+        if primeira_555:
+            return False, {'error': 'Status 429', 'status_code': 429, 'retry_after': '0.1'}
+        if phone == '000':
+            return False, {'error': 'Status 400', 'status_code': 400}
+        return True, {'texto': text}
+
+
+def test_rate_limiter():
+    """Valida fichas, pausa e o envio em massa concorrente"""
+    print("🔍 Testando TokenBucket...\n")
+
+    agora = [0.0]
+    balde = TokenBucket(rate=2, capacity=3, clock=lambda: agora[0], sleep=lambda s: None)
+    assert [balde.reserve() for _ in range(5)] == [0.0, 0.0, 0.0, 0.5, 1.0]
+    agora[0] = 10.0
+    assert balde.reserve() == 0.0
+    balde.pause(5)
+    assert balde.reserve() == 5.0 and balde.reserve() == 5.5
+    print("✅ Rajada, reposição e pausa")
+
+    print("\n🔍 Testando send_bulk_messages...\n")
+    api = _EvolutionFalsa()
+    contatos = [{'phone': str(n), 'name': f'Cliente {n}'} for n in range(100, 110)]
+    contatos += [{'phone': '555', 'name': 'Limitado'}, {'phone': '000', 'name': 'Invalido'}]
+    mensagens = []
+
+    inicio = time.monotonic()
+    resultado = api.send_bulk_messages(contatos, 'Olá {nome}', progress_callback=mensagens.append,
+                                       rate_per_second=50, max_in_flight=4)
+    duracao = time.monotonic() - inicio
+
+    assert resultado['total'] == 12
+    assert resultado['success'] == 11 and resultado['failed'] == 1
+    assert [d['phone'] for d in resultado['details']] == [c['phone'] for c in contatos]
+    assert resultado['details'][0]['response'] == {'texto': 'Olá Cliente 100'}
+    assert api.envios.count('555') == 2
+    assert 1 < api.pico <= 4
+    assert duracao < 12 * 0.05  # mais rápido que um envio por vez
+    assert any('Limite da Evolution API' in m for m in mensagens)
+    print(f"✅ {resultado['success']} enviados em {duracao:.2f}s, pico de {api.pico} simultâneos")
+
+    print("\n🔍 Testando dispatch_concurrently...\n")
+    finais = []
+    itens = [{'phone': '555'}, {'phone': '201'}, {'phone': '000'}]
+    retornos = api.dispatch_concurrently(
+        itens,
+        lambda item: api.send_text_message(item['phone'], 'Boleto'),
+        on_result=lambda item, ok, resp: finais.append((item['phone'], ok)),
+        rate_per_second=50
+    )
+    assert [ok for ok, _ in retornos] == [True, True, False]
+    assert sorted(finais) == [('000', False), ('201', True), ('555', True)]
+    assert api.dispatch_concurrently([], lambda item: (True, {})) == []
+    print("✅ Resultados na ordem dos itens, um on_result por item")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_rate_limiter()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do backend SQLite (utils/sqlite_store.py)
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+
+from utils.sqlite_store import SqliteDatabase, import_json_files
+
+
+def test_sqlite_store():
+    """Valida importação, ida e volta dos documentos, histórico e status"""
+    print("🔍 Testando backend SQLite...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        boletos = {
+            'dia08': [
+                {'task_id': 't1', 'client_id': 'c1', 'nome': 'Ana', 'grupo': '1550', 'cota': '1065'},
+                {'task_id': 't2', 'nome': 'José', 'is_completed': True},
+            ],
+            'dia16': [],
+            'last_import': '2025-10-08 18:00:20',
+        }
+        cotas = {
+            'dia08': [{'numero': '1550', 'dia': 8, 'cotas': [{'cota': '1065', 'nome': 'Ana'}]}],
+            'grupos': [],
+            'last_update': '2025-10-08 18:00:20',
+        }
+        for nome, conteudo in (('boletos_data.json', boletos), ('cotas_data.json', cotas)):
+            with open(os.path.join(tmp, nome), 'w', encoding='utf-8') as f:
+                json.dump(conteudo, f)
+        with open(os.path.join(tmp, 'history_dia8.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'cota': '1065', 'status': '✅ Sucesso'}], f)
+
+        db = SqliteDatabase(os.path.join(tmp, 'data', 'oxcash.db'))
+        stats = import_json_files(db, tmp)
+        assert stats['boletos'] == 2 and stats['cotas'] == 1
+        assert stats['historico_dia8'] == 1
+        assert import_json_files(db, tmp) == {}
+        assert db.connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        print("✅ Importação única dos arquivos JSON (modo WAL)")
+
+        # Documentos remontados são iguais aos originais
+        boletos_store = db.document_store('boletos')
+        assert boletos_store.load() == boletos
+        assert db.document_store('cotas').load() == cotas
+        assert not db.document_store('clientes').exists()
+        print("✅ Documentos reconstruídos a partir das linhas")
+
+        # Alteração de um registro grava apenas a linha correspondente
+        with boletos_store.locked():
+            data = boletos_store.load()
+            data['dia08'][1]['whatsapp_enviado'] = True
+            data['dia16'].append({'task_id': 't3', 'nome': 'Maria'})
+            boletos_store.save(data)
+
+        boletos_store.invalidate()
+        data = boletos_store.load()
+        assert data['dia08'][1]['whatsapp_enviado'] is True
+        assert data['dia16'][0]['task_id'] == 't3'
+        assert boletos_store.find_rows(task_id='t1')[0]['nome'] == 'Ana'
+        assert boletos_store.find_rows(dia='08', grupo='1550', cota='1065')[0]['task_id'] == 't1'
+        print("✅ Atualização por linha e consultas indexadas")
+
+        # Remoção
+        with boletos_store.locked():
+            data = boletos_store.load()
+            data['dia08'] = data['dia08'][1:]
+            boletos_store.save(data)
+        assert boletos_store.find_rows(task_id='t1') == []
+        posicao_t2 = db.connection().execute("SELECT posicao FROM boletos WHERE chave = 't2'").fetchone()[0]
+        assert posicao_t2 == 1
+        print("✅ Remoção de registros (sem renumerar os seguintes)")
+
+        # Operações de um registro: gravam só a linha, pela chave
+        with boletos_store.locked():
+            data = boletos_store.load()
+            data['dia16'] += [{'task_id': 't4', 'nome': 'Bia'}, {'task_id': 't5', 'nome': 'Caio'}]
+            boletos_store.save(data)
+
+        def linhas():
+            rows = db.connection().execute("SELECT chave, id, posicao, payload FROM boletos WHERE colecao = 'dia16'")
+            return {r['chave']: tuple(r) for r in rows}
+
+        antes = linhas()
+        assert boletos_store.delete_record('task_id', 't3')['nome'] == 'Maria'
+        assert boletos_store.update_record('task_id', 't5', {'whatsapp_enviado': True})['nome'] == 'Caio'
+        boletos_store.append_record('dia16', {'task_id': 't6', 'nome': 'Duda'})
+        depois = linhas()
+        assert 't3' not in depois and depois['t4'] == antes['t4']
+        assert depois['t5'][:3] == antes['t5'][:3] and depois['t6'][2] > depois['t5'][2]
+        assert boletos_store.update_record('task_id', 'nao-existe', {'nome': 'X'}) is None
+
+        boletos_store.invalidate()
+        data = boletos_store.load()
+        assert [b['task_id'] for b in data['dia16']] == ['t4', 't5', 't6']
+        assert data['dia16'][1]['whatsapp_enviado'] is True
+        print("✅ update/append/delete_record por linha")
+
+        # Histórico
+        log = db.history_log('dia8')
+        log.append({'cota': '1123', 'status': '❌ Erro'})
+        page, total = log.read_page(0, 1, newest_first=True)
+        assert total == 2 and page[0]['cota'] == '1123'
+        page, total = log.query(status='failed', newest_first=True)
+        assert total == 1 and page[0]['cota'] == '1123'
+        assert log.query(grupo='9999')[1] == 0
+        assert log.compact(keep=lambda e: '❌' not in e['status']) == 1
+        assert [e['cota'] for e in log.iter_entries()] == ['1065']
+        print("✅ Histórico em historico_execucoes")
+
+        # Status da automação
+        db.set_automation_status('dia16', is_running=True, total_tasks=10)
+        status = db.get_automation_status('dia16')
+        assert status['is_running'] is True and status['total_tasks'] == 10
+        print("✅ Status em automacao_status")
+
+        # Banco antigo (linhas por posição): recebe a coluna chave
+        antigo = os.path.join(tmp, 'antigo.db')
+        conn = sqlite3.connect(antigo)
+        conn.executescript("""
+            CREATE TABLE clientes (id TEXT PRIMARY KEY, colecao TEXT NOT NULL, posicao INTEGER NOT NULL,
+              dia TEXT NOT NULL DEFAULT '08', client_id TEXT, task_id TEXT, nome TEXT NOT NULL DEFAULT '',
+              payload TEXT NOT NULL, created_at TEXT, updated_at TEXT);
+            CREATE UNIQUE INDEX idx_clientes_posicao ON clientes(colecao, posicao);
+            CREATE TABLE metadados (chave TEXT PRIMARY KEY, valor TEXT);
+            INSERT INTO clientes (id, colecao, posicao, payload) VALUES
+              ('a', 'dia08', 0, '{"client_id": "c1", "nome": "Ana"}'),
+              ('b', 'dia08', 1, '{"client_id": "c2", "nome": "Beto"}');
+            INSERT INTO metadados VALUES ('versao:clientes', '1'),
+              ('documento:clientes', '{"chaves": ["dia08", "dia16"], "valores": {}, "grupos": {}}');
+        """)
+        conn.close()
+        clientes_store = SqliteDatabase(antigo).document_store('clientes')
+        assert clientes_store.delete_record('client_id', 'c1')['nome'] == 'Ana'
+        assert clientes_store.load() == {'dia08': [{'client_id': 'c2', 'nome': 'Beto'}], 'dia16': []}
+        print("✅ Migração de banco sem a coluna chave")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_sqlite_store()
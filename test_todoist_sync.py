@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do espelho incremental do Todoist (utils/todoist_sync.py), da
+extração de boletos a partir dele (TodoistRestAPI com mirror_path) e dos
+comandos em lote da Sync API
+"""
+
+import json
+import os
+import tempfile
+
+from utils.todoist_rest_api import TodoistRestAPI
+from utils.todoist_sync import TodoistCommandBatch, TodoistSyncMirror
+
+
+class _Resposta:
+    def __init__(self, corpo):
+        self.corpo = corpo
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.corpo
+
+
+class _SyncApiFalsa:
+    """Responde a Sync API: sync completo para '*', incremental depois"""
+
+    def __init__(self):
+        self.pedidos = []
+
+    def post(self, url, headers=None, data=None, **kwargs):
+        self.pedidos.append(data)
+        assert json.loads(data['resource_types']) == ['projects', 'sections', 'items']
+        if data['sync_token'] == '*':
+            return _Resposta({
+                'full_sync': True, 'sync_token': 't1',
+                'projects': [{'id': 'p1', 'name': 'Boletos Servopa Outubro', 'child_order': 1}],
+                'sections': [
+                    {'id': 's16', 'project_id': 'p1', 'name': 'Vencimento dia 16', 'section_order': 2},
+                    {'id': 's08', 'project_id': 'p1', 'name': 'Vencimento dia 08', 'section_order': 1},
+                ],
+                'items': [
+                    {'id': 'a', 'project_id': 'p1', 'section_id': 's08', 'content': 'Ana',
+                     'description': 'cota 1', 'child_order': 2, 'checked': False},
+                    {'id': 'b', 'project_id': 'p1', 'section_id': 's08', 'content': 'Bia',
+                     'description': 'cota 2', 'child_order': 1, 'checked': False},
+                    {'id': 'c', 'project_id': 'p1', 'section_id': 's16', 'content': 'Caio',
+                     'description': '', 'child_order': 1, 'checked': False},
+                ],
+            })
+        # Incremental: Bia concluída, Caio renomeado, Duda nova
+        return _Resposta({
+            'full_sync': False, 'sync_token': 't2', 'projects': [], 'sections': [],
+            'items': [
+                {'id': 'b', 'project_id': 'p1', 'section_id': 's08', 'content': 'Bia', 'checked': True},
+                {'id': 'c', 'project_id': 'p1', 'section_id': 's16', 'content': 'Caio Silva',
+                 'description': '', 'child_order': 1, 'checked': False},
+                {'id': 'd', 'project_id': 'p1', 'section_id': 's16', 'content': 'Duda',
+                 'description': 'cota 4', 'child_order': 2, 'checked': False},
+            ],
+        })
+
+
+def test_todoist_sync():
+    """Valida sync completo, incremental, persistência e extração pelo espelho"""
+    print("🔍 Testando TodoistSyncMirror...\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = os.path.join(tmp, 'todoist_mirror.json')
+        api_falsa = _SyncApiFalsa()
+
+        mirror = TodoistSyncMirror('token', caminho, session=api_falsa)
+        assert mirror.sync() == 6
+        assert [s['name'] for s in mirror.get_sections('p1')] == ['Vencimento dia 08', 'Vencimento dia 16']
+        assert [t['content'] for t in mirror.get_tasks(section_id='s08')] == ['Bia', 'Ana']
+        print("✅ Sync completo com o formato da REST API")
+
+        # Nova instância (ex.: servidor reiniciado) continua do sync_token salvo
+        api = TodoistRestAPI('token', mirror_path=caminho)
+        api.mirror.session = api_falsa
+        boletos = api.extract_boletos_board()
+        assert api_falsa.pedidos[-1]['sync_token'] == 't1' and len(api_falsa.pedidos) == 2
+        assert [b['nome'] for b in boletos['dia08']] == ['Ana']
+        assert [b['nome'] for b in boletos['dia16']] == ['Caio Silva', 'Duda']
+        assert boletos['dia16'][1] == {'nome': 'Duda', 'cotas': 'cota 4', 'task_id': 'd', 'is_completed': False}
+        print("✅ Extração com uma única requisição incremental")
+
+        # Outro token não reaproveita o espelho
+        outro = TodoistSyncMirror('outro-token', caminho, session=api_falsa)
+        assert outro.get_projects() == []
+        outro.sync()
+        assert api_falsa.pedidos[-1]['sync_token'] == '*'
+        print("✅ Espelho de outro token é descartado")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+class _ComandosFalsos:
+    """Responde ao endpoint de comandos: a tarefa 'x7' não existe"""
+
+    def __init__(self):
+        self.lotes = []
+
+    def post(self, url, headers=None, data=None, **kwargs):
+        assert 'Content-Type' not in headers
+        comandos = json.loads(data['commands'])
+        self.lotes.append(comandos)
+        return _Resposta({'sync_status': {
+            c['uuid']: {'error_code': 22, 'error': 'Item not found'} if c['args'].get('id') == 'x7' else 'ok'
+            for c in comandos
+        }})
+
+
+def test_todoist_commands():
+    """Valida o lote de comandos: uma requisição a cada 100 e resultado por comando"""
+    print("🔍 Testando comandos em lote...\n")
+
+    api = TodoistRestAPI('token')
+    api.session = _ComandosFalsos()
+
+    ids = [f'x{i}' for i in range(40)]
+    resultados = api.close_tasks(ids)
+    assert len(api.session.lotes) == 1 and len(api.session.lotes[0]) == 40
+    assert {c['type'] for c in api.session.lotes[0]} == {'item_close'}
+    assert [r['task_id'] for r in resultados] == ids
+    assert [r['task_id'] for r in resultados if not r['ok']] == ['x7']
+    assert resultados[7]['error'] == 'Item not found'
+    print("✅ Coluna de 40 tarefas concluída em 1 requisição")
+
+    lote = TodoistCommandBatch()
+    lote.reopen('a')
+    lote.update('a', content='Ana Souza')
+    lote.comment('a', 'Lance registrado')
+    assert lote.commands[2]['args'] == {'item_id': 'a', 'content': 'Lance registrado'}
+    assert [r['type'] for r in api.run_commands(lote)] == ['item_uncomplete', 'item_update', 'note_add']
+
+    api.close_tasks([f'y{i}' for i in range(250)])
+    assert [len(l) for l in api.session.lotes[-3:]] == [100, 100, 50]
+    print("✅ Reabrir, atualizar e comentar; lotes divididos a cada 100")
+
+    print("\n🎉 Todos os testes passaram!")
+
+
+if __name__ == "__main__":
+    test_todoist_sync()
+    test_todoist_commands()
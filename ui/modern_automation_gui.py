@@ -11,6 +11,14 @@ from datetime import datetime
 import queue
 import sys
 
+# Raiz do projeto: o histórico é o mesmo da interface web (history_<dia>.jsonl)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from utils.history_log import get_history_log
+from utils.history_stats import get_history_stats
+
 # Bloqueia acesso direto ao sistema desktop
 ALLOW_DESKTOP_ACCESS = False
 
@@ -1126,8 +1134,8 @@ class ModernAutomationGUI:
         tab_frame = tk.Frame(self.notebook)
         self.notebook.add(tab_frame, text='📊 Já feito do dia 8')
         
-        # Arquivo para salvar histórico
-        self.history_file = 'history_dia8.json'
+        # Histórico compartilhado com a interface web
+        self.history_log = get_history_log(PROJECT_ROOT, 'dia8')
         self.history_data = []
         
         # Header com informações
@@ -1212,8 +1220,8 @@ class ModernAutomationGUI:
         tab_frame = tk.Frame(self.notebook)
         self.notebook.add(tab_frame, text='📊 Já feito do dia 16')
         
-        # Arquivo para salvar histórico
-        self.history_file_dia16 = 'history_dia16.json'
+        # Histórico compartilhado com a interface web
+        self.history_log_dia16 = get_history_log(PROJECT_ROOT, 'dia16')
         self.history_data_dia16 = []
         
         # Header com informações
@@ -1294,15 +1302,10 @@ class ModernAutomationGUI:
         self.load_history_dia16()
     
     def load_history(self):
-        """Carrega histórico do arquivo JSON"""
+        """Carrega histórico do log compartilhado (history_dia8.jsonl)"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.history_data = json.load(f)
-                print(f"✅ Histórico carregado: {len(self.history_data)} registros")
-            else:
-                self.history_data = []
-                print(f"⚠️ Arquivo de histórico não existe: {self.history_file}")
+            self.history_data = list(self.history_log.iter_entries())
+            print(f"✅ Histórico carregado: {len(self.history_data)} registros")
             
             self.refresh_history()
         except Exception as e:
@@ -1310,11 +1313,11 @@ class ModernAutomationGUI:
             messagebox.showerror("Erro", f"Erro ao carregar histórico: {e}")
             self.history_data = []
     
-    def save_history(self):
-        """Salva histórico no arquivo JSON"""
+    def save_history_entry(self, dia, history_log, entry):
+        """Anexa a entrada ao log compartilhado e atualiza os contadores da web"""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(self.history_data, f, indent=2, ensure_ascii=False)
+            history_log.append(entry)
+            get_history_stats(PROJECT_ROOT, dia).refresh()
         except Exception as e:
             print(f"Erro ao salvar histórico: {e}")
     
@@ -1334,7 +1337,7 @@ class ModernAutomationGUI:
         }
         
         self.history_data.append(entry)
-        self.save_history()
+        self.save_history_entry('dia8', self.history_log, entry)
         
         # Atualiza a tabela na interface (thread-safe)
         self.root.after(0, self.refresh_history)
@@ -1446,22 +1449,17 @@ class ModernAutomationGUI:
         """Limpa todo o histórico"""
         if messagebox.askyesno("Confirmar", "Deseja realmente limpar TODO o histórico?\n\nEsta ação não pode ser desfeita!"):
             self.history_data = []
-            self.save_history()
+            self.history_log.clear()
             self.refresh_history()
             messagebox.showinfo("Sucesso", "Histórico limpo com sucesso!")
     
     # ========== MÉTODOS PARA DIA 16 ==========
     
     def load_history_dia16(self):
-        """Carrega histórico do Dia 16 do arquivo JSON"""
+        """Carrega histórico do Dia 16 do log compartilhado (history_dia16.jsonl)"""
         try:
-            if os.path.exists(self.history_file_dia16):
-                with open(self.history_file_dia16, 'r', encoding='utf-8') as f:
-                    self.history_data_dia16 = json.load(f)
-                print(f"✅ Histórico Dia 16 carregado: {len(self.history_data_dia16)} registros")
-            else:
-                self.history_data_dia16 = []
-                print(f"⚠️ Arquivo de histórico Dia 16 não existe: {self.history_file_dia16}")
+            self.history_data_dia16 = list(self.history_log_dia16.iter_entries())
+            print(f"✅ Histórico Dia 16 carregado: {len(self.history_data_dia16)} registros")
             
             self.refresh_history_dia16()
         except Exception as e:
@@ -1469,14 +1467,6 @@ class ModernAutomationGUI:
             messagebox.showerror("Erro", f"Erro ao carregar histórico Dia 16: {e}")
             self.history_data_dia16 = []
     
-    def save_history_dia16(self):
-        """Salva histórico do Dia 16 no arquivo JSON"""
-        try:
-            with open(self.history_file_dia16, 'w', encoding='utf-8') as f:
-                json.dump(self.history_data_dia16, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Erro ao salvar histórico Dia 16: {e}")
-    
     def add_history_entry_dia16(self, grupo, cota, nome, valor_lance, status, observacao="", protocolo=None, documento_url=None, **_extra):
         """Adiciona entrada ao histórico do Dia 16"""
         entry = {
@@ -1493,7 +1483,7 @@ class ModernAutomationGUI:
         }
         
         self.history_data_dia16.append(entry)
-        self.save_history_dia16()
+        self.save_history_entry('dia16', self.history_log_dia16, entry)
         
         # Atualiza a tabela na interface (thread-safe)
         self.root.after(0, self.refresh_history_dia16)
@@ -1605,7 +1595,7 @@ class ModernAutomationGUI:
         """Limpa todo o histórico do Dia 16"""
         if messagebox.askyesno("Confirmar", "Deseja realmente limpar TODO o histórico do Dia 16?\n\nEsta ação não pode ser desfeita!"):
             self.history_data_dia16 = []
-            self.save_history_dia16()
+            self.history_log_dia16.clear()
             self.refresh_history_dia16()
             messagebox.showinfo("Sucesso", "Histórico Dia 16 limpo com sucesso!")
     
@@ -0,0 +1,195 @@
+"""
+Armazenamento endereçado por conteúdo para arquivos binários (screenshots)
+
+Cada arquivo é gravado uma única vez em data/blobs/<aa>/<sha256>.<ext>;
+o identificador (``<sha256>.<ext>``) é o que fica salvo nos JSONs, no lugar
+do conteúdo em base64. Conteúdo igual gera o mesmo identificador, então
+não há duplicação, e um blob nunca muda depois de gravado (pode ser
+servido com cache de longa duração).
+
+Uso:
+    from utils.blob_store import get_blob_store
+
+    blobs = get_blob_store()
+    blob_id = blobs.put(png_bytes, 'png')      # 'e3b0c4...b855.png'
+    caminho = blobs.path_for(blob_id)
+
+Migração dos png_base64 já existentes nos JSONs:
+    python -m utils.blob_store
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BLOB_ID_RE = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]{1,5}$')
+DATA_URI_RE = re.compile(r'^data:(?P<mime>[\w/+.-]+);base64,', re.IGNORECASE)
+EXTENSIONS = {'image/png': 'png', 'image/jpeg': 'jpg', 'application/pdf': 'pdf'}
+
+# Campo antigo (data URI) → campo com o identificador do blob
+SCREENSHOT_FIELD = 'png_base64'
+SCREENSHOT_BLOB_FIELD = 'screenshot_blob'
+
+_registry: Dict[str, 'BlobStore'] = {}
+_registry_lock = threading.Lock()
+
+
+class BlobStore:
+    """Diretório de blobs imutáveis nomeados pelo SHA-256 do conteúdo"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path_for(self, blob_id: str) -> Optional[str]:
+        """Caminho do blob, ou None se o identificador for inválido"""
+        if not isinstance(blob_id, str) or not BLOB_ID_RE.match(blob_id):
+            return None
+        return os.path.join(self.root, blob_id[:2], blob_id)
+
+    def exists(self, blob_id: str) -> bool:
+        path = self.path_for(blob_id)
+        return bool(path) and os.path.exists(path)
+
+    def put(self, data: bytes, ext: str) -> str:
+        """
+        Grava ``data`` (se ainda não existir) e retorna o identificador
+
+        Args:
+            data: Conteúdo binário
+            ext: Extensão sem ponto (ex.: 'png')
+        """
+        blob_id = f"{hashlib.sha256(data).hexdigest()}.{ext.lower().lstrip('.')}"
+        path = self.path_for(blob_id)
+        if path is None:
+            raise ValueError(f'Extensão inválida para blob: {ext!r}')
+        if os.path.exists(path):
+            return blob_id
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.blob.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return blob_id
+
+    def put_data_uri(self, uri: str) -> Optional[str]:
+        """Decodifica um data URI base64 e grava o conteúdo; None se não for um data URI válido"""
+        match = DATA_URI_RE.match(uri or '')
+        if not match:
+            return None
+        try:
+            data = base64.b64decode(uri[match.end():], validate=False)
+        except (binascii.Error, ValueError):
+            return None
+        ext = EXTENSIONS.get(match.group('mime').lower(), 'bin')
+        return self.put(data, ext)
+
+    def move_data_uri(self, entry: Dict[str, Any], field: str = SCREENSHOT_FIELD,
+                      blob_field: str = SCREENSHOT_BLOB_FIELD) -> bool:
+        """
+        Se ``entry[field]`` for um data URI, grava o conteúdo como blob,
+        guarda o identificador em ``entry[blob_field]`` e remove ``field``
+
+        Returns:
+            bool: True se a entrada foi alterada
+        """
+        value = entry.get(field)
+        if not isinstance(value, str) or not DATA_URI_RE.match(value):
+            return False
+        blob_id = self.put_data_uri(value)
+        if blob_id is None:
+            return False
+        entry[blob_field] = blob_id
+        del entry[field]
+        return True
+
+    def migrate_document(self, data: Any) -> int:
+        """
+        Move os data URIs de todas as entradas de um documento
+        {'dia08': [...], 'dia16': [...]} para o repositório de blobs
+
+        Returns:
+            int: Quantidade de entradas alteradas
+        """
+        moved = 0
+        if not isinstance(data, dict):
+            return moved
+        for items in data.values():
+            if not isinstance(items, list):
+                continue
+            for item in items:
+                if isinstance(item, dict) and self.move_data_uri(item):
+                    moved += 1
+        return moved
+
+
+def get_blob_store(project_root: str = PROJECT_ROOT) -> BlobStore:
+    """Repositório de blobs compartilhado em <project_root>/data/blobs"""
+    root = os.path.abspath(os.path.join(project_root, 'data', 'blobs'))
+    with _registry_lock:
+        store = _registry.get(root)
+        if store is None:
+            store = BlobStore(root)
+            _registry[root] = store
+        return store
+
+
+def migrate_stores(blob_store: BlobStore, *document_stores: Any) -> int:
+    """
+    Migra os png_base64 dos repositórios de documentos (boletos/clientes)
+
+    Cada documento só é regravado se alguma entrada foi alterada.
+
+    Returns:
+        int: Total de entradas migradas
+    """
+    total = 0
+    for store in document_stores:
+        if not store.exists():
+            continue
+        with store.locked():
+            data = store.load()
+            moved = blob_store.migrate_document(data)
+            if moved:
+                store.save(data)
+                total += moved
+    return total
+
+
+if __name__ == '__main__':
+    import sys
+
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+
+    if os.environ.get('OXCASH_STORAGE', 'json').lower() == 'sqlite':
+        from utils.sqlite_store import SqliteDatabase
+
+        database = SqliteDatabase(
+            os.environ.get('OXCASH_SQLITE_PATH') or os.path.join(PROJECT_ROOT, 'data', 'oxcash.db')
+        )
+        stores = [database.document_store('boletos'), database.document_store('clientes')]
+    else:
+        from utils.data_store import get_document_store
+
+        stores = [
+            get_document_store(os.path.join(PROJECT_ROOT, nome))
+            for nome in ('boletos_data.json', 'clientes_data.json')
+        ]
+    migrated = migrate_stores(get_blob_store(), *stores)
+    print(f"✅ {migrated} screenshots movidos para {get_blob_store().root}")
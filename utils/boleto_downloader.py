@@ -5,6 +5,7 @@ Este módulo permite:
 - Baixar PDFs de boletos do Servopa
 - Salvar em cache local para reutilização
 - Verificar se boleto já está em cache
+- Pré-carregar o PDF em segundo plano logo após a geração do boleto
 
 Uso:
     from utils.boleto_downloader import download_boleto_pdf, get_cached_boleto
@@ -14,21 +15,52 @@ Uso:
     
     # Verificar cache
     pdf_path = get_cached_boleto("12345")
+    
+    # Agendar download em segundo plano (ex.: logo após gerar o boleto)
+    prefetch_boleto_pdf(boleto_url, task_id="12345")
 """
 
 import os
-import requests
-from datetime import datetime
+import queue
+import threading
 from typing import Optional, Tuple
 
+from utils.boleto_pdf_cache import PdfCache, PdfFetchError, get_pdf_cache, open_pdf_cache
+from utils.cache_manager import CacheManager, get_cache_manager
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Headers para evitar bloqueio
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/pdf,application/octet-stream,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Referer': 'https://www.consorcioservopa.com.br/',
+    'Connection': 'keep-alive',
+}
+
+
+def _get_cache(cache_dir: str = None) -> PdfCache:
+    """Cache compartilhado com o proxy /boleto/<code> (ou um diretório específico)"""
+    return open_pdf_cache(cache_dir) if cache_dir else get_pdf_cache(PROJECT_ROOT)
+
+
 def download_boleto_pdf(boleto_url: str, task_id: str = None, cache_dir: str = None) -> Tuple[bool, str, Optional[str]]:
     """
     Baixa PDF do boleto do Servopa e salva em cache
     
+    O PDF fica no cache por conteúdo compartilhado com o proxy /boleto/<code>
+    (utils.boleto_pdf_cache): se o mesmo boleto já foi baixado pelo link
+    curto, ou está sendo baixado agora, o download é reaproveitado.
+    
+    O corpo é gravado em blocos em um arquivo temporário (sem carregar o PDF
+    inteiro em memória), validado pela assinatura %PDF no primeiro bloco e
+    limitado a OXCASH_PDF_MAX_MB; só então é renomeado para o cache.
+    
     Args:
         boleto_url: URL do boleto no Servopa
-        task_id: ID da task do Todoist (para nome do arquivo)
-        cache_dir: Diretório de cache (padrão: data/boletos_pdf)
+        task_id: ID da task do Todoist (apelido do PDF no cache)
+        cache_dir: Diretório de cache (padrão: data/boletos_cache)
         
     Returns:
         Tuple[bool, str, Optional[str]]: (sucesso, caminho_arquivo, mensagem_erro)
@@ -41,79 +73,28 @@ def download_boleto_pdf(boleto_url: str, task_id: str = None, cache_dir: str = N
         ...     print(f"Erro: {erro}")
     """
     try:
-        # Define diretório de cache
-        if not cache_dir:
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            cache_dir = os.path.join(project_root, 'data', 'boletos_pdf')
-        
-        os.makedirs(cache_dir, exist_ok=True)
+        cache = _get_cache(cache_dir)
         
-        # Define nome do arquivo
-        if task_id:
-            filename = f"boleto_{task_id}.pdf"
-        else:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"boleto_{timestamp}.pdf"
-        
-        file_path = os.path.join(cache_dir, filename)
-        
-        # Se já existe em cache, retorna direto
-        if os.path.exists(file_path):
+        # Se já existe em cache (por task_id ou pela URL), retorna direto
+        file_path = cache.cached_path(task_id=task_id, url=boleto_url)
+        if file_path:
             file_size = os.path.getsize(file_path)
-            print(f"✅ Boleto já em cache: {filename} ({file_size} bytes)")
+            get_cache_manager(PROJECT_ROOT).touch(file_path)
+            print(f"✅ Boleto já em cache: {os.path.basename(file_path)} ({file_size} bytes)")
             return True, file_path, None
         
-        # Download do PDF
+        # Download do PDF (compartilhado com acessos simultâneos à mesma URL)
         print(f"📥 Baixando boleto de {boleto_url}")
+        download = cache.fetch(boleto_url, headers=DOWNLOAD_HEADERS, task_id=task_id)
+        file_path = download.wait_done()
         
-        # Headers para evitar bloqueio
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'application/pdf,application/octet-stream,*/*;q=0.8',
-            'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Referer': 'https://www.consorcioservopa.com.br/',
-            'Connection': 'keep-alive',
-        }
-        
-        # Faz download com timeout e redirects
-        response = requests.get(
-            boleto_url,
-            headers=headers,
-            timeout=30,
-            allow_redirects=True,
-            stream=True  # Stream para arquivos grandes
-        )
-        
-        if response.status_code != 200:
-            return False, "", f"Erro HTTP {response.status_code}"
-        
-        # Verifica se é PDF válido
-        content_type = response.headers.get('Content-Type', '').lower()
-        
-        # Lê primeiros bytes para verificar
-        content = response.content
-        
-        if 'pdf' not in content_type and not content.startswith(b'%PDF'):
-            # Tenta detectar se é HTML de erro
-            if content.startswith(b'<!DOCTYPE') or content.startswith(b'<html'):
-                return False, "", "Servopa retornou página HTML ao invés de PDF (possível sessão expirada)"
-            return False, "", f"Resposta não é um PDF válido (Content-Type: {content_type})"
-        
-        # Salva arquivo
-        with open(file_path, 'wb') as f:
-            f.write(content)
-        
-        file_size = len(content)
-        print(f"✅ Boleto salvo: {filename} ({file_size:,} bytes)")
+        file_size = os.path.getsize(file_path)
+        print(f"✅ Boleto salvo: {os.path.basename(file_path)} ({file_size:,} bytes)")
         
         return True, file_path, None
         
-    except requests.exceptions.Timeout:
-        return False, "", "Timeout ao baixar PDF (mais de 30 segundos)"
-    except requests.exceptions.ConnectionError as e:
-        return False, "", f"Erro de conexão: {str(e)}"
-    except requests.RequestException as e:
-        return False, "", f"Erro ao baixar: {str(e)}"
+    except PdfFetchError as e:
+        return False, "", str(e)
     except IOError as e:
         return False, "", f"Erro ao salvar arquivo: {str(e)}"
     except Exception as e:
@@ -126,7 +107,7 @@ def get_cached_boleto(task_id: str, cache_dir: str = None) -> Optional[str]:
     
     Args:
         task_id: ID da task do Todoist
-        cache_dir: Diretório de cache (padrão: data/boletos_pdf)
+        cache_dir: Diretório de cache (padrão: data/boletos_cache)
         
     Returns:
         Optional[str]: Caminho do arquivo se existir, None caso contrário
@@ -138,29 +119,80 @@ def get_cached_boleto(task_id: str, cache_dir: str = None) -> Optional[str]:
         ... else:
         ...     print("PDF não está em cache")
     """
-    if not cache_dir:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        cache_dir = os.path.join(project_root, 'data', 'boletos_pdf')
+    file_path = _get_cache(cache_dir).cached_path(task_id=task_id)
     
-    filename = f"boleto_{task_id}.pdf"
-    file_path = os.path.join(cache_dir, filename)
-    
-    if os.path.exists(file_path):
+    if file_path:
         file_size = os.path.getsize(file_path)
-        print(f"🔍 Boleto encontrado em cache: {filename} ({file_size} bytes)")
+        get_cache_manager(PROJECT_ROOT).touch(file_path)
+        print(f"🔍 Boleto encontrado em cache: {os.path.basename(file_path)} ({file_size} bytes)")
         return file_path
     else:
-        print(f"🔍 Boleto não está em cache: {filename}")
+        print(f"🔍 Boleto não está em cache: task {task_id}")
         return None
 
 
+# Pré-carregamento: uma única thread baixa os PDFs agendados, em ordem,
+# para não disparar vários downloads simultâneos contra o Servopa
+_prefetch_queue: "queue.Queue[Tuple[str, Optional[str], Optional[str]]]" = queue.Queue()
+_prefetch_worker: Optional[threading.Thread] = None
+_prefetch_lock = threading.Lock()
+
+
+def _prefetch_loop() -> None:
+    while True:
+        boleto_url, task_id, cache_dir = _prefetch_queue.get()
+        try:
+            sucesso, _path, erro = download_boleto_pdf(boleto_url, task_id, cache_dir)
+            if not sucesso:
+                print(f"⚠️ Pré-carregamento do boleto falhou (task {task_id}): {erro}")
+        except Exception as e:
+            print(f"⚠️ Erro no pré-carregamento do boleto (task {task_id}): {e}")
+        finally:
+            _prefetch_queue.task_done()
+
+
+def prefetch_boleto_pdf(boleto_url: str, task_id: str = None, cache_dir: str = None) -> bool:
+    """
+    Agenda o download do PDF para o cache, sem bloquear quem chamou
+    
+    Chamado assim que a URL do boleto é capturada: o primeiro clique no link
+    curto e o envio pelo WhatsApp passam a ser atendidos pelo cache local,
+    enquanto a URL do Servopa (vinculada ao IP/sessão) ainda é válida.
+    
+    Args:
+        boleto_url: URL do boleto no Servopa
+        task_id: ID da task do Todoist (apelido do PDF no cache)
+        cache_dir: Diretório de cache (padrão: data/boletos_cache)
+        
+    Returns:
+        bool: True se o download foi agendado (False sem URL)
+    """
+    global _prefetch_worker
+    
+    if not boleto_url:
+        return False
+    
+    with _prefetch_lock:
+        if _prefetch_worker is None:
+            _prefetch_worker = threading.Thread(target=_prefetch_loop, name='boleto-pdf-prefetch', daemon=True)
+            _prefetch_worker.start()
+    
+    _prefetch_queue.put((boleto_url, str(task_id) if task_id else None, cache_dir))
+    return True
+
+
 def clear_old_boletos(cache_dir: str = None, days_old: int = 30) -> Tuple[int, int]:
     """
     Remove boletos antigos do cache
     
+    A limpeza periódica (idade + limite de tamanho) é feita pelo
+    utils.cache_manager; esta função força uma varredura com outra idade.
+    Apelidos que apontavam para PDFs removidos são descartados na próxima
+    consulta ao cache.
+    
     Args:
-        cache_dir: Diretório de cache (padrão: data/boletos_pdf)
-        days_old: Remover arquivos com mais de X dias (padrão: 30)
+        cache_dir: Diretório de cache (padrão: caches gerenciados em data/)
+        days_old: Remover arquivos sem acesso há mais de X dias (padrão: 30)
         
     Returns:
         Tuple[int, int]: (arquivos_removidos, bytes_liberados)
@@ -169,39 +201,16 @@ def clear_old_boletos(cache_dir: str = None, days_old: int = 30) -> Tuple[int, i
         >>> removed, bytes_freed = clear_old_boletos(days_old=7)
         >>> print(f"Removidos {removed} arquivos ({bytes_freed:,} bytes)")
     """
-    import time
-    
-    if not cache_dir:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        cache_dir = os.path.join(project_root, 'data', 'boletos_pdf')
-    
-    if not os.path.exists(cache_dir):
-        return 0, 0
-    
-    removed_count = 0
-    bytes_freed = 0
-    cutoff_time = time.time() - (days_old * 86400)  # dias em segundos
-    
-    for filename in os.listdir(cache_dir):
-        if not filename.endswith('.pdf'):
-            continue
-        
-        file_path = os.path.join(cache_dir, filename)
-        
-        try:
-            # Verifica idade do arquivo
-            if os.path.getmtime(file_path) < cutoff_time:
-                file_size = os.path.getsize(file_path)
-                os.remove(file_path)
-                removed_count += 1
-                bytes_freed += file_size
-                print(f"🗑️  Removido: {filename} ({file_size} bytes)")
-        except Exception as e:
-            print(f"⚠️  Erro ao remover {filename}: {e}")
-    
-    if removed_count > 0:
-        print(f"✅ Limpeza concluída: {removed_count} arquivos removidos ({bytes_freed:,} bytes)")
-    else:
+    manager = get_cache_manager(PROJECT_ROOT)
+    if cache_dir and os.path.abspath(cache_dir) not in manager.directories:
+        if not os.path.exists(cache_dir):
+            return 0, 0
+        manager = CacheManager([cache_dir])
+    
+    # Usa o índice de acessos da limpeza automática (vale para todos os
+    # diretórios gerenciados, que compartilham o mesmo orçamento)
+    removed_count, bytes_freed = manager.sweep(max_age_days=days_old)
+    if removed_count == 0:
         print("ℹ️  Nenhum arquivo antigo encontrado")
     
     return removed_count, bytes_freed
@@ -228,8 +237,7 @@ if __name__ == '__main__':
     
     # Teste 3: Listar cache
     print("\n3️⃣  Teste: Verificar diretório de cache")
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    cache_dir = os.path.join(project_root, 'data', 'boletos_pdf')
+    cache_dir = _get_cache().cache_dir
     
     if os.path.exists(cache_dir):
         files = [f for f in os.listdir(cache_dir) if f.endswith('.pdf')]
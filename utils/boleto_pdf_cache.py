@@ -0,0 +1,422 @@
+"""
+Cache em disco dos PDFs de boleto, endereçado por conteúdo
+
+Cada PDF é gravado uma única vez em data/boletos_cache/<sha256>.pdf. Um
+índice de apelidos (data/boletos_cache/index.json) liga ao conteúdo:
+- a URL de origem no Servopa;
+- o código curto servido por /boleto/<code>;
+- o task_id do Todoist usado no envio pelo WhatsApp.
+Assim o proxy (/boleto/<code>) e o envio por WhatsApp (boleto_downloader)
+compartilham o mesmo arquivo e o mesmo download.
+
+- Download único por URL: requisições simultâneas para um PDF ainda fora do
+  cache compartilham o mesmo download do Servopa (single-flight).
+- O download roda em uma thread própria e grava o PDF em blocos em um
+  arquivo temporário; cada cliente recebe os bytes à medida que chegam,
+  lendo esse arquivo. Ao terminar, o arquivo é renomeado para o seu hash.
+- O primeiro bloco precisa ter a assinatura %PDF e o total não pode passar
+  de ``max_bytes`` (OXCASH_PDF_MAX_MB, padrão 25); downloads recusados,
+  truncados ou interrompidos nunca chegam ao cache.
+- Arquivos no formato antigo (boletos_cache/<code>.pdf e
+  boletos_pdf/boleto_<task_id>.pdf) são incorporados na primeira consulta.
+- No Windows um arquivo aberto por um cliente (streaming do proxy) não pode
+  ser renomeado nem removido: o conteúdo é copiado para o destino e o
+  arquivo original fica para a limpeza do cache (utils/cache_manager.py).
+
+Uso:
+    from utils.boleto_pdf_cache import get_pdf_cache
+
+    cache = get_pdf_cache(PROJECT_ROOT)
+    caminho = cache.cached_path(code, url=url)
+    if caminho is None:
+        download = cache.fetch(url, headers=..., code=code)
+        download.wait_started()          # levanta PdfFetchError se falhar
+        return Response(download.iter_chunks(), mimetype='application/pdf')
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+import requests
+
+from utils.http_client import get_session
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_TIMEOUT = 30
+DOWNLOAD_TIMEOUT = 120  # tempo máximo aguardando um download completo
+DEFAULT_MAX_MB = 25
+PDF_SIGNATURE_WINDOW = 1024  # a especificação admite lixo antes de %PDF
+INDEX_FILENAME = 'index.json'
+CONTENT_RE = re.compile(r'^[0-9a-f]{64}\.pdf$')
+
+_registry: Dict[str, 'PdfCache'] = {}
+_registry_lock = threading.Lock()
+
+
+class PdfFetchError(Exception):
+    """Falha ao obter o PDF do Servopa (HTTP != 200, conteúdo não-PDF, rede...)"""
+
+
+def _aliases(code: Optional[str] = None, task_id: Optional[str] = None,
+             url: Optional[str] = None) -> List[str]:
+    """Chaves do índice para cada identificador informado"""
+    aliases = []
+    if code:
+        aliases.append(f'code:{code}')
+    if task_id:
+        aliases.append(f'task:{task_id}')
+    if url:
+        aliases.append(f'url:{url}')
+    return aliases
+
+
+class PdfDownload:
+    """Download em andamento, compartilhado por todos os clientes da mesma URL"""
+
+    def __init__(self, tmp_path: str):
+        self.tmp_path = tmp_path
+        self.final_path: Optional[str] = None
+        self.bytes_written = 0
+        self.started = False
+        self.done = False
+        self.error: Optional[Exception] = None
+        self.aliases: List[str] = []
+        self._cond = threading.Condition()
+
+    # Chamados pela thread de download
+    def _notify(self, **changes) -> None:
+        with self._cond:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._cond.notify_all()
+
+    def wait_started(self, timeout: float = DEFAULT_TIMEOUT) -> None:
+        """Aguarda o primeiro bloco validado (ou o erro do download)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.started or self.done, timeout=timeout)
+            if self.error is not None:
+                raise self.error
+            if not self.started and not self.done:
+                raise PdfFetchError('Tempo esgotado aguardando o Servopa')
+
+    def wait_done(self, timeout: float = DOWNLOAD_TIMEOUT) -> str:
+        """Aguarda o fim do download e retorna o caminho do PDF no cache"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.done, timeout=timeout)
+            if self.error is not None:
+                raise self.error
+            if not self.done:
+                raise PdfFetchError(f'Timeout ao baixar PDF (mais de {timeout:g} segundos)')
+            return self.final_path
+
+    def iter_chunks(self) -> Iterator[bytes]:
+        """Bytes do PDF conforme são gravados (acompanha o arquivo temporário)"""
+        with self._cond:
+            if self.error is not None:
+                return
+            # O arquivo aberto continua válido depois de renomeado para o cache
+            f = open(self.final_path or self.tmp_path, 'rb')
+
+        with f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if data:
+                    yield data
+                    continue
+                with self._cond:
+                    if self.error is not None:
+                        return  # cliente recebe resposta truncada; o cache não é gravado
+                    if self.done and f.tell() >= self.bytes_written:
+                        return
+                    if f.tell() >= self.bytes_written:
+                        self._cond.wait(timeout=DEFAULT_TIMEOUT)
+
+
+class PdfCache:
+    """Diretório de PDFs nomeados pelo SHA-256, com apelidos por URL, código e task"""
+
+    def __init__(self, cache_dir: str, http_get: Optional[Callable[..., requests.Response]] = None,
+                 legacy_task_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_dir: Diretório do cache (conteúdo + index.json)
+            http_get: Função de download (padrão: sessão compartilhada de utils.http_client)
+            legacy_task_dir: Diretório antigo com boleto_<task_id>.pdf, incorporado sob demanda
+            max_bytes: Tamanho máximo aceito por PDF (padrão: OXCASH_PDF_MAX_MB)
+        """
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get('OXCASH_PDF_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.legacy_task_dir = os.path.abspath(legacy_task_dir) if legacy_task_dir else None
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILENAME)
+        self._http_get = http_get or get_session().get
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, PdfDownload] = {}
+        self._index: Optional[Dict[str, str]] = None
+
+    # ------------------------------------------------------------------
+    # Índice de apelidos
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict[str, str]:
+        """Apelido -> hash do conteúdo (carregado uma vez; chamar com _lock)"""
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._index = dict(json.load(f).get('aliases', {}))
+            except (OSError, ValueError, AttributeError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self) -> None:
+        """Grava o índice de forma atômica (chamar com _lock)"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.index.', suffix='.tmp', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'aliases': self._index}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            # O índice só evita downloads repetidos; sem ele o PDF é baixado de novo
+            print(f"⚠️ Erro ao gravar índice do cache de PDFs: {e}")
+            self._remove_tmp(tmp_path)
+
+    def _link(self, digest: str, aliases: List[str]) -> None:
+        """Aponta os apelidos para ``digest`` (chamar com _lock)"""
+        index = self._load_index()
+        changed = False
+        for alias in aliases:
+            if index.get(alias) != digest:
+                index[alias] = digest
+                changed = True
+        if changed:
+            self._save_index()
+
+    def content_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, f'{digest}.pdf')
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def cached_path(self, code: Optional[str] = None, task_id: Optional[str] = None,
+                    url: Optional[str] = None) -> Optional[str]:
+        """
+        Caminho do PDF em cache para qualquer um dos identificadores, ou None
+
+        Os demais identificadores informados passam a apontar para o mesmo
+        arquivo (ex.: o PDF baixado por task_id fica disponível pelo código).
+        """
+        task_id = str(task_id) if task_id else None
+        aliases = _aliases(code, task_id, url)
+        with self._lock:
+            index = self._load_index()
+            for alias in aliases:
+                digest = index.get(alias)
+                if digest is None:
+                    continue
+                path = self.content_path(digest)
+                if os.path.exists(path):
+                    self._link(digest, aliases)
+                    return path
+                # Conteúdo removido pela limpeza do cache: apelido órfão
+                del index[alias]
+
+            legacy = self._adopt_legacy(code, task_id)
+            if legacy:
+                self._link(os.path.basename(legacy)[:-4], aliases)
+            return legacy
+
+    def _legacy_paths(self, code: Optional[str], task_id: Optional[str]) -> List[str]:
+        paths = []
+        if code and not CONTENT_RE.match(f'{code}.pdf'):
+            paths.append(os.path.join(self.cache_dir, f'{code}.pdf'))
+        if task_id and self.legacy_task_dir:
+            paths.append(os.path.join(self.legacy_task_dir, f'boleto_{task_id}.pdf'))
+        return paths
+
+    def _adopt_legacy(self, code: Optional[str], task_id: Optional[str]) -> Optional[str]:
+        """Move um PDF do formato antigo para o armazenamento por hash (chamar com _lock)"""
+        for legacy in self._legacy_paths(code, task_id):
+            if not os.path.exists(legacy):
+                continue
+            digest = hashlib.sha256()
+            with open(legacy, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            path = self.content_path(digest.hexdigest())
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if os.path.exists(path):
+                self._remove_tmp(legacy)  # mesmo conteúdo já armazenado
+            else:
+                self._move_into_place(legacy, path)
+            return path
+        return None
+
+    # ------------------------------------------------------------------
+    # Download
+    # ------------------------------------------------------------------
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None, code: Optional[str] = None,
+              task_id: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT) -> PdfDownload:
+        """
+        Inicia (ou reaproveita) o download do PDF de ``url``
+
+        ``code`` e ``task_id`` passam a apontar para o PDF quando o download terminar.
+
+        Returns:
+            PdfDownload: o mesmo objeto para todas as chamadas simultâneas
+        """
+        aliases = _aliases(code, str(task_id) if task_id else None, url)
+        with self._lock:
+            download = self._inflight.get(url)
+            if download is not None:
+                download.aliases.extend(a for a in aliases if a not in download.aliases)
+                return download
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.download.', suffix='.part', dir=self.cache_dir)
+            os.close(fd)
+            download = PdfDownload(tmp_path)
+            download.aliases.extend(aliases)
+            self._inflight[url] = download
+
+        threading.Thread(
+            target=self._download,
+            args=(url, headers or {}, timeout, download),
+            name='boleto-pdf-download',
+            daemon=True
+        ).start()
+        return download
+
+    def _download(self, url: str, headers: Dict[str, str],
+                  timeout: float, download: PdfDownload) -> None:
+        digest = hashlib.sha256()
+        try:
+            with self._http_get(url, headers=headers, timeout=timeout,
+                                allow_redirects=True, stream=True) as resp:
+                if resp.status_code != 200:
+                    raise PdfFetchError(f'Erro ao buscar boleto do Servopa: HTTP {resp.status_code}')
+
+                expected = self._content_length(resp)
+                if expected is not None and expected > self.max_bytes:
+                    raise PdfFetchError(self._too_large_message())
+
+                with open(download.tmp_path, 'wb') as f:
+                    for chunk in resp.iter_content(CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        if not download.started:
+                            self._check_signature(chunk)
+                        if download.bytes_written + len(chunk) > self.max_bytes:
+                            raise PdfFetchError(self._too_large_message())
+                        digest.update(chunk)
+                        f.write(chunk)
+                        f.flush()
+                        download._notify(started=True, bytes_written=download.bytes_written + len(chunk))
+
+            if not download.started:
+                raise PdfFetchError('Resposta vazia do Servopa')
+            if expected is not None and download.bytes_written < expected:
+                raise PdfFetchError(f'Download interrompido ({download.bytes_written:,} de {expected:,} bytes)')
+
+            final_path = self.content_path(digest.hexdigest())
+            with self._lock, download._cond:
+                if os.path.exists(final_path):
+                    self._remove_tmp(download.tmp_path)  # mesmo PDF já veio por outra URL
+                else:
+                    self._move_into_place(download.tmp_path, final_path)
+                self._link(digest.hexdigest(), download.aliases)
+                download.final_path = final_path
+                download.done = True
+                download._cond.notify_all()
+        except Exception as e:
+            if isinstance(e, PdfFetchError):
+                error = e
+            elif isinstance(e, requests.exceptions.Timeout):
+                error = PdfFetchError(f'Timeout ao baixar PDF (mais de {timeout:g} segundos)')
+            else:
+                error = PdfFetchError(f'Erro ao acessar Servopa: {e}')
+            with download._cond:
+                download.error = error
+                download.done = True
+                download._cond.notify_all()
+                self._remove_tmp(download.tmp_path)
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    @staticmethod
+    def _content_length(resp) -> Optional[int]:
+        # Com Content-Encoding o tamanho declarado é o comprimido: não dá para comparar
+        if resp.headers.get('Content-Encoding'):
+            return None
+        try:
+            return int(resp.headers['Content-Length'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _check_signature(first_chunk: bytes) -> None:
+        """Recusa o download já no primeiro bloco se não for um PDF"""
+        if b'%PDF' in first_chunk[:PDF_SIGNATURE_WINDOW]:
+            return
+        if first_chunk.lstrip()[:15].lower().startswith((b'<!doctype', b'<html')):
+            raise PdfFetchError('Servopa retornou página HTML ao invés de PDF (possível sessão expirada)')
+        raise PdfFetchError('Resposta do Servopa não é um PDF válido')
+
+    def _too_large_message(self) -> str:
+        return f'PDF maior que o limite de {self.max_bytes:,} bytes'
+
+    @classmethod
+    def _move_into_place(cls, src: str, dst: str) -> None:
+        """Renomeia ``src`` para ``dst``; se ``src`` estiver aberto (Windows), copia"""
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            pass
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.copy.', suffix='.part', dir=os.path.dirname(dst))
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dst)
+        except BaseException:
+            cls._remove_tmp(tmp_path)
+            raise
+        cls._remove_tmp(src)
+
+    @staticmethod
+    def _remove_tmp(path: str) -> None:
+        # Clientes ainda podem estar com o arquivo aberto: no POSIX a remoção é
+        # segura; no Windows (PermissionError) o arquivo fica para a limpeza do cache
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def open_pdf_cache(cache_dir: str, legacy_task_dir: Optional[str] = None) -> PdfCache:
+    """Cache compartilhado (um objeto por diretório)"""
+    cache_dir = os.path.abspath(cache_dir)
+    with _registry_lock:
+        cache = _registry.get(cache_dir)
+        if cache is None:
+            cache = PdfCache(cache_dir, legacy_task_dir=legacy_task_dir)
+            _registry[cache_dir] = cache
+        return cache
+
+
+def get_pdf_cache(project_root: str) -> PdfCache:
+    """Cache compartilhado em <project_root>/data/boletos_cache"""
+    data_dir = os.path.join(project_root, 'data')
+    return open_pdf_cache(os.path.join(data_dir, 'boletos_cache'),
+                          legacy_task_dir=os.path.join(data_dir, 'boletos_pdf'))
@@ -0,0 +1,237 @@
+"""
+Gerenciador dos caches de PDF em disco (data/boletos_cache e data/boletos_pdf)
+
+Mantém os diretórios de cache dentro de um orçamento de bytes e de idade:
+- Arquivos sem acesso há mais de ``max_age_days`` são removidos;
+- Se o total ainda passar de ``max_bytes``, os menos usados recentemente
+  (LRU) são removidos até ficar abaixo do limite.
+- Temporários de download (.part) com mais de um dia são descartados; no
+  Windows sobram quando um cliente ainda lia o arquivo ao fim do download.
+
+O horário do último acesso de cada arquivo é registrado em memória por
+``touch()`` (chamado a cada acerto de cache) e gravado em
+data/cache_index.json a cada varredura; arquivos sem registro usam o mtime.
+
+Uso:
+    from utils.cache_manager import get_cache_manager
+
+    manager = get_cache_manager(PROJECT_ROOT)
+    manager.touch(pdf_path)        # ao servir um arquivo do cache
+    manager.start_sweeper()        # thread de limpeza em segundo plano
+    removidos, liberados = manager.sweep()
+
+Limites configuráveis por variáveis de ambiente:
+    OXCASH_PDF_CACHE_MAX_MB (padrão 500) e OXCASH_PDF_CACHE_MAX_DAYS (padrão 90)
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_MAX_MB = 500
+DEFAULT_MAX_DAYS = 90
+DEFAULT_SWEEP_INTERVAL = 3600  # segundos
+CACHE_SUBDIRS = ('boletos_cache', 'boletos_pdf')
+CACHE_EXTENSIONS = ('.pdf',)
+TMP_EXTENSIONS = ('.part',)
+TMP_MAX_AGE = 86400  # segundos até um temporário ser considerado abandonado
+
+_registry: Dict[str, 'CacheManager'] = {}
+_registry_lock = threading.Lock()
+
+
+class CacheManager:
+    """Remoção por idade e LRU de arquivos em um ou mais diretórios de cache"""
+
+    def __init__(self, directories: Iterable[str], max_bytes: Optional[int] = None,
+                 max_age_days: Optional[float] = None, index_path: Optional[str] = None):
+        """
+        Args:
+            directories: Diretórios gerenciados
+            max_bytes: Orçamento total em bytes (None = sem limite)
+            max_age_days: Idade máxima desde o último acesso (None = sem limite)
+            index_path: Arquivo JSON com os horários de acesso (None = só em memória)
+        """
+        self.directories = [os.path.abspath(d) for d in directories]
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.index_path = os.path.abspath(index_path) if index_path else None
+        self._lock = threading.Lock()
+        self._access: Dict[str, float] = self._load_index()
+        self._sweeper: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Índice de acessos
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict[str, float]:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {str(k): float(v) for k, v in data.items()}
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️ Índice de acessos do cache ignorado: {e}")
+            return {}
+
+    def _save_index(self) -> None:
+        if not self.index_path:
+            return
+        with self._lock:
+            snapshot = dict(self._access)
+
+        directory = os.path.dirname(self.index_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.cache_index.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.index_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def touch(self, path: str) -> None:
+        """Registra um acesso ao arquivo (apenas em memória)"""
+        with self._lock:
+            self._access[os.path.abspath(path)] = time.time()
+
+    def forget(self, path: str) -> None:
+        """Remove o arquivo do índice (ex.: após apagá-lo)"""
+        with self._lock:
+            self._access.pop(os.path.abspath(path), None)
+
+    # ------------------------------------------------------------------
+    # Varredura
+    # ------------------------------------------------------------------
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(último acesso, tamanho, caminho) de cada arquivo gerenciado"""
+        entries = []
+        with self._lock:
+            access = dict(self._access)
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not entry.is_file() or not entry.name.endswith(CACHE_EXTENSIONS):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    last_access = max(access.get(entry.path, 0.0), st.st_mtime)
+                    entries.append((last_access, st.st_size, entry.path))
+        return entries
+
+    def _remove_stale_tmp(self, now: float) -> None:
+        """Remove temporários abandonados (arquivos em uso ficam para a próxima)"""
+        for directory in self.directories:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if not entry.is_file() or not entry.name.endswith(TMP_EXTENSIONS):
+                        continue
+                    try:
+                        if now - entry.stat().st_mtime > TMP_MAX_AGE:
+                            os.remove(entry.path)
+                    except OSError:
+                        continue
+
+    def usage(self) -> Tuple[int, int]:
+        """(quantidade de arquivos, bytes) atualmente em cache"""
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def sweep(self, now: Optional[float] = None,
+              max_age_days: Optional[float] = None) -> Tuple[int, int]:
+        """
+        Aplica os limites de idade e de tamanho
+
+        Args:
+            now: Horário de referência (padrão: agora)
+            max_age_days: Substitui a idade máxima configurada nesta varredura
+
+        Returns:
+            Tuple[int, int]: (arquivos_removidos, bytes_liberados)
+        """
+        now = time.time() if now is None else now
+        self._remove_stale_tmp(now)
+        entries = sorted(self._entries())  # mais antigo (LRU) primeiro
+        total = sum(size for _, size, _ in entries)
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        cutoff = now - max_age_days * 86400 if max_age_days is not None else None
+
+        removed_count = 0
+        bytes_freed = 0
+        for last_access, size, path in entries:
+            expired = cutoff is not None and last_access < cutoff
+            over_budget = self.max_bytes is not None and total > self.max_bytes
+            if not expired and not over_budget:
+                # Ordenado por acesso: os próximos também não expiraram
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️  Erro ao remover {os.path.basename(path)}: {e}")
+                continue
+            self.forget(path)
+            total -= size
+            removed_count += 1
+            bytes_freed += size
+
+        # Descarta do índice arquivos que não existem mais
+        existing = {path for _, _, path in entries}
+        with self._lock:
+            for path in [p for p in self._access if p not in existing]:
+                del self._access[path]
+        self._save_index()
+
+        if removed_count:
+            print(f"🧹 Cache de PDFs: {removed_count} arquivos removidos ({bytes_freed:,} bytes)")
+        return removed_count, bytes_freed
+
+    def start_sweeper(self, interval: float = DEFAULT_SWEEP_INTERVAL) -> None:
+        """Inicia (uma única vez) a thread que chama sweep() periodicamente"""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(interval,), name='pdf-cache-sweeper', daemon=True
+            )
+        self._sweeper.start()
+
+    def _sweep_loop(self, interval: float) -> None:
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Erro na limpeza do cache de PDFs: {e}")
+            time.sleep(interval)
+
+
+def get_cache_manager(project_root: str) -> CacheManager:
+    """Gerenciador compartilhado dos caches de PDF em <project_root>/data"""
+    data_dir = os.path.abspath(os.path.join(project_root, 'data'))
+    with _registry_lock:
+        manager = _registry.get(data_dir)
+        if manager is None:
+            manager = CacheManager(
+                [os.path.join(data_dir, subdir) for subdir in CACHE_SUBDIRS],
+                max_bytes=int(float(os.environ.get('OXCASH_PDF_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024),
+                max_age_days=float(os.environ.get('OXCASH_PDF_CACHE_MAX_DAYS', DEFAULT_MAX_DAYS)),
+                index_path=os.path.join(data_dir, 'cache_index.json'),
+            )
+            _registry[data_dir] = manager
+        return manager
@@ -0,0 +1,313 @@
+"""
+Repositório em memória para os arquivos JSON de dados do sistema
+
+Os arquivos boletos_data.json, clientes_data.json e cotas_data.json eram
+lidos e regravados inteiros a cada requisição. Este módulo mantém o
+documento já parseado em memória e só relê o arquivo quando ele muda no
+disco (detectado por mtime + tamanho).
+
+Uso:
+    from utils.data_store import get_document_store
+
+    store = get_document_store('/caminho/boletos_data.json',
+                               default={'dia08': [], 'dia16': []})
+
+    # Leitura (documento compartilhado - não modificar fora de locked())
+    data = store.load()
+
+    # Leitura + escrita atômica
+    with store.locked():
+        data = store.load()
+        data['dia08'].append({...})
+        store.save(data)
+
+    # Busca O(1) por chave (índice refeito apenas quando o documento muda)
+    dia_key, posicao, boleto = store.find_record('task_id', task_id)
+
+    # Operações de um registro (no SQLite gravam só a linha)
+    store.update_record('task_id', task_id, {'is_completed': True})
+    store.append_record('dia08', {'task_id': '123', ...})
+    store.delete_record('task_id', task_id)
+"""
+
+import copy
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+_registry: Dict[str, 'JsonDocumentStore'] = {}
+_registry_lock = threading.Lock()
+
+Location = Tuple[str, int]
+NOT_FOUND: Tuple[None, None, None] = (None, None, None)
+
+
+class RecordIndexMixin:
+    """
+    Índices campo → (dia, posição) para documentos no formato
+    {'dia08': [...], 'dia16': [...]}
+
+    Cada índice é construído na primeira busca e reaproveitado enquanto a
+    geração do documento não mudar. Requer ``_lock``, ``load()``,
+    ``generation``, ``locked()`` e ``save()`` na classe que o utiliza.
+
+    As operações de um registro (update/replace/append/delete_record) aqui
+    regravam o documento inteiro; o backend SQLite as sobrescreve para
+    gravar apenas a linha afetada.
+    """
+
+    INDEX_COLLECTIONS = ('dia08', 'dia16')
+
+    def _build_index(self, field: str, data: Any) -> Dict[str, List[Location]]:
+        index: Dict[str, List[Location]] = {}
+        for dia_key in self.INDEX_COLLECTIONS:
+            for posicao, item in enumerate(data.get(dia_key, []) or []):
+                value = item.get(field) if isinstance(item, dict) else None
+                if value is None or value == '':
+                    continue
+                index.setdefault(str(value), []).append((dia_key, posicao))
+        return index
+
+    def _field_index(self, field: str, data: Any, rebuild: bool = False) -> Dict[str, List[Location]]:
+        indexes = self.__dict__.setdefault('_record_indexes', {})
+        generation = self.generation
+        cached = indexes.get(field)
+        if rebuild or cached is None or cached[0] != generation or cached[1] is not data:
+            cached = (generation, data, self._build_index(field, data))
+            indexes[field] = cached
+        return cached[2]
+
+    def find_record(self, field: str, value: Any,
+                    dia_key: Optional[str] = None) -> Tuple[Optional[str], Optional[int], Optional[Dict[str, Any]]]:
+        """
+        Localiza o primeiro registro com ``item[field] == value`` (comparação como str)
+
+        Args:
+            field: Campo indexado (ex.: 'task_id', 'client_id')
+            value: Valor procurado
+            dia_key: Restringe a busca a 'dia08' ou 'dia16'
+
+        Returns:
+            (dia_key, posição, registro) ou (None, None, None). O registro é o
+            objeto do documento em cache: para alterá-lo, use ``locked()``.
+            Registros adicionados e ainda não salvos não são encontrados.
+        """
+        if value is None or value == '':
+            return NOT_FOUND
+        key = str(value)
+
+        with self._lock:
+            data = self.load()
+            for attempt in range(2):
+                index = self._field_index(field, data, rebuild=attempt > 0)
+                stale = False
+                for loc_dia, posicao in index.get(key, []):
+                    items = data.get(loc_dia, [])
+                    if posicao >= len(items) or str(items[posicao].get(field)) != key:
+                        stale = True
+                        break
+                    if dia_key is None or loc_dia == dia_key:
+                        return loc_dia, posicao, items[posicao]
+                if not stale:
+                    return NOT_FOUND
+            return NOT_FOUND
+
+    def replace_record(self, field: str, value: Any, record: Dict[str, Any],
+                       dia_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Substitui o registro localizado por ``find_record`` e grava
+
+        Returns:
+            O registro gravado, ou None se não foi encontrado
+        """
+        with self.locked():
+            data = self.load()
+            loc_dia, posicao, item = self.find_record(field, value, dia_key)
+            if item is None:
+                return None
+            data[loc_dia][posicao] = record
+            self.save(data)
+            return record
+
+    def update_record(self, field: str, value: Any, changes: Dict[str, Any],
+                      dia_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Altera campos do registro localizado; retorna o registro gravado ou None"""
+        with self.locked():
+            _loc_dia, _posicao, item = self.find_record(field, value, dia_key)
+            if item is None:
+                return None
+            return self.replace_record(field, value, dict(item, **changes), dia_key)
+
+    def append_record(self, dia_key: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Acrescenta um registro ao fim de ``dia_key`` e grava"""
+        with self.locked():
+            data = self.load()
+            data.setdefault(dia_key, []).append(record)
+            self.save(data)
+            return record
+
+    def delete_record(self, field: str, value: Any,
+                      dia_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Remove o registro localizado; retorna o registro removido ou None"""
+        with self.locked():
+            data = self.load()
+            loc_dia, posicao, item = self.find_record(field, value, dia_key)
+            if item is None:
+                return None
+            del data[loc_dia][posicao]
+            self.save(data)
+            return item
+
+
+class JsonDocumentStore(RecordIndexMixin):
+    """Cache de um documento JSON revalidado por mtime/tamanho do arquivo"""
+
+    def __init__(self, filepath: str, default: Any = None):
+        """
+        Args:
+            filepath: Caminho do arquivo JSON
+            default: Estrutura usada quando o arquivo não existe (copiada a cada uso)
+        """
+        self.filepath = os.path.abspath(filepath)
+        self.default = default if default is not None else {}
+        self._lock = threading.RLock()
+        self._data: Any = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._generation = 0
+
+    # ------------------------------------------------------------------
+    # Estado do arquivo
+    # ------------------------------------------------------------------
+
+    def _stat_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def exists(self) -> bool:
+        """Retorna True se o arquivo existe no disco"""
+        return os.path.exists(self.filepath)
+
+    @property
+    def generation(self) -> int:
+        """Contador incrementado sempre que o documento em memória muda"""
+        with self._lock:
+            self._revalidate()
+            return self._generation
+
+    @property
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, tamanho) do arquivo na última leitura/escrita"""
+        with self._lock:
+            self._revalidate()
+            return self._signature
+
+    # ------------------------------------------------------------------
+    # Leitura / escrita
+    # ------------------------------------------------------------------
+
+    def _read_file(self) -> Any:
+        # utf-8-sig remove BOM automaticamente se existir
+        with open(self.filepath, 'r', encoding='utf-8-sig') as f:
+            content = f.read().strip()
+        if content.startswith('\ufeff'):
+            content = content[1:]
+        return json.loads(content)
+
+    def _revalidate(self) -> None:
+        signature = self._stat_signature()
+        if self._data is not None and signature == self._signature:
+            return
+
+        if signature is None:
+            self._data = copy.deepcopy(self.default)
+        else:
+            self._data = self._read_file()
+        self._signature = signature
+        self._generation += 1
+
+    def load(self) -> Any:
+        """
+        Retorna o documento parseado (do cache se o arquivo não mudou)
+
+        O objeto retornado é compartilhado entre requisições: quem for
+        modificá-lo deve fazer isso dentro de ``locked()`` e chamar ``save()``.
+
+        Raises:
+            json.JSONDecodeError: se o arquivo existir mas não for JSON válido
+        """
+        with self._lock:
+            self._revalidate()
+            return self._data
+
+    def save(self, data: Any) -> None:
+        """Grava o documento de forma atômica e atualiza o cache"""
+        with self._lock:
+            directory = os.path.dirname(self.filepath)
+            os.makedirs(directory, exist_ok=True)
+
+            fd, tmp_path = tempfile.mkstemp(
+                prefix='.' + os.path.basename(self.filepath) + '.',
+                suffix='.tmp',
+                dir=directory
+            )
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.filepath)
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+            self._data = data
+            self._signature = self._stat_signature()
+            self._generation += 1
+
+    def invalidate(self) -> None:
+        """Descarta o cache; a próxima leitura relê o arquivo"""
+        with self._lock:
+            self._data = None
+            self._signature = None
+
+    @contextmanager
+    def locked(self):
+        """
+        Bloqueio exclusivo para ciclos leitura-modificação-escrita
+
+        Se uma exceção escapar do bloco, o cache é descartado para que
+        alterações parciais em memória não sobrevivam sem terem sido salvas.
+        """
+        with self._lock:
+            try:
+                yield self
+            except BaseException:
+                self.invalidate()
+                raise
+
+
+def get_document_store(filepath: str, default: Any = None) -> JsonDocumentStore:
+    """
+    Retorna o repositório compartilhado para o arquivo informado
+
+    Args:
+        filepath: Caminho do arquivo JSON
+        default: Estrutura padrão quando o arquivo não existe
+
+    Returns:
+        JsonDocumentStore: mesma instância para o mesmo caminho absoluto
+    """
+    key = os.path.abspath(filepath)
+    with _registry_lock:
+        store = _registry.get(key)
+        if store is None:
+            store = JsonDocumentStore(key, default=default)
+            _registry[key] = store
+        return store
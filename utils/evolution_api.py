@@ -1,14 +1,112 @@
 # utils/evolution_api.py
 # Módulo de integração com Evolution API para envio de mensagens WhatsApp
 
+import base64
+import hashlib
+import os
 import requests
-import time
-from typing import List, Dict, Optional, Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Dict, Optional, Tuple
+
+from utils.http_client import get_session
+from utils.rate_limiter import TokenBucket
+
+# Envio em massa: taxa sustentada, rajada e envios simultâneos. A taxa padrão
+# é o ritmo de sempre (uma mensagem a cada 2s); os envios simultâneos só
+# sobrepõem a latência da Evolution API, sem passar dessa taxa
+BULK_RATE_PER_SECOND = 0.5
+BULK_BURST = 1
+BULK_MAX_IN_FLIGHT = 4
+BULK_MAX_RETRIES = 2        # novas tentativas após HTTP 429
+BULK_DEFAULT_RETRY_AFTER = 10.0
+
+# Envio de documentos locais: 'base64' (JSON) ou 'multipart' (arquivo bruto)
+UPLOAD_MODES = ('base64', 'multipart')
+ENCODED_CACHE_MAX_BYTES = 64 * 1024 * 1024  # base64 mantido em memória
+
+DOCUMENT_MIMETYPES = {
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.txt': 'text/plain',
+    '.zip': 'application/zip',
+    '.rar': 'application/x-rar-compressed',
+}
+
+
+class EncodedFileCache:
+    """
+    Base64 de arquivos locais reaproveitado entre envios
+
+    A chave é o SHA-256 do conteúdo: reenvios e novas tentativas do mesmo
+    boleto não recodificam o arquivo, e cópias idênticas compartilham a
+    mesma entrada. O hash de cada arquivo é lembrado por (caminho, tamanho,
+    mtime), então um acerto não relê o disco. Entradas menos usadas saem
+    quando o total passa de ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = ENCODED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._encoded: 'OrderedDict[str, str]' = OrderedDict()  # sha256 -> base64
+        self._digests: Dict[Tuple[str, int, int], str] = {}     # (caminho, tamanho, mtime) -> sha256
+        self._size = 0
+
+    def get(self, path: str) -> str:
+        """Base64 (sem prefixo data:) do conteúdo atual do arquivo"""
+        st = os.stat(path)
+        stamp = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(stamp)
+            if digest in self._encoded:
+                self._encoded.move_to_end(digest)
+                self.hits += 1
+                return self._encoded[digest]
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            self._digests[stamp] = digest
+            encoded = self._encoded.get(digest)
+            if encoded is not None:
+                self._encoded.move_to_end(digest)
+                self.hits += 1
+                return encoded
+            self.misses += 1
+
+        encoded = base64.b64encode(content).decode('ascii')
+        with self._lock:
+            if len(encoded) <= self.max_bytes and digest not in self._encoded:
+                self._encoded[digest] = encoded
+                self._size += len(encoded)
+                while self._size > self.max_bytes:
+                    old_digest, old = self._encoded.popitem(last=False)
+                    self._size -= len(old)
+                    self._digests = {k: v for k, v in self._digests.items() if v != old_digest}
+        return encoded
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._encoded), 'bytes': self._size,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+ENCODED_FILES = EncodedFileCache()
+
 
 class EvolutionAPI:
     """Cliente para integração com Evolution API WhatsApp"""
     
-    def __init__(self, base_url: str, instance_name: str, api_key: str):
+    def __init__(self, base_url: str, instance_name: str, api_key: str,
+                 upload_mode: str = 'base64'):
         """
         Inicializa cliente da Evolution API
         
@@ -16,10 +114,15 @@ class EvolutionAPI:
             base_url: URL base da API (ex: https://zap.tekvosoft.com)
             instance_name: Nome da instância (ex: david-tekvo)
             api_key: Chave de API para autenticação
+            upload_mode: Como enviar documentos locais: 'base64' (JSON) ou
+                'multipart' (arquivo bruto, para versões da Evolution que aceitam)
         """
+        if upload_mode not in UPLOAD_MODES:
+            raise ValueError(f"upload_mode inválido: {upload_mode}")
         self.base_url = base_url.rstrip('/')
         self.instance_name = instance_name
         self.api_key = api_key
+        self.upload_mode = upload_mode
         self.headers = {
             'apikey': api_key,
             'Content-Type': 'application/json'
@@ -37,7 +140,7 @@ class EvolutionAPI:
             url = f"{self.base_url}/message/sendText/{self.instance_name}"
             
             # Verifica se a URL está acessível
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = get_session().get(url, headers=self.headers, timeout=10)
             
             # 404 ou 405 significa que a rota existe mas o método está errado (OK!)
             # 401 ou 403 significa autenticação inválida
@@ -106,7 +209,7 @@ class EvolutionAPI:
             print(f"DEBUG - Headers: {self.headers}")
             
             # Envia requisição
-            response = requests.post(
+            response = get_session().post(
                 url,
                 headers=self.headers,
                 json=payload,
@@ -125,6 +228,8 @@ class EvolutionAPI:
             else:
                 return False, {
                     'error': f'Status {response.status_code}',
+                    'status_code': response.status_code,
+                    'retry_after': response.headers.get('Retry-After'),
                     'message': response.text,
                     'url': url,
                     'payload': payload
@@ -179,7 +284,7 @@ class EvolutionAPI:
             print(f"DEBUG - Payload: {payload}")
             
             # Envia requisição
-            response = requests.post(
+            response = get_session().post(
                 url,
                 headers=self.headers,
                 json=payload,
@@ -198,7 +303,9 @@ class EvolutionAPI:
             else:
                 return False, {
                     'error': f'Status {response.status_code}',
-                    'message': response.text
+                    'message': response.text,
+                    'status_code': response.status_code,
+                    'retry_after': response.headers.get('Retry-After')
                 }
                 
         except requests.exceptions.Timeout:
@@ -213,16 +320,25 @@ class EvolutionAPI:
         phone: str,
         file_path: str,
         caption: str = "",
-        filename: str = None
+        filename: str = None,
+        media_url: Optional[str] = None
     ) -> Tuple[bool, Dict]:
         """
         Envia documento (PDF, DOC, XLSX, etc) para um número via WhatsApp
         
+        Arquivos locais vão em base64 no JSON (codificação reaproveitada entre
+        envios do mesmo arquivo, ver EncodedFileCache) ou como multipart se
+        ``upload_mode='multipart'``. Com ``media_url`` (URL pública do mesmo
+        arquivo, ex.: o proxy /boleto/<code>) a Evolution API baixa o arquivo
+        por ela e nada é codificado; se esse envio falhar, o arquivo local é
+        enviado.
+        
         Args:
             phone: Número de telefone (+5519999999999 ou 5519999999999)
             file_path: Caminho do arquivo local OU URL pública
             caption: Legenda do documento (opcional)
             filename: Nome do arquivo que aparecerá no WhatsApp (opcional)
+            media_url: URL pública do arquivo local, preferida ao upload (opcional)
             
         Returns:
             Tuple[bool, Dict]: (sucesso, resposta_da_api)
@@ -244,72 +360,26 @@ class EvolutionAPI:
             ... )
         """
         try:
-            import os
-            import base64
-            
             url = f"{self.base_url}/message/sendMedia/{self.instance_name}"
             formatted_phone = self.format_phone_number(phone).replace('@c.us', '')
             
-            # Determina tipo de arquivo e converte se necessário
-            file_data = None
+            is_local = os.path.exists(file_path)
+            if not is_local and not file_path.startswith(('http://', 'https://')):
+                raise ValueError(f"Arquivo não encontrado e não é URL válida: {file_path}")
             
-            # Se é arquivo local, converte para base64
-            if os.path.exists(file_path):
-                print(f"📄 Lendo arquivo local: {file_path}")
-                
-                with open(file_path, 'rb') as f:
-                    file_content = base64.b64encode(f.read()).decode('utf-8')
-                
-                # Detecta mimetype baseado na extensão
-                ext = os.path.splitext(file_path)[1].lower()
-                mimetype_map = {
-                    '.pdf': 'application/pdf',
-                    '.doc': 'application/msword',
-                    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                    '.xls': 'application/vnd.ms-excel',
-                    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    '.txt': 'text/plain',
-                    '.zip': 'application/zip',
-                    '.rar': 'application/x-rar-compressed',
-                }
-                mimetype = mimetype_map.get(ext, 'application/octet-stream')
-                
-                file_data = f"data:{mimetype};base64,{file_content}"
-                
-                if not filename:
+            if not filename:
+                if is_local:
                     filename = os.path.basename(file_path)
-                
-                file_size = len(file_content)
-                print(f"📦 Arquivo codificado: {file_size:,} bytes base64")
-            
-            # Se é URL, usa direto (Evolution API baixa automaticamente)
-            elif file_path.startswith(('http://', 'https://')):
-                print(f"🌐 Usando URL pública: {file_path}")
-                file_data = file_path
-                
-                if not filename:
+                else:
                     filename = file_path.split('/')[-1] or "documento.pdf"
             
-            else:
-                raise ValueError(f"Arquivo não encontrado e não é URL válida: {file_path}")
-            
             # Mont payload para Evolution API - FORMATO CORRETO PARA DOCUMENTOS
-            # A Evolution API espera base64 SEM o prefixo "data:..."
             payload = {
                 "number": formatted_phone,
                 "mediatype": "document",  # IMPORTANTE: tipo 'document' para PDFs/docs
                 "fileName": filename,  # Nome que aparece no WhatsApp
             }
             
-            # Para base64, remove o prefixo "data:..."
-            if file_data.startswith('data:'):
-                # Extrai apenas o base64 puro
-                base64_only = file_data.split(',', 1)[1] if ',' in file_data else file_data
-                payload["media"] = base64_only
-            else:
-                # É URL pública
-                payload["media"] = file_data
-            
             # Adiciona caption se fornecido
             if caption:
                 payload["caption"] = caption
@@ -319,41 +389,26 @@ class EvolutionAPI:
             print(f"   📝 Caption: {caption if caption else '(sem legenda)'}")
             print(f"   🔗 URL: {url}")
             
-            # Envia requisição
-            response = requests.post(
-                url,
-                headers=self.headers,
-                json=payload,
-                timeout=60  # Timeout maior para upload de arquivos
-            )
-            
-            print(f"📨 Status Code: {response.status_code}")
+            # URL pública: a Evolution API baixa o arquivo (nada é codificado aqui)
+            remote_url = media_url or (None if is_local else file_path)
+            if remote_url:
+                print(f"🌐 Usando URL pública: {remote_url}")
+                success, response_data = self._post_document(url, json_payload={**payload, "media": remote_url})
+                if success or not is_local or response_data.get('status_code') == 429:
+                    return success, response_data
+                print(f"🔁 Envio pela URL falhou, enviando o arquivo local")
+            
+            if self.upload_mode == 'multipart':
+                print(f"📄 Enviando arquivo local (multipart): {file_path}")
+                mimetype = DOCUMENT_MIMETYPES.get(os.path.splitext(file_path)[1].lower(), 'application/octet-stream')
+                with open(file_path, 'rb') as f:
+                    return self._post_document(url, form=payload, files={'file': (filename, f, mimetype)})
             
-            # Processa resposta
-            if response.status_code in [200, 201]:
-                try:
-                    response_data = response.json()
-                    print(f"✅ Documento enviado com sucesso!")
-                    print(f"   Response: {response_data}")
-                    return True, response_data
-                except ValueError:
-                    # Se não é JSON, considera sucesso mesmo assim
-                    print(f"✅ Documento enviado (resposta não-JSON)")
-                    return True, {'message': 'Documento enviado com sucesso', 'raw_response': response.text}
-            else:
-                error_msg = f'Status {response.status_code}'
-                try:
-                    error_data = response.json()
-                    error_msg = error_data.get('message', error_msg)
-                except:
-                    error_msg = response.text
-                
-                print(f"❌ Falha ao enviar: {error_msg}")
-                return False, {
-                    'error': error_msg,
-                    'status_code': response.status_code,
-                    'response': response.text
-                }
+            # A Evolution API espera base64 SEM o prefixo "data:..."
+            print(f"📄 Lendo arquivo local: {file_path}")
+            media = ENCODED_FILES.get(file_path)
+            print(f"📦 Arquivo codificado: {len(media):,} bytes base64")
+            return self._post_document(url, json_payload={**payload, "media": media})
                 
         except FileNotFoundError as e:
             error_msg = f'Arquivo não encontrado: {file_path}'
@@ -374,69 +429,146 @@ class EvolutionAPI:
             traceback.print_exc()
             return False, {'error': error_msg}
     
+    def _post_document(
+        self,
+        url: str,
+        json_payload: Optional[Dict] = None,
+        form: Optional[Dict] = None,
+        files: Optional[Dict] = None
+    ) -> Tuple[bool, Dict]:
+        """Envia o documento (JSON ou multipart) e interpreta a resposta"""
+        if files is not None:
+            # requests monta o Content-Type multipart com o boundary
+            response = get_session().post(
+                url,
+                headers={'apikey': self.api_key},
+                data=form,
+                files=files,
+                timeout=60  # Timeout maior para upload de arquivos
+            )
+        else:
+            response = get_session().post(
+                url,
+                headers=self.headers,
+                json=json_payload,
+                timeout=60  # Timeout maior para upload de arquivos
+            )
+        
+        print(f"📨 Status Code: {response.status_code}")
+        
+        # Processa resposta
+        if response.status_code in [200, 201]:
+            try:
+                response_data = response.json()
+                print(f"✅ Documento enviado com sucesso!")
+                print(f"   Response: {response_data}")
+                return True, response_data
+            except ValueError:
+                # Se não é JSON, considera sucesso mesmo assim
+                print(f"✅ Documento enviado (resposta não-JSON)")
+                return True, {'message': 'Documento enviado com sucesso', 'raw_response': response.text}
+        
+        error_msg = f'Status {response.status_code}'
+        try:
+            error_data = response.json()
+            error_msg = error_data.get('message', error_msg)
+        except:
+            error_msg = response.text
+        
+        print(f"❌ Falha ao enviar: {error_msg}")
+        return False, {
+            'error': error_msg,
+            'status_code': response.status_code,
+            'retry_after': response.headers.get('Retry-After'),
+            'response': response.text
+        }
+    
     def send_bulk_messages(
         self,
         contacts: List[Dict[str, str]],
         message: str,
-        delay_between_messages: float = 2.0,
-        progress_callback: Optional[callable] = None
+        delay_between_messages: Optional[float] = None,
+        progress_callback: Optional[callable] = None,
+        rate_per_second: float = BULK_RATE_PER_SECOND,
+        max_in_flight: int = BULK_MAX_IN_FLIGHT
     ) -> Dict[str, any]:
         """
         Envia mensagem para múltiplos contatos
         
+        Até ``max_in_flight`` envios ficam em andamento ao mesmo tempo, com a
+        taxa limitada por um token bucket. Se a Evolution API responder 429,
+        todos os envios aguardam o Retry-After e a mensagem é reenviada.
+        
         Args:
             contacts: Lista de dicts com 'phone' e 'name'
             message: Texto da mensagem (pode usar {nome} para personalizar)
-            delay_between_messages: Delay entre envios em segundos
+            delay_between_messages: Intervalo médio entre envios em segundos
+                (se informado, substitui ``rate_per_second``)
             progress_callback: Função para callback de progresso
+            rate_per_second: Envios por segundo (taxa sustentada)
+            max_in_flight: Envios simultâneos
             
         Returns:
             Dict com estatísticas do envio
         """
+        total = len(contacts)
         results = {
-            'total': len(contacts),
+            'total': total,
             'success': 0,
             'failed': 0,
-            'details': []
+            'details': [None] * total
         }
         
-        for index, contact in enumerate(contacts, 1):
+        if delay_between_messages:
+            rate_per_second = 1.0 / delay_between_messages
+        results_lock = threading.Lock()
+        
+        def send_one(item: Tuple[int, Dict[str, str]]) -> Tuple[bool, Dict]:
+            index, contact = item
             phone = contact.get('phone', '')
             name = contact.get('name', 'Cliente')
             
-            # Personaliza mensagem com nome
-            personalized_message = message.replace('{nome}', name)
-            
             if progress_callback:
                 progress_callback(
-                    f"📤 [{index}/{len(contacts)}] Enviando para {name} ({phone})..."
+                    f"📤 [{index}/{total}] Enviando para {name} ({phone})..."
                 )
             
-            # Envia mensagem
-            success, response = self.send_text_message(phone, personalized_message)
+            # Personaliza mensagem com nome
+            return self.send_text_message(phone, message.replace('{nome}', name))
+        
+        def on_result(item: Tuple[int, Dict[str, str]], success: bool, response: Dict) -> None:
+            index, contact = item
+            phone = contact.get('phone', '')
+            name = contact.get('name', 'Cliente')
             
-            # Registra resultado
-            result_detail = {
-                'phone': phone,
-                'name': name,
-                'success': success,
-                'response': response
-            }
-            results['details'].append(result_detail)
+            # Registra resultado (na posição do contato)
+            with results_lock:
+                results['details'][index - 1] = {
+                    'phone': phone,
+                    'name': name,
+                    'success': success,
+                    'response': response
+                }
+                if success:
+                    results['success'] += 1
+                else:
+                    results['failed'] += 1
             
-            if success:
-                results['success'] += 1
-                if progress_callback:
+            if progress_callback:
+                if success:
                     progress_callback(f"✅ Enviado para {name}")
-            else:
-                results['failed'] += 1
-                error_msg = response.get('error', 'Erro desconhecido')
-                if progress_callback:
+                else:
+                    error_msg = response.get('error', 'Erro desconhecido')
                     progress_callback(f"❌ Falha para {name}: {error_msg}")
-            
-            # Delay entre mensagens (exceto última)
-            if index < len(contacts):
-                time.sleep(delay_between_messages)
+        
+        self.dispatch_concurrently(
+            list(enumerate(contacts, 1)),
+            send_one,
+            on_result=on_result,
+            progress_callback=progress_callback,
+            rate_per_second=rate_per_second,
+            max_in_flight=max_in_flight
+        )
         
         # Resumo final
         if progress_callback:
@@ -450,6 +582,58 @@ class EvolutionAPI:
         
         return results
     
+    def dispatch_concurrently(
+        self,
+        items: List[Any],
+        send_one: Callable[[Any], Tuple[bool, Dict]],
+        on_result: Optional[Callable[[Any, bool, Dict], None]] = None,
+        progress_callback: Optional[callable] = None,
+        rate_per_second: float = BULK_RATE_PER_SECOND,
+        max_in_flight: int = BULK_MAX_IN_FLIGHT
+    ) -> List[Tuple[bool, Dict]]:
+        """
+        Executa ``send_one(item)`` para cada item com envios simultâneos
+        
+        Até ``max_in_flight`` chamadas ficam em andamento ao mesmo tempo, com a
+        taxa limitada por um token bucket. Se a resposta tiver status_code 429,
+        todos os envios aguardam o Retry-After e o item é reenviado.
+        
+        Args:
+            items: Itens a enviar
+            send_one: Função que envia um item e retorna (sucesso, resposta)
+            on_result: Chamada (na thread do envio) com o resultado final de cada item
+            progress_callback: Função para callback de progresso
+            rate_per_second: Envios por segundo (taxa sustentada)
+            max_in_flight: Envios simultâneos
+            
+        Returns:
+            Lista de (sucesso, resposta) na ordem dos itens
+        """
+        bucket = TokenBucket(rate_per_second, capacity=min(BULK_BURST, max_in_flight))
+        
+        def run(item: Any) -> Tuple[bool, Dict]:
+            # Envia (respeitando a taxa e o 429 da Evolution)
+            for attempt in range(BULK_MAX_RETRIES + 1):
+                bucket.acquire()
+                success, response = send_one(item)
+                if success or response.get('status_code') != 429 or attempt == BULK_MAX_RETRIES:
+                    break
+                wait = retry_after_seconds(response.get('retry_after'))
+                bucket.pause(wait)
+                if progress_callback:
+                    progress_callback(f"⏳ Limite da Evolution API atingido, aguardando {wait:g}s...")
+            
+            if on_result:
+                on_result(item, success, response)
+            return success, response
+        
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, max_in_flight),
+                                thread_name_prefix='whatsapp-bulk') as pool:
+            # list() propaga exceções inesperadas das threads
+            return list(pool.map(run, items))
+    
     def validate_config(self) -> Tuple[bool, str]:
         """
         Valida configurações da API
@@ -480,6 +664,14 @@ class EvolutionAPI:
             return False, f"Configuração inválida: {message}"
 
 
+def retry_after_seconds(value) -> float:
+    """Segundos do cabeçalho Retry-After (padrão se ausente ou em formato de data)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return BULK_DEFAULT_RETRY_AFTER
+
+
 def parse_contacts_from_text(text: str) -> List[Dict[str, str]]:
     """
     Parseia contatos de texto no formato:
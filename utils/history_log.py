@@ -0,0 +1,371 @@
+"""
+Histórico de execuções em formato JSONL (uma entrada JSON por linha)
+
+Substitui os arquivos history_dia8.json / history_dia16.json, que eram
+lidos e regravados inteiros a cada cota processada. Aqui cada registro é
+apenas anexado ao final do arquivo, então o custo de uma escrita não
+depende do tamanho do histórico.
+
+Para leitura paginada é mantido em memória um índice com a posição (byte)
+de cada linha; ele é atualizado de forma incremental quando o arquivo
+cresce e reconstruído quando o arquivo é substituído (compactação/limpeza).
+
+Uso:
+    from utils.history_log import get_history_log
+
+    log = get_history_log(PROJECT_ROOT, 'dia8')
+    log.append({'grupo': '1550', 'cota': '1065', 'status': '✅ Sucesso'})
+
+    entries, total = log.read_page(offset=0, limit=50, newest_first=True)
+    entries, total = log.query(grupo='1550', status='failed', limit=50, newest_first=True)
+    removed = log.compact(keep=lambda e: '❌' not in e.get('status', ''))
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+STATUS_CLASSES = ('success', 'failed', 'stopped', 'other')
+
+_registry: Dict[str, 'HistoryLog'] = {}
+_registry_lock = threading.Lock()
+_backend_factory: Optional[Callable[[str, str], Any]] = None
+
+
+def classify_status(status: str) -> str:
+    """
+    Classifica o texto de status de uma entrada do histórico
+
+    Returns:
+        'success', 'failed', 'stopped' ou 'other'
+    """
+    status = status or ''
+    lowered = status.lower()
+    if 'sucesso' in lowered or '✅' in status:
+        return 'success'
+    if 'erro' in lowered or '❌' in status or 'falha' in lowered:
+        return 'failed'
+    if '⏹️' in status or 'parado' in lowered:
+        return 'stopped'
+    return 'other'
+
+
+# Campos de cada entrada mantidos no índice: (data, grupo, cota, classe do status)
+EntryKey = Tuple[str, str, str, str]
+
+
+def _entry_key(entry: Dict[str, Any]) -> EntryKey:
+    return (
+        str(entry.get('data') or ''),
+        str(entry.get('grupo') or ''),
+        str(entry.get('cota') or ''),
+        classify_status(entry.get('status', '')),
+    )
+
+
+def _key_matcher(data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                 grupo: Optional[str] = None, cota: Optional[str] = None,
+                 status: Optional[str] = None) -> Callable[[EntryKey], bool]:
+    """Monta o filtro usado por ``query`` (datas no formato AAAA-MM-DD, inclusivas)"""
+    def matches(key: EntryKey) -> bool:
+        data, key_grupo, key_cota, key_status = key
+        return (
+            (not data_inicio or data >= data_inicio)
+            and (not data_fim or data <= data_fim)
+            and (not grupo or key_grupo == grupo)
+            and (not cota or key_cota == cota)
+            and (not status or key_status == status)
+        )
+    return matches
+
+
+class HistoryLog:
+    """Log append-only de entradas de histórico com índice de linhas"""
+
+    def __init__(self, filepath: str, legacy_path: Optional[str] = None):
+        """
+        Args:
+            filepath: Caminho do arquivo .jsonl
+            legacy_path: Arquivo .json antigo (array) importado na primeira utilização
+        """
+        self.filepath = os.path.abspath(filepath)
+        self.legacy_path = os.path.abspath(legacy_path) if legacy_path else None
+        self._lock = threading.RLock()
+        self._offsets: List[int] = []
+        self._keys: List[EntryKey] = []
+        self._indexed_size = 0
+        self._inode: Optional[int] = None
+        self._migrated = False
+
+    # ------------------------------------------------------------------
+    # Migração e índice
+    # ------------------------------------------------------------------
+
+    def _ensure_migrated(self) -> None:
+        if self._migrated:
+            return
+        self._migrated = True
+
+        if os.path.exists(self.filepath) or not self.legacy_path:
+            return
+        if not os.path.exists(self.legacy_path):
+            return
+
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Não foi possível migrar {os.path.basename(self.legacy_path)}: {e}")
+            return
+
+        if isinstance(entries, list):
+            self._write_all(entries)
+            print(f"📦 Histórico migrado para {os.path.basename(self.filepath)} ({len(entries)} registros)")
+
+    def _reset_index(self) -> None:
+        self._offsets = []
+        self._keys = []
+        self._indexed_size = 0
+        self._inode = None
+
+    def _refresh_index(self) -> None:
+        """Indexa linhas novas (ou reindexa tudo se o arquivo foi substituído)"""
+        self._ensure_migrated()
+
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            self._reset_index()
+            return
+
+        if st.st_ino != self._inode or st.st_size < self._indexed_size:
+            self._reset_index()
+            self._inode = st.st_ino
+
+        if st.st_size == self._indexed_size:
+            return
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(self._indexed_size)
+            position = self._indexed_size
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    # Linha incompleta (escrita interrompida) - não indexa
+                    break
+                entry = self._parse(raw)
+                if entry is not None:
+                    self._offsets.append(position)
+                    self._keys.append(_entry_key(entry))
+                position += len(raw)
+            self._indexed_size = position
+
+    @staticmethod
+    def _parse(raw: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            entry = json.loads(raw.decode('utf-8'))
+        except ValueError:
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    @staticmethod
+    def _encode(entry: Dict[str, Any]) -> bytes:
+        return (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Anexa uma entrada ao final do log (O(1), não relê o histórico)"""
+        data = self._encode(entry)
+        with self._lock:
+            self._refresh_index()
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+
+            with open(self.filepath, 'ab') as f:
+                if f.seek(0, os.SEEK_END) > self._indexed_size:
+                    # Outro processo pode ter anexado linhas completas depois do
+                    # _refresh_index(); só o que sobrar sem '\n' é uma escrita
+                    # interrompida, e essa linha é fechada
+                    self._refresh_index()
+                    if f.seek(0, os.SEEK_END) > self._indexed_size:
+                        f.write(b'\n')
+                f.write(data)
+                f.flush()
+
+            # Indexa a entrada pela leitura do trecho novo: a posição em que o
+            # append caiu depende de outros processos escrevendo no arquivo
+            self._refresh_index()
+
+    def _write_all(self, entries: List[Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.filepath)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(
+            prefix='.' + os.path.basename(self.filepath) + '.',
+            suffix='.tmp',
+            dir=directory
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for entry in entries:
+                    f.write(self._encode(entry))
+            os.replace(tmp_path, self.filepath)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        self._reset_index()
+
+    def compact(self, keep: Optional[Callable[[Dict[str, Any]], bool]] = None) -> int:
+        """
+        Regrava o log descartando linhas corrompidas e, opcionalmente,
+        entradas para as quais ``keep(entry)`` retorna False
+
+        Returns:
+            int: Quantidade de entradas válidas removidas pelo filtro
+        """
+        with self._lock:
+            entries = list(self.iter_entries())
+            kept = [e for e in entries if keep is None or keep(e)]
+            self._write_all(kept)
+            return len(entries) - len(kept)
+
+    def clear(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._ensure_migrated()
+            self._write_all([])
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        """Quantidade de entradas válidas no log"""
+        with self._lock:
+            self._refresh_index()
+            return len(self._offsets)
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Percorre todas as entradas em ordem cronológica (streaming)"""
+        with self._lock:
+            self._refresh_index()
+            if not self._offsets:
+                return
+            end = self._indexed_size
+            f = open(self.filepath, 'rb')
+
+        # O arquivo já aberto continua válido mesmo se for substituído
+        with f:
+            position = 0
+            for raw in f:
+                position += len(raw)
+                if position > end:
+                    break
+                entry = self._parse(raw)
+                if entry is not None:
+                    yield entry
+
+    def read_page(self, offset: int = 0, limit: Optional[int] = None,
+                  newest_first: bool = False) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Lê uma página do histórico usando o índice de linhas
+
+        Args:
+            offset: Quantidade de entradas a pular
+            limit: Máximo de entradas retornadas (None = todas)
+            newest_first: Se True, a página começa pelas entradas mais recentes
+
+        Returns:
+            (entradas, total)
+        """
+        with self._lock:
+            self._refresh_index()
+            total = len(self._offsets)
+            offset = max(0, offset)
+
+            positions = list(reversed(self._offsets)) if newest_first else self._offsets
+            positions = positions[offset:] if limit is None else positions[offset:offset + max(0, limit)]
+            return self._read_at(positions), total
+
+    def query(self, offset: int = 0, limit: Optional[int] = None, newest_first: bool = False,
+              **filters: Optional[str]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Como ``read_page``, mas só com as entradas que atendem aos filtros
+
+        O filtro é aplicado sobre o índice em memória; apenas as entradas da
+        página retornada são lidas do arquivo.
+
+        Args:
+            **filters: data_inicio, data_fim (AAAA-MM-DD), grupo, cota e
+                status (uma das classes em STATUS_CLASSES)
+
+        Returns:
+            (entradas, total de entradas que atendem aos filtros)
+        """
+        matches = _key_matcher(**filters)
+        with self._lock:
+            self._refresh_index()
+            positions = [
+                position for position, key in zip(self._offsets, self._keys) if matches(key)
+            ]
+            total = len(positions)
+            if newest_first:
+                positions.reverse()
+            offset = max(0, offset)
+            positions = positions[offset:] if limit is None else positions[offset:offset + max(0, limit)]
+            return self._read_at(positions), total
+
+    def _read_at(self, positions: List[int]) -> List[Dict[str, Any]]:
+        if not positions:
+            return []
+        entries = []
+        with open(self.filepath, 'rb') as f:
+            for position in positions:
+                f.seek(position)
+                entry = self._parse(f.readline())
+                if entry is not None:
+                    entries.append(entry)
+        return entries
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        """Últimas ``n`` entradas, da mais recente para a mais antiga"""
+        return self.read_page(0, n, newest_first=True)[0]
+
+
+def get_history_log(project_root: str, dia: str) -> HistoryLog:
+    """
+    Retorna o log de histórico compartilhado de um dia ('dia8' ou 'dia16')
+
+    O arquivo antigo history_<dia>.json, se existir, é importado
+    automaticamente na primeira utilização.
+    """
+    if _backend_factory is not None:
+        return _backend_factory(project_root, dia)
+
+    filepath = os.path.abspath(os.path.join(project_root, f'history_{dia}.jsonl'))
+    with _registry_lock:
+        log = _registry.get(filepath)
+        if log is None:
+            legacy_path = os.path.join(project_root, f'history_{dia}.json')
+            log = HistoryLog(filepath, legacy_path=legacy_path)
+            _registry[filepath] = log
+        return log
+
+
+def set_history_backend(factory: Optional[Callable[[str, str], Any]]) -> None:
+    """
+    Substitui o armazenamento do histórico (ex.: SQLite)
+
+    Args:
+        factory: Função (project_root, dia) -> objeto com a interface de
+            HistoryLog, ou None para voltar aos arquivos JSONL
+    """
+    global _backend_factory
+    _backend_factory = factory
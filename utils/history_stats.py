@@ -0,0 +1,193 @@
+"""
+Estatísticas do histórico de execuções mantidas de forma incremental
+
+Em vez de reler todo o histórico e classificar cada entrada a cada consulta
+do dashboard, os contadores (total/sucesso/falha/parado - geral, por grupo e
+por data) são atualizados apenas com as entradas novas do log e gravados em
+history_<dia>.stats.json, ao lado do histórico.
+
+Para detectar compactação/limpeza do log, os contadores guardam a
+quantidade de entradas processadas e uma impressão digital da última delas;
+se o log não bater mais com isso, tudo é recontado.
+
+Uso:
+    from utils.history_stats import get_history_stats
+
+    stats = get_history_stats(PROJECT_ROOT, 'dia8')
+    stats.refresh()            # após history_log.append(entry)
+    resumo = stats.snapshot()  # {'total': ..., 'success': ..., 'por_grupo': {...}, ...}
+
+Reconstrução manual (recuperação):
+    python -m utils.history_stats [--dia dia8|dia16]
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from utils.data_store import get_document_store
+from utils.history_log import classify_status, get_history_log
+
+STATUS_KEYS = ('success', 'failed', 'stopped')
+
+_registry: Dict[str, 'HistoryStats'] = {}
+_registry_lock = threading.Lock()
+
+
+def _empty_bucket() -> Dict[str, int]:
+    return {'total': 0, 'success': 0, 'failed': 0, 'stopped': 0}
+
+
+def _empty_counters() -> Dict[str, Any]:
+    counters = _empty_bucket()
+    counters.update({'entries': 0, 'last_fingerprint': None, 'por_grupo': {}, 'por_data': {}})
+    return counters
+
+
+def _fingerprint(entry: Dict[str, Any]) -> str:
+    raw = json.dumps(entry, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()
+
+
+class HistoryStats:
+    """Contadores persistidos de um log de histórico"""
+
+    def __init__(self, history_log: Any, filepath: str):
+        """
+        Args:
+            history_log: Log com a interface de utils.history_log.HistoryLog
+            filepath: Arquivo JSON onde os contadores são persistidos
+        """
+        self.history_log = history_log
+        self.filepath = os.path.abspath(filepath)
+        self._store = get_document_store(self.filepath, default=None)
+        self._lock = threading.RLock()
+        self._counters: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # Contagem
+    # ------------------------------------------------------------------
+
+    def _add(self, counters: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        kind = classify_status(entry.get('status', ''))
+        buckets = [
+            counters,
+            counters['por_grupo'].setdefault(str(entry.get('grupo') or '-'), _empty_bucket()),
+            counters['por_data'].setdefault(str(entry.get('data') or '-'), _empty_bucket()),
+        ]
+        for bucket in buckets:
+            bucket['total'] += 1
+            if kind in STATUS_KEYS:
+                bucket[kind] += 1
+
+        counters['entries'] += 1
+        counters['last_fingerprint'] = _fingerprint(entry)
+
+    def _load(self) -> Dict[str, Any]:
+        if self._counters is None:
+            stored = self._store.load()
+            if isinstance(stored, dict) and 'entries' in stored:
+                self._counters = copy.deepcopy(stored)
+            else:
+                self._counters = _empty_counters()
+        return self._counters
+
+    def _in_sync(self, counters: Dict[str, Any], total: int) -> bool:
+        """Verifica se as entradas já contadas ainda são o início do log"""
+        processed = counters['entries']
+        if processed > total:
+            return False
+        if processed == 0:
+            return True
+        last, _total = self.history_log.read_page(processed - 1, 1)
+        return bool(last) and _fingerprint(last[0]) == counters['last_fingerprint']
+
+    def refresh(self) -> int:
+        """
+        Conta as entradas anexadas desde a última atualização
+
+        Returns:
+            int: Quantidade de entradas processadas (todas, se houve recontagem)
+        """
+        with self._lock:
+            counters = self._load()
+            total = self.history_log.count()
+
+            if not self._in_sync(counters, total):
+                return self.rebuild()
+            if counters['entries'] == total:
+                return 0
+
+            novas, _total = self.history_log.read_page(counters['entries'])
+            for entry in novas:
+                self._add(counters, entry)
+            self._store.save(counters)
+            return len(novas)
+
+    def rebuild(self) -> int:
+        """Recalcula todos os contadores a partir do log"""
+        with self._lock:
+            counters = _empty_counters()
+            for entry in self.history_log.iter_entries():
+                self._add(counters, entry)
+            self._counters = counters
+            self._store.save(counters)
+            return counters['entries']
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Contadores atuais (cópia), sem os campos de controle"""
+        with self._lock:
+            self.refresh()
+            result = copy.deepcopy(self._counters)
+        result.pop('entries', None)
+        result.pop('last_fingerprint', None)
+        return result
+
+
+def get_history_stats(project_root: str, dia: str) -> HistoryStats:
+    """
+    Retorna os contadores compartilhados de um dia ('dia8' ou 'dia16')
+
+    O log usado é o de get_history_log (JSONL ou o backend configurado).
+    """
+    filepath = os.path.abspath(os.path.join(project_root, f'history_{dia}.stats.json'))
+    history_log = get_history_log(project_root, dia)
+    with _registry_lock:
+        stats = _registry.get(filepath)
+        if stats is None or stats.history_log is not history_log:
+            stats = HistoryStats(history_log, filepath)
+            _registry[filepath] = stats
+        return stats
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+    parser = argparse.ArgumentParser(description='Reconstrói as estatísticas do histórico')
+    parser.add_argument('--dia', choices=['dia8', 'dia16'], help='Padrão: ambos')
+    args = parser.parse_args()
+
+    if os.environ.get('OXCASH_STORAGE', 'json').lower() == 'sqlite':
+        from utils.history_log import set_history_backend
+        from utils.sqlite_store import SqliteDatabase
+
+        database = SqliteDatabase(
+            os.environ.get('OXCASH_SQLITE_PATH') or os.path.join(project_root, 'data', 'oxcash.db')
+        )
+        set_history_backend(lambda root, dia: database.history_log(dia))
+
+    for dia in [args.dia] if args.dia else ['dia8', 'dia16']:
+        total = get_history_stats(project_root, dia).rebuild()
+        print(f"✅ {dia}: estatísticas reconstruídas ({total} registros)")
@@ -0,0 +1,135 @@
+"""
+Cliente HTTP compartilhado pelas integrações externas (Evolution API,
+Todoist, Servopa)
+
+Uma única ``requests.Session`` para todo o processo:
+- Pool de conexões por host com keep-alive: chamadas repetidas ao mesmo
+  host reaproveitam a conexão TCP/TLS em vez de abrir uma nova;
+- Timeout padrão em toda requisição que não informar um;
+- Novas tentativas com backoff exponencial para falhas de conexão e
+  respostas 429/5xx, apenas em métodos idempotentes (GET, HEAD, PUT,
+  DELETE...). POST nunca é repetido automaticamente: não há como saber se
+  a mensagem do WhatsApp já foi enviada;
+- Métricas por host (requisições, erros, novas tentativas, tempo).
+
+Cookies recebidos não são guardados na sessão, para que uma integração não
+envie os cookies de outra; use o parâmetro ``cookies`` de cada chamada.
+
+Uso:
+    from utils.http_client import get_session
+
+    response = get_session().get(url, headers=headers)
+    print(get_metrics())   # {'api.todoist.com': {'requests': 12, ...}}
+"""
+
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 30)  # (conexão, leitura) em segundos
+POOL_CONNECTIONS = 10   # hosts com pool mantido ao mesmo tempo
+POOL_MAXSIZE = 20       # conexões reaproveitáveis por host
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.3     # 0.3s, 0.6s...
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_session: Optional['PooledSession'] = None
+_session_lock = threading.Lock()
+
+
+def default_retry() -> Retry:
+    """Política padrão de novas tentativas (somente métodos idempotentes)"""
+    return Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,  # devolve a última resposta em vez de RetryError
+    )
+
+
+class PooledSession(requests.Session):
+    """Session com pool por host, timeout padrão, retry e métricas por host"""
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 retries: Optional[Retry] = None, pool_connections: int = POOL_CONNECTIONS,
+                 pool_maxsize: int = POOL_MAXSIZE):
+        super().__init__()
+        self.default_timeout = timeout
+        self.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retries if retries is not None else default_retry(),
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, Union[int, float, Dict[str, int]]]] = {}
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.default_timeout
+
+        host = urlsplit(url).netloc.lower()
+        started = time.monotonic()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException as e:
+            self._record(host, time.monotonic() - started, error=type(e).__name__)
+            raise
+
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', ()) or ()
+        self._record(host, time.monotonic() - started, status=response.status_code, retries=len(retries))
+        return response
+
+    def _record(self, host: str, elapsed: float, status: Optional[int] = None,
+                error: Optional[str] = None, retries: int = 0) -> None:
+        with self._metrics_lock:
+            metrics = self._metrics.setdefault(host, {
+                'requests': 0, 'errors': 0, 'retries': 0,
+                'total_seconds': 0.0, 'max_seconds': 0.0, 'status': {},
+            })
+            metrics['requests'] += 1
+            metrics['retries'] += retries
+            metrics['total_seconds'] += elapsed
+            metrics['max_seconds'] = max(metrics['max_seconds'], elapsed)
+            key = str(status) if status is not None else error
+            metrics['status'][key] = metrics['status'].get(key, 0) + 1
+            if error is not None or status >= 400:
+                metrics['errors'] += 1
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Cópia das métricas por host, com o tempo médio por requisição"""
+        with self._metrics_lock:
+            snapshot = {}
+            for host, metrics in self._metrics.items():
+                item = dict(metrics, status=dict(metrics['status']))
+                item['avg_seconds'] = round(item['total_seconds'] / item['requests'], 4)
+                item['total_seconds'] = round(item['total_seconds'], 4)
+                item['max_seconds'] = round(item['max_seconds'], 4)
+                snapshot[host] = item
+            return snapshot
+
+
+def get_session() -> PooledSession:
+    """Sessão compartilhada do processo (criada no primeiro uso)"""
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = PooledSession()
+        return _session
+
+
+def get_metrics() -> Dict[str, Dict]:
+    """Métricas por host da sessão compartilhada"""
+    return get_session().metrics()
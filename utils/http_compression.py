@@ -0,0 +1,205 @@
+"""
+Compressão gzip/brotli das respostas do Flask
+
+Respostas compressíveis (JSON, HTML, CSS, JS...) acima de um tamanho mínimo
+são comprimidas conforme o Accept-Encoding do navegador. Brotli é usado
+quando o pacote ``brotli`` está instalado; caso contrário apenas gzip.
+
+Os arquivos de /static são comprimidos uma única vez (na inicialização e
+novamente só se o arquivo mudar), em vez de a cada requisição.
+
+A ETag de uma resposta comprimida ganha o sufixo da codificação
+(``"<tag>-gzip"``), já que cada representação precisa do próprio validador;
+``strip_encoding_etag`` devolve a ETag original para comparar nas views.
+
+Uso:
+    from utils.http_compression import init_compression
+
+    init_compression(app)
+"""
+
+import gzip
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/javascript',
+    'text/plain',
+    'text/xml',
+    'image/svg+xml',
+}
+DEFAULT_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5          # respostas dinâmicas: equilíbrio entre CPU e tamanho
+BROTLI_STATIC_QUALITY = 11  # estáticos são comprimidos uma vez só
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Codificações suportadas, em ordem de preferência"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding) -> Optional[str]:
+    """
+    Escolhe a codificação aceita pelo cliente
+
+    Args:
+        accept_encoding: request.accept_encodings (werkzeug MIMEAccept/Accept)
+
+    Returns:
+        'br', 'gzip' ou None
+    """
+    for encoding in available_encodings():
+        if accept_encoding[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """Comprime ``data`` com 'gzip' ou 'br'"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_STATIC_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=9 if static else GZIP_LEVEL, mtime=0)
+
+
+def encoding_etag(etag: str, encoding: str) -> str:
+    """ETag da representação comprimida com ``encoding``"""
+    return f'{etag}-{encoding}'
+
+
+def strip_encoding_etag(etag: str) -> str:
+    """ETag original de uma representação comprimida (ou a própria ETag)"""
+    for encoding in ('br', 'gzip'):
+        suffix = f'-{encoding}'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)]
+    return etag
+
+
+def _is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and (mimetype in COMPRESSIBLE_MIMETYPES or mimetype.endswith('+json'))
+
+
+class StaticCompressionCache:
+    """Versões comprimidas dos arquivos estáticos, revalidadas por mtime/tamanho"""
+
+    def __init__(self, static_folder: str, min_size: int = DEFAULT_MIN_SIZE):
+        self.static_folder = os.path.abspath(static_folder)
+        self.min_size = min_size
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, str], Tuple[Tuple[int, int], bytes]] = {}
+
+    def get(self, filepath: str, encoding: str) -> Optional[bytes]:
+        """Conteúdo comprimido de ``filepath`` (None se não vale a pena comprimir)"""
+        filepath = os.path.abspath(filepath)
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        if st.st_size < self.min_size:
+            return None
+
+        signature = (st.st_mtime_ns, st.st_size)
+        key = (filepath, encoding)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        with open(filepath, 'rb') as f:
+            data = compress(f.read(), encoding, static=True)
+        with self._lock:
+            self._cache[key] = (signature, data)
+        return data
+
+    def warm_up(self) -> int:
+        """Pré-comprime todos os estáticos compressíveis; retorna a quantidade"""
+        import mimetypes
+
+        total = 0
+        for root, _dirs, files in os.walk(self.static_folder):
+            for name in files:
+                if not _is_compressible(mimetypes.guess_type(name)[0]):
+                    continue
+                for encoding in available_encodings():
+                    if self.get(os.path.join(root, name), encoding) is not None:
+                        total += 1
+        return total
+
+
+def init_compression(app, min_size: int = DEFAULT_MIN_SIZE) -> StaticCompressionCache:
+    """
+    Registra a compressão das respostas no app Flask
+
+    Args:
+        app: Aplicação Flask
+        min_size: Tamanho mínimo (bytes) para comprimir
+
+    Returns:
+        StaticCompressionCache: cache dos estáticos (já pré-comprimidos)
+    """
+    from flask import request
+    from werkzeug.security import safe_join
+
+    static_cache = StaticCompressionCache(app.static_folder, min_size=min_size)
+    total = static_cache.warm_up()
+    print(f"🗜️ Compressão ativa ({', '.join(available_encodings())}) - {total} estáticos pré-comprimidos")
+
+    @app.after_request
+    def _compress_response(response):
+        if (response.status_code != 200
+                or 'Content-Encoding' in response.headers
+                or 'Content-Range' in response.headers
+                or response.is_streamed and not response.direct_passthrough
+                or not _is_compressible(response.mimetype)):
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        if request.endpoint == 'static':
+            filepath = safe_join(app.static_folder, (request.view_args or {}).get('filename', ''))
+            data = static_cache.get(filepath, encoding) if filepath else None
+            if data is None:
+                return response
+            response.direct_passthrough = False
+            response.set_data(data)
+        else:
+            if response.direct_passthrough:
+                return response
+            body = response.get_data()
+            if len(body) < min_size:
+                return response
+            response.set_data(compress(body, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+
+        etag, weak = response.get_etag()
+        if etag:
+            etag = encoding_etag(etag, encoding)
+            response.set_etag(etag, weak)
+            # Estáticos: o send_file só conhece a ETag sem compressão
+            if request.method in ('GET', 'HEAD') and request.if_none_match.contains(etag):
+                not_modified = app.response_class(status=304)
+                not_modified.set_etag(etag, weak)
+                not_modified.vary.add('Accept-Encoding')
+                for header in ('Cache-Control', 'Expires', 'Last-Modified'):
+                    if header in response.headers:
+                        not_modified.headers[header] = response.headers[header]
+                response.close()
+                return not_modified
+        return response
+
+    return static_cache
@@ -0,0 +1,381 @@
+"""
+Fila persistente de envios em segundo plano (WhatsApp)
+
+As rotas de envio só validam o pedido e enfileiram um job; um pool fixo de
+workers executa o envio fora da requisição. Cada job fica gravado em disco
+com o seu status, então um envio que falhou não se perde e os pendentes são
+retomados quando o servidor reinicia:
+
+- data/whatsapp_queue.json: retrato da fila na última compactação
+- data/whatsapp_queue.journal.jsonl: cada mudança de status anexada como uma
+  linha JSON (custo fixo por transição, como em utils.history_log). A cada
+  ``compact_every`` linhas, e ao iniciar, o retrato é regravado sem os jobs
+  finalizados há mais de ``keep_days`` e o journal é zerado.
+
+- Idempotência: jobs com a mesma chave não são duplicados enquanto estão
+  pendentes, nem por ``dedupe_window`` segundos depois de enviados
+  (ex.: duplo clique no botão de envio).
+- Novas tentativas com backoff exponencial (``base_delay`` * 2^n, limitado a
+  ``max_delay``) até ``max_attempts``; o handler pode marcar a falha como
+  definitiva com ``PermanentJobError`` ou retornando ``'retry': False``.
+- Status: queued → sending → sent | retrying | failed. Cada mudança é
+  repassada a ``on_change`` (a aplicação web emite pelo SocketIO) e pode
+  ser consultada com ``get()``.
+
+Uso:
+    from utils.job_queue import JobQueue
+
+    fila = JobQueue(get_document_store('data/whatsapp_queue.json'), on_change=emitir)
+    fila.register('boleto', enviar_boleto)     # handler(payload) -> dict
+    fila.start()
+    job, criado = fila.enqueue('boleto', {'task_id': '123'}, key='boleto:123')
+"""
+
+import copy
+import heapq
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+STATUS_QUEUED = 'queued'
+STATUS_SENDING = 'sending'
+STATUS_RETRYING = 'retrying'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+PENDING_STATUSES = (STATUS_QUEUED, STATUS_SENDING, STATUS_RETRYING)
+FINAL_STATUSES = (STATUS_SENT, STATUS_FAILED)
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 5.0       # segundos até a 1ª nova tentativa
+DEFAULT_MAX_DELAY = 300.0
+DEFAULT_DEDUPE_WINDOW = 600.0  # segundos
+DEFAULT_KEEP_DAYS = 7          # jobs finalizados mantidos no arquivo
+DEFAULT_COMPACT_EVERY = 500    # linhas do journal até regravar o retrato da fila
+
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class PermanentJobError(Exception):
+    """Falha que não adianta repetir (configuração ausente, cadastro inválido...)"""
+
+
+def _now_str() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class JobQueue:
+    """Fila de jobs persistida em um JsonDocumentStore, com pool de workers"""
+
+    def __init__(self, store, workers: int = DEFAULT_WORKERS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY, dedupe_window: float = DEFAULT_DEDUPE_WINDOW,
+                 keep_days: float = DEFAULT_KEEP_DAYS,
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 name: str = 'job-queue', journal_path: Optional[str] = None,
+                 compact_every: int = DEFAULT_COMPACT_EVERY):
+        """
+        Args:
+            store: Repositório do arquivo da fila (utils.data_store)
+            workers: Quantidade de threads de envio
+            max_attempts: Tentativas por job (padrão; pode variar por tipo)
+            base_delay: Espera antes da 1ª nova tentativa (dobra a cada falha)
+            max_delay: Espera máxima entre tentativas
+            dedupe_window: Segundos em que um job enviado ainda bloqueia a mesma chave
+            keep_days: Dias que jobs finalizados ficam no arquivo
+            on_change: Chamado (fora do bloqueio) com uma cópia do job a cada mudança
+            name: Prefixo do nome das threads
+            journal_path: Journal das mudanças (padrão: <arquivo da fila>.journal.jsonl)
+            compact_every: Linhas do journal até compactar
+        """
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.dedupe_window = dedupe_window
+        self.keep_days = keep_days
+        self.on_change = on_change
+        self.name = name
+        self.journal_path = os.path.abspath(
+            journal_path or os.path.splitext(store.filepath)[0] + '.journal.jsonl'
+        )
+        self.compact_every = max(1, compact_every)
+        self._journal_lines = 0
+
+        self._handlers: Dict[str, Tuple[Handler, Optional[int]]] = {}
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, str]] = []  # (executar_em, ordem, job_id)
+        self._seq = 0
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._jobs: Dict[str, Dict[str, Any]] = self._recover()
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _recover(self) -> Dict[str, Dict[str, Any]]:
+        """Carrega o retrato + journal, compacta e reagenda os pendentes"""
+        data = self.store.load() or {}
+        jobs = copy.deepcopy(data.get('jobs', {}))
+        changed = self._replay_journal(jobs) > 0
+        cutoff = time.time() - self.keep_days * 86400
+
+        for job_id, job in list(jobs.items()):
+            if job['status'] in FINAL_STATUSES:
+                changed = changed or job.get('finished_at_ts', 0) < cutoff
+                continue
+            if job['status'] == STATUS_SENDING:
+                changed = True
+                if job['attempts'] >= job['max_attempts']:
+                    # Sem tentativas restantes (ex.: envio em massa): não repete
+                    job['status'] = STATUS_FAILED
+                    job['last_error'] = 'Envio interrompido (servidor reiniciado)'
+                    job['updated_at'] = _now_str()
+                    job['finished_at_ts'] = time.time()
+                    continue
+                # Servidor parou no meio do envio: tenta de novo
+                job['status'] = STATUS_RETRYING
+                job['last_error'] = 'Envio interrompido (servidor reiniciado)'
+            self._push(job_id, job.get('next_attempt_at') or 0)
+
+        self._jobs = jobs
+        if changed:
+            self._compact()
+        return jobs
+
+    def _replay_journal(self, jobs: Dict[str, Dict[str, Any]]) -> int:
+        """Aplica ao retrato as mudanças anotadas depois da última compactação; retorna as linhas lidas"""
+        lines = 0
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return 0
+        with f:
+            for raw in f:
+                lines += 1
+                try:
+                    change = json.loads(raw.decode('utf-8'))
+                except ValueError:
+                    continue  # linha incompleta (escrita interrompida)
+                job_id = change.get('id') if isinstance(change, dict) else None
+                if job_id in jobs:
+                    jobs[job_id].update(change)
+                elif job_id and 'payload' in change:
+                    jobs[job_id] = change
+        return lines
+
+    def _record(self, job: Dict[str, Any], created: bool = False) -> None:
+        """
+        Anota a mudança do job no journal (chamar com _cond)
+
+        A criação grava o job inteiro; as transições, tudo menos o payload.
+        """
+        change = job if created else {k: v for k, v in job.items() if k != 'payload'}
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, 'ab') as f:
+            f.write((json.dumps(change, ensure_ascii=False) + '\n').encode('utf-8'))
+        self._journal_lines += 1
+        if self._journal_lines >= self.compact_every:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Descarta jobs finalizados antigos, regrava o retrato e zera o journal (chamar com _cond)"""
+        cutoff = time.time() - self.keep_days * 86400
+        for job_id, job in list(self._jobs.items()):
+            if job['status'] in FINAL_STATUSES and job.get('finished_at_ts', 0) < cutoff:
+                del self._jobs[job_id]
+        with self.store.locked():
+            self.store.save({'jobs': self._jobs})
+        # Só depois do retrato gravado: reaplicar o journal antigo não muda o estado
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        with open(self.journal_path, 'wb'):
+            pass
+        self._journal_lines = 0
+
+    def _push(self, job_id: str, run_at: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (run_at, self._seq, job_id))
+
+    def _notify(self, job: Dict[str, Any]) -> None:
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(job)
+        except Exception as e:
+            print(f"⚠️ Erro ao notificar status do job {job.get('id')}: {e}")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def register(self, kind: str, handler: Handler, max_attempts: Optional[int] = None) -> None:
+        """
+        Registra o handler de um tipo de job
+
+        O handler recebe o payload e retorna um dict com 'success'; em caso de
+        falha, 'error' vira o last_error do job e 'retry': False encerra as tentativas.
+        """
+        self._handlers[kind] = (handler, max_attempts)
+
+    def enqueue(self, kind: str, payload: Dict[str, Any],
+                key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Enfileira um job (ou devolve o existente com a mesma chave)
+
+        Returns:
+            (job, criado): cópia do job e False se a chave já estava em uso
+        """
+        if kind not in self._handlers:
+            raise ValueError(f'Tipo de job não registrado: {kind}')
+
+        now = time.time()
+        with self._cond:
+            if key:
+                for job in self._jobs.values():
+                    if job['key'] != key:
+                        continue
+                    recent = job['status'] == STATUS_SENT and now - job.get('finished_at_ts', 0) < self.dedupe_window
+                    if job['status'] in PENDING_STATUSES or recent:
+                        return copy.deepcopy(job), False
+
+            max_attempts = self._handlers[kind][1] or self.max_attempts
+            job_id = uuid.uuid4().hex
+            job = {
+                'id': job_id,
+                'key': key or job_id,
+                'kind': kind,
+                'payload': payload,
+                'status': STATUS_QUEUED,
+                'attempts': 0,
+                'max_attempts': max_attempts,
+                'created_at': _now_str(),
+                'updated_at': _now_str(),
+                'next_attempt_at': now,
+                'last_error': None,
+                'result': None,
+            }
+            self._jobs[job_id] = job
+            self._record(job, created=True)
+            self._push(job_id, now)
+            self._cond.notify_all()
+            snapshot = copy.deepcopy(job)
+
+        self._notify(snapshot)
+        return snapshot, True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Cópia do job, ou None"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def list(self, status: Optional[str] = None, kind: Optional[str] = None,
+             limit: int = 50) -> List[Dict[str, Any]]:
+        """Jobs mais recentes primeiro, opcionalmente filtrados"""
+        with self._cond:
+            jobs = [
+                job for job in self._jobs.values()
+                if (status is None or job['status'] == status) and (kind is None or job['kind'] == kind)
+            ]
+            jobs.sort(key=lambda j: j['created_at'], reverse=True)
+            return copy.deepcopy(jobs[:limit])
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Aguarda o job terminar (enviado ou falha definitiva) e retorna a cópia"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._jobs.get(job_id, {}).get('status') not in PENDING_STATUSES,
+                timeout=timeout
+            )
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def start(self) -> None:
+        """Inicia as threads de envio (uma única vez)"""
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'{self.name}-{index + 1}', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Para as threads após o job em andamento (pendentes continuam no arquivo)"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _next_job(self) -> Optional[Dict[str, Any]]:
+        """Bloqueia até um job estar pronto; None ao parar"""
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                if self._heap and self._heap[0][0] <= now:
+                    _run_at, _seq, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    if job is None or job['status'] not in (STATUS_QUEUED, STATUS_RETRYING):
+                        continue
+                    job['status'] = STATUS_SENDING
+                    job['attempts'] += 1
+                    job['updated_at'] = _now_str()
+                    self._record(job)
+                    return copy.deepcopy(job)
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._notify(job)
+            self._notify(self._run(job))
+
+    def _run(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Executa o handler e registra o resultado; retorna a cópia atualizada"""
+        handler = self._handlers.get(job['kind'], (None, None))[0]
+        retry = True
+        try:
+            if handler is None:
+                raise PermanentJobError(f"Tipo de job não registrado: {job['kind']}")
+            result = handler(copy.deepcopy(job['payload'])) or {}
+            success = bool(result.get('success'))
+            error = None if success else result.get('error') or 'Falha no envio'
+            retry = result.get('retry', True)
+        except PermanentJobError as e:
+            result, success, error, retry = {'success': False, 'error': str(e)}, False, str(e), False
+        except Exception as e:
+            print(f"❌ Erro no job {job['kind']} {job['id']}: {e}")
+            result, success, error = {'success': False, 'error': str(e)}, False, str(e)
+
+        with self._cond:
+            current = self._jobs[job['id']]
+            current['result'] = result
+            current['last_error'] = error
+            current['updated_at'] = _now_str()
+            if success or not retry or current['attempts'] >= current['max_attempts']:
+                current['status'] = STATUS_SENT if success else STATUS_FAILED
+                current['finished_at_ts'] = time.time()
+            else:
+                delay = min(self.max_delay, self.base_delay * 2 ** (current['attempts'] - 1))
+                current['status'] = STATUS_RETRYING
+                current['next_attempt_at'] = time.time() + delay
+                self._push(current['id'], current['next_attempt_at'])
+            self._record(current)
+            self._cond.notify_all()
+            return copy.deepcopy(current)
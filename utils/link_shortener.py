@@ -3,12 +3,23 @@
 This module provides a tiny file-backed URL shortener tailored for boleto links.
 It stores mappings between generated short codes and original Servopa URLs so we
 can share friendly links with clients.
+
+The mapping is loaded once and kept in memory, so resolving a code never
+touches the disk. Hit counts are buffered in memory and periodically appended
+to a journal (``short_links_hits.jsonl``); the journal is replayed on load and
+folded back into ``short_links.json`` whenever the mapping is rewritten.
+
+A reverse index (task_id -> codes) is kept next to the forward map and saved
+to ``short_links_index.json`` together with the size/mtime of the mapping it
+was built from, so it is reused after a restart instead of being rebuilt.
 """
 
 from __future__ import annotations
 
+import atexit
 import json
 import os
+import tempfile
 import threading
 import time
 import typing as t
@@ -17,8 +28,27 @@ from hashlib import blake2b
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 SHORT_LINKS_FILE = os.path.join(DATA_DIR, "short_links.json")
+HITS_JOURNAL_FILE = os.path.join(DATA_DIR, "short_links_hits.jsonl")
+TASK_INDEX_FILE = os.path.join(DATA_DIR, "short_links_index.json")
+
+# Seconds between journal flushes, and journal size (lines) that triggers a
+# rewrite of short_links.json with the accumulated hits.
+HITS_FLUSH_INTERVAL = 15.0
+HITS_JOURNAL_MAX_LINES = 5000
 
 _lock = threading.Lock()
+_links: t.Optional[dict] = None
+_task_index: t.Dict[str, t.List[str]] = {}  # task_id -> codes, in creation order
+_journal_lines = 0
+
+# code -> [pending hits, last hit timestamp]
+_pending_hits: t.Dict[str, list] = {}
+_hits_lock = threading.Lock()
+_flusher: t.Optional[threading.Thread] = None
+
+
+def _timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
 
 
 def _ensure_storage() -> None:
@@ -28,19 +58,182 @@ def _ensure_storage() -> None:
             json.dump({}, fh)
 
 
-def _load_links() -> dict:
-    _ensure_storage()
-    with open(SHORT_LINKS_FILE, "r", encoding="utf-8") as fh:
+def _apply_hits(data: dict, code: str, hits: int, at: str) -> None:
+    meta = data.get(code)
+    if meta is not None:
+        meta["hits"] = int(meta.get("hits", 0)) + hits
+        meta["updated_at"] = at
+
+
+def _replay_journal(data: dict) -> int:
+    """Apply journaled hits to ``data``; returns the number of journal lines."""
+    if not os.path.exists(HITS_JOURNAL_FILE):
+        return 0
+
+    lines = 0
+    with open(HITS_JOURNAL_FILE, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+                _apply_hits(data, record["code"], int(record["hits"]), record["at"])
+            except (ValueError, KeyError, TypeError):
+                continue  # partial/corrupt line from an interrupted write
+            lines += 1
+    return lines
+
+
+def _file_signature(path: str) -> t.Optional[t.List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _build_task_index(data: dict) -> t.Dict[str, t.List[str]]:
+    index: t.Dict[str, t.List[str]] = {}
+    for code, meta in data.items():
+        index.setdefault(str(meta.get("task_id")), []).append(code)
+    return index
+
+
+def _load_task_index(data: dict) -> t.Dict[str, t.List[str]]:
+    """Reuse the persisted index if it was built from the current mapping file."""
+    try:
+        with open(TASK_INDEX_FILE, "r", encoding="utf-8") as fh:
+            stored = json.load(fh)
+        if stored.get("source") == _file_signature(SHORT_LINKS_FILE):
+            return stored["tasks"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    index = _build_task_index(data)
+    _save_task_index(index)
+    return index
+
+
+def _save_task_index(index: t.Dict[str, t.List[str]]) -> None:
+    payload = {"source": _file_signature(SHORT_LINKS_FILE), "tasks": index}
+    fd, tmp_path = tempfile.mkstemp(prefix=".short_links_index.", suffix=".tmp", dir=DATA_DIR)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False)
+        os.replace(tmp_path, TASK_INDEX_FILE)
+    except OSError:
+        # The index is only a cache: if it can't be saved it is rebuilt on load
         try:
-            return json.load(fh)
-        except json.JSONDecodeError:
-            return {}
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _load_links() -> dict:
+    """Return the in-memory mapping, loading it (and the hit journal) once."""
+    global _links, _task_index, _journal_lines
+
+    if _links is None:
+        _ensure_storage()
+        with open(SHORT_LINKS_FILE, "r", encoding="utf-8") as fh:
+            try:
+                data = json.load(fh)
+            except json.JSONDecodeError:
+                data = {}
+        _task_index = _load_task_index(data)
+        _journal_lines = _replay_journal(data)
+        _links = data
+    return _links
+
+
+def _take_pending_hits() -> t.Dict[str, list]:
+    global _pending_hits
+
+    with _hits_lock:
+        pending, _pending_hits = _pending_hits, {}
+    return pending
 
 
 def _save_links(data: dict) -> None:
+    """Atomically rewrite short_links.json, folding in every pending hit.
+
+    Must be called with ``_lock`` held. The journal is truncated afterwards,
+    since all the hits it holds are now part of the saved mapping.
+    """
+    global _journal_lines
+
+    for code, (hits, at) in _take_pending_hits().items():
+        _apply_hits(data, code, hits, at)
+
     _ensure_storage()
-    with open(SHORT_LINKS_FILE, "w", encoding="utf-8") as fh:
-        json.dump(data, fh, indent=2, ensure_ascii=False)
+    fd, tmp_path = tempfile.mkstemp(prefix=".short_links.", suffix=".tmp", dir=DATA_DIR)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, SHORT_LINKS_FILE)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    _save_task_index(_task_index)
+    if os.path.exists(HITS_JOURNAL_FILE):
+        os.remove(HITS_JOURNAL_FILE)
+    _journal_lines = 0
+
+
+def flush_hits() -> int:
+    """Append buffered hit counts to the journal; returns codes written."""
+    global _journal_lines
+
+    with _lock:
+        pending = _take_pending_hits()
+        if not pending:
+            return 0
+
+        _ensure_storage()
+        with open(HITS_JOURNAL_FILE, "a", encoding="utf-8") as fh:
+            for code, (hits, at) in pending.items():
+                fh.write(json.dumps({"code": code, "hits": hits, "at": at}) + "\n")
+        _journal_lines += len(pending)
+
+        # A loaded mapping already replayed the journal, so apply the new
+        # lines to it too; the next _save_links drops the journal.
+        if _links is not None:
+            for code, (hits, at) in pending.items():
+                _apply_hits(_links, code, hits, at)
+
+        if _journal_lines >= HITS_JOURNAL_MAX_LINES:
+            _save_links(_load_links())
+        return len(pending)
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(HITS_FLUSH_INTERVAL)
+        try:
+            flush_hits()
+        except Exception as exc:  # keep the flusher alive
+            print(f"⚠️ Erro ao gravar acessos dos links curtos: {exc}")
+
+
+def _start_flusher() -> None:
+    global _flusher
+
+    with _hits_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="short-link-hits", daemon=True)
+            _flusher.start()
+            atexit.register(flush_hits)
+
+
+def reload_short_links() -> None:
+    """Flush pending hits and drop the in-memory mapping (reloaded on next use)."""
+    global _links
+
+    flush_hits()
+    with _lock:
+        _links = None
 
 
 def _generate_code(url: str, salt: str | None = None, length: int = 8) -> str:
@@ -64,8 +257,8 @@ def create_short_link(task_id: str | int, url: str) -> str:
         data = _load_links()
 
         # Reuse existing mapping if the same task already points to this URL
-        for code, meta in data.items():
-            if meta.get("task_id") == task_id and meta.get("url") == url:
+        for code in _task_index.get(task_id, []):
+            if data.get(code, {}).get("url") == url:
                 return code
 
         # Otherwise, generate a new code; ensure uniqueness
@@ -75,7 +268,7 @@ def create_short_link(task_id: str | int, url: str) -> str:
             salt = str(time.time_ns())
             code = _generate_code(url, salt=salt)
 
-        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+        timestamp = _timestamp()
         data[code] = {
             "task_id": task_id,
             "url": url,
@@ -83,6 +276,7 @@ def create_short_link(task_id: str | int, url: str) -> str:
             "updated_at": timestamp,
             "hits": 0,
         }
+        _task_index.setdefault(task_id, []).append(code)
 
         _save_links(data)
         return code
@@ -95,31 +289,32 @@ def update_short_link(code: str, url: str) -> None:
             raise KeyError(f"Código curto '{code}' não encontrado")
 
         data[code]["url"] = url
-        data[code]["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        data[code]["updated_at"] = _timestamp()
         _save_links(data)
 
 
 def resolve_short_link(code: str) -> t.Optional[str]:
+    """Resolve ``code`` from memory; the hit is only buffered (no disk I/O)."""
     with _lock:
-        data = _load_links()
-        meta = data.get(code)
-        if not meta:
-            return None
+        meta = _load_links().get(code)
+        url = meta.get("url") if meta else None
+    if not meta:
+        return None
 
-        meta["hits"] = int(meta.get("hits", 0)) + 1
-        meta["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
-        _save_links(data)
-        return meta.get("url")
+    with _hits_lock:
+        pending = _pending_hits.setdefault(code, [0, ""])
+        pending[0] += 1
+        pending[1] = _timestamp()
+    _start_flusher()
+    return url
 
 
 def get_short_code_for_task(task_id: str | int) -> t.Optional[str]:
     task_id = str(task_id)
     with _lock:
-        data = _load_links()
-        for code, meta in data.items():
-            if meta.get("task_id") == task_id:
-                return code
-    return None
+        _load_links()
+        codes = _task_index.get(task_id)
+        return codes[0] if codes else None
 
 
 def build_public_short_url(base_url: str, code: str) -> str:
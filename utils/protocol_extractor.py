@@ -13,9 +13,10 @@ from typing import Callable, Dict, Optional, Tuple
 from urllib.parse import unquote
 
 import pdfplumber
-import requests
 from selenium.webdriver.remote.webdriver import WebDriver
 
+from utils.http_client import get_session
+
 ProgressCb = Optional[Callable[[str], None]]
 
 LOGGER = logging.getLogger(__name__)
@@ -96,7 +97,7 @@ def _download_pdf(
     errors: list[str] = []
 
     try:
-        response = requests.get(pdf_url, headers=headers, cookies=cookies, timeout=timeout)
+        response = get_session().get(pdf_url, headers=headers, cookies=cookies, timeout=timeout)
         response.raise_for_status()
 
         response_info.update(
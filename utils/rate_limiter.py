@@ -0,0 +1,74 @@
+"""
+Limitador de taxa (token bucket) compartilhado entre threads
+
+Usado nos envios em massa pelo WhatsApp: vários envios podem estar em
+andamento ao mesmo tempo, mas a taxa média fica limitada a ``rate`` por
+segundo, com rajadas de até ``capacity`` envios. Quando a Evolution API
+responde 429, ``pause()`` segura todos os envios pelo tempo pedido.
+
+Uso:
+    from utils.rate_limiter import TokenBucket
+
+    bucket = TokenBucket(rate=2.0, capacity=5)
+    bucket.acquire()            # bloqueia até haver uma ficha disponível
+    bucket.pause(10)            # ex.: após HTTP 429
+"""
+
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Token bucket com reserva de fichas (ordem de chegada, thread-safe)"""
+
+    def __init__(self, rate: float, capacity: float = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            rate: Fichas repostas por segundo (> 0)
+            capacity: Máximo de fichas acumuladas (tamanho da rajada)
+            clock: Relógio monotônico (substituível nos testes)
+            sleep: Função de espera (substituível nos testes)
+        """
+        if rate <= 0:
+            raise ValueError('rate deve ser maior que zero')
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        # Instante a partir do qual as fichas voltam a ser repostas
+        # (fica no futuro durante uma pausa)
+        self._updated = clock()
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """Reserva uma ficha e retorna quantos segundos esperar antes de usá-la"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            return max(0.0, self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Bloqueia até a ficha reservada estar disponível; retorna o tempo esperado"""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Impede novas liberações pelos próximos ``seconds`` segundos"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._updated = max(self._updated, now + seconds)
+            # Ao fim da pausa sai um envio por vez (sem rajada)
+            self._tokens = min(self._tokens, 1.0)
@@ -0,0 +1,923 @@
+"""
+Backend SQLite com o schema de supabase/migrations
+
+Implementa localmente as tabelas boletos, cotas, historico_execucoes e
+automacao_status (mais a tabela clientes, que não existe na migração) e
+oferece repositórios com a mesma interface de utils.data_store e
+utils.history_log, para que as rotas do web/app.py funcionem sem mudanças.
+
+Cada registro dos arquivos JSON vira uma linha; o registro completo fica na
+coluna ``payload`` (JSON) e os campos usados em buscas são replicados em
+colunas indexadas. Boletos e clientes são identificados pelo próprio ID
+(task_id / client_id, coluna ``chave``) e a ordem da lista fica em
+``posicao``: remover um registro não regrava os seguintes. Ao salvar,
+apenas as linhas que mudaram são gravadas, e update/append/delete_record
+gravam uma única linha sem comparar o documento inteiro.
+
+O banco roda em modo WAL: leitores não bloqueiam enquanto a thread de
+automação escreve.
+
+Ativação (web/app.py):
+    OXCASH_STORAGE=sqlite           usa o banco em vez dos arquivos JSON
+    OXCASH_SQLITE_PATH=/caminho.db  opcional (padrão: data/oxcash.db)
+
+Importação única dos arquivos JSON existentes:
+    python -m utils.sqlite_store [--force] [--db caminho.db]
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from utils.data_store import RecordIndexMixin
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS boletos (
+  id TEXT PRIMARY KEY,
+  colecao TEXT NOT NULL,
+  chave TEXT NOT NULL DEFAULT '',
+  posicao INTEGER NOT NULL,
+  dia TEXT NOT NULL DEFAULT '08',
+  task_id TEXT,
+  client_id TEXT,
+  nome TEXT NOT NULL DEFAULT '',
+  grupo TEXT NOT NULL DEFAULT '',
+  cota TEXT NOT NULL DEFAULT '',
+  valor NUMERIC DEFAULT 0,
+  vencimento TEXT,
+  is_completed INTEGER DEFAULT 0,
+  protocolo TEXT,
+  documento_url TEXT,
+  payload TEXT NOT NULL,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS clientes (
+  id TEXT PRIMARY KEY,
+  colecao TEXT NOT NULL,
+  chave TEXT NOT NULL DEFAULT '',
+  posicao INTEGER NOT NULL,
+  dia TEXT NOT NULL DEFAULT '08',
+  client_id TEXT,
+  task_id TEXT,
+  nome TEXT NOT NULL DEFAULT '',
+  payload TEXT NOT NULL,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS cotas (
+  id TEXT PRIMARY KEY,
+  colecao TEXT NOT NULL,
+  grupo_posicao INTEGER NOT NULL,
+  posicao INTEGER NOT NULL,
+  dia TEXT NOT NULL DEFAULT '08',
+  grupo TEXT NOT NULL DEFAULT '',
+  cota TEXT NOT NULL DEFAULT '',
+  nome TEXT NOT NULL DEFAULT '',
+  whatsapp TEXT,
+  payload TEXT NOT NULL,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+  updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS historico_execucoes (
+  id TEXT PRIMARY KEY,
+  dia TEXT NOT NULL,
+  grupo TEXT NOT NULL DEFAULT '',
+  cota TEXT NOT NULL DEFAULT '',
+  nome TEXT NOT NULL DEFAULT '',
+  valor_lance TEXT DEFAULT 'N/A',
+  status TEXT NOT NULL DEFAULT '',
+  observacao TEXT,
+  protocolo TEXT,
+  documento_url TEXT,
+  docparser_url TEXT,
+  payload TEXT NOT NULL,
+  created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS automacao_status (
+  id TEXT PRIMARY KEY,
+  dia TEXT NOT NULL UNIQUE,
+  is_running INTEGER DEFAULT 0,
+  total_tasks INTEGER DEFAULT 0,
+  completed_tasks INTEGER DEFAULT 0,
+  failed_tasks INTEGER DEFAULT 0,
+  current_task TEXT,
+  started_at TEXT,
+  updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS metadados (
+  chave TEXT PRIMARY KEY,
+  valor TEXT
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_boletos_chave ON boletos(colecao, chave);
+CREATE INDEX IF NOT EXISTS idx_boletos_ordem ON boletos(colecao, posicao);
+CREATE INDEX IF NOT EXISTS idx_boletos_dia ON boletos(dia);
+CREATE INDEX IF NOT EXISTS idx_boletos_is_completed ON boletos(is_completed);
+CREATE INDEX IF NOT EXISTS idx_boletos_dia_grupo_cota ON boletos(dia, grupo, cota);
+CREATE INDEX IF NOT EXISTS idx_boletos_task_id ON boletos(task_id);
+CREATE INDEX IF NOT EXISTS idx_boletos_client_id ON boletos(client_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_clientes_chave ON clientes(colecao, chave);
+CREATE INDEX IF NOT EXISTS idx_clientes_ordem ON clientes(colecao, posicao);
+CREATE INDEX IF NOT EXISTS idx_clientes_client_id ON clientes(client_id);
+CREATE INDEX IF NOT EXISTS idx_clientes_task_id ON clientes(task_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cotas_posicao ON cotas(colecao, grupo_posicao, posicao);
+CREATE INDEX IF NOT EXISTS idx_cotas_dia ON cotas(dia);
+CREATE INDEX IF NOT EXISTS idx_cotas_dia_grupo_cota ON cotas(dia, grupo, cota);
+
+CREATE INDEX IF NOT EXISTS idx_historico_dia ON historico_execucoes(dia);
+CREATE INDEX IF NOT EXISTS idx_historico_created_at ON historico_execucoes(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_historico_dia_grupo_cota ON historico_execucoes(dia, grupo, cota);
+
+INSERT OR IGNORE INTO automacao_status (id, dia, is_running) VALUES ('status-08', '08', 0);
+INSERT OR IGNORE INTO automacao_status (id, dia, is_running) VALUES ('status-16', '16', 0);
+"""
+
+DEFAULT_DOCUMENTS = {
+    'boletos': {'dia08': [], 'dia16': [], 'last_import': None},
+    'clientes': {'dia08': [], 'dia16': []},
+    'cotas': {'grupos': []},
+}
+
+# Campo que identifica cada linha (coluna chave); cotas seguem por posição
+KEY_FIELDS = {
+    'boletos': 'task_id',
+    'clientes': 'client_id',
+}
+
+_AUTOMACAO_CAMPOS = ('is_running', 'total_tasks', 'completed_tasks', 'failed_tasks',
+                     'current_task', 'started_at')
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _dia_from(value: Any, default: str = '08') -> str:
+    """Normaliza 8, '8', 'dia8', 'dia08' → '08' (idem para 16)"""
+    digits = ''.join(ch for ch in str(value or '') if ch.isdigit())
+    return digits.zfill(2) if digits else default
+
+
+def _text(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+def _record_keys(items: List[Dict[str, Any]], field: str) -> List[str]:
+    """
+    Chave de cada registro de uma coleção: o próprio ID (str)
+
+    IDs repetidos ganham o sufixo '#n' a partir da 2ª ocorrência e registros
+    sem ID recebem '#<ordem entre os sem ID>'; a 1ª ocorrência de um ID é
+    sempre a chave igual ao ID.
+    """
+    keys, seen, sem_id = [], {}, 0
+    for item in items:
+        value = item.get(field)
+        if value is None or value == '':
+            keys.append(f'#{sem_id}')
+            sem_id += 1
+            continue
+        value = str(value)
+        ocorrencia = seen.get(value, 0)
+        seen[value] = ocorrencia + 1
+        keys.append(value if ocorrencia == 0 else f'{value}#{ocorrencia}')
+    return keys
+
+
+class SqliteDatabase:
+    """Conexões SQLite (uma por thread) com schema e modo WAL"""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        conn = self.connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        self._migrate(conn)
+        conn.executescript(SCHEMA)
+
+        self._stores: Dict[str, 'SqliteDocumentStore'] = {}
+        self._history: Dict[str, 'SqliteHistoryLog'] = {}
+        self._registry_lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: transações controladas por transaction()
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Bancos anteriores à coluna chave: preenche a chave pelo ID de cada registro"""
+        for table, field in KEY_FIELDS.items():
+            columns = [row['name'] for row in conn.execute(f'PRAGMA table_info({table})')]
+            if not columns or 'chave' in columns:
+                continue
+            with self.transaction() as tx:
+                # O índice único antigo era por posição
+                tx.execute(f'DROP INDEX IF EXISTS idx_{table}_posicao')
+                tx.execute(f"ALTER TABLE {table} ADD COLUMN chave TEXT NOT NULL DEFAULT ''")
+                rows = tx.execute(f'SELECT id, colecao, payload FROM {table} ORDER BY colecao, posicao').fetchall()
+                by_colecao: Dict[str, List[sqlite3.Row]] = {}
+                for row in rows:
+                    by_colecao.setdefault(row['colecao'], []).append(row)
+                for colecao_rows in by_colecao.values():
+                    keys = _record_keys([json.loads(r['payload']) for r in colecao_rows], field)
+                    tx.executemany(f'UPDATE {table} SET chave = ? WHERE id = ?',
+                                   [(key, r['id']) for key, r in zip(keys, colecao_rows)])
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT (ROLLBACK em caso de erro)"""
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # Metadados
+    # ------------------------------------------------------------------
+
+    def get_meta(self, chave: str) -> Optional[str]:
+        row = self.connection().execute(
+            'SELECT valor FROM metadados WHERE chave = ?', (chave,)
+        ).fetchone()
+        return row['valor'] if row else None
+
+    def set_meta(self, conn: sqlite3.Connection, chave: str, valor: Optional[str]) -> None:
+        conn.execute(
+            'INSERT INTO metadados (chave, valor) VALUES (?, ?) '
+            'ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor',
+            (chave, valor)
+        )
+
+    # ------------------------------------------------------------------
+    # Repositórios
+    # ------------------------------------------------------------------
+
+    def document_store(self, kind: str) -> 'SqliteDocumentStore':
+        """Repositório de 'boletos', 'clientes' ou 'cotas'"""
+        with self._registry_lock:
+            store = self._stores.get(kind)
+            if store is None:
+                store = SqliteDocumentStore(self, kind)
+                self._stores[kind] = store
+            return store
+
+    def history_log(self, dia: str) -> 'SqliteHistoryLog':
+        """Histórico de execuções de 'dia8' ou 'dia16'"""
+        dia = _dia_from(dia)
+        with self._registry_lock:
+            log = self._history.get(dia)
+            if log is None:
+                log = SqliteHistoryLog(self, dia)
+                self._history[dia] = log
+            return log
+
+    # ------------------------------------------------------------------
+    # Status da automação
+    # ------------------------------------------------------------------
+
+    def get_automation_status(self, dia: str) -> Dict[str, Any]:
+        row = self.connection().execute(
+            'SELECT * FROM automacao_status WHERE dia = ?', (_dia_from(dia),)
+        ).fetchone()
+        if not row:
+            return {}
+        status = dict(row)
+        status['is_running'] = bool(status['is_running'])
+        return status
+
+    def set_automation_status(self, dia: str, **fields) -> None:
+        """Atualiza campos de automacao_status (is_running, total_tasks, ...)"""
+        updates = {k: v for k, v in fields.items() if k in _AUTOMACAO_CAMPOS}
+        if 'is_running' in updates:
+            updates['is_running'] = 1 if updates['is_running'] else 0
+        updates['updated_at'] = _now()
+
+        assignments = ', '.join(f'{campo} = ?' for campo in updates)
+        with self.transaction() as conn:
+            conn.execute(
+                'INSERT OR IGNORE INTO automacao_status (id, dia) VALUES (?, ?)',
+                (f'status-{_dia_from(dia)}', _dia_from(dia))
+            )
+            conn.execute(
+                f'UPDATE automacao_status SET {assignments} WHERE dia = ?',
+                (*updates.values(), _dia_from(dia))
+            )
+
+
+class SqliteDocumentStore(RecordIndexMixin):
+    """
+    Mesma interface de utils.data_store.JsonDocumentStore sobre tabelas SQLite
+
+    O documento é remontado a partir das linhas e mantido em cache; a
+    revalidação compara um contador de versão gravado em ``metadados``.
+    ``save()`` grava somente as linhas cujo conteúdo mudou; as operações de
+    um registro (update/replace/append/delete_record) gravam uma linha só,
+    pela chave, quando o cache está em dia.
+    """
+
+    def __init__(self, db: SqliteDatabase, kind: str):
+        if kind not in DEFAULT_DOCUMENTS:
+            raise ValueError(f'Tipo de documento desconhecido: {kind}')
+        self.db = db
+        self.kind = kind
+        self.table = kind
+        self.default = DEFAULT_DOCUMENTS[kind]
+        self.key_field = KEY_FIELDS.get(kind)
+        self._lock = threading.RLock()
+        self._data: Any = None
+        self._version: Optional[str] = None
+        self._rows: Dict[Tuple, str] = {}     # chave da linha -> payload
+        self._order: Dict[Tuple, int] = {}    # chave da linha -> posicao (boletos/clientes)
+        self._generation = 0
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def _current_version(self) -> Optional[str]:
+        return self.db.get_meta(f'versao:{self.kind}')
+
+    def exists(self) -> bool:
+        """True se o documento já foi importado/salvo no banco"""
+        return self._current_version() is not None
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            self._revalidate()
+            return self._generation
+
+    @property
+    def signature(self) -> Optional[Tuple[str]]:
+        with self._lock:
+            self._revalidate()
+            return (self._version,) if self._version is not None else None
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data = None
+            self._version = None
+
+    # ------------------------------------------------------------------
+    # Conversão documento <-> linhas
+    # ------------------------------------------------------------------
+
+    def _split(self, data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[Tuple, Dict[str, Any]]]:
+        """Separa o documento em metadados (chaves escalares) e linhas"""
+        meta: Dict[str, Any] = {'chaves': list(data.keys()), 'valores': {}, 'grupos': {}}
+        rows: Dict[Tuple, Dict[str, Any]] = {}
+
+        for colecao, value in data.items():
+            if not isinstance(value, list) or not all(isinstance(i, dict) for i in value):
+                meta['valores'][colecao] = value
+                continue
+
+            if self.key_field:
+                for chave, item in zip(_record_keys(value, self.key_field), value):
+                    rows[(colecao, chave)] = item
+                continue
+
+            # cotas: cada item é um grupo com a lista 'cotas'
+            headers = []
+            for grupo_posicao, grupo in enumerate(value):
+                cotas = grupo.get('cotas')
+                if isinstance(cotas, list) and all(isinstance(c, dict) for c in cotas):
+                    headers.append([{k: v for k, v in grupo.items() if k != 'cotas'}, True])
+                    for posicao, cota in enumerate(cotas):
+                        rows[(colecao, grupo_posicao, posicao)] = dict(cota, __grupo=grupo)
+                else:
+                    headers.append([grupo, False])
+            meta['grupos'][colecao] = headers
+
+        return meta, rows
+
+    def _columns(self, key: Tuple, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Colunas da linha (boletos/clientes: sem posicao, gravada à parte)"""
+        colecao = key[0]
+        if self.kind == 'boletos':
+            return {
+                'colecao': colecao, 'chave': key[1], 'dia': _dia_from(colecao),
+                'task_id': item.get('task_id'), 'client_id': item.get('client_id'),
+                'nome': _text(item.get('nome')), 'grupo': _text(item.get('grupo')),
+                'cota': _text(item.get('cota')),
+                'is_completed': 1 if item.get('is_completed') else 0,
+                'protocolo': item.get('protocolo'),
+                'documento_url': item.get('boleto_url') or item.get('link'),
+            }
+        if self.kind == 'clientes':
+            return {
+                'colecao': colecao, 'chave': key[1], 'dia': _dia_from(colecao),
+                'client_id': item.get('client_id'), 'task_id': item.get('task_id'),
+                'nome': _text(item.get('nome')),
+            }
+        grupo = item['__grupo']
+        return {
+            'colecao': colecao, 'grupo_posicao': key[1], 'posicao': key[2],
+            'dia': _dia_from(grupo.get('dia') or colecao),
+            'grupo': _text(item.get('grupo') or grupo.get('numero')),
+            'cota': _text(item.get('cota')), 'nome': _text(item.get('nome')),
+            'whatsapp': item.get('whatsapp') or item.get('celular'),
+        }
+
+    def _key_columns(self) -> Tuple[str, ...]:
+        if self.key_field:
+            return ('colecao', 'chave')
+        return ('colecao', 'grupo_posicao', 'posicao')
+
+    def _order_columns(self) -> str:
+        if self.key_field:
+            return 'colecao, posicao'
+        return 'colecao, grupo_posicao, posicao'
+
+    @staticmethod
+    def _positions(keys: List[Tuple], order: Dict[Tuple, int]) -> Dict[Tuple, int]:
+        """
+        posicao de cada linha (boletos/clientes)
+
+        Enquanto as linhas gravadas mantêm a ordem relativa e as novas vêm
+        no fim (remoções, alterações, inclusões), as posições gravadas são
+        mantidas; só uma reordenação renumera a coleção.
+        """
+        by_colecao: Dict[str, List[Tuple]] = {}
+        for key in keys:
+            by_colecao.setdefault(key[0], []).append(key)
+
+        positions: Dict[Tuple, int] = {}
+        for chaves in by_colecao.values():
+            stored = [order.get(key) for key in chaves]
+            existing = [p for p in stored if p is not None]
+            first_new = next((i for i, p in enumerate(stored) if p is None), len(stored))
+            keeps = (all(a < b for a, b in zip(existing, existing[1:]))
+                     and all(p is None for p in stored[first_new:]))
+            if not keeps:
+                positions.update((key, i) for i, key in enumerate(chaves))
+                continue
+            proxima = existing[-1] + 1 if existing else 0
+            for key, posicao in zip(chaves, stored):
+                if posicao is None:
+                    posicao, proxima = proxima, proxima + 1
+                positions[key] = posicao
+        return positions
+
+    def _assemble(self, meta: Dict[str, Any], rows: List[sqlite3.Row]) -> Dict[str, Any]:
+        by_colecao: Dict[str, List[sqlite3.Row]] = {}
+        for row in rows:
+            by_colecao.setdefault(row['colecao'], []).append(row)
+
+        data: Dict[str, Any] = {}
+        for chave in meta.get('chaves', []):
+            if chave in meta.get('valores', {}):
+                data[chave] = meta['valores'][chave]
+            elif self.kind != 'cotas':
+                data[chave] = [json.loads(r['payload']) for r in by_colecao.get(chave, [])]
+            else:
+                grupos = []
+                cotas_por_grupo: Dict[int, List[Dict[str, Any]]] = {}
+                for r in by_colecao.get(chave, []):
+                    cotas_por_grupo.setdefault(r['grupo_posicao'], []).append(json.loads(r['payload']))
+                for grupo_posicao, (header, tem_cotas) in enumerate(meta['grupos'].get(chave, [])):
+                    grupo = dict(header)
+                    if tem_cotas:
+                        grupo['cotas'] = cotas_por_grupo.get(grupo_posicao, [])
+                    grupos.append(grupo)
+                data[chave] = grupos
+        return data
+
+    # ------------------------------------------------------------------
+    # Leitura / escrita
+    # ------------------------------------------------------------------
+
+    def _revalidate(self) -> None:
+        version = self._current_version()
+        if self._data is not None and version == self._version:
+            return
+
+        if version is None:
+            self._data = copy.deepcopy(self.default)
+            self._rows = {}
+        else:
+            conn = self.db.connection()
+            meta = json.loads(self.db.get_meta(f'documento:{self.kind}') or '{}')
+            rows = conn.execute(f'SELECT * FROM {self.table} ORDER BY {self._order_columns()}').fetchall()
+            self._data = self._assemble(meta, rows)
+            key_columns = self._key_columns()
+            self._rows = {tuple(r[c] for c in key_columns): r['payload'] for r in rows}
+            self._order = (
+                {tuple(r[c] for c in key_columns): r['posicao'] for r in rows} if self.key_field else {}
+            )
+        self._version = version
+        self._generation += 1
+
+    def load(self) -> Any:
+        """Retorna o documento (do cache se nenhuma escrita ocorreu)"""
+        with self._lock:
+            self._revalidate()
+            return self._data
+
+    def save(self, data: Any) -> None:
+        """Grava apenas as linhas alteradas e atualiza o cache"""
+        with self._lock:
+            meta, items = self._split(data)
+            desired: Dict[Tuple, Tuple[str, Dict[str, Any]]] = {}
+            for key, item in items.items():
+                payload = {k: v for k, v in item.items() if k != '__grupo'}
+                desired[key] = (_dumps(payload), item)
+
+            key_columns = self._key_columns()
+            timestamp = _now()
+
+            where = ' AND '.join(f'{c} = ?' for c in key_columns)
+
+            with self.db.transaction() as conn:
+                previous_version = self.db.get_meta(f'versao:{self.kind}')
+                if previous_version is not None and previous_version == self._version:
+                    # Cache em dia: compara com as linhas já conhecidas
+                    current, order = self._rows, self._order
+                else:
+                    extra = ', posicao' if self.key_field else ''
+                    rows = conn.execute(
+                        f'SELECT {", ".join(key_columns)}{extra}, payload FROM {self.table}'
+                    ).fetchall()
+                    current = {tuple(r[c] for c in key_columns): r['payload'] for r in rows}
+                    order = {tuple(r[c] for c in key_columns): r['posicao'] for r in rows} if extra else {}
+
+                for key in current.keys() - desired.keys():
+                    conn.execute(f'DELETE FROM {self.table} WHERE {where}', key)
+
+                positions = self._positions(list(desired), order) if self.key_field else {}
+                for key, (payload, item) in desired.items():
+                    posicao = positions.get(key)
+                    if current.get(key) == payload:
+                        if posicao is not None and order.get(key) != posicao:
+                            conn.execute(f'UPDATE {self.table} SET posicao = ? WHERE {where}', (posicao, *key))
+                        continue
+                    columns = self._columns(key, item)
+                    if posicao is not None:
+                        columns['posicao'] = posicao
+                    columns['payload'] = payload
+                    columns['updated_at'] = timestamp
+                    names = ['id'] + list(columns.keys())
+                    updates = ', '.join(f'{n} = excluded.{n}' for n in columns if n not in key_columns)
+                    conn.execute(
+                        f'INSERT INTO {self.table} ({", ".join(names)}) '
+                        f'VALUES ({", ".join("?" for _ in names)}) '
+                        f'ON CONFLICT({", ".join(key_columns)}) DO UPDATE SET {updates}',
+                        (str(uuid.uuid4()), *columns.values())
+                    )
+
+                version = str(int(previous_version or 0) + 1)
+                self.db.set_meta(conn, f'documento:{self.kind}', _dumps(meta))
+                self.db.set_meta(conn, f'versao:{self.kind}', version)
+
+            self._data = data
+            self._rows = {key: payload for key, (payload, _item) in desired.items()}
+            self._order = positions
+            self._version = version
+            self._generation += 1
+
+    # ------------------------------------------------------------------
+    # Operações de um registro (boletos/clientes)
+    # ------------------------------------------------------------------
+
+    def _write_row(self, write: Callable[[sqlite3.Connection], bool]) -> bool:
+        """
+        Executa ``write(conn)`` e avança a versão, se o cache estiver em dia
+
+        Returns:
+            False se outro processo gravou desde a última leitura ou se
+            ``write`` não encontrou a linha (nada é gravado; quem chama usa
+            o caminho do documento inteiro)
+        """
+        with self.db.transaction() as conn:
+            previous_version = self.db.get_meta(f'versao:{self.kind}')
+            if previous_version is None or previous_version != self._version or not write(conn):
+                return False
+            version = str(int(previous_version) + 1)
+            self.db.set_meta(conn, f'versao:{self.kind}', version)
+        self._version = version
+        self._generation += 1
+        return True
+
+    def replace_record(self, field: str, value: Any, record: Dict[str, Any],
+                       dia_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self.locked():
+            loc_dia, posicao, item = self.find_record(field, value, dia_key)
+            if item is None:
+                return None
+            key = (loc_dia, str(value))
+            # A 1ª ocorrência do ID na coleção é a linha com chave == ID
+            if field == self.key_field and key in self._rows and str(record.get(field)) == str(value):
+                payload = _dumps(record)
+                columns = self._columns(key, record)
+                columns['payload'] = payload
+                columns['updated_at'] = _now()
+                assignments = ', '.join(f'{c} = ?' for c in columns)
+
+                def write(conn):
+                    return conn.execute(
+                        f'UPDATE {self.table} SET {assignments} WHERE colecao = ? AND chave = ?',
+                        (*columns.values(), *key)
+                    ).rowcount == 1
+
+                if self._write_row(write):
+                    self._data[loc_dia][posicao] = record
+                    self._rows[key] = payload
+                    return record
+            return super().replace_record(field, value, record, dia_key)
+
+    def append_record(self, dia_key: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        with self.locked():
+            data = self.load()
+            value = record.get(self.key_field) if self.key_field else None
+            key = (dia_key, str(value))
+            if isinstance(data.get(dia_key), list) and value not in (None, '') and key not in self._rows:
+                payload = _dumps(record)
+                columns = self._columns(key, record)
+                columns['payload'] = payload
+                columns['updated_at'] = _now()
+
+                def write(conn):
+                    columns['posicao'] = conn.execute(
+                        f'SELECT COALESCE(MAX(posicao), -1) + 1 FROM {self.table} WHERE colecao = ?',
+                        (dia_key,)
+                    ).fetchone()[0]
+                    names = ['id'] + list(columns)
+                    conn.execute(
+                        f'INSERT INTO {self.table} ({", ".join(names)}) '
+                        f'VALUES ({", ".join("?" for _ in names)})',
+                        (str(uuid.uuid4()), *columns.values())
+                    )
+                    return True
+
+                if self._write_row(write):
+                    data[dia_key].append(record)
+                    self._rows[key] = payload
+                    self._order[key] = columns['posicao']
+                    return record
+            return super().append_record(dia_key, record)
+
+    def delete_record(self, field: str, value: Any,
+                      dia_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self.locked():
+            loc_dia, posicao, item = self.find_record(field, value, dia_key)
+            if item is None:
+                return None
+            key = (loc_dia, str(value))
+            # Com IDs repetidos a chave '#1' passaria a ser a 1ª: regrava pelo documento
+            if field == self.key_field and key in self._rows and (loc_dia, f'{value}#1') not in self._rows:
+                def write(conn):
+                    return conn.execute(
+                        f'DELETE FROM {self.table} WHERE colecao = ? AND chave = ?', key
+                    ).rowcount == 1
+
+                if self._write_row(write):
+                    del self._data[loc_dia][posicao]
+                    del self._rows[key]
+                    self._order.pop(key, None)
+                    return item
+            return super().delete_record(field, value, dia_key)
+
+    @contextmanager
+    def locked(self):
+        """Bloqueio exclusivo para ciclos leitura-modificação-escrita"""
+        with self._lock:
+            try:
+                yield self
+            except BaseException:
+                self.invalidate()
+                raise
+
+    # ------------------------------------------------------------------
+    # Consultas indexadas
+    # ------------------------------------------------------------------
+
+    def find_rows(self, **filters) -> List[Dict[str, Any]]:
+        """
+        Busca registros por colunas indexadas (task_id, client_id, dia, grupo, cota)
+
+        Returns:
+            Lista de payloads (cópias) que atendem aos filtros
+        """
+        if not filters:
+            return []
+        where = ' AND '.join(f'{campo} = ?' for campo in filters)
+        rows = self.db.connection().execute(
+            f'SELECT payload FROM {self.table} WHERE {where}', tuple(filters.values())
+        ).fetchall()
+        return [json.loads(r['payload']) for r in rows]
+
+
+class SqliteHistoryLog:
+    """Mesma interface de utils.history_log.HistoryLog sobre historico_execucoes"""
+
+    _CAMPOS = ('grupo', 'cota', 'nome', 'valor_lance', 'status', 'observacao',
+               'protocolo', 'documento_url', 'docparser_url')
+
+    def __init__(self, db: SqliteDatabase, dia: str):
+        self.db = db
+        self.dia = dia
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        columns = {campo: _text(entry.get(campo)) for campo in self._CAMPOS}
+        created_at = f"{entry.get('data', '')} {entry.get('hora', '')}".strip() or _now()
+        with self.db.transaction() as conn:
+            conn.execute(
+                'INSERT INTO historico_execucoes '
+                f'(id, dia, {", ".join(columns)}, payload, created_at) '
+                f'VALUES (?, ?, {", ".join("?" for _ in columns)}, ?, ?)',
+                (str(uuid.uuid4()), self.dia, *columns.values(), _dumps(entry), created_at)
+            )
+
+    def count(self) -> int:
+        row = self.db.connection().execute(
+            'SELECT COUNT(*) AS total FROM historico_execucoes WHERE dia = ?', (self.dia,)
+        ).fetchone()
+        return row['total']
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        cursor = self.db.connection().execute(
+            'SELECT payload FROM historico_execucoes WHERE dia = ? ORDER BY rowid', (self.dia,)
+        )
+        for row in cursor:
+            yield json.loads(row['payload'])
+
+    def read_page(self, offset: int = 0, limit: Optional[int] = None,
+                  newest_first: bool = False) -> Tuple[List[Dict[str, Any]], int]:
+        order = 'DESC' if newest_first else 'ASC'
+        rows = self.db.connection().execute(
+            f'SELECT payload FROM historico_execucoes WHERE dia = ? '
+            f'ORDER BY rowid {order} LIMIT ? OFFSET ?',
+            (self.dia, -1 if limit is None else max(0, limit), max(0, offset))
+        ).fetchall()
+        return [json.loads(r['payload']) for r in rows], self.count()
+
+    def tail(self, n: int) -> List[Dict[str, Any]]:
+        return self.read_page(0, n, newest_first=True)[0]
+
+    # Mesma regra de utils.history_log.classify_status
+    _STATUS_CLASS_SQL = (
+        "CASE"
+        " WHEN lower(status) LIKE '%sucesso%' OR status LIKE '%✅%' THEN 'success'"
+        " WHEN lower(status) LIKE '%erro%' OR status LIKE '%❌%' OR lower(status) LIKE '%falha%' THEN 'failed'"
+        " WHEN status LIKE '%⏹️%' OR lower(status) LIKE '%parado%' THEN 'stopped'"
+        " ELSE 'other' END"
+    )
+
+    def query(self, offset: int = 0, limit: Optional[int] = None, newest_first: bool = False,
+              data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+              grupo: Optional[str] = None, cota: Optional[str] = None,
+              status: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+        where, params = ['dia = ?'], [self.dia]
+        if data_inicio:
+            where.append('substr(created_at, 1, 10) >= ?')
+            params.append(data_inicio)
+        if data_fim:
+            where.append('substr(created_at, 1, 10) <= ?')
+            params.append(data_fim)
+        if grupo:
+            where.append('grupo = ?')
+            params.append(grupo)
+        if cota:
+            where.append('cota = ?')
+            params.append(cota)
+        if status:
+            where.append(f'{self._STATUS_CLASS_SQL} = ?')
+            params.append(status)
+
+        conn = self.db.connection()
+        clause = ' AND '.join(where)
+        total = conn.execute(
+            f'SELECT COUNT(*) AS total FROM historico_execucoes WHERE {clause}', params
+        ).fetchone()['total']
+        order = 'DESC' if newest_first else 'ASC'
+        rows = conn.execute(
+            f'SELECT payload FROM historico_execucoes WHERE {clause} '
+            f'ORDER BY rowid {order} LIMIT ? OFFSET ?',
+            (*params, -1 if limit is None else max(0, limit), max(0, offset))
+        ).fetchall()
+        return [json.loads(r['payload']) for r in rows], total
+
+    def compact(self, keep: Optional[Callable[[Dict[str, Any]], bool]] = None) -> int:
+        if keep is None:
+            return 0
+        conn = self.db.connection()
+        remove = [
+            row['rowid'] for row in conn.execute(
+                'SELECT rowid, payload FROM historico_execucoes WHERE dia = ?', (self.dia,)
+            ).fetchall()
+            if not keep(json.loads(row['payload']))
+        ]
+        with self.db.transaction() as conn:
+            conn.executemany('DELETE FROM historico_execucoes WHERE rowid = ?',
+                             [(rowid,) for rowid in remove])
+        return len(remove)
+
+    def clear(self) -> None:
+        with self.db.transaction() as conn:
+            conn.execute('DELETE FROM historico_execucoes WHERE dia = ?', (self.dia,))
+
+
+# ----------------------------------------------------------------------
+# Importação dos arquivos JSON
+# ----------------------------------------------------------------------
+
+def import_json_files(db: SqliteDatabase, project_root: str, force: bool = False) -> Dict[str, int]:
+    """
+    Importa boletos/clientes/cotas_data.json e o histórico para o banco
+
+    A importação roda uma única vez; use ``force=True`` para repetir
+    (os documentos são substituídos e o histórico é recarregado).
+
+    Returns:
+        dict com a quantidade de registros importados por tabela
+    """
+    from utils.history_log import HistoryLog
+
+    if db.get_meta('importado_em') and not force:
+        return {}
+
+    stats: Dict[str, int] = {}
+
+    for kind in DEFAULT_DOCUMENTS:
+        filepath = os.path.join(project_root, f'{kind}_data.json')
+        if not os.path.exists(filepath):
+            continue
+        with open(filepath, 'r', encoding='utf-8-sig') as f:
+            content = f.read().strip()
+        data = json.loads(content) if content else copy.deepcopy(DEFAULT_DOCUMENTS[kind])
+
+        store = db.document_store(kind)
+        with store.locked():
+            store.save(data)
+        _meta, rows = store._split(data)
+        stats[kind] = len(rows)
+
+    for dia in ('dia8', 'dia16'):
+        legacy = HistoryLog(
+            os.path.join(project_root, f'history_{dia}.jsonl'),
+            legacy_path=os.path.join(project_root, f'history_{dia}.json')
+        )
+        log = db.history_log(dia)
+        log.clear()
+        total = 0
+        for entry in legacy.iter_entries():
+            log.append(entry)
+            total += 1
+        stats[f'historico_{dia}'] = total
+
+    with db.transaction() as conn:
+        db.set_meta(conn, 'importado_em', _now())
+
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+
+    parser = argparse.ArgumentParser(description='Importa os arquivos JSON do OXCASH para SQLite')
+    parser.add_argument('--db', default=os.path.join(project_root, 'data', 'oxcash.db'))
+    parser.add_argument('--force', action='store_true', help='Reimporta mesmo se já importado')
+    args = parser.parse_args()
+
+    database = SqliteDatabase(args.db)
+    result = import_json_files(database, project_root, force=args.force)
+    if not result:
+        print(f"ℹ️ Banco {args.db} já importado (use --force para reimportar)")
+    else:
+        for tabela, total in result.items():
+            print(f"✅ {tabela}: {total} registros importados")
@@ -1,28 +1,75 @@
 """
 Módulo para interação com Todoist REST API
 Documentação: https://developer.todoist.com/rest/v2
+
+Com ``mirror_path``, as leituras (projetos, seções e tarefas) vêm de um
+espelho local atualizado pela Sync API (ver utils/todoist_sync.py): cada
+extração de board faz uma única sincronização incremental em vez de listar
+tudo de novo.
+
+Alterações em lote (concluir uma coluna inteira, por exemplo) usam
+``run_commands``/``close_tasks``: até 100 comandos por requisição, com o
+resultado de cada um.
 """
 
+import json
+import time
+
 import requests
 from typing import Dict, List, Optional
 
+from utils.http_client import get_session
+from utils.todoist_sync import (
+    MAX_COMMANDS_PER_REQUEST,
+    SYNC_URL,
+    TodoistCommandBatch,
+    TodoistSyncMirror,
+    command_task_id,
+)
+
+# Leituras pelo espelho sincronizam de novo após este intervalo (segundos)
+MIRROR_MAX_AGE = 30
+
 class TodoistRestAPI:
     """Cliente para Todoist REST API"""
     
     BASE_URL = "https://api.todoist.com/rest/v2"
     
-    def __init__(self, token: str):
+    def __init__(self, token: str, mirror_path: Optional[str] = None):
         """
         Inicializa o cliente da API
         
         Args:
             token: Token de autenticação do Todoist
+            mirror_path: Arquivo do espelho local (ex.: data/todoist_mirror.json);
+                None = leituras direto pela REST API
         """
         self.token = token
+        # Sessão compartilhada: conexão reaproveitada e timeout padrão
+        self.session = get_session()
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
+        self.mirror = TodoistSyncMirror(token, mirror_path, session=self.session) if mirror_path else None
+    
+    def sync_mirror(self, force: bool = False) -> bool:
+        """
+        Atualiza o espelho local se estiver desatualizado (ou sempre, com force)
+        
+        Returns:
+            True se o espelho está em uso
+        """
+        if self.mirror is None:
+            return False
+        last_sync = self.mirror.last_sync
+        if force or last_sync is None or time.monotonic() - last_sync > MIRROR_MAX_AGE:
+            self.mirror.sync()
+        return True
+    
+    def _mark_mirror_stale(self) -> None:
+        if self.mirror is not None:
+            self.mirror.mark_stale()
     
     def get_projects(self) -> List[Dict]:
         """
@@ -31,8 +78,10 @@ class TodoistRestAPI:
         Returns:
             Lista de projetos
         """
+        if self.sync_mirror():
+            return self.mirror.get_projects()
         url = f"{self.BASE_URL}/projects"
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
@@ -46,6 +95,8 @@ class TodoistRestAPI:
         Returns:
             Dados do projeto ou None se não encontrado
         """
+        if self.sync_mirror():
+            return self.mirror.get_project_by_name(name)
         projects = self.get_projects()
         for project in projects:
             if project.get('name') == name:
@@ -62,9 +113,11 @@ class TodoistRestAPI:
         Returns:
             Lista de seções
         """
+        if self.sync_mirror():
+            return self.mirror.get_sections(project_id)
         url = f"{self.BASE_URL}/sections"
         params = {"project_id": project_id}
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self.session.get(url, headers=self.headers, params=params)
         response.raise_for_status()
         return response.json()
     
@@ -79,6 +132,8 @@ class TodoistRestAPI:
         Returns:
             Lista de tarefas
         """
+        if self.sync_mirror():
+            return self.mirror.get_tasks(project_id=project_id, section_id=section_id)
         url = f"{self.BASE_URL}/tasks"
         params = {}
         
@@ -87,7 +142,7 @@ class TodoistRestAPI:
         if section_id:
             params['section_id'] = section_id
             
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self.session.get(url, headers=self.headers, params=params)
         response.raise_for_status()
         return response.json()
     
@@ -102,7 +157,7 @@ class TodoistRestAPI:
             Dados da tarefa
         """
         url = f"{self.BASE_URL}/tasks/{task_id}"
-        response = requests.get(url, headers=self.headers)
+        response = self.session.get(url, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
@@ -117,8 +172,9 @@ class TodoistRestAPI:
             True se sucesso
         """
         url = f"{self.BASE_URL}/tasks/{task_id}/close"
-        response = requests.post(url, headers=self.headers)
+        response = self.session.post(url, headers=self.headers)
         response.raise_for_status()
+        self._mark_mirror_stale()
         # close_task retorna 204 No Content em sucesso
         return response.status_code == 204
     
@@ -133,8 +189,9 @@ class TodoistRestAPI:
             True se sucesso (retorna 204 No Content)
         """
         url = f"{self.BASE_URL}/tasks/{task_id}/reopen"
-        response = requests.post(url, headers=self.headers)
+        response = self.session.post(url, headers=self.headers)
         response.raise_for_status()
+        self._mark_mirror_stale()
         # reopen_task retorna 204 No Content em sucesso
         return response.status_code == 204
     
@@ -150,8 +207,9 @@ class TodoistRestAPI:
             Dados da tarefa atualizada
         """
         url = f"{self.BASE_URL}/tasks/{task_id}"
-        response = requests.post(url, headers=self.headers, json=kwargs)
+        response = self.session.post(url, headers=self.headers, json=kwargs)
         response.raise_for_status()
+        self._mark_mirror_stale()
         return response.json()
     
     def add_comment(self, task_id: str, content: str) -> Dict:
@@ -170,10 +228,65 @@ class TodoistRestAPI:
             "task_id": task_id,
             "content": content
         }
-        response = requests.post(url, headers=self.headers, json=payload)
+        response = self.session.post(url, headers=self.headers, json=payload)
         response.raise_for_status()
         return response.json()
     
+    def run_commands(self, batch: TodoistCommandBatch) -> List[Dict]:
+        """
+        Envia os comandos do lote pela Sync API (até 100 por requisição)
+        
+        Args:
+            batch: Comandos acumulados (concluir, reabrir, atualizar, comentar)
+            
+        Returns:
+            Um resultado por comando, na ordem do lote:
+            {'uuid', 'type', 'task_id', 'ok', 'error'}
+            
+        Raises:
+            requests.exceptions.HTTPError: se a requisição inteira falhar
+        """
+        results = []
+        # Sync API recebe formulário: só o cabeçalho de autenticação
+        headers = {"Authorization": self.headers["Authorization"]}
+        
+        for start in range(0, len(batch.commands), MAX_COMMANDS_PER_REQUEST):
+            chunk = batch.commands[start:start + MAX_COMMANDS_PER_REQUEST]
+            response = self.session.post(SYNC_URL, headers=headers, data={'commands': json.dumps(chunk)})
+            response.raise_for_status()
+            self._mark_mirror_stale()
+            sync_status = response.json().get('sync_status', {})
+            
+            for command in chunk:
+                status = sync_status.get(command['uuid'], {'error': 'Comando sem resposta'})
+                error = None
+                if status != 'ok':
+                    error = status.get('error', str(status)) if isinstance(status, dict) else str(status)
+                results.append({
+                    'uuid': command['uuid'],
+                    'type': command['type'],
+                    'task_id': command_task_id(command),
+                    'ok': error is None,
+                    'error': error,
+                })
+        
+        return results
+    
+    def close_tasks(self, task_ids: List[str]) -> List[Dict]:
+        """
+        Conclui várias tarefas em uma única requisição (ver run_commands)
+        
+        Args:
+            task_ids: IDs das tarefas
+            
+        Returns:
+            Resultado de cada tarefa, na mesma ordem
+        """
+        batch = TodoistCommandBatch()
+        for task_id in task_ids:
+            batch.close(task_id)
+        return self.run_commands(batch)
+    
     def extract_boletos_board(self, project_name: str = "Boletos Servopa Outubro", 
                             section_dia08: str = "Vencimento dia 08",
                             section_dia16: str = "Vencimento dia 16",
@@ -194,6 +307,10 @@ class TodoistRestAPI:
             if progress_callback:
                 progress_callback("🔍 Buscando projeto no Todoist...")
             
+            # Espelho local: uma requisição incremental para toda a extração
+            if self.sync_mirror(force=True) and progress_callback:
+                progress_callback("🔄 Espelho local do Todoist sincronizado")
+            
             # Busca projeto
             project = self.get_project_by_name(project_name)
             if not project:
@@ -304,6 +421,10 @@ class TodoistRestAPI:
         try:
             result = {'dia08': [], 'dia16': []}
             
+            # Espelho local: uma requisição incremental para toda a extração
+            if self.sync_mirror(force=True) and progress_callback:
+                progress_callback("🔄 Espelho local do Todoist sincronizado")
+            
             # Processa dia 8
             if progress_callback:
                 progress_callback(f"🔍 Buscando projeto '{project_dia8}'...")
@@ -459,8 +580,9 @@ class TodoistRestAPI:
         if labels:
             payload["labels"] = labels
         
-        response = requests.post(url, headers=self.headers, json=payload)
+        response = self.session.post(url, headers=self.headers, json=payload)
         response.raise_for_status()
+        self._mark_mirror_stale()
         return response.json()
     
     def update_task(self, task_id: str, content: Optional[str] = None,
@@ -487,8 +609,9 @@ class TodoistRestAPI:
         if labels is not None:
             payload["labels"] = labels
         
-        response = requests.post(url, headers=self.headers, json=payload)
+        response = self.session.post(url, headers=self.headers, json=payload)
         response.raise_for_status()
+        self._mark_mirror_stale()
         return response.json()
     
     def delete_task(self, task_id: str) -> bool:
@@ -502,7 +625,8 @@ class TodoistRestAPI:
             True se sucesso
         """
         url = f"{self.BASE_URL}/tasks/{task_id}"
-        response = requests.delete(url, headers=self.headers)
+        response = self.session.delete(url, headers=self.headers)
         response.raise_for_status()
+        self._mark_mirror_stale()
         # delete retorna 204 No Content em sucesso
         return response.status_code == 204
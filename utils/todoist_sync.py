@@ -0,0 +1,208 @@
+"""
+Espelho local do Todoist mantido pela Sync API (sync_token incremental)
+
+As extrações de board (boletos e lances) listavam projetos, seções e
+tarefas inteiros pela REST API a cada importação. O espelho guarda em disco
+os projetos, seções e tarefas ativas e o ``sync_token`` da última
+sincronização: cada ``sync()`` é uma única requisição que devolve só o que
+mudou desde então (na primeira vez, ou com token inválido, vem tudo).
+
+As consultas devolvem os objetos no mesmo formato da REST API v2
+(``id``, ``name``, ``content``, ``is_completed``...), então quem usava
+TodoistRestAPI.get_tasks() não percebe a diferença.
+
+Uso:
+    from utils.todoist_sync import TodoistSyncMirror
+
+    mirror = TodoistSyncMirror(token, 'data/todoist_mirror.json')
+    mirror.sync()                                  # 1 requisição
+    project = mirror.get_project_by_name('Boletos Servopa Outubro')
+    tasks = mirror.get_tasks(project_id=project['id'])
+
+Alterações em lote vão pelo endpoint de comandos da mesma Sync API: cada
+``TodoistCommandBatch`` (concluir, reabrir, atualizar, comentar) é enviado
+por TodoistRestAPI.run_commands() em uma requisição a cada 100 comandos,
+com o resultado de cada comando.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from utils.data_store import get_document_store
+from utils.http_client import get_session
+
+SYNC_URL = "https://api.todoist.com/sync/v9/sync"
+RESOURCE_TYPES = ('projects', 'sections', 'items')
+FULL_SYNC_TOKEN = '*'
+# Limite de comandos por requisição da Sync API
+MAX_COMMANDS_PER_REQUEST = 100
+
+
+def _empty_mirror(token_id: str) -> Dict[str, Any]:
+    return {'token_id': token_id, 'sync_token': FULL_SYNC_TOKEN, 'synced_at': None,
+            'projects': {}, 'sections': {}, 'items': {}}
+
+
+def _is_active(resource: str, obj: Dict[str, Any]) -> bool:
+    """Tarefas concluídas e objetos excluídos/arquivados saem do espelho (como na REST)"""
+    if obj.get('is_deleted') or obj.get('is_archived'):
+        return False
+    return not (resource == 'items' and obj.get('checked'))
+
+
+class TodoistCommandBatch:
+    """Comandos da Sync API acumulados para envio em uma única requisição"""
+
+    def __init__(self):
+        self.commands: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def _add(self, command_type: str, args: Dict[str, Any]) -> str:
+        command_uuid = str(uuid.uuid4())
+        self.commands.append({'type': command_type, 'uuid': command_uuid, 'args': args})
+        return command_uuid
+
+    def close(self, task_id: str) -> str:
+        """Conclui a tarefa (retorna o uuid do comando)"""
+        return self._add('item_close', {'id': str(task_id)})
+
+    def reopen(self, task_id: str) -> str:
+        """Reabre a tarefa concluída"""
+        return self._add('item_uncomplete', {'id': str(task_id)})
+
+    def update(self, task_id: str, **fields) -> str:
+        """Atualiza campos da tarefa (content, description, labels...)"""
+        return self._add('item_update', {'id': str(task_id), **fields})
+
+    def comment(self, task_id: str, content: str) -> str:
+        """Adiciona um comentário à tarefa"""
+        return self._add('note_add', {'item_id': str(task_id), 'content': content})
+
+
+def command_task_id(command: Dict[str, Any]) -> Optional[str]:
+    """ID da tarefa alvo de um comando do lote"""
+    args = command.get('args', {})
+    return args.get('id') or args.get('item_id')
+
+
+class TodoistSyncMirror:
+    """Projetos, seções e tarefas ativas do Todoist, atualizados por sync incremental"""
+
+    def __init__(self, token: str, mirror_path: str, session=None):
+        """
+        Args:
+            token: Token de autenticação do Todoist
+            mirror_path: Arquivo JSON do espelho (ex.: data/todoist_mirror.json)
+            session: Sessão HTTP (padrão: sessão compartilhada de utils.http_client)
+        """
+        self.token = token
+        self.session = session or get_session()
+        self.store = get_document_store(mirror_path)
+        self.headers = {"Authorization": f"Bearer {token}"}
+        # Identifica o token sem gravá-lo: outro token começa um espelho novo
+        self.token_id = hashlib.sha256(token.encode('utf-8')).hexdigest()[:16]
+        self.last_sync: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        data = self.store.load()
+        if not data or data.get('token_id') != self.token_id:
+            return _empty_mirror(self.token_id)
+        return data
+
+    def sync(self) -> int:
+        """
+        Busca as mudanças desde o último sync_token e grava o espelho
+
+        Returns:
+            Quantidade de objetos recebidos (0 = nada mudou)
+
+        Raises:
+            requests.exceptions.HTTPError: se a Sync API responder com erro
+        """
+        with self._lock, self.store.locked():
+            mirror = self._load()
+            response = self.session.post(
+                SYNC_URL,
+                headers=self.headers,
+                data={
+                    'sync_token': mirror['sync_token'],
+                    'resource_types': json.dumps(list(RESOURCE_TYPES)),
+                },
+            )
+            response.raise_for_status()
+            payload = response.json()
+
+            if payload.get('full_sync'):
+                # Primeira sincronização ou token expirado: recomeça do zero
+                mirror = _empty_mirror(self.token_id)
+
+            received = 0
+            for resource in RESOURCE_TYPES:
+                objects = mirror[resource]
+                for obj in payload.get(resource, []):
+                    received += 1
+                    obj_id = str(obj['id'])
+                    if _is_active(resource, obj):
+                        objects[obj_id] = obj
+                    else:
+                        objects.pop(obj_id, None)
+
+            mirror['sync_token'] = payload.get('sync_token', mirror['sync_token'])
+            mirror['synced_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            self.store.save(mirror)
+            self.last_sync = time.monotonic()
+            return received
+
+    def mark_stale(self) -> None:
+        """Indica que houve alteração local (a próxima leitura deve sincronizar)"""
+        self.last_sync = None
+
+    # ------------------------------------------------------------------
+    # Consultas no formato da REST API v2
+    # ------------------------------------------------------------------
+
+    def get_projects(self) -> List[Dict]:
+        projects = self._load()['projects'].values()
+        return [
+            {'id': str(p['id']), 'name': p.get('name', ''), 'parent_id': p.get('parent_id'),
+             'order': p.get('child_order', 0), 'color': p.get('color'),
+             'is_favorite': p.get('is_favorite', False)}
+            for p in sorted(projects, key=lambda p: p.get('child_order', 0))
+        ]
+
+    def get_project_by_name(self, name: str) -> Optional[Dict]:
+        for project in self.get_projects():
+            if project['name'] == name:
+                return project
+        return None
+
+    def get_sections(self, project_id: str) -> List[Dict]:
+        sections = [s for s in self._load()['sections'].values() if str(s.get('project_id')) == str(project_id)]
+        return [
+            {'id': str(s['id']), 'project_id': str(s['project_id']), 'name': s.get('name', ''),
+             'order': s.get('section_order', 0)}
+            for s in sorted(sections, key=lambda s: s.get('section_order', 0))
+        ]
+
+    def get_tasks(self, project_id: Optional[str] = None, section_id: Optional[str] = None) -> List[Dict]:
+        items = [
+            i for i in self._load()['items'].values()
+            if (project_id is None or str(i.get('project_id')) == str(project_id))
+            and (section_id is None or str(i.get('section_id')) == str(section_id))
+        ]
+        return [
+            {'id': str(i['id']), 'content': i.get('content', ''), 'description': i.get('description', ''),
+             'project_id': str(i.get('project_id')),
+             'section_id': str(i['section_id']) if i.get('section_id') else None,
+             'parent_id': i.get('parent_id'), 'order': i.get('child_order', 0),
+             'labels': i.get('labels', []), 'priority': i.get('priority', 1), 'due': i.get('due'),
+             'is_completed': bool(i.get('checked')), 'created_at': i.get('added_at')}
+            for i in sorted(items, key=lambda i: i.get('child_order', 0))
+        ]
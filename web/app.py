@@ -4,11 +4,12 @@
 Interface web moderna para o sistema de automação
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, session, abort
+from flask import Flask, render_template, jsonify, request, redirect, url_for, session, abort, send_file
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 from functools import wraps
 from typing import Dict
+import hashlib
 import json
 import os
 import sys
@@ -32,6 +33,16 @@ from utils.link_shortener import (
     get_short_code_for_task,
     resolve_short_link,
 )
+from utils.blob_store import SCREENSHOT_BLOB_FIELD, get_blob_store, migrate_stores
+from utils.boleto_downloader import prefetch_boleto_pdf
+from utils.boleto_pdf_cache import PdfFetchError, get_pdf_cache
+from utils.cache_manager import get_cache_manager
+from utils.data_store import get_document_store
+from utils.http_client import get_metrics as get_http_metrics
+from utils.http_compression import init_compression, strip_encoding_etag
+from utils.job_queue import JobQueue, PermanentJobError
+from utils.history_log import STATUS_CLASSES, get_history_log, set_history_backend
+from utils.history_stats import get_history_stats
 from ai.ai_agent import OXCASHAgent
 
 app = Flask(__name__)
@@ -41,6 +52,7 @@ app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['PUBLIC_BASE_URL'] = os.environ.get('PUBLIC_BASE_URL', '').rstrip('/')
 CORS(app)
+init_compression(app)
 socketio = SocketIO(app, cors_allowed_origins="*")
 
 # Estado global da aplicação
@@ -57,6 +69,182 @@ app_state = {
     'stop_automation': {}  # Controle de parada de automação por grupo
 }
 
+# Repositórios em memória dos arquivos de dados (relidos só quando mudam no disco)
+BOLETOS_STORE = get_document_store(
+    os.path.join(PROJECT_ROOT, 'boletos_data.json'),
+    default={'dia08': [], 'dia16': [], 'last_import': None}
+)
+CLIENTES_STORE = get_document_store(
+    os.path.join(PROJECT_ROOT, 'clientes_data.json'),
+    default={'dia08': [], 'dia16': []}
+)
+COTAS_STORE = get_document_store(
+    os.path.join(PROJECT_ROOT, 'cotas_data.json'),
+    default={'grupos': []}
+)
+
+# Backend SQLite opcional (OXCASH_STORAGE=sqlite) - mesmo schema de supabase/migrations
+SQLITE_DB = None
+if os.environ.get('OXCASH_STORAGE', 'json').lower() == 'sqlite':
+    from utils.sqlite_store import SqliteDatabase, import_json_files
+    
+    SQLITE_DB = SqliteDatabase(
+        os.environ.get('OXCASH_SQLITE_PATH') or os.path.join(PROJECT_ROOT, 'data', 'oxcash.db')
+    )
+    imported = import_json_files(SQLITE_DB, PROJECT_ROOT)
+    if imported:
+        print(f"📦 Dados JSON importados para SQLite: {imported}")
+    
+    BOLETOS_STORE = SQLITE_DB.document_store('boletos')
+    CLIENTES_STORE = SQLITE_DB.document_store('clientes')
+    COTAS_STORE = SQLITE_DB.document_store('cotas')
+    set_history_backend(lambda project_root, dia: SQLITE_DB.history_log(dia))
+    print(f"🗄️ Armazenamento SQLite ativo: {SQLITE_DB.path}")
+
+# Screenshots dos boletos ficam em data/blobs (fora dos JSONs)
+BLOB_STORE = get_blob_store(PROJECT_ROOT)
+try:
+    _migrated = migrate_stores(BLOB_STORE, BOLETOS_STORE, CLIENTES_STORE)
+    if _migrated:
+        print(f"📦 {_migrated} screenshots (png_base64) movidos para {BLOB_STORE.root}")
+except Exception as e:
+    print(f"⚠️ Erro ao migrar screenshots para o repositório de blobs: {e}")
+
+# PDFs servidos por /boleto/<code>; limites de disco em utils/cache_manager.py
+PDF_CACHE = get_pdf_cache(PROJECT_ROOT)
+CACHE_MANAGER = get_cache_manager(PROJECT_ROOT)
+
+# Token da API do Todoist (comentários de envio e conclusão em lote no ciclo)
+TODOIST_TOKEN = os.environ.get('TODOIST_TOKEN', "aa4b5ab41a462bd6fd5dbae643b45fe9bfaeeded")
+TODOIST_MIRROR_PATH = os.path.join(PROJECT_ROOT, 'data', 'todoist_mirror.json')
+# Origem do board de lances: 'api' (REST, só o Servopa no navegador) ou 'browser'
+BOARD_SOURCES = ('api', 'browser')
+DEFAULT_BOARD_SOURCE = os.environ.get('LANCES_BOARD_SOURCE', 'api').strip().lower()
+if DEFAULT_BOARD_SOURCE not in BOARD_SOURCES:
+    print(f"⚠️ LANCES_BOARD_SOURCE inválido ({DEFAULT_BOARD_SOURCE!r}); usando 'api'")
+    DEFAULT_BOARD_SOURCE = 'api'
+
+# Envios de WhatsApp saem da requisição: as rotas enfileiram e os workers
+# entregam (handlers registrados junto de cada rota; ver utils/job_queue.py)
+WHATSAPP_QUEUE = JobQueue(
+    get_document_store(os.path.join(PROJECT_ROOT, 'data', 'whatsapp_queue.json'), default={'jobs': {}}),
+    on_change=lambda job: socketio.emit('whatsapp_job', _public_job(job), namespace='/'),
+    name='whatsapp-queue'
+)
+
+def _public_job(job):
+    """Job sem o payload (mensagem/contatos) para respostas e eventos"""
+    return {key: value for key, value in job.items() if key != 'payload'}
+
+def _enqueue_whatsapp(kind, payload, default_key, message, **extra):
+    """Enfileira um envio: 202 com o job, ou 200 se a mesma chave já está na fila"""
+    key = request.headers.get('Idempotency-Key') or default_key
+    job, created = WHATSAPP_QUEUE.enqueue(kind, payload, key=key)
+    if not created:
+        message = 'Este envio já está na fila ou acabou de ser feito'
+    return jsonify({
+        'success': True,
+        'queued': True,
+        'duplicate': not created,
+        'message': message,
+        'job': _public_job(job),
+        **extra
+    }), 202 if created else 200
+
+def _enqueued_whatsapp_batch(jobs, descricao, **extra):
+    """Resposta de um lote enfileirado ([(nome, (job, criado)), ...]): 202 se algum job é novo"""
+    criados = sum(1 for _nome, (_job, created) in jobs if created)
+    message = f'{criados} {descricao} adicionados à fila do WhatsApp'
+    if criados < len(jobs):
+        message += f' ({len(jobs) - criados} já estavam na fila ou acabaram de ser enviados)'
+    return jsonify({
+        'success': True,
+        'queued': True,
+        'duplicate': criados == 0,
+        'message': message,
+        'jobs': [dict(_public_job(job), nome=nome) for nome, (job, _created) in jobs],
+        **extra
+    }), 202 if criados else 200
+
+def _evolution_api_from_config():
+    """Cliente da Evolution API conforme evolution_config.json (usado pelos jobs da fila)"""
+    from utils.evolution_api import EvolutionAPI
+    
+    config_path = os.path.join(PROJECT_ROOT, 'evolution_config.json')
+    if not os.path.exists(config_path):
+        raise PermanentJobError('Configuração da Evolution API não encontrada')
+    with open(config_path, 'r', encoding='utf-8') as f:
+        api_config = json.load(f).get('api', {})
+    if not api_config.get('instance_name') or not api_config.get('api_key'):
+        raise PermanentJobError('Configuração da Evolution API incompleta')
+    return EvolutionAPI(
+        api_config.get('base_url') or 'https://zap.tekvosoft.com',
+        api_config['instance_name'],
+        api_config['api_key'],
+        upload_mode=api_config.get('upload_mode') or 'base64'
+    )
+
+def _whatsapp_send_delay():
+    """Intervalo entre envios em massa (configuracoes.delay_entre_mensagens, padrão 2s)"""
+    config_path = os.path.join(PROJECT_ROOT, 'evolution_config.json')
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            delay = float(json.load(f).get('configuracoes', {}).get('delay_entre_mensagens', 2.0))
+    except (OSError, ValueError, TypeError, AttributeError):
+        return 2.0
+    return delay if delay > 0 else 2.0
+
+# Ritmo compartilhado pelos workers da fila: um envio por delay_entre_mensagens,
+# e um 429 da Evolution segura todos os envios pelo Retry-After
+_WHATSAPP_PACING = {'delay': None, 'bucket': None}
+_WHATSAPP_PACING_LOCK = threading.Lock()
+
+def _paced_whatsapp_send(send):
+    """Executa send() (retorna dict com 'success') no ritmo dos envios de WhatsApp"""
+    from utils.evolution_api import retry_after_seconds
+    from utils.rate_limiter import TokenBucket
+
+    delay = _whatsapp_send_delay()
+    with _WHATSAPP_PACING_LOCK:
+        if _WHATSAPP_PACING['delay'] != delay:
+            _WHATSAPP_PACING.update(delay=delay, bucket=TokenBucket(1.0 / delay, capacity=1))
+        bucket = _WHATSAPP_PACING['bucket']
+
+    bucket.acquire()
+    result = send()
+    if not result.get('success') and result.get('status_code') == 429:
+        bucket.pause(retry_after_seconds(result.get('retry_after')))
+    return result
+
+def _public_boleto_url(task_id, link_boleto):
+    """
+    URL pública do PDF pelo proxy /boleto/<code> (requer PUBLIC_BASE_URL)
+
+    Com ela a Evolution API baixa o boleto do cache deste servidor em vez de
+    receber o PDF em base64 no corpo da requisição.
+    """
+    base_url = app.config['PUBLIC_BASE_URL']
+    if not base_url or not link_boleto:
+        return None
+    if link_boleto.startswith(f'{base_url}/boleto/'):
+        return link_boleto
+    if 'consorcioservopa.com.br' not in link_boleto.lower():
+        return None
+    return build_public_short_url(base_url, create_short_link(task_id, link_boleto))
+
+def _format_brl(value):
+    """Formata valor em moeda brasileira (R$ 1.234,56)"""
+    return f"R$ {value:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+def _record_automation_status(dia, **fields):
+    """Registra o status da automação em automacao_status (apenas com SQLite)"""
+    if SQLITE_DB is None:
+        return
+    try:
+        SQLITE_DB.set_automation_status(dia, **fields)
+    except Exception as e:
+        print(f"⚠️ Erro ao registrar status da automação: {e}")
+
 # ========== MIDDLEWARE DE AUTENTICAÇÃO ==========
 
 def login_required(f):
@@ -208,10 +396,12 @@ def proxy_boleto(code):
     
     Como o Servopa valida o IP no link, fazemos o download usando o IP
     do servidor e servimos o PDF diretamente para o cliente.
-    """
-    import requests
-    from io import BytesIO
     
+    O PDF fica no cache por conteúdo em data/boletos_cache, compartilhado
+    com o envio por WhatsApp (mesma URL = mesmo arquivo); acessos
+    simultâneos a um boleto fora do cache compartilham um único download,
+    repassado ao cliente em blocos enquanto é gravado.
+    """
     original_url = resolve_short_link(code)
     if not original_url:
         abort(404)
@@ -220,65 +410,71 @@ def proxy_boleto(code):
     if 'consorcioservopa.com.br' not in original_url.lower():
         return redirect(original_url, code=302)
     
+    download_name = f'boleto_{code}.pdf'
+    
+    # Se já está em cache, serve o arquivo (Range, ETag e If-Modified-Since)
+    cache_file = PDF_CACHE.cached_path(code, url=original_url)
+    if cache_file:
+        CACHE_MANAGER.touch(cache_file)
+        return send_file(
+            cache_file,
+            mimetype='application/pdf',
+            download_name=download_name,
+            conditional=True,
+            max_age=3600
+        )
+    
+    # Faz download do Servopa usando o IP do servidor
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    }
+    
     try:
-        # Cache directory
-        cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'boletos_cache')
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        # Cache file path
-        cache_file = os.path.join(cache_dir, f'{code}.pdf')
-        
-        # Se já está em cache, retorna direto
-        if os.path.exists(cache_file):
-            with open(cache_file, 'rb') as f:
-                pdf_data = f.read()
-            
-            response = app.make_response(pdf_data)
-            response.headers['Content-Type'] = 'application/pdf'
-            response.headers['Content-Disposition'] = f'inline; filename=boleto_{code}.pdf'
-            return response
-        
-        # Faz download do Servopa usando o IP do servidor
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
-        }
-        
-        resp = requests.get(original_url, headers=headers, timeout=30, allow_redirects=True)
-        
-        if resp.status_code != 200:
-            abort(502, description=f'Erro ao buscar boleto do Servopa: HTTP {resp.status_code}')
-        
-        # Verifica se é PDF
-        content_type = resp.headers.get('Content-Type', '').lower()
-        if 'pdf' not in content_type and not resp.content.startswith(b'%PDF'):
-            abort(502, description='Resposta do Servopa não é um PDF válido')
-        
-        # Salva em cache
-        with open(cache_file, 'wb') as f:
-            f.write(resp.content)
-        
-        # Retorna PDF
-        response = app.make_response(resp.content)
-        response.headers['Content-Type'] = 'application/pdf'
-        response.headers['Content-Disposition'] = f'inline; filename=boleto_{code}.pdf'
+        download = PDF_CACHE.fetch(original_url, headers=headers, code=code)
+        download.wait_started()
+    except PdfFetchError as e:
+        abort(502, description=str(e))
+    
+    response = app.response_class(download.iter_chunks(), mimetype='application/pdf')
+    response.headers['Content-Disposition'] = f'inline; filename={download_name}'
+    return response
+
+# ========== RESPOSTAS CONDICIONAIS (ETag) ==========
+
+def _data_etag(*version):
+    """ETag forte derivada da versão dos arquivos de dados (mtime/tamanho ou versão SQLite)"""
+    return hashlib.sha1(repr(version).encode('utf-8')).hexdigest()
+
+def _not_modified(etag):
+    """Resposta 304 se o navegador já tem a versão ``etag``; caso contrário None"""
+    # A ETag enviada pode ser a da versão comprimida ("<etag>-gzip")
+    matched = etag if etag in request.if_none_match else next(
+        (tag for tag in request.if_none_match.as_set() if strip_encoding_etag(tag) == etag), None)
+    if matched:
+        response = app.response_class(status=304)
+        response.set_etag(matched)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = 'no-cache'
         return response
-        
-    except requests.RequestException as e:
-        abort(502, description=f'Erro ao acessar Servopa: {str(e)}')
-    except Exception as e:
-        abort(500, description=f'Erro interno: {str(e)}')
+    return None
+
+def _with_etag(response, etag):
+    """Anexa a ETag e obriga o navegador a revalidar a cada uso"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 # ========== API REST ==========
 
 @app.route('/api/stats')
 def api_stats():
     """Retorna estatísticas gerais"""
-    stats_dia8 = load_history_stats('history_dia8.json')
-    stats_dia16 = load_history_stats('history_dia16.json')
+    stats_dia8 = load_history_stats('dia8')
+    stats_dia16 = load_history_stats('dia16')
     
-    return jsonify({
+    response = jsonify({
         'dia8': stats_dia8,
         'dia16': stats_dia16,
         'running': {
@@ -286,20 +482,77 @@ def api_stats():
             'dia16': app_state['automation_dia16_running']
         }
     })
+    # Contadores já são baratos de montar: a ETag é o hash do conteúdo
+    response.add_etag()
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/api/http/metrics')
+def api_http_metrics():
+    """Métricas por host das chamadas externas (Evolution, Todoist, Servopa)"""
+    return jsonify({'success': True, 'hosts': get_http_metrics()})
+
+HISTORY_FILTERS = ('data_inicio', 'data_fim', 'grupo', 'cota', 'status')
+HISTORY_MAX_PER_PAGE = 500
 
 @app.route('/api/history/<dia>')
 def api_history(dia):
-    """Retorna histórico de um dia específico"""
-    filename = f'history_{dia}.json'
-    filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), filename)
+    """
+    Retorna histórico de um dia específico
+    
+    Sem parâmetros, devolve o histórico completo (ordem cronológica).
+    Parâmetros opcionais (query string):
+        page, per_page: paginação (per_page máximo HISTORY_MAX_PER_PAGE)
+        order: 'desc' (mais recentes primeiro) ou 'asc'
+        data_inicio, data_fim: intervalo AAAA-MM-DD (inclusivo)
+        grupo, cota: valores exatos
+        status: success | failed | stopped | other
+    """
+    if dia not in ['dia8', 'dia16']:
+        return jsonify({'success': True, 'data': []})
     
     try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        history_log = get_history_log(PROJECT_ROOT, dia)
+        filters = {
+            campo: request.args.get(campo, '').strip()
+            for campo in HISTORY_FILTERS
+            if request.args.get(campo, '').strip()
+        }
+        paginated = 'page' in request.args or 'per_page' in request.args
+        
+        if not filters and not paginated:
+            data, _total = history_log.read_page()
             return jsonify({'success': True, 'data': data})
+        
+        if filters.get('status') and filters['status'] not in STATUS_CLASSES:
+            return jsonify({'success': False, 'error': f"Status inválido: {filters['status']}"}), 400
+        
+        try:
+            page = max(1, int(request.args.get('page', 1)))
+            per_page = min(HISTORY_MAX_PER_PAGE, max(1, int(request.args.get('per_page', 50))))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'page/per_page devem ser números inteiros'}), 400
+        
+        newest_first = request.args.get('order', 'desc').lower() != 'asc'
+        if not paginated:
+            data, total = history_log.query(newest_first=newest_first, **filters)
+            page, per_page = 1, max(1, total)
         else:
-            return jsonify({'success': True, 'data': []})
+            data, total = history_log.query(
+                offset=(page - 1) * per_page,
+                limit=per_page,
+                newest_first=newest_first,
+                **filters
+            )
+        
+        return jsonify({
+            'success': True,
+            'data': data,
+            'total': total,
+            'page': page,
+            'per_page': per_page,
+            'pages': (total + per_page - 1) // per_page
+        })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -371,47 +624,50 @@ def api_evolution_config():
     elif request.method == 'POST':
         try:
             data = request.json
+            # Mantém opções que a página não edita (ex.: api.upload_mode, configuracoes)
+            if os.path.exists(filepath):
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    current = json.load(f)
+                data = {**current, **data, 'api': {**current.get('api', {}), **data.get('api', {})}}
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
             return jsonify({'success': True, 'message': 'Configuração salva com sucesso'})
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/blobs/<blob_id>')
+def api_blob(blob_id):
+    """Serve um blob (screenshot do boleto) - conteúdo imutável, cache de longa duração"""
+    filepath = BLOB_STORE.path_for(blob_id)
+    if not filepath or not os.path.exists(filepath):
+        abort(404)
+    
+    response = send_file(filepath, conditional=True, etag=blob_id.split('.')[0], max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 @app.route('/api/boletos', methods=['GET'])
 def api_boletos():
     """Retorna dados dos boletos"""
-    filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-    
     try:
-        if os.path.exists(filepath):
-            # Lê com utf-8-sig para remover BOM automaticamente se existir
-            with open(filepath, 'r', encoding='utf-8-sig') as f:
-                content = f.read().strip()
-            
-            # Remove BOM invisível se existir
-            if content.startswith('\ufeff'):
-                content = content[1:]
-            
-            # Tenta fazer parse do JSON
-            try:
-                data = json.loads(content)
-            except json.JSONDecodeError as json_err:
-                print(f"❌ Erro ao fazer parse do JSON de boletos: {json_err}")
-                print(f"📄 Conteúdo do arquivo (primeiros 200 chars): {content[:200]}")
-                
-                # Recria arquivo limpo
+        with BOLETOS_STORE.locked():
+            if BOLETOS_STORE.exists():
+                try:
+                    data = BOLETOS_STORE.load()
+                except json.JSONDecodeError as json_err:
+                    print(f"❌ Erro ao fazer parse do JSON de boletos: {json_err}")
+                    
+                    # Recria arquivo limpo
+                    data = {'dia08': [], 'dia16': [], 'last_import': None}
+                    BOLETOS_STORE.save(data)
+                    print("✅ Arquivo de boletos recriado com estrutura limpa")
+            else:
+                # Cria arquivo se não existir
                 data = {'dia08': [], 'dia16': [], 'last_import': None}
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                print("✅ Arquivo de boletos recriado com estrutura limpa")
+                BOLETOS_STORE.save(data)
             
-            return jsonify({'success': True, 'data': data})
-        else:
-            # Cria arquivo se não existir
-            data = {'dia08': [], 'dia16': [], 'last_import': None}
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return jsonify({'success': True, 'data': data})
+            etag = _data_etag('boletos', BOLETOS_STORE.signature)
+            return _not_modified(etag) or _with_etag(jsonify({'success': True, 'data': data}), etag)
     except Exception as e:
         print(f"❌ Erro geral na API de boletos: {e}")
         import traceback
@@ -422,38 +678,35 @@ def api_boletos():
 def api_boletos_import():
     """Recarrega boletos do arquivo local (não usa mais Todoist)"""
     try:
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        
         # Emite progresso via WebSocket
         def emit_progress(message):
             socketio.emit('boletos_progress', {'message': message})
         
         emit_progress('📂 Carregando boletos do sistema...')
         
-        # Carrega dados do arquivo local
-        if os.path.exists(boletos_filepath):
-            with open(boletos_filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        else:
-            # Se não existe, cria arquivo vazio
-            data = {
-                'dia08': [],
-                'dia16': [],
-                'last_import': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            with open(boletos_filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        
-        emit_progress('✅ Boletos carregados com sucesso!')
-        
-        total_dia08 = len(data.get('dia08', []))
-        total_dia16 = len(data.get('dia16', []))
-        
-        return jsonify({
-            'success': True, 
-            'message': f'Carregados: {total_dia08} boletos (dia 08) e {total_dia16} boletos (dia 16)',
-            'data': data
-        })
+        with BOLETOS_STORE.locked():
+            # Carrega dados do arquivo local
+            if BOLETOS_STORE.exists():
+                data = BOLETOS_STORE.load()
+            else:
+                # Se não existe, cria arquivo vazio
+                data = {
+                    'dia08': [],
+                    'dia16': [],
+                    'last_import': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }
+                BOLETOS_STORE.save(data)
+            
+            emit_progress('✅ Boletos carregados com sucesso!')
+            
+            total_dia08 = len(data.get('dia08', []))
+            total_dia16 = len(data.get('dia16', []))
+            
+            return jsonify({
+                'success': True, 
+                'message': f'Carregados: {total_dia08} boletos (dia 08) e {total_dia16} boletos (dia 16)',
+                'data': data
+            })
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -462,8 +715,6 @@ def api_boletos_import():
 def api_boletos_reset():
     """Reset completo do arquivo de boletos - cria arquivo limpo"""
     try:
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        
         # Cria estrutura limpa
         data = {
             'dia08': [],
@@ -472,8 +723,7 @@ def api_boletos_reset():
         }
         
         # Salva com encoding correto (sem BOM)
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        BOLETOS_STORE.save(data)
         
         print("✅ Arquivo de boletos resetado com sucesso")
         
@@ -494,29 +744,14 @@ def api_boletos_toggle(task_id):
         is_completed = data.get('is_completed', False)
         
         # Atualiza arquivo local
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if not os.path.exists(boletos_filepath):
+        if not BOLETOS_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de boletos não encontrado'})
-            
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
         
-        # Atualiza status no cache local
-        found = False
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in boletos_data:
-                for boleto in boletos_data[dia_key]:
-                    if boleto.get('task_id') == task_id:
-                        boleto['is_completed'] = is_completed
-                        found = True
-                        break
-        
-        if not found:
+        # Atualiza status no cache local (só a linha do boleto)
+        boleto = BOLETOS_STORE.update_record('task_id', task_id, {'is_completed': is_completed})
+        if boleto is None:
             return jsonify({'success': False, 'error': 'Boleto não encontrado'})
         
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
-        
         return jsonify({
             'success': True,
             'message': 'Boleto atualizado com sucesso'
@@ -538,35 +773,26 @@ def api_boletos_update(task_id):
         short_link = data.get('short_link', '')
         
         # Atualiza arquivo local
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if not os.path.exists(boletos_filepath):
+        if not BOLETOS_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de boletos não encontrado'})
-            
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
         
         dia_key = f'dia{dia}'
-        found = False
-        updated_boleto = None
-        if dia_key in boletos_data:
-            for boleto in boletos_data[dia_key]:
-                if boleto.get('task_id') == task_id:
-                    boleto['nome'] = nome
-                    boleto['celular'] = celular
-                    boleto['cotas'] = cotas
-                    if png_base64:
-                        boleto['png_base64'] = png_base64
-                    if short_link:
-                        boleto['short_link'] = short_link
-                    found = True
-                    updated_boleto = boleto
-                    break
-        
-        if not found:
-            return jsonify({'success': False, 'error': 'Boleto não encontrado'})
-        
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+        with BOLETOS_STORE.locked():
+            _dia_key, _posicao, boleto = BOLETOS_STORE.find_record('task_id', task_id, dia_key)
+            if boleto is None:
+                return jsonify({'success': False, 'error': 'Boleto não encontrado'})
+            
+            updated_boleto = dict(boleto)
+            updated_boleto['nome'] = nome
+            updated_boleto['celular'] = celular
+            updated_boleto['cotas'] = cotas
+            if png_base64:
+                updated_boleto['png_base64'] = png_base64
+                BLOB_STORE.move_data_uri(updated_boleto)
+            if short_link:
+                updated_boleto['short_link'] = short_link
+            
+            BOLETOS_STORE.replace_record('task_id', task_id, updated_boleto, dia_key)
         
         # Sincroniza com cliente correspondente
         if updated_boleto:
@@ -596,17 +822,7 @@ def api_boletos_create():
         import uuid
         task_id = str(uuid.uuid4())
         
-        # Adiciona ao arquivo local
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        boletos_data = {'dia08': [], 'dia16': []}
-        
-        if os.path.exists(boletos_filepath):
-            with open(boletos_filepath, 'r', encoding='utf-8') as f:
-                boletos_data = json.load(f)
-        
         dia_key = f'dia{dia}'
-        if dia_key not in boletos_data:
-            boletos_data[dia_key] = []
         
         new_boleto = {
             'task_id': task_id,
@@ -618,13 +834,12 @@ def api_boletos_create():
         
         if png_base64:
             new_boleto['png_base64'] = png_base64
+            BLOB_STORE.move_data_uri(new_boleto)
         if short_link:
             new_boleto['short_link'] = short_link
         
-        boletos_data[dia_key].append(new_boleto)
-        
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+        # Adiciona ao arquivo local
+        BOLETOS_STORE.append_record(dia_key, new_boleto)
         
         return jsonify({
             'success': True,
@@ -650,146 +865,141 @@ def api_boletos_import_from_clientes():
         emit_progress('📂 Carregando dados de clientes...')
         
         # Carrega dados dos clientes
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado. Configure clientes primeiro.'})
         
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
+        clientes_data = CLIENTES_STORE.load()
         
         # Carrega ou cria estrutura de boletos
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if os.path.exists(boletos_filepath):
-            with open(boletos_filepath, 'r', encoding='utf-8') as f:
-                boletos_data = json.load(f)
-        else:
-            boletos_data = {'dia08': [], 'dia16': [], 'last_import': None}
-        
-        import uuid
-        stats = {
-            'importados': 0,
-            'ignorados': 0,
-            'erros': 0,
-            'dia08': 0,
-            'dia16': 0
-        }
-        
-        # Processa cada dia selecionado
-        for dia_num in dias_selecionados:
-            dia_key = f'dia{dia_num}'
+        with BOLETOS_STORE.locked():
+            boletos_data = BOLETOS_STORE.load()
             
-            if dia_key not in clientes_data or not clientes_data[dia_key]:
-                emit_progress(f'⚠️ Nenhum cliente encontrado para o dia {dia_num}')
-                continue
+            import uuid
+            stats = {
+                'importados': 0,
+                'ignorados': 0,
+                'erros': 0,
+                'dia08': 0,
+                'dia16': 0
+            }
             
-            emit_progress(f'📋 Processando {len(clientes_data[dia_key])} clientes do dia {dia_num}...')
+            # Processa cada dia selecionado
+            for dia_num in dias_selecionados:
+                dia_key = f'dia{dia_num}'
             
-            # Se sobrescrever, limpa boletos existentes
-            if sobrescrever:
-                boletos_data[dia_key] = []
-                emit_progress(f'🗑️ Boletos anteriores do dia {dia_num} foram removidos')
+                if dia_key not in clientes_data or not clientes_data[dia_key]:
+                    emit_progress(f'⚠️ Nenhum cliente encontrado para o dia {dia_num}')
+                    continue
             
-            # Cria conjunto de IDs de clientes já existentes em boletos para evitar duplicatas
-            existing_client_ids = {b.get('client_id') for b in boletos_data.get(dia_key, []) if b.get('client_id')}
+                emit_progress(f'📋 Processando {len(clientes_data[dia_key])} clientes do dia {dia_num}...')
             
-            # Converte cada cliente em boleto
-            for cliente in clientes_data[dia_key]:
-                try:
-                    client_id = cliente.get('client_id')
+                # Se sobrescrever, limpa boletos existentes
+                if sobrescrever:
+                    boletos_data[dia_key] = []
+                    emit_progress(f'🗑️ Boletos anteriores do dia {dia_num} foram removidos')
+            
+                # Cria conjunto de IDs de clientes já existentes em boletos para evitar duplicatas
+                existing_client_ids = {b.get('client_id') for b in boletos_data.get(dia_key, []) if b.get('client_id')}
+            
+                # Converte cada cliente em boleto
+                for cliente in clientes_data[dia_key]:
+                    try:
+                        client_id = cliente.get('client_id')
                     
-                    # Verifica se já existe (evita duplicata)
-                    if not sobrescrever and client_id in existing_client_ids:
-                        stats['ignorados'] += 1
-                        continue
+                        # Verifica se já existe (evita duplicata)
+                        if not sobrescrever and client_id in existing_client_ids:
+                            stats['ignorados'] += 1
+                            continue
                     
-                    # Monta o texto de cotas para o boleto
-                    cotas_texto = cliente.get('cotas_texto', '')
-                    if not cotas_texto:
-                        grupo = cliente.get('grupo', '')
-                        cota = cliente.get('cota', '')
-                        if grupo and cota:
-                            cotas_texto = f'{cota} - {grupo}'
-                        elif grupo or cota:
-                            cotas_texto = grupo or cota
+                        # Monta o texto de cotas para o boleto
+                        cotas_texto = cliente.get('cotas_texto', '')
+                        if not cotas_texto:
+                            grupo = cliente.get('grupo', '')
+                            cota = cliente.get('cota', '')
+                            if grupo and cota:
+                                cotas_texto = f'{cota} - {grupo}'
+                            elif grupo or cota:
+                                cotas_texto = grupo or cota
                     
-                    # Cria task_id se não existir (usando o mesmo do cliente se disponível)
-                    task_id = cliente.get('task_id')
-                    if not task_id:
-                        task_id = str(uuid.uuid4())
+                        # Cria task_id se não existir (usando o mesmo do cliente se disponível)
+                        task_id = cliente.get('task_id')
+                        if not task_id:
+                            task_id = str(uuid.uuid4())
                     
-                    # Monta estrutura do boleto
-                    novo_boleto = {
-                        'task_id': task_id,
-                        'client_id': client_id,  # Mantém referência ao cliente
-                        'nome': cliente.get('nome', ''),
-                        'celular': cliente.get('contato', ''),
-                        'cotas': cotas_texto,
-                        'grupo': cliente.get('grupo', ''),
-                        'cota': cliente.get('cota', ''),
-                        'valor_primeira_cota': cliente.get('valor_primeira_cota', ''),
-                        'is_completed': False,
-                        'imported_from_cliente': True,
-                        'imported_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
+                        # Monta estrutura do boleto
+                        novo_boleto = {
+                            'task_id': task_id,
+                            'client_id': client_id,  # Mantém referência ao cliente
+                            'nome': cliente.get('nome', ''),
+                            'celular': cliente.get('contato', ''),
+                            'cotas': cotas_texto,
+                            'grupo': cliente.get('grupo', ''),
+                            'cota': cliente.get('cota', ''),
+                            'valor_primeira_cota': cliente.get('valor_primeira_cota', ''),
+                            'is_completed': False,
+                            'imported_from_cliente': True,
+                            'imported_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        }
                     
-                    # Mantém histórico de boletos do cliente se existir
-                    historico_boletos = cliente.get('historico_boletos', [])
-                    if historico_boletos:
-                        novo_boleto['historico_boletos'] = historico_boletos
+                        # Mantém histórico de boletos do cliente se existir
+                        historico_boletos = cliente.get('historico_boletos', [])
+                        if historico_boletos:
+                            novo_boleto['historico_boletos'] = historico_boletos
                         
-                        # Se houver histórico, pega o último link como link principal
-                        if isinstance(historico_boletos, list) and len(historico_boletos) > 0:
-                            ultimo_link = historico_boletos[-1]  # Pega o último link do histórico
-                            novo_boleto['boleto_url'] = ultimo_link
-                            novo_boleto['short_link'] = ultimo_link
-                            novo_boleto['png_base64'] = ultimo_link  # Para compatibilidade
+                            # Se houver histórico, pega o último link como link principal
+                            if isinstance(historico_boletos, list) and len(historico_boletos) > 0:
+                                ultimo_link = historico_boletos[-1]  # Pega o último link do histórico
+                                novo_boleto['boleto_url'] = ultimo_link
+                                novo_boleto['short_link'] = ultimo_link
+                                novo_boleto['png_base64'] = ultimo_link  # Para compatibilidade
                     
-                    # Se o cliente tiver um campo de link direto, usa ele também
-                    if cliente.get('boleto_url'):
-                        novo_boleto['boleto_url'] = cliente['boleto_url']
+                        # Se o cliente tiver um campo de link direto, usa ele também
+                        if cliente.get('boleto_url'):
+                            novo_boleto['boleto_url'] = cliente['boleto_url']
                     
-                    if cliente.get('short_link'):
-                        novo_boleto['short_link'] = cliente['short_link']
+                        if cliente.get('short_link'):
+                            novo_boleto['short_link'] = cliente['short_link']
                     
-                    if cliente.get('png_base64'):
-                        novo_boleto['png_base64'] = cliente['png_base64']
+                        if cliente.get('png_base64'):
+                            novo_boleto['png_base64'] = cliente['png_base64']
+                        if cliente.get(SCREENSHOT_BLOB_FIELD):
+                            novo_boleto[SCREENSHOT_BLOB_FIELD] = cliente[SCREENSHOT_BLOB_FIELD]
                     
-                    boletos_data[dia_key].append(novo_boleto)
-                    stats['importados'] += 1
-                    stats[dia_key] += 1
+                        boletos_data[dia_key].append(novo_boleto)
+                        stats['importados'] += 1
+                        stats[dia_key] += 1
                     
-                except Exception as e:
-                    stats['erros'] += 1
-                    emit_progress(f'❌ Erro ao importar cliente {cliente.get("nome", "desconhecido")}: {str(e)}')
-        
-        # Atualiza timestamp de importação
-        boletos_data['last_import'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Salva os boletos
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
-        
-        # Mensagem de sucesso
-        msg_parts = []
-        if stats['dia08'] > 0:
-            msg_parts.append(f"{stats['dia08']} boletos do dia 08")
-        if stats['dia16'] > 0:
-            msg_parts.append(f"{stats['dia16']} boletos do dia 16")
-        
-        mensagem_final = f"✅ Importação concluída! {' e '.join(msg_parts)}"
-        if stats['ignorados'] > 0:
-            mensagem_final += f" | {stats['ignorados']} já existentes (ignorados)"
-        if stats['erros'] > 0:
-            mensagem_final += f" | {stats['erros']} erros"
-        
-        emit_progress(mensagem_final)
-        
-        return jsonify({
-            'success': True,
-            'message': mensagem_final,
-            'stats': stats,
-            'data': boletos_data
-        })
+                    except Exception as e:
+                        stats['erros'] += 1
+                        emit_progress(f'❌ Erro ao importar cliente {cliente.get("nome", "desconhecido")}: {str(e)}')
+            
+            # Atualiza timestamp de importação
+            boletos_data['last_import'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            # Salva os boletos
+            BOLETOS_STORE.save(boletos_data)
+            
+            # Mensagem de sucesso
+            msg_parts = []
+            if stats['dia08'] > 0:
+                msg_parts.append(f"{stats['dia08']} boletos do dia 08")
+            if stats['dia16'] > 0:
+                msg_parts.append(f"{stats['dia16']} boletos do dia 16")
+            
+            mensagem_final = f"✅ Importação concluída! {' e '.join(msg_parts)}"
+            if stats['ignorados'] > 0:
+                mensagem_final += f" | {stats['ignorados']} já existentes (ignorados)"
+            if stats['erros'] > 0:
+                mensagem_final += f" | {stats['erros']} erros"
+            
+            emit_progress(mensagem_final)
+            
+            return jsonify({
+                'success': True,
+                'message': mensagem_final,
+                'stats': stats,
+                'data': boletos_data
+            })
         
     except Exception as e:
         return jsonify({'success': False, 'error': f'Erro ao importar: {str(e)}'})
@@ -799,29 +1009,11 @@ def api_boletos_delete(task_id):
     """Deleta um boleto (apenas localmente)"""
     try:
         # Remove do arquivo local
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if not os.path.exists(boletos_filepath):
+        if not BOLETOS_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de boletos não encontrado'})
-            
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
-        
-        found = False
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in boletos_data:
-                original_len = len(boletos_data[dia_key])
-                boletos_data[dia_key] = [
-                    b for b in boletos_data[dia_key] 
-                    if b.get('task_id') != task_id
-                ]
-                if len(boletos_data[dia_key]) < original_len:
-                    found = True
-        
-        if not found:
-            return jsonify({'success': False, 'error': 'Boleto não encontrado'})
         
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+        if BOLETOS_STORE.delete_record('task_id', task_id) is None:
+            return jsonify({'success': False, 'error': 'Boleto não encontrado'})
         
         return jsonify({'success': True, 'message': 'Boleto deletado com sucesso'})
         
@@ -832,24 +1024,18 @@ def api_boletos_delete(task_id):
 def api_boletos_extrair(task_id):
     """Gera automaticamente o boleto no portal da Servopa para a tarefa informada."""
     try:
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if not os.path.exists(boletos_filepath):
+        if not BOLETOS_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo local de boletos não encontrado'}), 400
 
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
-
         boleto_entry = None
         dia = None
 
-        for dia_key in ('dia08', 'dia16'):
-            for item in boletos_data.get(dia_key, []):
-                if str(item.get('task_id')) == str(task_id):
-                    boleto_entry = item
-                    dia = '08' if dia_key == 'dia08' else '16'
-                    break
-            if boleto_entry:
-                break
+        with BOLETOS_STORE.locked():
+            dia_key, _posicao, item = BOLETOS_STORE.find_record('task_id', task_id)
+            if item is not None:
+                # Cópia: a automação demora e não deve segurar o lock
+                boleto_entry = dict(item)
+                dia = '08' if dia_key == 'dia08' else '16'
 
         if not boleto_entry:
             return jsonify({'success': False, 'error': 'Boleto não encontrado na base local'}), 404
@@ -875,6 +1061,8 @@ def api_boletos_extrair(task_id):
 
             progress('📄 Iniciando geração automática do boleto...')
             result = run_boleto_flow(driver, boleto_entry, dia, progress)
+            # Baixa o PDF em segundo plano enquanto o link ainda é válido
+            prefetch_boleto_pdf(result.boleto_url, task_id)
 
         finally:
             try:
@@ -883,30 +1071,39 @@ def api_boletos_extrair(task_id):
                 pass
 
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        if result.png_base64:
-            boleto_entry['png_base64'] = result.png_base64
-        
-        # Usa o link direto do Servopa (já modificado sem IP)
-        if result.boleto_url:
-            boleto_entry['boleto_url'] = result.boleto_url
-            boleto_entry['short_link'] = result.boleto_url  # Link direto, sem proxy
-        
-        boleto_entry['last_generated'] = timestamp
-        boleto_entry['tipo'] = result.tipo
-        if result.grupo:
-            boleto_entry['grupo'] = result.grupo
-        if result.cota:
-            boleto_entry['cota'] = result.cota
-        if result.metadata:
-            boleto_entry['metadata'] = result.metadata
-
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+        dia_key = f'dia{dia}'
+
+        with BOLETOS_STORE.locked():
+            # Relê a entrada: o arquivo pode ter mudado durante a automação
+            boletos_data = BOLETOS_STORE.load()
+            _dia_key, _posicao, item = BOLETOS_STORE.find_record('task_id', task_id, dia_key)
+            if item is not None:
+                boleto_entry = item
+            else:
+                boletos_data.setdefault(dia_key, []).append(boleto_entry)
+
+            if result.screenshot_blob:
+                boleto_entry[SCREENSHOT_BLOB_FIELD] = result.screenshot_blob
+            
+            # Usa o link direto do Servopa (já modificado sem IP)
+            if result.boleto_url:
+                boleto_entry['boleto_url'] = result.boleto_url
+                boleto_entry['short_link'] = result.boleto_url  # Link direto, sem proxy
+            
+            boleto_entry['last_generated'] = timestamp
+            boleto_entry['tipo'] = result.tipo
+            if result.grupo:
+                boleto_entry['grupo'] = result.grupo
+            if result.cota:
+                boleto_entry['cota'] = result.cota
+            if result.metadata:
+                boleto_entry['metadata'] = result.metadata
+
+            BOLETOS_STORE.save(boletos_data)
 
         progress('✅ Boleto gerado e salvo com sucesso!')
         
         # Sincroniza com cliente correspondente
-        dia_key = f'dia{dia}'
         _sync_boleto_to_cliente(boleto_entry, dia_key)
 
         return jsonify({
@@ -917,7 +1114,8 @@ def api_boletos_extrair(task_id):
                 'dia': dia,
                 'boleto_url': result.boleto_url,
                 'short_link': result.boleto_url,  # Link direto do Servopa
-                'png_base64': result.png_base64,
+                'screenshot_blob': result.screenshot_blob,
+                'screenshot_url': url_for('api_blob', blob_id=result.screenshot_blob) if result.screenshot_blob else '',
                 'last_generated': timestamp,
                 'tipo': result.tipo,
             }
@@ -931,105 +1129,40 @@ def api_boletos_extrair(task_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-@app.route('/api/boletos/whatsapp/<task_id>', methods=['POST'])
-def api_boletos_whatsapp(task_id):
-    """Envia boleto via WhatsApp usando Evolution API"""
-    try:
-        from utils.evolution_api import EvolutionAPI
-        
-        # Carrega dados do boleto
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        
-        if not os.path.exists(boletos_filepath):
-            return jsonify({'success': False, 'error': 'Dados de boletos não encontrados'})
-        
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
-        
-        # Busca o boleto específico
-        boleto = None
-        dia = None
-        
-        for boleto_item in boletos_data.get('dia08', []):
-            if str(boleto_item.get('task_id')) == str(task_id):
-                boleto = boleto_item
-                dia = '08'
-                break
-        
-        if not boleto:
-            for boleto_item in boletos_data.get('dia16', []):
-                if str(boleto_item.get('task_id')) == str(task_id):
-                    boleto = boleto_item
-                    dia = '16'
-                    break
-        
-        if not boleto:
-            return jsonify({'success': False, 'error': 'Boleto não encontrado'})
-        
-        # Extrai e limpa o celular
-        import re
-        celular = boleto.get('celular', '').strip()
-        
-        # Se o celular está vazio, tenta extrair do campo cotas (dados legados)
-        if not celular:
-            raw_cotas = boleto.get('cotas', '')
-            celular_match = re.search(r'(?:📱\s*)?[Cc]elular:\s*(\d+)', raw_cotas)
-            if celular_match:
-                celular = celular_match.group(1)
-        
-        # Remove todos os caracteres não numéricos
-        celular = re.sub(r'\D', '', celular)
-        
-        # Valida celular (deve ter pelo menos 10 dígitos)
-        if not celular or len(celular) < 10:
-            return jsonify({
-                'success': False, 
-                'error': 'Boleto não possui número de celular válido. Por favor, edite o boleto e adicione um celular com pelo menos 10 dígitos.'
-            })
-        
-        # Carrega configuração da Evolution API
-        evolution_config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'evolution_config.json')
-        
-        if not os.path.exists(evolution_config_path):
-            # Cria arquivo padrão automaticamente
-            default_config = {
-                "api": {
-                    "base_url": "https://zap.tekvosoft.com",
-                    "instance_name": "",
-                    "api_key": ""
-                }
-            }
-            with open(evolution_config_path, 'w', encoding='utf-8') as f:
-                json.dump(default_config, f, indent=2, ensure_ascii=False)
-            
-            return jsonify({
-                'success': False, 
-                'error': 'Configuração da Evolution API não encontrada. Por favor, acesse a aba "WhatsApp" no menu e configure sua instância e API Key.'
-            })
-        
-        with open(evolution_config_path, 'r', encoding='utf-8') as f:
-            evolution_config = json.load(f)
-        
-        # Cria cliente da Evolution API
-        api_config = evolution_config.get('api', {})
-        base_url = api_config.get('base_url')
-        instance_name = api_config.get('instance_name')
-        api_key = api_config.get('api_key')
-        
-        if not all([base_url, instance_name, api_key]):
-            return jsonify({
-                'success': False, 
-                'error': 'Configuração da Evolution API incompleta. Por favor, acesse a aba "WhatsApp" no menu e preencha: Nome da Instância e API Key.'
-            })
-        
-        evolution_api = EvolutionAPI(base_url, instance_name, api_key)
-        
-        # Monta a mensagem personalizada
-        nome = boleto.get('nome', 'Cliente')
-        cotas = boleto.get('cotas', 'N/A')
-        link_boleto = _best_boleto_link(boleto)
+def _boleto_whatsapp_payload(task_id, dia_key, boleto):
+    """
+    Monta o envio de um boleto pelo WhatsApp (celular + mensagem)
 
-        mensagem = f"""Olá *{nome}*! 👋
+    Returns:
+        (payload, erro): erro preenchido quando o boleto não tem celular válido
+    """
+    import re
+
+    dia = dia_key[-2:] if dia_key else None
+
+    # Extrai e limpa o celular
+    celular = boleto.get('celular', '').strip()
+
+    # Se o celular está vazio, tenta extrair do campo cotas (dados legados)
+    if not celular:
+        raw_cotas = boleto.get('cotas', '')
+        celular_match = re.search(r'(?:📱\s*)?[Cc]elular:\s*(\d+)', raw_cotas)
+        if celular_match:
+            celular = celular_match.group(1)
+
+    # Remove todos os caracteres não numéricos
+    celular = re.sub(r'\D', '', celular)
+
+    # Valida celular (deve ter pelo menos 10 dígitos)
+    if not celular or len(celular) < 10:
+        return None, 'Boleto não possui número de celular válido. Por favor, edite o boleto e adicione um celular com pelo menos 10 dígitos.'
+
+    # Monta a mensagem personalizada
+    nome = boleto.get('nome', 'Cliente')
+    cotas = boleto.get('cotas', 'N/A')
+    link_boleto = _best_boleto_link(boleto)
+
+    mensagem = f"""Olá *{nome}*! 👋
 
 📋 *Lembrete de Boleto - Sistema OXCASH*
 
@@ -1044,168 +1177,362 @@ Qualquer dúvida, estamos à disposição!
 
 _Mensagem automática - Sistema OXCASH_"""
 
-        details = {
-            'nome': nome,
-            'celular': celular,
-            'dia': dia,
-            'text_sent': False,  # Não envia texto separado mais
-            'link': link_boleto,
-            'pdf_sent': False,
-            'pdf_path': None,
-        }
+    fallback_image = boleto.get('png_base64', '')
+    return {
+        'task_id': task_id,
+        'dia': dia,
+        'nome': nome,
+        'celular': celular,
+        'mensagem': mensagem,
+        'link_boleto': link_boleto,
+        'fallback_image': fallback_image if isinstance(fallback_image, str) else '',
+    }, None
+
+def _deliver_boleto_whatsapp(evolution_api, payload, todoist_api=None):
+    """
+    Envia um boleto (PDF com a mensagem como legenda, ou só texto) e anota no Todoist
 
-        # ========== NOVO: BAIXA E ENVIA PDF DO BOLETO COM MENSAGEM UNIFICADA ==========
-        from utils.boleto_downloader import download_boleto_pdf, get_cached_boleto
-        
-        pdf_path = None
-        pdf_sent = False
-        pdf_response = None
-        text_only_sent = False  # Flag para fallback se PDF falhar
-        
-        if link_boleto:
-            # 1. Verifica se já está em cache
-            pdf_path = get_cached_boleto(task_id)
-            
-            # 2. Se não está em cache, baixa do Servopa
-            if not pdf_path:
-                print(f"📥 Baixando PDF do boleto: {link_boleto}")
-                sucesso, pdf_path, erro = download_boleto_pdf(link_boleto, task_id)
-                
-                if not sucesso:
-                    print(f"⚠️ Falha ao baixar PDF: {erro}")
-                    pdf_path = None
-                else:
-                    print(f"✅ PDF baixado: {pdf_path}")
-            
-            # 3. Se conseguiu o PDF (cache ou download), envia COM A MENSAGEM JUNTO
-            if pdf_path and os.path.exists(pdf_path):
-                # Monta nome do arquivo bonito para o WhatsApp
-                nome_arquivo = f"Boleto_{nome.replace(' ', '_')}.pdf"
-                
-                print(f"📤 Enviando PDF + mensagem pelo WhatsApp: {nome_arquivo}")
-                
-                # ENVIA PDF COM CAPTION (mensagem + arquivo juntos!)
-                success_pdf, pdf_response = evolution_api.send_document(
-                    celular,
-                    pdf_path,
-                    caption=mensagem,  # Usa a mensagem completa como caption
-                    filename=nome_arquivo
-                )
-                
-                pdf_sent = success_pdf
-                
-                if success_pdf:
-                    print(f"✅ PDF + mensagem enviados com sucesso para {celular}")
-                    details['pdf_sent'] = True
-                    details['pdf_path'] = pdf_path
-                    details['pdf_response'] = pdf_response
-                else:
-                    print(f"❌ Falha ao enviar PDF: {pdf_response}")
-                    # Fallback: se falhou enviar PDF, envia só texto
-                    success_text, response_text = evolution_api.send_text_message(celular, mensagem)
-                    text_only_sent = success_text
-                    details['text_sent'] = success_text
+    Não grava o boleto: o job da fila marca o envio depois do sucesso.
+    """
+    task_id = payload['task_id']
+    dia = payload['dia']
+    nome = payload['nome']
+    celular = payload['celular']
+    mensagem = payload['mensagem']
+    link_boleto = payload['link_boleto']
+    fallback_image = payload.get('fallback_image', '')
+
+    details = {
+        'nome': nome,
+        'celular': celular,
+        'dia': dia,
+        'text_sent': False,  # Não envia texto separado mais
+        'link': link_boleto,
+        'pdf_sent': False,
+        'pdf_path': None,
+    }
+
+    # ========== NOVO: BAIXA E ENVIA PDF DO BOLETO COM MENSAGEM UNIFICADA ==========
+    from utils.boleto_downloader import download_boleto_pdf, get_cached_boleto
+
+    pdf_path = None
+    pdf_sent = False
+    pdf_response = None
+    text_only_sent = False  # Flag para fallback se PDF falhar
+    falha = None  # resposta do último envio que falhou (status_code/retry_after)
+
+    if link_boleto:
+        # 1. Verifica se já está em cache
+        pdf_path = get_cached_boleto(task_id)
+
+        # 2. Se não está em cache, baixa do Servopa
+        if not pdf_path:
+            print(f"📥 Baixando PDF do boleto: {link_boleto}")
+            sucesso, pdf_path, erro = download_boleto_pdf(link_boleto, task_id)
+
+            if not sucesso:
+                print(f"⚠️ Falha ao baixar PDF: {erro}")
+                pdf_path = None
+            else:
+                print(f"✅ PDF baixado: {pdf_path}")
+
+        # 3. Se conseguiu o PDF (cache ou download), envia COM A MENSAGEM JUNTO
+        if pdf_path and os.path.exists(pdf_path):
+            # Monta nome do arquivo bonito para o WhatsApp
+            nome_arquivo = f"Boleto_{nome.replace(' ', '_')}.pdf"
+
+            print(f"📤 Enviando PDF + mensagem pelo WhatsApp: {nome_arquivo}")
+
+            # ENVIA PDF COM CAPTION (mensagem + arquivo juntos!)
+            success_pdf, pdf_response = evolution_api.send_document(
+                celular,
+                pdf_path,
+                caption=mensagem,  # Usa a mensagem completa como caption
+                filename=nome_arquivo,
+                media_url=_public_boleto_url(task_id, link_boleto)
+            )
+
+            pdf_sent = success_pdf
+
+            if success_pdf:
+                print(f"✅ PDF + mensagem enviados com sucesso para {celular}")
+                details['pdf_sent'] = True
+                details['pdf_path'] = pdf_path
+                details['pdf_response'] = pdf_response
+            elif pdf_response.get('status_code') == 429:
+                # Instância limitada: devolve o 429 para quem despacha aguardar o
+                # Retry-After e reenviar o PDF (texto agora também seria recusado)
+                print(f"⏳ Limite da Evolution API ao enviar PDF para {celular}")
+                return {
+                    'success': False,
+                    'error': f"Falha ao enviar PDF: {pdf_response.get('error', 'Limite de envios')}",
+                    'status_code': 429,
+                    'retry_after': pdf_response.get('retry_after'),
+                    'details': pdf_response
+                }
             else:
-                print(f"⚠️ PDF não disponível, enviando apenas mensagem de texto")
-                # Fallback: envia só a mensagem se não conseguir o PDF
+                print(f"❌ Falha ao enviar PDF: {pdf_response}")
+                # Fallback: se falhou enviar PDF, envia só texto
                 success_text, response_text = evolution_api.send_text_message(celular, mensagem)
                 text_only_sent = success_text
                 details['text_sent'] = success_text
-                
                 if not success_text:
-                    return jsonify({
-                        'success': False,
-                        'error': f"Falha ao enviar mensagem: {response_text.get('error', 'Erro desconhecido')}",
-                        'details': response_text
-                    })
-        
-        # Se não há link, tenta enviar imagem remota como fallback (mantém compatibilidade)
-        elif not link_boleto:
-            fallback_image = boleto.get('png_base64', '')
-            if isinstance(fallback_image, str) and fallback_image.lower().startswith(('http://', 'https://')):
-                success_media, response_media = evolution_api.send_media_message(
-                    celular,
-                    fallback_image,
-                    mensagem  # Usa mensagem completa como caption também
-                )
-                details['media_sent'] = success_media
-                details['media_response'] = response_media
-        
-        # Atualiza o boleto no Todoist adicionando uma nota sobre o envio
-        try:
+                    falha = response_text
+        else:
+            print(f"⚠️ PDF não disponível, enviando apenas mensagem de texto")
+            # Fallback: envia só a mensagem se não conseguir o PDF
+            success_text, response_text = evolution_api.send_text_message(celular, mensagem)
+            text_only_sent = success_text
+            details['text_sent'] = success_text
+
+            if not success_text:
+                return {
+                    'success': False,
+                    'error': f"Falha ao enviar mensagem: {response_text.get('error', 'Erro desconhecido')}",
+                    'status_code': response_text.get('status_code'),
+                    'retry_after': response_text.get('retry_after'),
+                    'details': response_text
+                }
+
+    # Se não há link, tenta enviar imagem remota como fallback (mantém compatibilidade)
+    elif not link_boleto:
+        if isinstance(fallback_image, str) and fallback_image.lower().startswith(('http://', 'https://')):
+            success_media, response_media = evolution_api.send_media_message(
+                celular,
+                fallback_image,
+                mensagem  # Usa mensagem completa como caption também
+            )
+            details['media_sent'] = success_media
+            details['media_response'] = response_media
+            if not success_media:
+                falha = response_media
+        else:
+            # Sem link e sem imagem remota: não há o que enviar, repetir não adianta
+            return {
+                'success': False,
+                'error': 'Boleto sem link e sem imagem para enviar',
+                'retry': False
+            }
+
+    # Nada chegou ao cliente: a fila repete com backoff e o Todoist não é anotado
+    if falha is not None:
+        return {
+            'success': False,
+            'error': f"Falha ao enviar mensagem: {falha.get('error', 'Erro desconhecido')}",
+            'status_code': falha.get('status_code'),
+            'retry_after': falha.get('retry_after'),
+            'details': falha
+        }
+
+    # Atualiza o boleto no Todoist adicionando uma nota sobre o envio
+    try:
+        if todoist_api is None:
             from utils.todoist_rest_api import TodoistRestAPI
-            TODOIST_TOKEN = "aa4b5ab41a462bd6fd5dbae643b45fe9bfaeeded"
             todoist_api = TodoistRestAPI(TODOIST_TOKEN)
-            
-            # Adiciona comentário na task do Todoist
-            comment_text = f"📱 WhatsApp enviado em {datetime.now().strftime('%d/%m/%Y %H:%M')} para {celular}"
-            
-            # Status baseado no que foi enviado
-            if details.get('pdf_sent'):
-                comment_text += "\n✅ Texto + PDF enviados"
-            elif link_boleto:
-                comment_text += "\n⚠️ Texto enviado, mas falha ao enviar PDF"
-            elif details.get('media_sent'):
-                comment_text += "\n✅ Texto + Imagem enviados (fallback)"
-            else:
-                comment_text += "\n⚠️ Texto enviado, mas boleto indisponível"
-            
-            todoist_api.add_comment(task_id, comment_text)
-        except Exception as e:
-            print(f"Aviso: Não foi possível adicionar comentário no Todoist: {e}")
+
+        # Adiciona comentário na task do Todoist
+        comment_text = f"📱 WhatsApp enviado em {datetime.now().strftime('%d/%m/%Y %H:%M')} para {celular}"
+
+        # Status baseado no que foi enviado
+        if details.get('pdf_sent'):
+            comment_text += "\n✅ Texto + PDF enviados"
+        elif details.get('media_sent'):
+            comment_text += "\n✅ Texto + Imagem enviados (fallback)"
+        else:
+            comment_text += "\n⚠️ Texto enviado, mas falha ao enviar PDF"
+
+        todoist_api.add_comment(task_id, comment_text)
+    except Exception as e:
+        print(f"Aviso: Não foi possível adicionar comentário no Todoist: {e}")
+
+    # Monta mensagem de sucesso
+    mensagem_sucesso = f'WhatsApp enviado com sucesso para {nome}!'
+    if details.get('pdf_sent'):
+        mensagem_sucesso += ' (PDF anexado)'
+    elif link_boleto:
+        mensagem_sucesso += ' (PDF não enviado - verifique logs)'
+
+    return {
+        'success': True,
+        'message': mensagem_sucesso,
+        'details': {
+            'nome': nome,
+            'celular': celular,
+            'dia': dia,
+            'text_sent': details.get('text_sent', False),
+            'pdf_sent': details.get('pdf_sent', False),
+            'pdf_path': details.get('pdf_path'),
+            'media_sent': details.get('media_sent', False),
+            'link': link_boleto,
+            'pdf_response': details.get('pdf_response'),
+            'media_response': details.get('media_response')
+        }
+    }
+
+def _send_boleto_whatsapp_job(payload):
+    """
+    Entrega um boleto enfileirado por api_boletos_whatsapp ou pelo lote (worker da fila)
+
+    Cada boleto é um job próprio: uma falha é repetida pela fila sem reenviar
+    os boletos que já foram entregues.
+    """
+    result = _paced_whatsapp_send(lambda: _deliver_boleto_whatsapp(_evolution_api_from_config(), payload))
+    if result['success']:
+        BOLETOS_STORE.update_record('task_id', payload['task_id'], {
+            'whatsapp_enviado': True,
+            'data_envio_boleto': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }, f"dia{payload['dia']}")
+    status = '✅' if result['success'] else '❌'
+    socketio.emit('log', {'dia': 'whatsapp', 'message': f"{status} {payload['nome']}: {result.get('message') or result.get('error')}"})
+    return result
+
+WHATSAPP_QUEUE.register('boleto_whatsapp', _send_boleto_whatsapp_job)
+
+def _boleto_whatsapp_key(task_id, dia):
+    """Chave de idempotência do envio de um boleto (a mesma no envio avulso e no lote)"""
+    return f'boleto_whatsapp:{task_id}:{dia}'
+
+def _check_evolution_config():
+    """Valida evolution_config.json antes de enfileirar; retorna a mensagem de erro ou None"""
+    evolution_config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'evolution_config.json')
+
+    if not os.path.exists(evolution_config_path):
+        # Cria arquivo padrão automaticamente
+        default_config = {
+            "api": {
+                "base_url": "https://zap.tekvosoft.com",
+                "instance_name": "",
+                "api_key": ""
+            }
+        }
+        with open(evolution_config_path, 'w', encoding='utf-8') as f:
+            json.dump(default_config, f, indent=2, ensure_ascii=False)
+
+        return 'Configuração da Evolution API não encontrada. Por favor, acesse a aba "WhatsApp" no menu e configure sua instância e API Key.'
+
+    with open(evolution_config_path, 'r', encoding='utf-8') as f:
+        evolution_config = json.load(f)
+
+    api_config = evolution_config.get('api', {})
+    if not all([api_config.get('base_url'), api_config.get('instance_name'), api_config.get('api_key')]):
+        return 'Configuração da Evolution API incompleta. Por favor, acesse a aba "WhatsApp" no menu e preencha: Nome da Instância e API Key.'
+    return None
+
+@app.route('/api/boletos/whatsapp/<task_id>', methods=['POST'])
+def api_boletos_whatsapp(task_id):
+    """Envia boleto via WhatsApp usando Evolution API"""
+    try:
+        # Carrega dados do boleto
+        if not BOLETOS_STORE.exists():
+            return jsonify({'success': False, 'error': 'Dados de boletos não encontrados'})
         
-        # Marca boleto como enviado no arquivo local
-        boleto['whatsapp_enviado'] = True
-        boleto['data_envio_boleto'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # Busca o boleto específico
+        dia_key, _posicao, boleto = BOLETOS_STORE.find_record('task_id', task_id)
         
-        # Salva alterações no arquivo de boletos
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+        if not boleto:
+            return jsonify({'success': False, 'error': 'Boleto não encontrado'})
         
-        # Monta mensagem de sucesso
-        mensagem_sucesso = f'WhatsApp enviado com sucesso para {nome}!'
-        if details.get('pdf_sent'):
-            mensagem_sucesso += ' (PDF anexado)'
-        elif link_boleto:
-            mensagem_sucesso += ' (PDF não enviado - verifique logs)'
+        payload, erro = _boleto_whatsapp_payload(task_id, dia_key, boleto)
+        if erro:
+            return jsonify({'success': False, 'error': erro})
         
-        return jsonify({
-            'success': True,
-            'message': mensagem_sucesso,
-            'details': {
-                'nome': nome,
-                'celular': celular,
-                'dia': dia,
-                'text_sent': details.get('text_sent', False),
-                'pdf_sent': details.get('pdf_sent', False),
-                'pdf_path': details.get('pdf_path'),
-                'media_sent': details.get('media_sent', False),
-                'link': link_boleto,
-                'pdf_response': details.get('pdf_response'),
-                'media_response': details.get('media_response')
-            }
-        })
+        erro = _check_evolution_config()
+        if erro:
+            return jsonify({'success': False, 'error': erro})
+        
+        return _enqueue_whatsapp(
+            'boleto_whatsapp', payload, _boleto_whatsapp_key(task_id, payload['dia']),
+            f"Envio para {payload['nome']} adicionado à fila do WhatsApp"
+        )
+    
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        print(f"Erro ao enfileirar WhatsApp: {error_details}")
+        return jsonify({'success': False, 'error': f'Erro ao enfileirar WhatsApp: {str(e)}'})
+
+@app.route('/api/boletos/whatsapp/batch', methods=['POST'])
+def api_boletos_whatsapp_batch():
+    """
+    Enfileira o envio de vários boletos via WhatsApp (um job por boleto)
+
+    Body JSON: {"dia": "08"} (pendentes do dia) ou {"task_ids": [...]};
+    "include_sent": true reenvia também os já enviados.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        dia = str(data.get('dia') or '').replace('dia', '')
+        task_ids = data.get('task_ids') or []
+        include_sent = bool(data.get('include_sent'))
+        
+        if dia not in ('', '08', '16'):
+            return jsonify({'success': False, 'error': 'Dia inválido (use 08 ou 16)'}), 400
+        if not dia and not task_ids:
+            return jsonify({'success': False, 'error': 'Informe o dia ou a lista de task_ids'}), 400
+        
+        erro = _check_evolution_config()
+        if erro:
+            return jsonify({'success': False, 'error': erro})
+        
+        # Uma leitura do arquivo de boletos para o lote todo
+        with BOLETOS_STORE.locked():
+            boletos_data = BOLETOS_STORE.load()
+            dia_keys = [f'dia{dia}'] if dia else ['dia08', 'dia16']
+            wanted = {str(task_id) for task_id in task_ids}
+            candidatos = [
+                (dia_key, boleto)
+                for dia_key in dia_keys
+                for boleto in boletos_data.get(dia_key, [])
+                if not wanted or str(boleto.get('task_id')) in wanted
+            ]
+        
+        items, ignorados = [], []
+        for dia_key, boleto in candidatos:
+            task_id = boleto.get('task_id')
+            if boleto.get('whatsapp_enviado') and not include_sent:
+                continue
+            if not task_id:
+                # Sem task_id não há como marcar o envio nem deduplicar o lote
+                ignorados.append({'task_id': None, 'nome': boleto.get('nome', 'Cliente'),
+                                  'error': 'Boleto sem task_id'})
+                continue
+            payload, erro = _boleto_whatsapp_payload(task_id, dia_key, boleto)
+            if erro:
+                ignorados.append({'task_id': task_id, 'nome': boleto.get('nome', 'Cliente'), 'error': erro})
+            else:
+                items.append(payload)
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'error': 'Nenhum boleto pendente com celular válido para enviar',
+                'skipped': ignorados
+            })
+        
+        jobs = [
+            (item['nome'], WHATSAPP_QUEUE.enqueue(
+                'boleto_whatsapp', item, _boleto_whatsapp_key(item['task_id'], item['dia'])
+            ))
+            for item in items
+        ]
+        return _enqueued_whatsapp_batch(jobs, 'boletos', skipped=ignorados)
     
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"Erro ao enviar WhatsApp: {error_details}")
-        return jsonify({'success': False, 'error': f'Erro ao enviar WhatsApp: {str(e)}'})
+        print(f"Erro ao enfileirar lote de WhatsApp: {error_details}")
+        return jsonify({'success': False, 'error': f'Erro ao enfileirar lote de WhatsApp: {str(e)}'})
 
 # ========== ROTAS DE EXTRAÇÃO DE COTAS ==========
 
 @app.route('/api/cotas', methods=['GET'])
 def api_cotas():
     """Retorna dados das cotas extraídas"""
-    filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cotas_data.json')
-    
     try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return jsonify({'success': True, 'data': data})
-        else:
-            return jsonify({'success': True, 'data': {'grupos': []}})
+        with COTAS_STORE.locked():
+            data = COTAS_STORE.load()
+            etag = _data_etag('cotas', COTAS_STORE.signature)
+            return _not_modified(etag) or _with_etag(jsonify({'success': True, 'data': data}), etag)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -1270,33 +1597,28 @@ def api_cotas_extract(grupo):
             emit_progress('💾 Salvando dados...')
             
             # Carrega dados existentes
-            cotas_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cotas_data.json')
-            cotas_data = {'grupos': []}
-            
-            if os.path.exists(cotas_filepath):
+            with COTAS_STORE.locked():
                 try:
-                    with open(cotas_filepath, 'r', encoding='utf-8') as f:
-                        cotas_data = json.load(f)
+                    cotas_data = COTAS_STORE.load()
                 except:
                     cotas_data = {'grupos': []}
-            
-            if 'grupos' not in cotas_data:
-                cotas_data['grupos'] = []
-            
-            # Remove grupo existente se houver
-            cotas_data['grupos'] = [g for g in cotas_data['grupos'] if g.get('numero') != grupo]
-            
-            # Adiciona novo grupo com dia
-            cotas_data['grupos'].append({
-                'numero': grupo,
-                'dia': dia_grupo,  # ========== SALVA DIA ==========
-                'cotas': result['cotas'],
-                'extracted_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-            
-            # Salva arquivo
-            with open(cotas_filepath, 'w', encoding='utf-8') as f:
-                json.dump(cotas_data, f, indent=2, ensure_ascii=False)
+                
+                if 'grupos' not in cotas_data:
+                    cotas_data['grupos'] = []
+                
+                # Remove grupo existente se houver
+                cotas_data['grupos'] = [g for g in cotas_data['grupos'] if g.get('numero') != grupo]
+                
+                # Adiciona novo grupo com dia
+                cotas_data['grupos'].append({
+                    'numero': grupo,
+                    'dia': dia_grupo,  # ========== SALVA DIA ==========
+                    'cotas': result['cotas'],
+                    'extracted_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+                
+                # Salva arquivo
+                COTAS_STORE.save(cotas_data)
             
             emit_progress(f'✅ Extração concluída! Grupo {grupo} configurado para Dia {dia_grupo}')
             
@@ -1337,18 +1659,15 @@ def api_cotas_extract(grupo):
 def api_cotas_delete(grupo):
     """Remove um grupo extraído"""
     try:
-        cotas_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cotas_data.json')
-        
-        if os.path.exists(cotas_filepath):
-            with open(cotas_filepath, 'r', encoding='utf-8') as f:
-                cotas_data = json.load(f)
-            
-            # Remove grupo
-            if 'grupos' in cotas_data:
-                cotas_data['grupos'] = [g for g in cotas_data['grupos'] if g.get('numero') != grupo]
-            
-            with open(cotas_filepath, 'w', encoding='utf-8') as f:
-                json.dump(cotas_data, f, indent=2, ensure_ascii=False)
+        if COTAS_STORE.exists():
+            with COTAS_STORE.locked():
+                cotas_data = COTAS_STORE.load()
+                
+                # Remove grupo
+                if 'grupos' in cotas_data:
+                    cotas_data['grupos'] = [g for g in cotas_data['grupos'] if g.get('numero') != grupo]
+                
+                COTAS_STORE.save(cotas_data)
         
         return jsonify({'success': True, 'message': f'Grupo {grupo} removido com sucesso'})
         
@@ -1371,13 +1690,10 @@ def api_cotas_automatizar_lance(grupo):
         checkbox_states = request_data.get('checkbox_states', {})
         
         # Carrega dados das cotas extraídas
-        cotas_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cotas_data.json')
-        
-        if not os.path.exists(cotas_filepath):
+        if not COTAS_STORE.exists():
             return jsonify({'success': False, 'error': 'Nenhum grupo extraído ainda. Extraia o grupo primeiro.'})
         
-        with open(cotas_filepath, 'r', encoding='utf-8') as f:
-            cotas_data = json.load(f)
+        cotas_data = COTAS_STORE.load()
         
         # Procura o grupo específico
         grupo_data = None
@@ -1431,7 +1747,7 @@ def api_cotas_automatizar_lance(grupo):
             
             # Callback para histórico
             def history_callback(grupo, cota, nome, valor, status, obs="", **kwargs):
-                filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'history_dia8.json')
+                history_log = get_history_log(PROJECT_ROOT, 'dia8')
                 
                 protocolo_valor = kwargs.get('protocolo')
                 documento_url = kwargs.get('documento_url')
@@ -1454,16 +1770,8 @@ def api_cotas_automatizar_lance(grupo):
                 }
                 
                 try:
-                    if os.path.exists(filepath):
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                    else:
-                        data = []
-                    
-                    data.append(entry)
-                    
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    history_log.append(entry)
+                    get_history_stats(PROJECT_ROOT, 'dia8').refresh()
                     
                     emit_progress(f"📝 Histórico salvo: {nome} - {status}")
                     socketio.emit('history_update', {'dia': 'dia8', 'entry': entry})
@@ -1698,53 +2006,92 @@ def api_parar_automacao(grupo):
 
 # ========== ROTAS DE GERENCIAMENTO DE CLIENTES ==========
 
+# Cache da resposta de /api/clientes: {'versao': (geração clientes, geração boletos), 'body': str}
+_clientes_response_cache = {}
+_clientes_response_lock = threading.Lock()
+
+def _join_clientes_boletos(clientes_cache, boletos_data):
+    """
+    Associa a cada cliente o boleto do mesmo dia (por client_id ou task_id)
+    
+    Monta um dicionário por dia com a primeira ocorrência de cada client_id/task_id
+    dos boletos, então cada cliente é resolvido com uma consulta O(1).
+    """
+    # Cópia rasa para a resposta: o campo 'boleto' não vai para o arquivo
+    clientes_data = dict(clientes_cache)
+    
+    for dia_key in ['dia08', 'dia16']:
+        if dia_key not in clientes_data:
+            continue
+        
+        # Índice do dia: valor de client_id/task_id → primeiro boleto que o contém
+        boletos_por_id = {}
+        for boleto in boletos_data.get(dia_key, []):
+            for campo in ('client_id', 'task_id'):
+                valor = boleto.get(campo)
+                if valor:
+                    boletos_por_id.setdefault(valor, boleto)
+        
+        clientes_data[dia_key] = [dict(c) for c in clientes_cache[dia_key]]
+        for cliente in clientes_data[dia_key]:
+            boleto_encontrado = boletos_por_id.get(cliente.get('client_id'))
+            
+            # Adiciona informações do boleto ao cliente
+            if boleto_encontrado:
+                cliente['boleto'] = {
+                    'task_id': boleto_encontrado.get('task_id'),
+                    'link': boleto_encontrado.get('link', ''),
+                    'short_link': boleto_encontrado.get('short_link', ''),
+                    'whatsapp_enviado': boleto_encontrado.get('whatsapp_enviado', False),
+                    'data_envio_boleto': boleto_encontrado.get('data_envio_boleto', None)
+                }
+            else:
+                cliente['boleto'] = None
+    
+    return clientes_data
+
+def _clientes_versao():
+    """(gerações, assinaturas) dos documentos de clientes e boletos"""
+    return (
+        (CLIENTES_STORE.generation, BOLETOS_STORE.generation),
+        (CLIENTES_STORE.signature, BOLETOS_STORE.signature),
+    )
+
 @app.route('/api/clientes', methods=['GET'])
 def api_clientes():
     """Retorna dados dos clientes com informações de boletos associados"""
-    clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-    boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-    
     try:
-        # Carrega clientes
-        if os.path.exists(clientes_filepath):
-            with open(clientes_filepath, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
+        # Carrega clientes e boletos (documentos em cache - não são modificados aqui).
+        # Versão lida antes e depois: se uma gravação cair no meio, lê de novo
+        for _tentativa in range(3):
+            antes = _clientes_versao()
+            clientes_cache = CLIENTES_STORE.load()
+            boletos_data = BOLETOS_STORE.load()
+            if _clientes_versao() == antes:
+                break
         else:
-            clientes_data = {'dia08': [], 'dia16': []}
-        
-        # Carrega boletos
-        boletos_data = {'dia08': [], 'dia16': []}
-        if os.path.exists(boletos_filepath):
-            with open(boletos_filepath, 'r', encoding='utf-8') as f:
-                boletos_data = json.load(f)
-        
-        # Associa boletos aos clientes
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in clientes_data:
-                for cliente in clientes_data[dia_key]:
-                    client_id = cliente.get('client_id')
-                    
-                    # Busca boleto correspondente
-                    boleto_encontrado = None
-                    if dia_key in boletos_data:
-                        for boleto in boletos_data[dia_key]:
-                            if boleto.get('client_id') == client_id or boleto.get('task_id') == client_id:
-                                boleto_encontrado = boleto
-                                break
-                    
-                    # Adiciona informações do boleto ao cliente
-                    if boleto_encontrado:
-                        cliente['boleto'] = {
-                            'task_id': boleto_encontrado.get('task_id'),
-                            'link': boleto_encontrado.get('link', ''),
-                            'short_link': boleto_encontrado.get('short_link', ''),
-                            'whatsapp_enviado': boleto_encontrado.get('whatsapp_enviado', False),
-                            'data_envio_boleto': boleto_encontrado.get('data_envio_boleto', None)
-                        }
-                    else:
-                        cliente['boleto'] = None
+            # Gravações seguidas: responde sem cache nem ETag
+            body = app.json.dumps({'success': True, 'data': _join_clientes_boletos(clientes_cache, boletos_data)})
+            return app.response_class(body + '\n', mimetype=app.json.mimetype)
+        
+        versao, assinaturas = antes
+        etag = _data_etag('clientes', *assinaturas)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        # Resposta serializada reaproveitada até um dos dois arquivos mudar
+        with _clientes_response_lock:
+            if _clientes_response_cache.get('versao') == versao:
+                body = _clientes_response_cache['body']
+            else:
+                body = app.json.dumps({
+                    'success': True,
+                    'data': _join_clientes_boletos(clientes_cache, boletos_data)
+                })
+                _clientes_response_cache.update(versao=versao, body=body)
         
-        return jsonify({'success': True, 'data': clientes_data})
+        return _with_etag(app.response_class(body + '\n', mimetype=app.json.mimetype), etag)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -1770,18 +2117,7 @@ def api_clientes_create():
         import uuid
         client_id = str(uuid.uuid4())
         
-        # Carrega dados existentes
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        clientes_data = {'dia08': [], 'dia16': []}
-        
-        if os.path.exists(clientes_filepath):
-            with open(clientes_filepath, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
-        
         dia_key = f'dia{dia}'
-        if dia_key not in clientes_data:
-            clientes_data[dia_key] = []
-        
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Novo formato: usa listas para grupos e cotas
@@ -1817,10 +2153,8 @@ def api_clientes_create():
             'updated_at': timestamp
         }
         
-        clientes_data[dia_key].append(new_cliente)
-        
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+        # Acrescenta ao arquivo de clientes
+        CLIENTES_STORE.append_record(dia_key, new_cliente)
         
         print(f"✅ Cliente criado: ID={client_id}, Dia={dia_key}")
         
@@ -1848,69 +2182,58 @@ def api_clientes_update(client_id):
         print(f"🔧 UPDATE Cliente: ID={client_id}, Nome={nome}, Email={email}")
         
         # Carrega dados
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado'})
             
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
-        
-        # Busca e atualiza cliente
-        found = False
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in clientes_data:
-                for cliente in clientes_data[dia_key]:
-                    if cliente.get('client_id') == client_id:
-                        print(f"✅ Cliente encontrado em {dia_key}: {cliente.get('nome')}")
-                        
-                        # Atualiza nome, email e outros dados
-                        cliente['nome'] = nome
-                        cliente['email'] = email
-                        cliente['contato'] = contato
-                        cliente['valor_primeira_cota'] = valor_primeira_cota
-                        
-                        # ========== PRESERVA GRUPOS/COTAS EXISTENTES ==========
-                        # Só atualiza grupos/cotas se novos valores forem enviados
-                        # Caso contrário, mantém os valores existentes (arrays)
-                        if grupo or cota:
-                            # Se enviou novos valores, atualiza
-                            grupos_list = [grupo] if grupo else []
-                            cotas_list = [cota] if cota else []
-                            
-                            cliente['grupos'] = grupos_list
-                            cliente['cotas'] = cotas_list
-                            
-                            # Atualiza cotas_texto
-                            if len(cotas_list) == 1 and len(grupos_list) == 1:
-                                cliente['cotas_texto'] = f"{cotas_list[0]} - {grupos_list[0]}"
-                            elif len(cotas_list) > 1:
-                                cliente['cotas_texto'] = f"{len(cotas_list)} cotas"
-                            else:
-                                cliente['cotas_texto'] = ''
-                        else:
-                            # Não enviou grupo/cota = PRESERVA dados existentes
-                            print(f"🔒 Preservando grupos/cotas existentes: {len(cliente.get('grupos', []))} grupos, {len(cliente.get('cotas', []))} cotas")
-                            # Não altera cliente['grupos'] nem cliente['cotas']
-                        
-                        # Remove campos antigos se existirem
-                        cliente.pop('grupo', None)
-                        cliente.pop('cota', None)
-                        
-                        cliente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        found = True
-                        
-                        # Sincroniza com boleto correspondente
-                        _sync_cliente_to_boleto(cliente, dia_key)
-                        break
-            if found:
-                break
-        
-        if not found:
-            print(f"❌ Cliente NÃO encontrado: {client_id}")
-            return jsonify({'success': False, 'error': 'Cliente não encontrado'})
-        
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+        with CLIENTES_STORE.locked():
+            # Busca e atualiza cliente (cópia, gravada só na linha dele)
+            dia_key, _posicao, cliente_atual = CLIENTES_STORE.find_record('client_id', client_id)
+            if cliente_atual is None:
+                print(f"❌ Cliente NÃO encontrado: {client_id}")
+                return jsonify({'success': False, 'error': 'Cliente não encontrado'})
+            
+            cliente = dict(cliente_atual)
+            print(f"✅ Cliente encontrado em {dia_key}: {cliente.get('nome')}")
+            
+            # Atualiza nome, email e outros dados
+            cliente['nome'] = nome
+            cliente['email'] = email
+            cliente['contato'] = contato
+            cliente['valor_primeira_cota'] = valor_primeira_cota
+            
+            # ========== PRESERVA GRUPOS/COTAS EXISTENTES ==========
+            # Só atualiza grupos/cotas se novos valores forem enviados
+            # Caso contrário, mantém os valores existentes (arrays)
+            if grupo or cota:
+                # Se enviou novos valores, atualiza
+                grupos_list = [grupo] if grupo else []
+                cotas_list = [cota] if cota else []
+                
+                cliente['grupos'] = grupos_list
+                cliente['cotas'] = cotas_list
+                
+                # Atualiza cotas_texto
+                if len(cotas_list) == 1 and len(grupos_list) == 1:
+                    cliente['cotas_texto'] = f"{cotas_list[0]} - {grupos_list[0]}"
+                elif len(cotas_list) > 1:
+                    cliente['cotas_texto'] = f"{len(cotas_list)} cotas"
+                else:
+                    cliente['cotas_texto'] = ''
+            else:
+                # Não enviou grupo/cota = PRESERVA dados existentes
+                print(f"🔒 Preservando grupos/cotas existentes: {len(cliente.get('grupos', []))} grupos, {len(cliente.get('cotas', []))} cotas")
+                # Não altera cliente['grupos'] nem cliente['cotas']
+            
+            # Remove campos antigos se existirem
+            cliente.pop('grupo', None)
+            cliente.pop('cota', None)
+            
+            cliente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            # Sincroniza com boleto correspondente
+            _sync_cliente_to_boleto(cliente, dia_key)
+            
+            CLIENTES_STORE.replace_record('client_id', client_id, cliente, dia_key)
         
         print(f"✅ Cliente atualizado com sucesso!")
         return jsonify({'success': True, 'message': 'Cliente atualizado com sucesso'})
@@ -1924,76 +2247,47 @@ def api_clientes_delete(client_id):
     """Deleta um cliente E o boleto associado"""
     try:
         # ========== 1. BUSCA E DELETA CLIENTE ==========
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado'})
             
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
-        
-        found = False
-        cliente_nome = None
-        cliente_task_id = None
-        dia_encontrado = None
-        
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in clientes_data:
-                for cliente in clientes_data[dia_key]:
-                    if cliente.get('client_id') == client_id:
-                        cliente_nome = cliente.get('nome', '').strip()
-                        cliente_task_id = cliente.get('task_id', '')
-                        dia_encontrado = dia_key
-                        found = True
-                        break
-                
-                if found:
-                    # Remove cliente
-                    original_len = len(clientes_data[dia_key])
-                    clientes_data[dia_key] = [
-                        c for c in clientes_data[dia_key] 
-                        if c.get('client_id') != client_id
-                    ]
-                    print(f"🗑️ Cliente deletado: {cliente_nome} (ID: {client_id})")
-                    break
-        
-        if not found:
-            return jsonify({'success': False, 'error': 'Cliente não encontrado'})
-        
-        # Salva clientes atualizados
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+        with CLIENTES_STORE.locked():
+            dia_encontrado, _posicao, cliente = CLIENTES_STORE.find_record('client_id', client_id)
+            if cliente is None:
+                return jsonify({'success': False, 'error': 'Cliente não encontrado'})
+            
+            cliente_nome = cliente.get('nome', '').strip()
+            cliente_task_id = cliente.get('task_id', '')
+            
+            # Remove cliente (só a linha dele)
+            CLIENTES_STORE.delete_record('client_id', client_id, dia_encontrado)
+            print(f"🗑️ Cliente deletado: {cliente_nome} (ID: {client_id})")
         
         # ========== 2. DELETA BOLETO ASSOCIADO ==========
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
         boleto_deletado = False
         
-        if os.path.exists(boletos_filepath):
+        if BOLETOS_STORE.exists():
             try:
-                with open(boletos_filepath, 'r', encoding='utf-8-sig') as f:
-                    content = f.read().strip()
-                    if content.startswith('\ufeff'):
-                        content = content[1:]
-                    boletos_data = json.loads(content)
-                
-                if dia_encontrado and dia_encontrado in boletos_data:
-                    original_len = len(boletos_data[dia_encontrado])
-                    
-                    # Tenta deletar por task_id ou por nome (case-insensitive)
-                    boletos_data[dia_encontrado] = [
-                        b for b in boletos_data[dia_encontrado]
-                        if not (
-                            (cliente_task_id and b.get('task_id') == cliente_task_id) or
-                            (cliente_nome and b.get('nome', '').strip().lower() == cliente_nome.lower())
-                        )
-                    ]
+                with BOLETOS_STORE.locked():
+                    boletos_data = BOLETOS_STORE.load()
                     
-                    if len(boletos_data[dia_encontrado]) < original_len:
-                        boleto_deletado = True
-                        print(f"🗑️ Boleto deletado: {cliente_nome}")
-                    
-                    # Salva boletos atualizados
-                    with open(boletos_filepath, 'w', encoding='utf-8') as f:
-                        json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+                    if dia_encontrado and dia_encontrado in boletos_data:
+                        original_len = len(boletos_data[dia_encontrado])
+                        
+                        # Tenta deletar por task_id ou por nome (case-insensitive)
+                        boletos_data[dia_encontrado] = [
+                            b for b in boletos_data[dia_encontrado]
+                            if not (
+                                (cliente_task_id and b.get('task_id') == cliente_task_id) or
+                                (cliente_nome and b.get('nome', '').strip().lower() == cliente_nome.lower())
+                            )
+                        ]
+                        
+                        if len(boletos_data[dia_encontrado]) < original_len:
+                            boleto_deletado = True
+                            print(f"🗑️ Boleto deletado: {cliente_nome}")
+                        
+                        # Salva boletos atualizados
+                        BOLETOS_STORE.save(boletos_data)
                         
             except Exception as e:
                 print(f"⚠️ Erro ao deletar boleto: {e}")
@@ -2012,81 +2306,74 @@ def api_clientes_delete(client_id):
 def api_clientes_delete_mes(mes_relatorio):
     """Deleta todos os clientes de um mês específico"""
     try:
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado'})
             
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
+        with CLIENTES_STORE.locked():
+            clientes_data = CLIENTES_STORE.load()
+            
+            total_deletados = 0
+            clientes_deletados = []
+            
+            # Remove clientes do mês especificado de ambos os dias
+            for dia_key in ['dia08', 'dia16']:
+                if dia_key in clientes_data:
+                    original_count = len(clientes_data[dia_key])
+                    
+                    # Guarda os nomes dos clientes que serão deletados
+                    for cliente in clientes_data[dia_key]:
+                        if cliente.get('mes_relatorio') == mes_relatorio:
+                            clientes_deletados.append({
+                                'nome': cliente.get('nome', ''),
+                                'client_id': cliente.get('client_id', ''),
+                                'task_id': cliente.get('task_id', ''),
+                                'dia': dia_key
+                            })
+                    
+                    # Remove clientes do mês
+                    clientes_data[dia_key] = [
+                        c for c in clientes_data[dia_key] 
+                        if c.get('mes_relatorio') != mes_relatorio
+                    ]
+                    
+                    deletados_neste_dia = original_count - len(clientes_data[dia_key])
+                    total_deletados += deletados_neste_dia
+                    
+                    if deletados_neste_dia > 0:
+                        print(f"🗑️ {deletados_neste_dia} clientes deletados do {dia_key} (mês: {mes_relatorio})")
+            
+            # Salva clientes atualizados
+            CLIENTES_STORE.save(clientes_data)
         
-        total_deletados = 0
-        clientes_deletados = []
+        # Remove boletos associados também
+        boletos_deletados = 0
         
-        # Remove clientes do mês especificado de ambos os dias
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in clientes_data:
-                original_count = len(clientes_data[dia_key])
-                
-                # Guarda os nomes dos clientes que serão deletados
-                for cliente in clientes_data[dia_key]:
-                    if cliente.get('mes_relatorio') == mes_relatorio:
-                        clientes_deletados.append({
-                            'nome': cliente.get('nome', ''),
-                            'client_id': cliente.get('client_id', ''),
-                            'task_id': cliente.get('task_id', ''),
-                            'dia': dia_key
-                        })
-                
-                # Remove clientes do mês
-                clientes_data[dia_key] = [
-                    c for c in clientes_data[dia_key] 
-                    if c.get('mes_relatorio') != mes_relatorio
-                ]
-                
-                deletados_neste_dia = original_count - len(clientes_data[dia_key])
-                total_deletados += deletados_neste_dia
-                
-                if deletados_neste_dia > 0:
-                    print(f"🗑️ {deletados_neste_dia} clientes deletados do {dia_key} (mês: {mes_relatorio})")
-        
-        # Salva clientes atualizados
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
-        
-        # Remove boletos associados também
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        boletos_deletados = 0
-        
-        if os.path.exists(boletos_filepath):
+        if BOLETOS_STORE.exists():
             try:
-                with open(boletos_filepath, 'r', encoding='utf-8-sig') as f:
-                    content = f.read().strip()
-                    if content.startswith('\ufeff'):
-                        content = content[1:]
-                    boletos_data = json.loads(content)
-                
-                # Remove boletos dos clientes deletados
-                for cliente_info in clientes_deletados:
-                    dia_key = cliente_info['dia']
-                    task_id = cliente_info['task_id']
-                    nome = cliente_info['nome']
+                with BOLETOS_STORE.locked():
+                    boletos_data = BOLETOS_STORE.load()
                     
-                    if dia_key in boletos_data:
-                        original_len = len(boletos_data[dia_key])
-                        
-                        boletos_data[dia_key] = [
-                            b for b in boletos_data[dia_key]
-                            if not (
-                                (task_id and b.get('task_id') == task_id) or
-                                (nome and b.get('nome', '').strip().lower() == nome.lower())
-                            )
-                        ]
+                    # Remove boletos dos clientes deletados
+                    for cliente_info in clientes_deletados:
+                        dia_key = cliente_info['dia']
+                        task_id = cliente_info['task_id']
+                        nome = cliente_info['nome']
                         
-                        boletos_deletados += original_len - len(boletos_data[dia_key])
-                
-                # Salva boletos atualizados
-                with open(boletos_filepath, 'w', encoding='utf-8') as f:
-                    json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+                        if dia_key in boletos_data:
+                            original_len = len(boletos_data[dia_key])
+                            
+                            boletos_data[dia_key] = [
+                                b for b in boletos_data[dia_key]
+                                if not (
+                                    (task_id and b.get('task_id') == task_id) or
+                                    (nome and b.get('nome', '').strip().lower() == nome.lower())
+                                )
+                            ]
+                            
+                            boletos_deletados += original_len - len(boletos_data[dia_key])
+                    
+                    # Salva boletos atualizados
+                    BOLETOS_STORE.save(boletos_data)
                     
                 if boletos_deletados > 0:
                     print(f"🗑️ {boletos_deletados} boletos também foram removidos")
@@ -2116,20 +2403,10 @@ def api_clientes_sync_from_boletos():
     """Sincroniza clientes a partir dos boletos existentes"""
     try:
         # Carrega boletos
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if not os.path.exists(boletos_filepath):
+        if not BOLETOS_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de boletos não encontrado'})
         
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
-        
-        # Carrega clientes existentes
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        clientes_data = {'dia08': [], 'dia16': []}
-        
-        if os.path.exists(clientes_filepath):
-            with open(clientes_filepath, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
+        boletos_data = BOLETOS_STORE.load()
         
         import uuid
         import re
@@ -2137,111 +2414,114 @@ def api_clientes_sync_from_boletos():
         created_count = 0
         updated_count = 0
         
-        # Processa cada dia
-        for dia_key in ['dia08', 'dia16']:
-            boletos_list = boletos_data.get(dia_key, [])
+        # Carrega clientes existentes
+        with CLIENTES_STORE.locked():
+            clientes_data = CLIENTES_STORE.load()
             
-            for boleto in boletos_list:
-                nome = boleto.get('nome', '').strip()
-                if not nome:
-                    continue
-                
-                # Extrai grupo e cota das informações do boleto
-                cotas_info = boleto.get('cotas', '')
-                grupo = boleto.get('grupo', '')
-                cota = boleto.get('cota', '')
-                
-                # Tenta extrair grupo e cota do campo cotas se não existirem
-                if not grupo or not cota:
-                    # Padrão: "1920 - 1553" ou "Cotas: 304 - 1545"
-                    match = re.search(r'(\d{3,4})\s*-\s*(\d{4})', cotas_info)
-                    if match:
-                        cota = match.group(1)
-                        grupo = match.group(2)
-                
-                contato = boleto.get('celular', '')
+            # Processa cada dia
+            for dia_key in ['dia08', 'dia16']:
+                boletos_list = boletos_data.get(dia_key, [])
                 
-                # Busca cliente existente com mesmo nome e dia
-                cliente_existente = None
-                for cliente in clientes_data.get(dia_key, []):
-                    if cliente.get('nome') == nome:
-                        cliente_existente = cliente
-                        break
-                
-                # Pega link do boleto
-                boleto_link = _best_boleto_link(boleto)
-                
-                if cliente_existente:
-                    # Atualiza cliente existente
-                    # Converte para arrays se necessário
-                    if 'grupos' not in cliente_existente:
-                        cliente_existente['grupos'] = []
-                    if 'cotas' not in cliente_existente:
-                        cliente_existente['cotas'] = []
+                for boleto in boletos_list:
+                    nome = boleto.get('nome', '').strip()
+                    if not nome:
+                        continue
                     
-                    # Adiciona grupo/cota se não existirem nos arrays
-                    if grupo and grupo not in cliente_existente['grupos']:
-                        cliente_existente['grupos'].append(grupo)
-                    if cota and cota not in cliente_existente['cotas']:
-                        cliente_existente['cotas'].append(cota)
+                    # Extrai grupo e cota das informações do boleto
+                    cotas_info = boleto.get('cotas', '')
+                    grupo = boleto.get('grupo', '')
+                    cota = boleto.get('cota', '')
                     
-                    # Atualiza cotas_texto
-                    if len(cliente_existente['cotas']) == 1 and len(cliente_existente['grupos']) == 1:
-                        cliente_existente['cotas_texto'] = f"{cliente_existente['cotas'][0]} - {cliente_existente['grupos'][0]}"
-                    elif len(cliente_existente['cotas']) > 1:
-                        cliente_existente['cotas_texto'] = f"{cliente_existente['cotas'][0]} - {cliente_existente['grupos'][0]} +{len(cliente_existente['cotas']) - 1}"
+                    # Tenta extrair grupo e cota do campo cotas se não existirem
+                    if not grupo or not cota:
+                        # Padrão: "1920 - 1553" ou "Cotas: 304 - 1545"
+                        match = re.search(r'(\d{3,4})\s*-\s*(\d{4})', cotas_info)
+                        if match:
+                            cota = match.group(1)
+                            grupo = match.group(2)
                     
-                    cliente_existente['contato'] = contato or cliente_existente.get('contato', '')
-                    cliente_existente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    contato = boleto.get('celular', '')
                     
-                    # Adiciona link ao histórico se não existir
-                    if boleto_link and boleto_link not in cliente_existente.get('historico_boletos', []):
-                        if 'historico_boletos' not in cliente_existente:
-                            cliente_existente['historico_boletos'] = []
-                        cliente_existente['historico_boletos'].append(boleto_link)
+                    # Busca cliente existente com mesmo nome e dia
+                    cliente_existente = None
+                    for cliente in clientes_data.get(dia_key, []):
+                        if cliente.get('nome') == nome:
+                            cliente_existente = cliente
+                            break
                     
-                    updated_count += 1
-                else:
-                    # Cria novo cliente
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    hoje = datetime.now()
-                    mes_relatorio_atual = f"{hoje.year}-{str(hoje.month).zfill(2)}"
+                    # Pega link do boleto
+                    boleto_link = _best_boleto_link(boleto)
                     
-                    # Novo formato: usa listas para grupos e cotas
-                    grupos_list = [grupo] if grupo else []
-                    cotas_list = [cota] if cota else []
-                    
-                    # Define cotas_texto
-                    if len(cotas_list) == 1 and len(grupos_list) == 1:
-                        cotas_texto = f"{cotas_list[0]} - {grupos_list[0]}"
-                    elif len(cotas_list) > 1:
-                        cotas_texto = f"{len(cotas_list)} cotas"
+                    if cliente_existente:
+                        # Atualiza cliente existente
+                        # Converte para arrays se necessário
+                        if 'grupos' not in cliente_existente:
+                            cliente_existente['grupos'] = []
+                        if 'cotas' not in cliente_existente:
+                            cliente_existente['cotas'] = []
+                        
+                        # Adiciona grupo/cota se não existirem nos arrays
+                        if grupo and grupo not in cliente_existente['grupos']:
+                            cliente_existente['grupos'].append(grupo)
+                        if cota and cota not in cliente_existente['cotas']:
+                            cliente_existente['cotas'].append(cota)
+                        
+                        # Atualiza cotas_texto
+                        if len(cliente_existente['cotas']) == 1 and len(cliente_existente['grupos']) == 1:
+                            cliente_existente['cotas_texto'] = f"{cliente_existente['cotas'][0]} - {cliente_existente['grupos'][0]}"
+                        elif len(cliente_existente['cotas']) > 1:
+                            cliente_existente['cotas_texto'] = f"{cliente_existente['cotas'][0]} - {cliente_existente['grupos'][0]} +{len(cliente_existente['cotas']) - 1}"
+                        
+                        cliente_existente['contato'] = contato or cliente_existente.get('contato', '')
+                        cliente_existente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        
+                        # Adiciona link ao histórico se não existir
+                        if boleto_link and boleto_link not in cliente_existente.get('historico_boletos', []):
+                            if 'historico_boletos' not in cliente_existente:
+                                cliente_existente['historico_boletos'] = []
+                            cliente_existente['historico_boletos'].append(boleto_link)
+                        
+                        updated_count += 1
                     else:
-                        cotas_texto = ''
-                    
-                    novo_cliente = {
-                        'client_id': str(uuid.uuid4()),
-                        'nome': nome,
-                        'email': '',
-                        'grupos': grupos_list,
-                        'cotas': cotas_list,
-                        'cotas_texto': cotas_texto,
-                        'contato': contato,
-                        'valor_primeira_cota': '',
-                        'mes_relatorio': mes_relatorio_atual,
-                        'historico_boletos': [boleto_link] if boleto_link else [],
-                        'created_at': timestamp,
-                        'updated_at': timestamp
-                    }
-                    
-                    if dia_key not in clientes_data:
-                        clientes_data[dia_key] = []
-                    clientes_data[dia_key].append(novo_cliente)
-                    created_count += 1
-        
-        # Salva clientes atualizados
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+                        # Cria novo cliente
+                        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        hoje = datetime.now()
+                        mes_relatorio_atual = f"{hoje.year}-{str(hoje.month).zfill(2)}"
+                        
+                        # Novo formato: usa listas para grupos e cotas
+                        grupos_list = [grupo] if grupo else []
+                        cotas_list = [cota] if cota else []
+                        
+                        # Define cotas_texto
+                        if len(cotas_list) == 1 and len(grupos_list) == 1:
+                            cotas_texto = f"{cotas_list[0]} - {grupos_list[0]}"
+                        elif len(cotas_list) > 1:
+                            cotas_texto = f"{len(cotas_list)} cotas"
+                        else:
+                            cotas_texto = ''
+                        
+                        novo_cliente = {
+                            'client_id': str(uuid.uuid4()),
+                            'nome': nome,
+                            'email': '',
+                            'grupos': grupos_list,
+                            'cotas': cotas_list,
+                            'cotas_texto': cotas_texto,
+                            'contato': contato,
+                            'valor_primeira_cota': '',
+                            'mes_relatorio': mes_relatorio_atual,
+                            'historico_boletos': [boleto_link] if boleto_link else [],
+                            'created_at': timestamp,
+                            'updated_at': timestamp
+                        }
+                        
+                        if dia_key not in clientes_data:
+                            clientes_data[dia_key] = []
+                        clientes_data[dia_key].append(novo_cliente)
+                        created_count += 1
+            
+            # Salva clientes atualizados
+            CLIENTES_STORE.save(clientes_data)
         
         return jsonify({
             'success': True,
@@ -2266,32 +2546,22 @@ def api_clientes_update_credito_inicial(client_id):
         if isinstance(credito_inicial, str):
             credito_inicial = float(credito_inicial.replace('R$', '').replace(' ', '').replace('.', '').replace(',', '.'))
         
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado'})
         
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
-        
-        # Busca cliente
-        found = False
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in clientes_data:
-                for cliente in clientes_data[dia_key]:
-                    if cliente.get('client_id') == client_id:
-                        cliente['credito_inicial'] = credito_inicial
-                        cliente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        found = True
-                        break
-            if found:
-                break
-        
-        if not found:
-            return jsonify({'success': False, 'error': 'Cliente não encontrado'})
-        
-        # Salva
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+        with CLIENTES_STORE.locked():
+            clientes_data = CLIENTES_STORE.load()
+            
+            # Busca cliente
+            _dia_key, _posicao, cliente = CLIENTES_STORE.find_record('client_id', client_id)
+            if cliente is None:
+                return jsonify({'success': False, 'error': 'Cliente não encontrado'})
+            
+            cliente['credito_inicial'] = credito_inicial
+            cliente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            # Salva
+            CLIENTES_STORE.save(clientes_data)
         
         return jsonify({'success': True, 'message': 'Crédito inicial atualizado com sucesso'})
         
@@ -2309,32 +2579,22 @@ def api_clientes_update_mes_relatorio(client_id):
         if not mes_relatorio:
             return jsonify({'success': False, 'error': 'Mês do relatório é obrigatório'})
         
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado'})
         
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
-        
-        # Busca cliente
-        found = False
-        for dia_key in ['dia08', 'dia16']:
-            if dia_key in clientes_data:
-                for cliente in clientes_data[dia_key]:
-                    if cliente.get('client_id') == client_id:
-                        cliente['mes_relatorio'] = mes_relatorio
-                        cliente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        found = True
-                        break
-            if found:
-                break
-        
-        if not found:
-            return jsonify({'success': False, 'error': 'Cliente não encontrado'})
-        
-        # Salva
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+        with CLIENTES_STORE.locked():
+            clientes_data = CLIENTES_STORE.load()
+            
+            # Busca cliente
+            _dia_key, _posicao, cliente = CLIENTES_STORE.find_record('client_id', client_id)
+            if cliente is None:
+                return jsonify({'success': False, 'error': 'Cliente não encontrado'})
+            
+            cliente['mes_relatorio'] = mes_relatorio
+            cliente['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            # Salva
+            CLIENTES_STORE.save(clientes_data)
         
         return jsonify({
             'success': True, 
@@ -2345,33 +2605,86 @@ def api_clientes_update_mes_relatorio(client_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+def _send_cliente_relatorio_job(payload):
+    """Entrega do relatório enfileirado por api_clientes_enviar_whatsapp (worker da fila)"""
+    client_id = payload['client_id']
+    dia_key = payload['dia_key']
+    nome = payload['nome']
+    celular = payload['celular']
+    mensagem = payload['mensagem']
+    valores = payload['valores']
+    credito_inicial = valores['credito_inicial']
+    total_investido_soma = valores['total_investido']
+    credito_atual_soma = valores['credito_atual']
+    valorizacao_patrimonial = valores['valorizacao_patrimonial']
+    lucro_atual = valores['lucro_atual']
+    evolution_api = _evolution_api_from_config()
+
+    # Envia mensagem
+    success, response = evolution_api.send_text_message(celular, mensagem)
+
+    if not success:
+        return {
+            'success': False,
+            'error': f"Falha ao enviar mensagem: {response.get('error', 'Erro desconhecido')}",
+            'details': response
+        }
+
+    # Registra no histórico (relê o cliente: o envio acontece fora do bloqueio)
+    registro_envio = {
+        'data_envio': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'mensagem_enviada': mensagem,
+        'celular': celular,
+        'valores': {
+            'credito_inicial': credito_inicial,
+            'total_investido': total_investido_soma,
+            'credito_atual': credito_atual_soma,
+            'valorizacao_patrimonial': valorizacao_patrimonial,
+            'lucro_atual': lucro_atual
+        }
+    }
+
+    with CLIENTES_STORE.locked():
+        clientes_data = CLIENTES_STORE.load()
+        _dia_key, _posicao, c = CLIENTES_STORE.find_record('client_id', client_id, dia_key)
+        if c is not None:
+            c.setdefault('historico_whatsapp', []).append(registro_envio)
+
+        # Salva cliente atualizado
+        CLIENTES_STORE.save(clientes_data)
+
+    return {
+        'success': True,
+        'message': f'WhatsApp enviado com sucesso para {nome}!',
+        'details': {
+            'nome': nome,
+            'celular': celular,
+            'data_envio': registro_envio['data_envio'],
+            'valores': {
+                'credito_inicial': _format_brl(credito_inicial),
+                'total_investido': _format_brl(total_investido_soma),
+                'credito_atual': _format_brl(credito_atual_soma),
+                'valorizacao_patrimonial': _format_brl(valorizacao_patrimonial),
+                'lucro_atual': _format_brl(lucro_atual)
+            }
+        }
+    }
+
+WHATSAPP_QUEUE.register('cliente_relatorio', _send_cliente_relatorio_job)
+
 @app.route('/api/clientes/enviar-whatsapp/<client_id>', methods=['POST'])
 def api_clientes_enviar_whatsapp(client_id):
     """Envia mensagem personalizada via WhatsApp com os dados financeiros do cliente"""
     try:
-        from utils.evolution_api import EvolutionAPI
         import re
         from datetime import datetime, timedelta
         
         # Carrega cliente
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado'})
         
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
-        
         # Busca cliente
-        cliente = None
-        dia_key = None
-        for dia in ['dia08', 'dia16']:
-            for c in clientes_data.get(dia, []):
-                if c.get('client_id') == client_id:
-                    cliente = c
-                    dia_key = dia
-                    break
-            if cliente:
-                break
+        dia_key, _posicao, cliente = CLIENTES_STORE.find_record('client_id', client_id)
         
         if not cliente:
             return jsonify({'success': False, 'error': 'Cliente não encontrado'})
@@ -2414,24 +2727,20 @@ def api_clientes_enviar_whatsapp(client_id):
         valorizacao_patrimonial = credito_atual_soma - credito_inicial
         lucro_atual = valorizacao_patrimonial - total_investido_soma
         
-        # Formata valores para moeda brasileira
-        def format_brl(value):
-            return f"R$ {value:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
-        
         # Monta mensagem personalizada
         mensagem = f"""Olá *{nome}*! 👋
 
 📊 *Relatório Patrimonial - Sistema OXCASH*
 
-💼 *Crédito Inicial:* {format_brl(credito_inicial)}
+💼 *Crédito Inicial:* {_format_brl(credito_inicial)}
 
-💰 *Total Investido:* {format_brl(total_investido_soma)}
+💰 *Total Investido:* {_format_brl(total_investido_soma)}
 
-💎 *Crédito Atual:* {format_brl(credito_atual_soma)}
+💎 *Crédito Atual:* {_format_brl(credito_atual_soma)}
 
-📈 *Valorização Patrimonial:* {format_brl(valorizacao_patrimonial)}
+📈 *Valorização Patrimonial:* {_format_brl(valorizacao_patrimonial)}
 
-{"🎉 *Lucro Atual:* " + format_brl(lucro_atual) if lucro_atual >= 0 else "⚠️ *Déficit Atual:* " + format_brl(abs(lucro_atual))}
+{"🎉 *Lucro Atual:* " + _format_brl(lucro_atual) if lucro_atual >= 0 else "⚠️ *Déficit Atual:* " + _format_brl(abs(lucro_atual))}
 
 _Este é um relatório automático gerado pelo Sistema OXCASH._
 _Próximo envio em 6 meses._"""
@@ -2453,26 +2762,12 @@ _Próximo envio em 6 meses._"""
         if not all([base_url, instance_name, api_key]):
             return jsonify({'success': False, 'error': 'Configuração da Evolution API incompleta'})
         
-        evolution_api = EvolutionAPI(base_url, instance_name, api_key)
-        
-        # Envia mensagem
-        success, response = evolution_api.send_text_message(celular, mensagem)
-        
-        if not success:
-            return jsonify({
-                'success': False,
-                'error': f"Falha ao enviar mensagem: {response.get('error', 'Erro desconhecido')}",
-                'details': response
-            })
-        
-        # Registra no histórico
-        if 'historico_whatsapp' not in cliente:
-            cliente['historico_whatsapp'] = []
-        
-        cliente['historico_whatsapp'].append({
-            'data_envio': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'mensagem_enviada': mensagem,
+        payload = {
+            'client_id': client_id,
+            'dia_key': dia_key,
+            'nome': nome,
             'celular': celular,
+            'mensagem': mensagem,
             'valores': {
                 'credito_inicial': credito_inicial,
                 'total_investido': total_investido_soma,
@@ -2480,79 +2775,145 @@ _Próximo envio em 6 meses._"""
                 'valorizacao_patrimonial': valorizacao_patrimonial,
                 'lucro_atual': lucro_atual
             }
-        })
-        
-        # Salva cliente atualizado
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
-        
-        return jsonify({
-            'success': True,
-            'message': f'WhatsApp enviado com sucesso para {nome}!',
-            'details': {
-                'nome': nome,
-                'celular': celular,
-                'data_envio': cliente['historico_whatsapp'][-1]['data_envio'],
-                'valores': {
-                    'credito_inicial': format_brl(credito_inicial),
-                    'total_investido': format_brl(total_investido_soma),
-                    'credito_atual': format_brl(credito_atual_soma),
-                    'valorizacao_patrimonial': format_brl(valorizacao_patrimonial),
-                    'lucro_atual': format_brl(lucro_atual)
-                }
-            }
-        })
+        }
+        return _enqueue_whatsapp(
+            'cliente_relatorio', payload, f'cliente_relatorio:{client_id}',
+            f'Relatório de {nome} adicionado à fila do WhatsApp'
+        )
         
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"Erro ao enviar WhatsApp: {error_details}")
-        return jsonify({'success': False, 'error': f'Erro ao enviar WhatsApp: {str(e)}'})
+        print(f"Erro ao enfileirar WhatsApp: {error_details}")
+        return jsonify({'success': False, 'error': f'Erro ao enfileirar WhatsApp: {str(e)}'})
+
+def _send_cliente_boleto_job(payload):
+    """Entrega do boleto enfileirado por api_clientes_enviar_boleto (worker da fila)"""
+    task_id = payload['task_id']
+    dia_key = payload['dia_key']
+    nome = payload['nome']
+    celular = payload['celular']
+    mensagem = payload['mensagem']
+    link_boleto = payload['link_boleto']
+    evolution_api = _evolution_api_from_config()
+
+    # ========== BAIXA E ENVIA PDF DO BOLETO COM MENSAGEM UNIFICADA ==========
+    from utils.boleto_downloader import download_boleto_pdf, get_cached_boleto
+
+    pdf_path = None
+    pdf_sent = False
+
+    # 1. Verifica se já está em cache
+    pdf_path = get_cached_boleto(task_id)
+
+    # 2. Se não está em cache, baixa do Servopa
+    if not pdf_path:
+        print(f"📥 Baixando PDF do boleto: {link_boleto}")
+        sucesso, pdf_path, erro = download_boleto_pdf(link_boleto, task_id)
+
+        if not sucesso:
+            print(f"⚠️ Falha ao baixar PDF: {erro}")
+            pdf_path = None
+        else:
+            print(f"✅ PDF baixado: {pdf_path}")
+
+    # 3. Se conseguiu o PDF (cache ou download), envia COM A MENSAGEM JUNTO
+    if pdf_path and os.path.exists(pdf_path):
+        # Monta nome do arquivo bonito para o WhatsApp
+        nome_arquivo = f"Boleto_{nome.replace(' ', '_')}.pdf"
+
+        print(f"📤 Enviando PDF + mensagem pelo WhatsApp: {nome_arquivo}")
+
+        # ENVIA PDF COM CAPTION (mensagem + arquivo juntos!)
+        success, response = evolution_api.send_document(
+            celular,
+            pdf_path,
+            caption=mensagem,  # Usa a mensagem completa como caption
+            filename=nome_arquivo,
+            media_url=_public_boleto_url(task_id, link_boleto)
+        )
+
+        pdf_sent = success
+
+        if not success:
+            print(f"❌ Falha ao enviar PDF: {response}")
+            # Fallback: se falhou enviar PDF, envia só texto
+            success, response = evolution_api.send_text_message(celular, mensagem)
+            if not success:
+                return {
+                    'success': False,
+                    'error': f"Falha ao enviar mensagem: {response.get('error', 'Erro desconhecido')}",
+                    'details': response
+                }
+    else:
+        print(f"⚠️ PDF não disponível, enviando apenas mensagem de texto")
+        # Fallback: envia só a mensagem se não conseguir o PDF
+        success, response = evolution_api.send_text_message(celular, mensagem)
+
+    if not success:
+        return {
+            'success': False,
+            'error': f"Falha ao enviar mensagem: {response.get('error', 'Erro desconhecido')}",
+            'details': response
+        }
+
+    # Marca boleto como enviado
+    data_envio_boleto = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    with BOLETOS_STORE.locked():
+        boletos_data = BOLETOS_STORE.load()
+        _dia_key, _posicao, b = BOLETOS_STORE.find_record('task_id', task_id, dia_key)
+        if b is not None:
+            b['whatsapp_enviado'] = True
+            b['data_envio_boleto'] = data_envio_boleto
+
+        # Salva boletos atualizado
+        BOLETOS_STORE.save(boletos_data)
+
+    # Monta mensagem de sucesso baseada no que foi enviado
+    if pdf_sent:
+        mensagem_sucesso = f'Boleto PDF enviado via WhatsApp para {nome}! ✅'
+    else:
+        mensagem_sucesso = f'Mensagem de boleto enviada via WhatsApp para {nome} (PDF indisponível)'
+
+    return {
+        'success': True,
+        'message': mensagem_sucesso,
+        'details': {
+            'nome': nome,
+            'celular': celular,
+            'link_boleto': link_boleto,
+            'pdf_sent': pdf_sent,
+            'pdf_path': pdf_path if pdf_sent else None,
+            'data_envio': data_envio_boleto
+        }
+    }
+
+WHATSAPP_QUEUE.register('cliente_boleto', _send_cliente_boleto_job)
 
 @app.route('/api/clientes/enviar-boleto/<client_id>', methods=['POST'])
 def api_clientes_enviar_boleto(client_id):
     """Envia boleto via WhatsApp sem mover o card de mês"""
     try:
-        from utils.evolution_api import EvolutionAPI
         import re
         
         # Carrega cliente
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        if not os.path.exists(clientes_filepath):
+        if not CLIENTES_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de clientes não encontrado'})
         
-        with open(clientes_filepath, 'r', encoding='utf-8') as f:
-            clientes_data = json.load(f)
-        
         # Busca cliente
-        cliente = None
-        dia_key = None
-        for dia in ['dia08', 'dia16']:
-            for c in clientes_data.get(dia, []):
-                if c.get('client_id') == client_id:
-                    cliente = c
-                    dia_key = dia
-                    break
-            if cliente:
-                break
+        dia_key, _posicao, cliente = CLIENTES_STORE.find_record('client_id', client_id)
         
         if not cliente:
             return jsonify({'success': False, 'error': 'Cliente não encontrado'})
         
         # Carrega boleto
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if not os.path.exists(boletos_filepath):
+        if not BOLETOS_STORE.exists():
             return jsonify({'success': False, 'error': 'Arquivo de boletos não encontrado'})
         
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
-        
-        # Busca boleto correspondente
-        boleto = None
-        for b in boletos_data.get(dia_key, []):
-            if b.get('client_id') == client_id or b.get('task_id') == client_id:
-                boleto = b
-                break
+        # Busca boleto correspondente (por client_id ou, em dados antigos, pelo task_id)
+        _dia_key, _posicao, boleto = BOLETOS_STORE.find_record('client_id', client_id, dia_key)
+        if boleto is None:
+            _dia_key, _posicao, boleto = BOLETOS_STORE.find_record('task_id', client_id, dia_key)
         
         if not boleto:
             return jsonify({'success': False, 'error': 'Boleto não encontrado para este cliente'})
@@ -2607,103 +2968,25 @@ _Mensagem automática - Sistema OXCASH_"""
         if not api_config.get('instance_name') or not api_config.get('api_key'):
             return jsonify({'success': False, 'error': 'Evolution API não configurada. Configure instance_name e api_key em WhatsApp.'})
         
-        evolution_api = EvolutionAPI(
-            base_url=api_config.get('base_url', 'https://zap.tekvosoft.com'),
-            instance_name=api_config['instance_name'],
-            api_key=api_config['api_key']
+        payload = {
+            'client_id': client_id,
+            'task_id': task_id,
+            'dia_key': dia_key,
+            'nome': nome,
+            'celular': celular,
+            'mensagem': mensagem,
+            'link_boleto': link_boleto,
+        }
+        return _enqueue_whatsapp(
+            'cliente_boleto', payload, f'cliente_boleto:{client_id}',
+            f'Boleto de {nome} adicionado à fila do WhatsApp'
         )
         
-        # ========== BAIXA E ENVIA PDF DO BOLETO COM MENSAGEM UNIFICADA ==========
-        from utils.boleto_downloader import download_boleto_pdf, get_cached_boleto
-        
-        pdf_path = None
-        pdf_sent = False
-        
-        # 1. Verifica se já está em cache
-        pdf_path = get_cached_boleto(task_id)
-        
-        # 2. Se não está em cache, baixa do Servopa
-        if not pdf_path:
-            print(f"📥 Baixando PDF do boleto: {link_boleto}")
-            sucesso, pdf_path, erro = download_boleto_pdf(link_boleto, task_id)
-            
-            if not sucesso:
-                print(f"⚠️ Falha ao baixar PDF: {erro}")
-                pdf_path = None
-            else:
-                print(f"✅ PDF baixado: {pdf_path}")
-        
-        # 3. Se conseguiu o PDF (cache ou download), envia COM A MENSAGEM JUNTO
-        if pdf_path and os.path.exists(pdf_path):
-            # Monta nome do arquivo bonito para o WhatsApp
-            nome_arquivo = f"Boleto_{nome.replace(' ', '_')}.pdf"
-            
-            print(f"📤 Enviando PDF + mensagem pelo WhatsApp: {nome_arquivo}")
-            
-            # ENVIA PDF COM CAPTION (mensagem + arquivo juntos!)
-            success, response = evolution_api.send_document(
-                celular,
-                pdf_path,
-                caption=mensagem,  # Usa a mensagem completa como caption
-                filename=nome_arquivo
-            )
-            
-            pdf_sent = success
-            
-            if not success:
-                print(f"❌ Falha ao enviar PDF: {response}")
-                # Fallback: se falhou enviar PDF, envia só texto
-                success, response = evolution_api.send_text_message(celular, mensagem)
-                if not success:
-                    return jsonify({
-                        'success': False,
-                        'error': f"Falha ao enviar mensagem: {response.get('error', 'Erro desconhecido')}",
-                        'details': response
-                    })
-        else:
-            print(f"⚠️ PDF não disponível, enviando apenas mensagem de texto")
-            # Fallback: envia só a mensagem se não conseguir o PDF
-            success, response = evolution_api.send_text_message(celular, mensagem)
-        
-        if not success:
-            return jsonify({
-                'success': False,
-                'error': f"Falha ao enviar mensagem: {response.get('error', 'Erro desconhecido')}",
-                'details': response
-            })
-        
-        # Marca boleto como enviado
-        boleto['whatsapp_enviado'] = True
-        boleto['data_envio_boleto'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Salva boletos atualizado
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
-        
-        # Monta mensagem de sucesso baseada no que foi enviado
-        if pdf_sent:
-            mensagem_sucesso = f'Boleto PDF enviado via WhatsApp para {nome}! ✅'
-        else:
-            mensagem_sucesso = f'Mensagem de boleto enviada via WhatsApp para {nome} (PDF indisponível)'
-        
-        return jsonify({
-            'success': True,
-            'message': mensagem_sucesso,
-            'details': {
-                'nome': nome,
-                'celular': celular,
-                'link_boleto': link_boleto,
-                'pdf_sent': pdf_sent,
-                'pdf_path': pdf_path if pdf_sent else None,
-                'data_envio': boleto['data_envio_boleto']
-            }
-        })
-        
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
-        print(f"Erro ao enviar boleto: {error_details}")
-        return jsonify({'success': False, 'error': f'Erro ao enviar boleto: {str(e)}'})
+        print(f"Erro ao enfileirar boleto: {error_details}")
+        return jsonify({'success': False, 'error': f'Erro ao enfileirar boleto: {str(e)}'})
 
 @app.route('/api/calendario-lances/get', methods=['GET'])
 def api_calendario_lances_get():
@@ -2735,6 +3018,12 @@ def api_calendario_lances_get():
                 'calendario': calendario_inicial[str(ano_atual)]
             })
         
+        st = os.stat(calendario_filepath)
+        etag = _data_etag('calendario', st.st_mtime_ns, st.st_size, ano_atual)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
         with open(calendario_filepath, 'r', encoding='utf-8') as f:
             calendario_data = json.load(f)
         
@@ -2745,11 +3034,11 @@ def api_calendario_lances_get():
         
         calendario = calendario_data.get(ano_key, {})
         
-        return jsonify({
+        return _with_etag(jsonify({
             'success': True,
             'ano': ano_key,
             'calendario': calendario
-        })
+        }), etag)
         
     except Exception as e:
         print(f"Erro ao carregar calendário: {e}")
@@ -2812,240 +3101,225 @@ def _sync_cotas_to_clientes(cotas_list, grupo, dia_grupo):
         import uuid
         from datetime import datetime
         
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        
-        # Carrega ou cria estrutura de clientes
-        clientes_data = {'dia08': [], 'dia16': []}
-        if os.path.exists(clientes_filepath):
-            with open(clientes_filepath, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
-        
-        dia_key = f'dia{dia_grupo:02d}'
-        if dia_key not in clientes_data:
-            clientes_data[dia_key] = []
-        
-        stats = {'created': 0, 'updated': 0, 'skipped': 0}
-        
-        print(f"\n🔄 Sincronizando {len(cotas_list)} cotas do grupo {grupo} para clientes (Dia {dia_grupo})...")
-        
-        # Função auxiliar para converter valor monetário em float
-        def parse_money(value_str):
-            """Converte 'R$ 1.234,56' para float 1234.56"""
-            if not value_str or value_str == 'N/A':
-                return 0.0
-            try:
-                # Remove 'R$', espaços, pontos (milhares) e substitui vírgula por ponto
-                clean = value_str.replace('R$', '').replace(' ', '').replace('.', '').replace(',', '.')
-                return float(clean)
-            except:
-                return 0.0
-        
-        for cota_info in cotas_list:
-            nome = cota_info.get('nome', '').strip()
-            cota = cota_info.get('cota', '').strip()
-            total_investido_str = cota_info.get('total_investido')
-            credito_atual_str = cota_info.get('credito_atual')
+        # Carrega ou cria estrutura de clientes (bloqueio de clientes -> boletos)
+        with CLIENTES_STORE.locked(), BOLETOS_STORE.locked():
+            clientes_data = CLIENTES_STORE.load()
             
-            if not nome or not cota:
-                stats['skipped'] += 1
-                continue
+            dia_key = f'dia{dia_grupo:02d}'
+            if dia_key not in clientes_data:
+                clientes_data[dia_key] = []
             
-            # Converte valores para float
-            total_investido = parse_money(total_investido_str)
-            credito_atual = parse_money(credito_atual_str)
+            stats = {'created': 0, 'updated': 0, 'skipped': 0}
             
-            # Busca cliente existente por NOME (case-insensitive)
-            cliente_encontrado = None
-            for idx, cliente in enumerate(clientes_data[dia_key]):
-                nome_cliente = cliente.get('nome', '').strip()
-                if nome_cliente.lower() == nome.lower():
-                    cliente_encontrado = cliente
-                    print(f"  ✓ Cliente encontrado: {nome}")
-                    break
+            print(f"\n🔄 Sincronizando {len(cotas_list)} cotas do grupo {grupo} para clientes (Dia {dia_grupo})...")
             
-            if cliente_encontrado:
-                # Cliente já existe - atualizar grupos/cotas E SOMAR VALORES
-                grupos_atual = cliente_encontrado.get('grupos', [])
-                cotas_atual = cliente_encontrado.get('cotas', [])
+            # Função auxiliar para converter valor monetário em float
+            def parse_money(value_str):
+                """Converte 'R$ 1.234,56' para float 1234.56"""
+                if not value_str or value_str == 'N/A':
+                    return 0.0
+                try:
+                    # Remove 'R$', espaços, pontos (milhares) e substitui vírgula por ponto
+                    clean = value_str.replace('R$', '').replace(' ', '').replace('.', '').replace(',', '.')
+                    return float(clean)
+                except:
+                    return 0.0
+            
+            for cota_info in cotas_list:
+                nome = cota_info.get('nome', '').strip()
+                cota = cota_info.get('cota', '').strip()
+                total_investido_str = cota_info.get('total_investido')
+                credito_atual_str = cota_info.get('credito_atual')
                 
-                # Se ainda usa formato antigo (string), converte para lista
-                if isinstance(cliente_encontrado.get('grupo'), str):
-                    grupo_antigo = cliente_encontrado.get('grupo', '').strip()
-                    cota_antiga = cliente_encontrado.get('cota', '').strip()
-                    
-                    if grupo_antigo and cota_antiga:
-                        grupos_atual = [grupo_antigo]
-                        cotas_atual = [cota_antiga]
-                    else:
-                        grupos_atual = []
-                        cotas_atual = []
+                if not nome or not cota:
+                    stats['skipped'] += 1
+                    continue
                 
-                # Adiciona nova cota/grupo se não existir
-                cota_grupo_key = f"{cota}-{grupo}"
-                cotas_grupos_existentes = [f"{c}-{g}" for c, g in zip(cotas_atual, grupos_atual)]
+                # Converte valores para float
+                total_investido = parse_money(total_investido_str)
+                credito_atual = parse_money(credito_atual_str)
                 
-                if cota_grupo_key not in cotas_grupos_existentes:
-                    grupos_atual.append(grupo)
-                    cotas_atual.append(cota)
-                    
-                    cliente_encontrado['grupos'] = grupos_atual
-                    cliente_encontrado['cotas'] = cotas_atual
-                    
-                    # ========== SOMA VALORES ==========
-                    # Total Investido
-                    total_investido_cliente = cliente_encontrado.get('total_investido_soma', 0.0)
-                    if isinstance(total_investido_cliente, str):
-                        total_investido_cliente = parse_money(total_investido_cliente)
-                    cliente_encontrado['total_investido_soma'] = total_investido_cliente + total_investido
+                # Busca cliente existente por NOME (case-insensitive)
+                cliente_encontrado = None
+                for idx, cliente in enumerate(clientes_data[dia_key]):
+                    nome_cliente = cliente.get('nome', '').strip()
+                    if nome_cliente.lower() == nome.lower():
+                        cliente_encontrado = cliente
+                        print(f"  ✓ Cliente encontrado: {nome}")
+                        break
+                
+                if cliente_encontrado:
+                    # Cliente já existe - atualizar grupos/cotas E SOMAR VALORES
+                    grupos_atual = cliente_encontrado.get('grupos', [])
+                    cotas_atual = cliente_encontrado.get('cotas', [])
                     
-                    # Crédito Atual
-                    credito_atual_cliente = cliente_encontrado.get('credito_atual_soma', 0.0)
-                    if isinstance(credito_atual_cliente, str):
-                        credito_atual_cliente = parse_money(credito_atual_cliente)
-                    cliente_encontrado['credito_atual_soma'] = credito_atual_cliente + credito_atual
+                    # Se ainda usa formato antigo (string), converte para lista
+                    if isinstance(cliente_encontrado.get('grupo'), str):
+                        grupo_antigo = cliente_encontrado.get('grupo', '').strip()
+                        cota_antiga = cliente_encontrado.get('cota', '').strip()
+                        
+                        if grupo_antigo and cota_antiga:
+                            grupos_atual = [grupo_antigo]
+                            cotas_atual = [cota_antiga]
+                        else:
+                            grupos_atual = []
+                            cotas_atual = []
                     
-                    cliente_encontrado['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    # Adiciona nova cota/grupo se não existir
+                    cota_grupo_key = f"{cota}-{grupo}"
+                    cotas_grupos_existentes = [f"{c}-{g}" for c, g in zip(cotas_atual, grupos_atual)]
                     
-                    # Atualiza cotas_texto
-                    if len(cotas_atual) == 1:
-                        cliente_encontrado['cotas_texto'] = f"{cotas_atual[0]} - {grupos_atual[0]}"
+                    if cota_grupo_key not in cotas_grupos_existentes:
+                        grupos_atual.append(grupo)
+                        cotas_atual.append(cota)
+                        
+                        cliente_encontrado['grupos'] = grupos_atual
+                        cliente_encontrado['cotas'] = cotas_atual
+                        
+                        # ========== SOMA VALORES ==========
+                        # Total Investido
+                        total_investido_cliente = cliente_encontrado.get('total_investido_soma', 0.0)
+                        if isinstance(total_investido_cliente, str):
+                            total_investido_cliente = parse_money(total_investido_cliente)
+                        cliente_encontrado['total_investido_soma'] = total_investido_cliente + total_investido
+                        
+                        # Crédito Atual
+                        credito_atual_cliente = cliente_encontrado.get('credito_atual_soma', 0.0)
+                        if isinstance(credito_atual_cliente, str):
+                            credito_atual_cliente = parse_money(credito_atual_cliente)
+                        cliente_encontrado['credito_atual_soma'] = credito_atual_cliente + credito_atual
+                        
+                        cliente_encontrado['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                        
+                        # Atualiza cotas_texto
+                        if len(cotas_atual) == 1:
+                            cliente_encontrado['cotas_texto'] = f"{cotas_atual[0]} - {grupos_atual[0]}"
+                        else:
+                            cliente_encontrado['cotas_texto'] = f"{len(cotas_atual)} cotas"
+                        
+                        # Remove campos antigos (migração)
+                        cliente_encontrado.pop('grupo', None)
+                        cliente_encontrado.pop('cota', None)
+                        
+                        stats['updated'] += 1
+                        print(f"  ↻ Cliente atualizado: {nome} - Agora com {len(cotas_atual)} cota(s)")
+                        print(f"      💰 Total Investido: R$ {cliente_encontrado['total_investido_soma']:.2f}")
+                        print(f"      💎 Crédito Atual: R$ {cliente_encontrado['credito_atual_soma']:.2f}")
                     else:
-                        cliente_encontrado['cotas_texto'] = f"{len(cotas_atual)} cotas"
-                    
-                    # Remove campos antigos (migração)
-                    cliente_encontrado.pop('grupo', None)
-                    cliente_encontrado.pop('cota', None)
-                    
-                    stats['updated'] += 1
-                    print(f"  ↻ Cliente atualizado: {nome} - Agora com {len(cotas_atual)} cota(s)")
-                    print(f"      💰 Total Investido: R$ {cliente_encontrado['total_investido_soma']:.2f}")
-                    print(f"      💎 Crédito Atual: R$ {cliente_encontrado['credito_atual_soma']:.2f}")
+                        stats['skipped'] += 1
+                        print(f"  ⊘ Cliente já possui esta cota: {nome}")
+                        
                 else:
-                    stats['skipped'] += 1
-                    print(f"  ⊘ Cliente já possui esta cota: {nome}")
+                    # Cliente não existe - criar novo
+                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    hoje = datetime.now()
+                    mes_relatorio_atual = f"{hoje.year}-{str(hoje.month).zfill(2)}"
                     
-            else:
-                # Cliente não existe - criar novo
-                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                hoje = datetime.now()
-                mes_relatorio_atual = f"{hoje.year}-{str(hoje.month).zfill(2)}"
-                
-                novo_cliente = {
-                    'client_id': str(uuid.uuid4()),
-                    'nome': nome,
-                    'grupos': [grupo],
-                    'cotas': [cota],
-                    'cotas_texto': f"{cota} - {grupo}",
-                    'contato': '',
-                    'valor_primeira_cota': cota_info.get('valor', '').replace('R$ ', '').replace('.', '').replace(',', '.'),
-                    'total_investido_soma': total_investido,  # ========== NOVO CAMPO ==========
-                    'credito_atual_soma': credito_atual,      # ========== NOVO CAMPO ==========
-                    'credito_inicial': 0.0,  # Será preenchido manualmente pelo usuário
-                    'mes_relatorio': mes_relatorio_atual,     # ========== DEFINE MÊS ATUAL ==========
-                    'historico_boletos': [],
-                    'created_at': timestamp,
-                    'updated_at': timestamp
-                }
-                
-                clientes_data[dia_key].append(novo_cliente)
-                stats['created'] += 1
-                print(f"  + Cliente criado: {nome} (Mês: {mes_relatorio_atual})")
-                print(f"      💰 Total Investido: R$ {total_investido:.2f}")
-                print(f"      💎 Crédito Atual: R$ {credito_atual:.2f}")
-        
-        # Salva clientes atualizados
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"✅ Sincronização de clientes concluída: {stats['created']} criados, {stats['updated']} atualizados, {stats['skipped']} ignorados")
-        
-        # ========== CRIA/ATUALIZA BOLETOS AUTOMATICAMENTE ==========
-        print(f"\n🎫 Sincronizando boletos automaticamente...")
-        
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        
-        # Carrega ou cria estrutura de boletos
-        boletos_data = {'dia08': [], 'dia16': [], 'last_import': None}
-        if os.path.exists(boletos_filepath):
-            with open(boletos_filepath, 'r', encoding='utf-8-sig') as f:
-                content = f.read().strip()
-                if content.startswith('\ufeff'):
-                    content = content[1:]
-                try:
-                    boletos_data = json.loads(content)
-                except:
-                    boletos_data = {'dia08': [], 'dia16': [], 'last_import': None}
-        
-        if dia_key not in boletos_data:
-            boletos_data[dia_key] = []
-        
-        # Para cada cliente criado/atualizado, cria/atualiza boleto
-        boletos_stats = {'created': 0, 'updated': 0, 'skipped': 0}
-        
-        for cliente in clientes_data[dia_key]:
-            nome = cliente.get('nome', '').strip()
-            grupos = cliente.get('grupos', [])
-            cotas = cliente.get('cotas', [])
-            cotas_texto = cliente.get('cotas_texto', '')
-            contato = cliente.get('contato', '')
-            task_id = cliente.get('task_id', '')
+                    novo_cliente = {
+                        'client_id': str(uuid.uuid4()),
+                        'nome': nome,
+                        'grupos': [grupo],
+                        'cotas': [cota],
+                        'cotas_texto': f"{cota} - {grupo}",
+                        'contato': '',
+                        'valor_primeira_cota': cota_info.get('valor', '').replace('R$ ', '').replace('.', '').replace(',', '.'),
+                        'total_investido_soma': total_investido,  # ========== NOVO CAMPO ==========
+                        'credito_atual_soma': credito_atual,      # ========== NOVO CAMPO ==========
+                        'credito_inicial': 0.0,  # Será preenchido manualmente pelo usuário
+                        'mes_relatorio': mes_relatorio_atual,     # ========== DEFINE MÊS ATUAL ==========
+                        'historico_boletos': [],
+                        'created_at': timestamp,
+                        'updated_at': timestamp
+                    }
+                    
+                    clientes_data[dia_key].append(novo_cliente)
+                    stats['created'] += 1
+                    print(f"  + Cliente criado: {nome} (Mês: {mes_relatorio_atual})")
+                    print(f"      💰 Total Investido: R$ {total_investido:.2f}")
+                    print(f"      💎 Crédito Atual: R$ {credito_atual:.2f}")
             
-            if not nome:
-                continue
+            # Salva clientes atualizados
+            CLIENTES_STORE.save(clientes_data)
             
-            # Busca boleto existente pelo nome
-            boleto_encontrado = None
-            for boleto in boletos_data[dia_key]:
-                if boleto.get('nome', '').strip().lower() == nome.lower():
-                    boleto_encontrado = boleto
-                    break
+            print(f"✅ Sincronização de clientes concluída: {stats['created']} criados, {stats['updated']} atualizados, {stats['skipped']} ignorados")
             
-            if boleto_encontrado:
-                # Atualiza boleto existente
-                boleto_encontrado['cotas'] = cotas_texto
-                if contato:
-                    boleto_encontrado['celular'] = contato
-                if grupos:
-                    boleto_encontrado['grupo'] = grupos[0]
-                if cotas:
-                    boleto_encontrado['cota'] = cotas[0]
-                boletos_stats['updated'] += 1
-                print(f"  ↻ Boleto atualizado: {nome}")
-            else:
-                # Cria novo boleto
-                if not task_id:
-                    task_id = str(uuid.uuid4())
-                
-                novo_boleto = {
-                    'task_id': task_id,
-                    'client_id': cliente.get('client_id'),
-                    'nome': nome,
-                    'celular': contato,
-                    'cotas': cotas_texto,
-                    'grupo': grupos[0] if grupos else '',
-                    'cota': cotas[0] if cotas else '',
-                    'valor_primeira_cota': cliente.get('valor_primeira_cota', ''),
-                    'is_completed': False,
-                    'created_from_cotas': True,
-                    'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
+            # ========== CRIA/ATUALIZA BOLETOS AUTOMATICAMENTE ==========
+            print(f"\n🎫 Sincronizando boletos automaticamente...")
+            
+            # Carrega ou cria estrutura de boletos
+            try:
+                boletos_data = BOLETOS_STORE.load()
+            except:
+                boletos_data = {'dia08': [], 'dia16': [], 'last_import': None}
+            
+            if dia_key not in boletos_data:
+                boletos_data[dia_key] = []
+            
+            # Para cada cliente criado/atualizado, cria/atualiza boleto
+            boletos_stats = {'created': 0, 'updated': 0, 'skipped': 0}
+            
+            for cliente in clientes_data[dia_key]:
+                nome = cliente.get('nome', '').strip()
+                grupos = cliente.get('grupos', [])
+                cotas = cliente.get('cotas', [])
+                cotas_texto = cliente.get('cotas_texto', '')
+                contato = cliente.get('contato', '')
+                task_id = cliente.get('task_id', '')
                 
-                boletos_data[dia_key].append(novo_boleto)
+                if not nome:
+                    continue
                 
-                # Atualiza task_id no cliente se não tinha
-                if not cliente.get('task_id'):
-                    cliente['task_id'] = task_id
+                # Busca boleto existente pelo nome
+                boleto_encontrado = None
+                for boleto in boletos_data[dia_key]:
+                    if boleto.get('nome', '').strip().lower() == nome.lower():
+                        boleto_encontrado = boleto
+                        break
                 
-                boletos_stats['created'] += 1
-                print(f"  + Boleto criado: {nome} - {cotas_texto}")
-        
-        # Salva boletos atualizados
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
-        
-        # Salva clientes com task_id atualizado
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+                if boleto_encontrado:
+                    # Atualiza boleto existente
+                    boleto_encontrado['cotas'] = cotas_texto
+                    if contato:
+                        boleto_encontrado['celular'] = contato
+                    if grupos:
+                        boleto_encontrado['grupo'] = grupos[0]
+                    if cotas:
+                        boleto_encontrado['cota'] = cotas[0]
+                    boletos_stats['updated'] += 1
+                    print(f"  ↻ Boleto atualizado: {nome}")
+                else:
+                    # Cria novo boleto
+                    if not task_id:
+                        task_id = str(uuid.uuid4())
+                    
+                    novo_boleto = {
+                        'task_id': task_id,
+                        'client_id': cliente.get('client_id'),
+                        'nome': nome,
+                        'celular': contato,
+                        'cotas': cotas_texto,
+                        'grupo': grupos[0] if grupos else '',
+                        'cota': cotas[0] if cotas else '',
+                        'valor_primeira_cota': cliente.get('valor_primeira_cota', ''),
+                        'is_completed': False,
+                        'created_from_cotas': True,
+                        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    }
+                    
+                    boletos_data[dia_key].append(novo_boleto)
+                    
+                    # Atualiza task_id no cliente se não tinha
+                    if not cliente.get('task_id'):
+                        cliente['task_id'] = task_id
+                    
+                    boletos_stats['created'] += 1
+                    print(f"  + Boleto criado: {nome} - {cotas_texto}")
+            
+            # Salva boletos atualizados
+            BOLETOS_STORE.save(boletos_data)
+            
+            # Salva clientes com task_id atualizado
+            CLIENTES_STORE.save(clientes_data)
         
         print(f"✅ Sincronização de boletos concluída: {boletos_stats['created']} criados, {boletos_stats['updated']} atualizados\n")
         
@@ -3068,99 +3342,97 @@ def _sync_cliente_to_boleto(cliente, dia_key):
     - Se não existem → busca por nome (fallback)
     """
     try:
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        if not os.path.exists(boletos_filepath):
-            return
-        
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
-        
-        # Extrai dados do cliente - suporta novo formato (arrays) e antigo (strings)
-        nome = cliente.get('nome', '').strip()
-        
-        # Novo formato: arrays
-        grupos = cliente.get('grupos', [])
-        cotas = cliente.get('cotas', [])
-        
-        # Migração do formato antigo
-        if not grupos and cliente.get('grupo'):
-            grupos = [str(cliente.get('grupo', '')).strip()]
-        if not cotas and cliente.get('cota'):
-            cotas = [str(cliente.get('cota', '')).strip()]
-        
-        # Pega primeiro grupo/cota para busca
-        grupo = grupos[0] if grupos else ''
-        cota = cotas[0] if cotas else ''
-        
-        contato = cliente.get('contato', '')
-        cotas_texto = cliente.get('cotas_texto', '')
-        
-        if not nome:
+        if not BOLETOS_STORE.exists():
             return
         
-        print(f"🔄 SYNC Cliente→Boleto: Nome='{nome}', Grupos={grupos}, Cotas={cotas}, Dia={dia_key}")
-        
-        # Busca boleto existente - PRIORIDADE: Grupo+Cota, depois Nome
-        boleto_encontrado = None
-        metodo_busca = None
-        
-        # Método 1: Busca por GRUPO + COTA (mais confiável)
-        if grupo and cota:
-            for idx, boleto in enumerate(boletos_data.get(dia_key, [])):
-                boleto_grupo = str(boleto.get('grupo', '')).strip()
-                boleto_cota = str(boleto.get('cota', '')).strip()
+        with BOLETOS_STORE.locked():
+            boletos_data = BOLETOS_STORE.load()
+            
+            # Extrai dados do cliente - suporta novo formato (arrays) e antigo (strings)
+            nome = cliente.get('nome', '').strip()
+            
+            # Novo formato: arrays
+            grupos = cliente.get('grupos', [])
+            cotas = cliente.get('cotas', [])
+            
+            # Migração do formato antigo
+            if not grupos and cliente.get('grupo'):
+                grupos = [str(cliente.get('grupo', '')).strip()]
+            if not cotas and cliente.get('cota'):
+                cotas = [str(cliente.get('cota', '')).strip()]
+            
+            # Pega primeiro grupo/cota para busca
+            grupo = grupos[0] if grupos else ''
+            cota = cotas[0] if cotas else ''
+            
+            contato = cliente.get('contato', '')
+            cotas_texto = cliente.get('cotas_texto', '')
+            
+            if not nome:
+                return
+            
+            print(f"🔄 SYNC Cliente→Boleto: Nome='{nome}', Grupos={grupos}, Cotas={cotas}, Dia={dia_key}")
+            
+            # Busca boleto existente - PRIORIDADE: Grupo+Cota, depois Nome
+            boleto_encontrado = None
+            metodo_busca = None
+            
+            # Método 1: Busca por GRUPO + COTA (mais confiável)
+            if grupo and cota:
+                for idx, boleto in enumerate(boletos_data.get(dia_key, [])):
+                    boleto_grupo = str(boleto.get('grupo', '')).strip()
+                    boleto_cota = str(boleto.get('cota', '')).strip()
+                    
+                    if boleto_grupo == grupo and boleto_cota == cota:
+                        print(f"✅ Boleto ENCONTRADO por Grupo+Cota (posição {idx}): '{boleto.get('nome')}'")
+                        boleto_encontrado = boleto
+                        metodo_busca = "grupo+cota"
+                        break
+            
+            # Método 2: Fallback - Busca por NOME (se não achou por grupo/cota)
+            if not boleto_encontrado:
+                for idx, boleto in enumerate(boletos_data.get(dia_key, [])):
+                    nome_boleto = boleto.get('nome', '').strip()
+                    if nome_boleto == nome:
+                        print(f"✅ Boleto ENCONTRADO por Nome (posição {idx}): '{nome_boleto}'")
+                        boleto_encontrado = boleto
+                        metodo_busca = "nome"
+                        break
+            
+            if boleto_encontrado:
+                # ATUALIZA boleto existente
+                print(f"📝 ATUALIZANDO boleto existente (método: {metodo_busca})")
                 
-                if boleto_grupo == grupo and boleto_cota == cota:
-                    print(f"✅ Boleto ENCONTRADO por Grupo+Cota (posição {idx}): '{boleto.get('nome')}'")
-                    boleto_encontrado = boleto
-                    metodo_busca = "grupo+cota"
-                    break
-        
-        # Método 2: Fallback - Busca por NOME (se não achou por grupo/cota)
-        if not boleto_encontrado:
-            for idx, boleto in enumerate(boletos_data.get(dia_key, [])):
-                nome_boleto = boleto.get('nome', '').strip()
-                if nome_boleto == nome:
-                    print(f"✅ Boleto ENCONTRADO por Nome (posição {idx}): '{nome_boleto}'")
-                    boleto_encontrado = boleto
-                    metodo_busca = "nome"
-                    break
-        
-        if boleto_encontrado:
-            # ATUALIZA boleto existente
-            print(f"📝 ATUALIZANDO boleto existente (método: {metodo_busca})")
-            
-            # Atualiza NOME se mudou (permite correção de nomes)
-            boleto_encontrado['nome'] = nome
-            
-            # Atualiza grupo e cota (primeiro da lista)
-            if grupo:
-                boleto_encontrado['grupo'] = grupo
-            if cota:
-                boleto_encontrado['cota'] = cota
-            
-            # Atualiza contato/celular
-            if contato:
-                boleto_encontrado['celular'] = contato
-            
-            # Atualiza campo cotas - FORMATO ESPECÍFICO PARA BOLETOS
-            # Boletos mostram "2 cotas", "3 cotas", etc. quando há múltiplas
-            # Clientes mostram "1065 - 1550 +1" (detalhado)
-            if len(cotas) == 1 and len(grupos) == 1:
-                boleto_encontrado['cotas'] = f"{cotas[0]} - {grupos[0]}"
-            elif len(cotas) > 1:
-                boleto_encontrado['cotas'] = f"{len(cotas)} cotas"
-            elif cotas_texto:
-                boleto_encontrado['cotas'] = cotas_texto
-            
-            print(f"✅ Boleto atualizado: Nome='{nome}', Cotas='{boleto_encontrado.get('cotas')}'")
-        else:
-            print(f"⚠️ Boleto NÃO encontrado para o cliente: '{nome}' (Grupos: {grupos}, Cotas: {cotas})")
-            print(f"📋 Boletos existentes em {dia_key}: {[(b.get('nome'), b.get('grupo'), b.get('cota')) for b in boletos_data.get(dia_key, [])]}")
-        
-        # Salva boletos atualizados
-        with open(boletos_filepath, 'w', encoding='utf-8') as f:
-            json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+                # Atualiza NOME se mudou (permite correção de nomes)
+                boleto_encontrado['nome'] = nome
+                
+                # Atualiza grupo e cota (primeiro da lista)
+                if grupo:
+                    boleto_encontrado['grupo'] = grupo
+                if cota:
+                    boleto_encontrado['cota'] = cota
+                
+                # Atualiza contato/celular
+                if contato:
+                    boleto_encontrado['celular'] = contato
+                
+                # Atualiza campo cotas - FORMATO ESPECÍFICO PARA BOLETOS
+                # Boletos mostram "2 cotas", "3 cotas", etc. quando há múltiplas
+                # Clientes mostram "1065 - 1550 +1" (detalhado)
+                if len(cotas) == 1 and len(grupos) == 1:
+                    boleto_encontrado['cotas'] = f"{cotas[0]} - {grupos[0]}"
+                elif len(cotas) > 1:
+                    boleto_encontrado['cotas'] = f"{len(cotas)} cotas"
+                elif cotas_texto:
+                    boleto_encontrado['cotas'] = cotas_texto
+                
+                print(f"✅ Boleto atualizado: Nome='{nome}', Cotas='{boleto_encontrado.get('cotas')}'")
+            else:
+                print(f"⚠️ Boleto NÃO encontrado para o cliente: '{nome}' (Grupos: {grupos}, Cotas: {cotas})")
+                print(f"📋 Boletos existentes em {dia_key}: {[(b.get('nome'), b.get('grupo'), b.get('cota')) for b in boletos_data.get(dia_key, [])]}")
+            
+            # Salva boletos atualizados
+            BOLETOS_STORE.save(boletos_data)
     
     except Exception as e:
         print(f"❌ Erro ao sincronizar cliente para boleto: {e}")
@@ -3178,180 +3450,175 @@ def _sync_boleto_to_cliente(boleto, dia_key):
         import uuid
         import re
         
-        clientes_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'clientes_data.json')
-        
         # Carrega ou cria estrutura de clientes
-        clientes_data = {'dia08': [], 'dia16': []}
-        if os.path.exists(clientes_filepath):
-            with open(clientes_filepath, 'r', encoding='utf-8') as f:
-                clientes_data = json.load(f)
-        
-        # Extrai dados do boleto
-        nome = boleto.get('nome', '').strip()
-        if not nome:
-            return
-        
-        cotas_info = boleto.get('cotas', '')
-        grupo = boleto.get('grupo', '').strip()
-        cota = boleto.get('cota', '').strip()
-        
-        # Preserva o texto original das cotas
-        cotas_texto = cotas_info.strip()
-        
-        # Tenta extrair grupo e cota do campo cotas se não existirem
-        if not grupo or not cota:
-            match = re.search(r'(\d{3,4})\s*-\s*(\d{4})', cotas_info)
-            if match:
-                cota = match.group(1).strip()
-                grupo = match.group(2).strip()
-        
-        contato = boleto.get('celular', '')
-        boleto_link = _best_boleto_link(boleto)
-        task_id = boleto.get('task_id', '')  # ID único do boleto
-        
-        print(f"🔄 SYNC Boleto→Cliente: TaskID={task_id}, Nome='{nome}', Grupo={grupo or 'N/A'}, Cota={cota or 'N/A'}, Dia={dia_key}")
-        
-        # Busca cliente existente - PRIORIDADE: task_id, depois Grupo+Cota, depois Nome
-        cliente_encontrado = None
-        metodo_busca = None
-        
-        # Método 0: Busca por TASK_ID (MAIS CONFIÁVEL - vínculo direto com boleto)
-        if task_id:
-            for idx, cliente in enumerate(clientes_data.get(dia_key, [])):
-                cliente_task_id = cliente.get('task_id', '')
-                if cliente_task_id == task_id:
-                    print(f"✅ Cliente ENCONTRADO por TaskID (posição {idx}): '{cliente.get('nome')}'")
-                    cliente_encontrado = cliente
-                    metodo_busca = "task_id"
-                    break
-        
-        # Método 1: Busca por GRUPO + COTA (se não achou por task_id)
-        if not cliente_encontrado and grupo and cota:
-            for idx, cliente in enumerate(clientes_data.get(dia_key, [])):
-                cliente_grupo = str(cliente.get('grupo', '')).strip()
-                cliente_cota = str(cliente.get('cota', '')).strip()
-                
-                if cliente_grupo == grupo and cliente_cota == cota:
-                    print(f"✅ Cliente ENCONTRADO por Grupo+Cota (posição {idx}): '{cliente.get('nome')}'")
-                    cliente_encontrado = cliente
-                    metodo_busca = "grupo+cota"
-                    break
-        
-        # Método 2: Fallback - Busca por NOME (se não achou por task_id nem grupo/cota)
-        if not cliente_encontrado:
-            for idx, cliente in enumerate(clientes_data.get(dia_key, [])):
-                nome_cliente = cliente.get('nome', '').strip()
-                if nome_cliente.lower() == nome.lower():
-                    print(f"✅ Cliente ENCONTRADO por Nome (posição {idx}): '{nome_cliente}'")
-                    cliente_encontrado = cliente
-                    metodo_busca = "nome"
-                    break
-        
-        if cliente_encontrado:
-            # ATUALIZA cliente existente
-            print(f"📝 ATUALIZANDO cliente existente (método: {metodo_busca}): {cliente_encontrado.get('client_id')}")
-            
-            # Obtém listas atuais de grupos e cotas
-            grupos_atual = cliente_encontrado.get('grupos', [])
-            cotas_atual = cliente_encontrado.get('cotas', [])
-            
-            # Migração de formato antigo APENAS se não tem arrays ainda
-            if not isinstance(grupos_atual, list):
-                # Se ainda usa formato antigo (string), converte para lista
-                grupo_antigo = cliente_encontrado.get('grupo', '').strip()
-                cota_antiga = cliente_encontrado.get('cota', '').strip()
-                
-                if grupo_antigo and cota_antiga:
-                    grupos_atual = [grupo_antigo]
-                    cotas_atual = [cota_antiga]
-                else:
-                    grupos_atual = []
-                    cotas_atual = []
+        with CLIENTES_STORE.locked():
+            clientes_data = CLIENTES_STORE.load()
             
-            # Adiciona nova cota/grupo se existir e ainda não estiver na lista
-            if grupo and cota:
-                cota_grupo_key = f"{cota}-{grupo}"
-                cotas_grupos_existentes = [f"{c}-{g}" for c, g in zip(cotas_atual, grupos_atual)]
-                
-                if cota_grupo_key not in cotas_grupos_existentes:
-                    grupos_atual.append(grupo)
-                    cotas_atual.append(cota)
-                    print(f"  ↻ Adicionando nova cota: {cota} - {grupo}")
-                else:
-                    print(f"  ⊘ Cota já existe: {cota} - {grupo}")
-            
-            # Atualiza cliente
-            cliente_encontrado['nome'] = nome
-            cliente_encontrado['grupos'] = grupos_atual
-            cliente_encontrado['cotas'] = cotas_atual
-            cliente_encontrado['contato'] = contato or cliente_encontrado.get('contato', '')
-            cliente_encontrado['task_id'] = task_id
-            
-            # Atualiza cotas_texto
-            if len(cotas_atual) == 1:
-                cliente_encontrado['cotas_texto'] = f"{cotas_atual[0]} - {grupos_atual[0]}"
-            elif len(cotas_atual) > 1:
-                cliente_encontrado['cotas_texto'] = f"{cotas_atual[0]} - {grupos_atual[0]} +{len(cotas_atual) - 1}"
-            else:
-                cliente_encontrado['cotas_texto'] = cotas_texto
+            # Extrai dados do boleto
+            nome = boleto.get('nome', '').strip()
+            if not nome:
+                return
             
-            # Remove campos antigos (migração)
-            cliente_encontrado.pop('grupo', None)
-            cliente_encontrado.pop('cota', None)
+            cotas_info = boleto.get('cotas', '')
+            grupo = boleto.get('grupo', '').strip()
+            cota = boleto.get('cota', '').strip()
             
-            # Adiciona link ao histórico se não existir
-            if boleto_link:
-                if 'historico_boletos' not in cliente_encontrado:
-                    cliente_encontrado['historico_boletos'] = []
-                if boleto_link not in cliente_encontrado['historico_boletos']:
-                    cliente_encontrado['historico_boletos'].append(boleto_link)
+            # Preserva o texto original das cotas
+            cotas_texto = cotas_info.strip()
             
-            cliente_encontrado['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            print(f"✅ Cliente atualizado: {nome} - {cliente_encontrado.get('cotas_texto')}")
-        else:
-            # CRIA novo cliente apenas se não existir
-            print(f"🆕 Cliente NÃO encontrado, CRIANDO NOVO: '{nome}' (Grupo: {grupo}, Cota: {cota})")
-            print(f"📋 Clientes existentes em {dia_key}: {[(c.get('nome'), c.get('grupos', c.get('grupo')), c.get('cotas', c.get('cota'))) for c in clientes_data.get(dia_key, [])]}")
+            # Tenta extrair grupo e cota do campo cotas se não existirem
+            if not grupo or not cota:
+                match = re.search(r'(\d{3,4})\s*-\s*(\d{4})', cotas_info)
+                if match:
+                    cota = match.group(1).strip()
+                    grupo = match.group(2).strip()
             
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            hoje = datetime.now()
-            mes_relatorio_atual = f"{hoje.year}-{str(hoje.month).zfill(2)}"
+            contato = boleto.get('celular', '')
+            boleto_link = _best_boleto_link(boleto)
+            task_id = boleto.get('task_id', '')  # ID único do boleto
             
-            # Inicia listas vazias
-            grupos_list = []
-            cotas_list = []
+            print(f"🔄 SYNC Boleto→Cliente: TaskID={task_id}, Nome='{nome}', Grupo={grupo or 'N/A'}, Cota={cota or 'N/A'}, Dia={dia_key}")
             
-            # Adiciona grupo/cota se existirem
-            if grupo and cota:
-                grupos_list = [grupo]
-                cotas_list = [cota]
-                cotas_texto_calc = f"{cota} - {grupo}"
+            # Busca cliente existente - PRIORIDADE: task_id, depois Grupo+Cota, depois Nome
+            cliente_encontrado = None
+            metodo_busca = None
+            
+            # Método 0: Busca por TASK_ID (MAIS CONFIÁVEL - vínculo direto com boleto)
+            if task_id:
+                for idx, cliente in enumerate(clientes_data.get(dia_key, [])):
+                    cliente_task_id = cliente.get('task_id', '')
+                    if cliente_task_id == task_id:
+                        print(f"✅ Cliente ENCONTRADO por TaskID (posição {idx}): '{cliente.get('nome')}'")
+                        cliente_encontrado = cliente
+                        metodo_busca = "task_id"
+                        break
+            
+            # Método 1: Busca por GRUPO + COTA (se não achou por task_id)
+            if not cliente_encontrado and grupo and cota:
+                for idx, cliente in enumerate(clientes_data.get(dia_key, [])):
+                    cliente_grupo = str(cliente.get('grupo', '')).strip()
+                    cliente_cota = str(cliente.get('cota', '')).strip()
+                    
+                    if cliente_grupo == grupo and cliente_cota == cota:
+                        print(f"✅ Cliente ENCONTRADO por Grupo+Cota (posição {idx}): '{cliente.get('nome')}'")
+                        cliente_encontrado = cliente
+                        metodo_busca = "grupo+cota"
+                        break
+            
+            # Método 2: Fallback - Busca por NOME (se não achou por task_id nem grupo/cota)
+            if not cliente_encontrado:
+                for idx, cliente in enumerate(clientes_data.get(dia_key, [])):
+                    nome_cliente = cliente.get('nome', '').strip()
+                    if nome_cliente.lower() == nome.lower():
+                        print(f"✅ Cliente ENCONTRADO por Nome (posição {idx}): '{nome_cliente}'")
+                        cliente_encontrado = cliente
+                        metodo_busca = "nome"
+                        break
+            
+            if cliente_encontrado:
+                # ATUALIZA cliente existente
+                print(f"📝 ATUALIZANDO cliente existente (método: {metodo_busca}): {cliente_encontrado.get('client_id')}")
+                
+                # Obtém listas atuais de grupos e cotas
+                grupos_atual = cliente_encontrado.get('grupos', [])
+                cotas_atual = cliente_encontrado.get('cotas', [])
+                
+                # Migração de formato antigo APENAS se não tem arrays ainda
+                if not isinstance(grupos_atual, list):
+                    # Se ainda usa formato antigo (string), converte para lista
+                    grupo_antigo = cliente_encontrado.get('grupo', '').strip()
+                    cota_antiga = cliente_encontrado.get('cota', '').strip()
+                    
+                    if grupo_antigo and cota_antiga:
+                        grupos_atual = [grupo_antigo]
+                        cotas_atual = [cota_antiga]
+                    else:
+                        grupos_atual = []
+                        cotas_atual = []
+                
+                # Adiciona nova cota/grupo se existir e ainda não estiver na lista
+                if grupo and cota:
+                    cota_grupo_key = f"{cota}-{grupo}"
+                    cotas_grupos_existentes = [f"{c}-{g}" for c, g in zip(cotas_atual, grupos_atual)]
+                    
+                    if cota_grupo_key not in cotas_grupos_existentes:
+                        grupos_atual.append(grupo)
+                        cotas_atual.append(cota)
+                        print(f"  ↻ Adicionando nova cota: {cota} - {grupo}")
+                    else:
+                        print(f"  ⊘ Cota já existe: {cota} - {grupo}")
+                
+                # Atualiza cliente
+                cliente_encontrado['nome'] = nome
+                cliente_encontrado['grupos'] = grupos_atual
+                cliente_encontrado['cotas'] = cotas_atual
+                cliente_encontrado['contato'] = contato or cliente_encontrado.get('contato', '')
+                cliente_encontrado['task_id'] = task_id
+                
+                # Atualiza cotas_texto
+                if len(cotas_atual) == 1:
+                    cliente_encontrado['cotas_texto'] = f"{cotas_atual[0]} - {grupos_atual[0]}"
+                elif len(cotas_atual) > 1:
+                    cliente_encontrado['cotas_texto'] = f"{cotas_atual[0]} - {grupos_atual[0]} +{len(cotas_atual) - 1}"
+                else:
+                    cliente_encontrado['cotas_texto'] = cotas_texto
+                
+                # Remove campos antigos (migração)
+                cliente_encontrado.pop('grupo', None)
+                cliente_encontrado.pop('cota', None)
+                
+                # Adiciona link ao histórico se não existir
+                if boleto_link:
+                    if 'historico_boletos' not in cliente_encontrado:
+                        cliente_encontrado['historico_boletos'] = []
+                    if boleto_link not in cliente_encontrado['historico_boletos']:
+                        cliente_encontrado['historico_boletos'].append(boleto_link)
+                
+                cliente_encontrado['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                print(f"✅ Cliente atualizado: {nome} - {cliente_encontrado.get('cotas_texto')}")
             else:
-                cotas_texto_calc = cotas_texto
-            
-            novo_cliente = {
-                'client_id': str(uuid.uuid4()),
-                'nome': nome,
-                'grupos': grupos_list,
-                'cotas': cotas_list,
-                'cotas_texto': cotas_texto_calc,
-                'contato': contato,
-                'task_id': task_id,
-                'valor_primeira_cota': '',
-                'mes_relatorio': mes_relatorio_atual,
-                'historico_boletos': [boleto_link] if boleto_link else [],
-                'created_at': timestamp,
-                'updated_at': timestamp
-            }
+                # CRIA novo cliente apenas se não existir
+                print(f"🆕 Cliente NÃO encontrado, CRIANDO NOVO: '{nome}' (Grupo: {grupo}, Cota: {cota})")
+                print(f"📋 Clientes existentes em {dia_key}: {[(c.get('nome'), c.get('grupos', c.get('grupo')), c.get('cotas', c.get('cota'))) for c in clientes_data.get(dia_key, [])]}")
+                
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                hoje = datetime.now()
+                mes_relatorio_atual = f"{hoje.year}-{str(hoje.month).zfill(2)}"
+                
+                # Inicia listas vazias
+                grupos_list = []
+                cotas_list = []
+                
+                # Adiciona grupo/cota se existirem
+                if grupo and cota:
+                    grupos_list = [grupo]
+                    cotas_list = [cota]
+                    cotas_texto_calc = f"{cota} - {grupo}"
+                else:
+                    cotas_texto_calc = cotas_texto
+                
+                novo_cliente = {
+                    'client_id': str(uuid.uuid4()),
+                    'nome': nome,
+                    'grupos': grupos_list,
+                    'cotas': cotas_list,
+                    'cotas_texto': cotas_texto_calc,
+                    'contato': contato,
+                    'task_id': task_id,
+                    'valor_primeira_cota': '',
+                    'mes_relatorio': mes_relatorio_atual,
+                    'historico_boletos': [boleto_link] if boleto_link else [],
+                    'created_at': timestamp,
+                    'updated_at': timestamp
+                }
+                
+                if dia_key not in clientes_data:
+                    clientes_data[dia_key] = []
+                clientes_data[dia_key].append(novo_cliente)
+                print(f"✅ Novo cliente criado: {nome} - {cotas_texto_calc} (Mês: {mes_relatorio_atual})")
             
-            if dia_key not in clientes_data:
-                clientes_data[dia_key] = []
-            clientes_data[dia_key].append(novo_cliente)
-            print(f"✅ Novo cliente criado: {nome} - {cotas_texto_calc} (Mês: {mes_relatorio_atual})")
-        
-        # Salva clientes atualizados
-        with open(clientes_filepath, 'w', encoding='utf-8') as f:
-            json.dump(clientes_data, f, indent=2, ensure_ascii=False)
+            # Salva clientes atualizados
+            CLIENTES_STORE.save(clientes_data)
         
         # Sincroniza de volta para o boleto (atualiza formato de cotas)
         if cliente_encontrado:
@@ -3375,26 +3642,13 @@ def api_clear_history(dia):
             total_removed = 0
             
             for d in dias_to_clean:
-                filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), f'history_{d}.json')
-                
-                if os.path.exists(filepath):
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    
-                    # Filtra APENAS os que NÃO são erro
-                    data_filtered = [
-                        entry for entry in data 
-                        if not ('❌' in entry.get('status', '') or 
-                                'Erro' in entry.get('status', '') or 
-                                'erro' in entry.get('status', '').lower())
-                    ]
-                    
-                    removed = len(data) - len(data_filtered)
-                    total_removed += removed
-                    
-                    # Salva apenas os não-erros
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(data_filtered, f, indent=2, ensure_ascii=False)
+                # Compacta o log mantendo APENAS os que NÃO são erro
+                total_removed += get_history_log(PROJECT_ROOT, d).compact(
+                    keep=lambda entry: not ('❌' in entry.get('status', '') or 
+                                            'Erro' in entry.get('status', '') or 
+                                            'erro' in entry.get('status', '').lower())
+                )
+                get_history_stats(PROJECT_ROOT, d).rebuild()
             
             return jsonify({
                 'success': True, 
@@ -3408,9 +3662,8 @@ def api_clear_history(dia):
             dias = [dia]
         
         for d in dias:
-            filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), f'history_{d}.json')
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump([], f, indent=2)
+            get_history_log(PROJECT_ROOT, d).clear()
+            get_history_stats(PROJECT_ROOT, d).rebuild()
         
         msg = 'Todos os históricos limpos' if dia == 'all' else f'Histórico do {dia} limpo'
         return jsonify({'success': True, 'message': msg})
@@ -3514,8 +3767,14 @@ def api_start_automation(dia):
     if app_state[f'automation_{dia}_running']:
         return jsonify({'success': False, 'error': 'Automação já está rodando'})
     
+    data = request.get_json(silent=True) or {}
+    board_source = data.get('board_source') or DEFAULT_BOARD_SOURCE
+    if board_source not in BOARD_SOURCES:
+        return jsonify({'success': False, 'error': f"board_source deve ser {' ou '.join(BOARD_SOURCES)}"})
+    
     # Marca como rodando ANTES de iniciar thread
     app_state[f'automation_{dia}_running'] = True
+    _record_automation_status(dia, is_running=True, started_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     
     # Notifica interface IMEDIATAMENTE via WebSocket
     with app.app_context():
@@ -3524,7 +3783,7 @@ def api_start_automation(dia):
         socketio.emit('progress', {'dia': dia, 'value': 5, 'message': 'Preparando...'}, namespace='/')
     
     # Inicia thread de automação
-    thread = threading.Thread(target=run_automation_thread, args=(dia,))
+    thread = threading.Thread(target=run_automation_thread, args=(dia, board_source))
     thread.daemon = True
     thread.start()
     
@@ -3578,6 +3837,32 @@ def api_stop_automation(dia):
     
     return jsonify({'success': True, 'message': f'Automação {dia} parada e Chrome fechado'})
 
+def _send_whatsapp_text_job(payload):
+    """Envia a mensagem do envio em massa a um contato (worker da fila)"""
+    name = payload.get('name') or 'Cliente'
+
+    def send():
+        api = _evolution_api_from_config()
+        success, response = api.send_text_message(payload['phone'], payload['message'].replace('{nome}', name))
+        if success:
+            return {'success': True, 'message': f'Enviado para {name}', 'details': response}
+        return {
+            'success': False,
+            'error': response.get('error', 'Erro desconhecido'),
+            'status_code': response.get('status_code'),
+            'retry_after': response.get('retry_after'),
+            'details': response
+        }
+
+    result = _paced_whatsapp_send(send)
+    if result['success']:
+        socketio.emit('log', {'dia': 'whatsapp', 'message': f"✅ Enviado para {name} ({payload['phone']})"})
+    else:
+        socketio.emit('log', {'dia': 'whatsapp', 'message': f"❌ Falha para {name}: {result['error']}"})
+    return result
+
+WHATSAPP_QUEUE.register('whatsapp_text', _send_whatsapp_text_job)
+
 @app.route('/api/whatsapp/send', methods=['POST'])
 def api_whatsapp_send():
     """Envia mensagens WhatsApp"""
@@ -3601,15 +3886,7 @@ def api_whatsapp_send():
         if 'api' not in config:
             return jsonify({'success': False, 'error': 'Configuração da API incompleta'})
         
-        # Importa módulo de envio
-        from utils.evolution_api import EvolutionAPI, parse_contacts_from_text
-        
-        # Cria cliente API
-        api = EvolutionAPI(
-            config['api']['base_url'],
-            config['api']['instance_name'],
-            config['api']['api_key']
-        )
+        from utils.evolution_api import parse_contacts_from_text
         
         # Parse contatos
         contacts = parse_contacts_from_text(contacts_text)
@@ -3617,31 +3894,48 @@ def api_whatsapp_send():
         if not contacts:
             return jsonify({'success': False, 'error': 'Nenhum contato válido encontrado'})
         
-        # Envia mensagens
-        def progress_callback(msg):
-            socketio.emit('log', {'dia': 'whatsapp', 'message': msg})
-        
-        results = api.send_bulk_messages(
-            contacts,
-            message_template,
-            delay_between_messages=2.0,
-            progress_callback=progress_callback
-        )
-        
-        # Retorna resultado
-        return jsonify({
-            'success': True,
-            'message': f'Envio concluído para {dia}',
-            'stats': {
-                'total': results['total'],
-                'success': results['success'],
-                'failed': results['failed']
-            }
-        })
+        # Um job por contato; mesmo dia + telefone + mensagem = mesmo envio, então
+        # repetir o pedido não reenvia a quem já recebeu
+        digest = hashlib.sha256(message_template.encode('utf-8')).hexdigest()[:16]
+        jobs = [
+            (contact.get('name') or 'Cliente', WHATSAPP_QUEUE.enqueue(
+                'whatsapp_text',
+                {'dia': dia, 'phone': contact['phone'], 'name': contact.get('name'), 'message': message_template},
+                f"whatsapp_text:{dia}:{contact['phone']}:{digest}"
+            ))
+            for contact in contacts
+        ]
+        return _enqueued_whatsapp_batch(jobs, f'contatos ({dia})')
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/whatsapp/jobs/<job_id>', methods=['GET'])
+def api_whatsapp_job(job_id):
+    """Status de um envio enfileirado"""
+    job = WHATSAPP_QUEUE.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Envio não encontrado'}), 404
+    return jsonify({'success': True, 'job': _public_job(job)})
+
+@app.route('/api/whatsapp/jobs', methods=['GET'])
+def api_whatsapp_jobs():
+    """Envios recentes da fila (filtros opcionais: status, kind, limit; ou ids=a,b,c)"""
+    ids = [job_id for job_id in (request.args.get('ids') or '').split(',') if job_id]
+    if ids:
+        jobs = [job for job in map(WHATSAPP_QUEUE.get, ids) if job is not None]
+        return jsonify({'success': True, 'jobs': [_public_job(job) for job in jobs]})
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit inválido'}), 400
+    jobs = WHATSAPP_QUEUE.list(
+        status=request.args.get('status') or None,
+        kind=request.args.get('kind') or None,
+        limit=limit
+    )
+    return jsonify({'success': True, 'jobs': [_public_job(job) for job in jobs]})
+
 # ========== ROTAS DA API DO AGENTE DE IA ==========
 
 def _get_or_create_ai_agent():
@@ -3701,23 +3995,14 @@ def _execute_boleto_generation(task_id: str, dia: str) -> Dict:
             raise Exception('Credenciais do Servopa não encontradas')
         
         # Carrega dados do boleto
-        boletos_filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'boletos_data.json')
-        with open(boletos_filepath, 'r', encoding='utf-8') as f:
-            boletos_data = json.load(f)
-        
-        boleto_entry = None
-        for dia_key in ('dia08', 'dia16'):
-            for item in boletos_data.get(dia_key, []):
-                if str(item.get('task_id')) == str(task_id):
-                    boleto_entry = item
-                    dia = '08' if dia_key == 'dia08' else '16'
-                    break
-            if boleto_entry:
-                break
-        
-        if not boleto_entry:
+        dia_key, _posicao, item = BOLETOS_STORE.find_record('task_id', task_id)
+        if item is None:
             raise Exception('Boleto não encontrado')
         
+        # Cópia: a automação roda fora do bloqueio do repositório
+        boleto_entry = dict(item)
+        dia = '08' if dia_key == 'dia08' else '16'
+        
         # Cria driver headless
         driver = create_driver(headless=True)
         
@@ -3733,19 +4018,23 @@ def _execute_boleto_generation(task_id: str, dia: str) -> Dict:
                 dia,
                 lambda msg: socketio.emit('log', {'dia': 'ai', 'message': msg})
             )
+            prefetch_boleto_pdf(result.boleto_url, task_id)
             
             # Salva resultado no arquivo
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            if result.png_base64:
-                boleto_entry['png_base64'] = result.png_base64
-            if result.boleto_url:
-                boleto_entry['boleto_url'] = result.boleto_url
-                boleto_entry['short_link'] = result.boleto_url
-            boleto_entry['last_generated'] = timestamp
-            boleto_entry['tipo'] = result.tipo
-            
-            with open(boletos_filepath, 'w', encoding='utf-8') as f:
-                json.dump(boletos_data, f, indent=2, ensure_ascii=False)
+            with BOLETOS_STORE.locked():
+                boletos_data = BOLETOS_STORE.load()
+                _dia_key, _posicao, item = BOLETOS_STORE.find_record('task_id', task_id, f'dia{dia}')
+                if item is not None:
+                    if result.screenshot_blob:
+                        item[SCREENSHOT_BLOB_FIELD] = result.screenshot_blob
+                    if result.boleto_url:
+                        item['boleto_url'] = result.boleto_url
+                        item['short_link'] = result.boleto_url
+                    item['last_generated'] = timestamp
+                    item['tipo'] = result.tipo
+                
+                BOLETOS_STORE.save(boletos_data)
             
             return {
                 'success': True,
@@ -4144,10 +4433,8 @@ def handle_test():
 
 # ========== FUNÇÕES AUXILIARES ==========
 
-def load_history_stats(filename):
-    """Carrega estatísticas do histórico"""
-    filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), filename)
-    
+def load_history_stats(dia):
+    """Estatísticas do histórico ('dia8' ou 'dia16') a partir dos contadores incrementais"""
     stats = {
         'total': 0,
         'success': 0,
@@ -4157,25 +4444,12 @@ def load_history_stats(filename):
     }
     
     try:
-        if os.path.exists(filepath):
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            stats['total'] = len(data)
-            
-            for entry in data:
-                status = entry.get('status', '')
-                if 'sucesso' in status.lower() or '✅' in status:
-                    stats['success'] += 1
-                elif 'erro' in status.lower() or '❌' in status or 'falha' in status.lower():
-                    stats['failed'] += 1
-                elif '⏹️' in status or 'parado' in status.lower():
-                    stats['stopped'] += 1
-            
-            # Últimos 5 registros
-            stats['recent'] = list(reversed(data[-5:]))
-    except:
-        pass
+        stats.update(get_history_stats(PROJECT_ROOT, dia).snapshot())
+        
+        # Últimos 5 registros
+        stats['recent'] = get_history_log(PROJECT_ROOT, dia).tail(5)
+    except Exception as e:
+        print(f"⚠️ Erro ao carregar estatísticas do {dia}: {e}")
     
     return stats
 
@@ -4187,14 +4461,40 @@ def progress_callback(dia, message):
     except Exception as e:
         print(f"Erro ao enviar log: {e}")
 
-def run_automation_thread(dia):
+def _lances_board_from_api(dia, todoist_api):
+    """
+    Board de lances do dia pela API do Todoist (mesmo formato de extract_complete_board,
+    sem checkbox_element). None se falhar ou o projeto não tiver colunas.
+    """
+    try:
+        boards = todoist_api.extract_lances_board(progress_callback=lambda msg: progress_callback(dia, msg))
+    except Exception as e:
+        progress_callback(dia, f"⚠️ Board pela API indisponível: {e}")
+        return None
+    sections = boards['dia08' if dia == 'dia8' else 'dia16']
+    return {'sections': sections} if sections else None
+
+def run_automation_thread(dia, board_source=DEFAULT_BOARD_SOURCE):
     """Thread de automação"""
     try:
         from auth.servopa_auth import create_driver, login_servopa
         from utils.todoist_board_extractor import navigate_to_board_project, navigate_to_board_project_dia16, extract_complete_board
         from automation.cycle_orchestrator import executar_ciclo_completo
+        from utils.todoist_rest_api import TodoistRestAPI
         
         progress_callback(dia, f"🚀 Iniciando automação {dia.upper()}...")
+        todoist_api = TodoistRestAPI(TODOIST_TOKEN, mirror_path=TODOIST_MIRROR_PATH)
+        
+        # Board pela API: o navegador fica só com o Servopa (sem login no Todoist)
+        board_data = None
+        if board_source == 'api':
+            socketio.emit('progress', {'dia': dia, 'value': 5, 'message': 'Carregando board pela API...'})
+            board_data = _lances_board_from_api(dia, todoist_api)
+            if board_data is None:
+                progress_callback(dia, "🔄 Usando o board pelo navegador")
+        # Só o board da API tem os IDs que a API aceita para concluir as tarefas
+        board_da_api = board_data is not None
+        
         socketio.emit('progress', {'dia': dia, 'value': 10, 'message': 'Iniciando navegador...'})
         
         # Carrega credenciais
@@ -4213,46 +4513,47 @@ def run_automation_thread(dia):
             if not login_servopa(driver, lambda msg: progress_callback(dia, msg), credentials['servopa']):
                 raise Exception("Falha no login Servopa")
             
-            # Login Todoist
-            socketio.emit('progress', {'dia': dia, 'value': 40, 'message': 'Login Todoist...'})
-            from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            
-            driver.execute_script("window.open('');")
-            driver.switch_to.window(driver.window_handles[-1])
-            driver.get("https://todoist.com/auth/login")
-            
-            import time
-            time.sleep(3)
-            
-            wait = WebDriverWait(driver, 20)
-            email_input = wait.until(EC.presence_of_element_located((By.ID, "element-0")))
-            email_input.send_keys(credentials['todoist']['usuario'])
-            
-            password_input = wait.until(EC.presence_of_element_located((By.ID, "element-2")))
-            password_input.send_keys(credentials['todoist']['senha'])
-            
-            login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
-            login_button.click()
-            time.sleep(10)
-            
-            # Navega para board
-            socketio.emit('progress', {'dia': dia, 'value': 60, 'message': 'Extraindo board...'})
-            nav_func = navigate_to_board_project if dia == 'dia8' else navigate_to_board_project_dia16
-            if not nav_func(driver, lambda msg: progress_callback(dia, msg)):
-                raise Exception("Falha ao navegar para board")
-            
-            board_data = extract_complete_board(driver, lambda msg: progress_callback(dia, msg))
-            if not board_data or not board_data['sections']:
-                raise Exception("Board vazio ou inválido")
+            if board_data is None:
+                # Login Todoist
+                socketio.emit('progress', {'dia': dia, 'value': 40, 'message': 'Login Todoist...'})
+                from selenium.webdriver.common.by import By
+                from selenium.webdriver.support.ui import WebDriverWait
+                from selenium.webdriver.support import expected_conditions as EC
+                
+                driver.execute_script("window.open('');")
+                driver.switch_to.window(driver.window_handles[-1])
+                driver.get("https://todoist.com/auth/login")
+                
+                import time
+                time.sleep(3)
+                
+                wait = WebDriverWait(driver, 20)
+                email_input = wait.until(EC.presence_of_element_located((By.ID, "element-0")))
+                email_input.send_keys(credentials['todoist']['usuario'])
+                
+                password_input = wait.until(EC.presence_of_element_located((By.ID, "element-2")))
+                password_input.send_keys(credentials['todoist']['senha'])
+                
+                login_button = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, "button[type='submit']")))
+                login_button.click()
+                time.sleep(10)
+                
+                # Navega para board
+                socketio.emit('progress', {'dia': dia, 'value': 60, 'message': 'Extraindo board...'})
+                nav_func = navigate_to_board_project if dia == 'dia8' else navigate_to_board_project_dia16
+                if not nav_func(driver, lambda msg: progress_callback(dia, msg)):
+                    raise Exception("Falha ao navegar para board")
+                
+                board_data = extract_complete_board(driver, lambda msg: progress_callback(dia, msg))
+                if not board_data or not board_data['sections']:
+                    raise Exception("Board vazio ou inválido")
             
             # Executa ciclo
             socketio.emit('progress', {'dia': dia, 'value': 80, 'message': 'Executando ciclo...'})
             
             def history_callback(grupo, cota, nome, valor, status, obs="", **kwargs):
-                # Salva no histórico via arquivo
-                filepath = os.path.join(os.path.dirname(os.path.dirname(__file__)), f'history_{dia}.json')
+                # Salva no histórico (log append-only)
+                history_log = get_history_log(PROJECT_ROOT, dia)
                 
                 protocolo_valor = kwargs.get('protocolo')
                 documento_url = kwargs.get('documento_url')
@@ -4275,19 +4576,9 @@ def run_automation_thread(dia):
                 }
                 
                 try:
-                    # Lê histórico existente
-                    if os.path.exists(filepath):
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                    else:
-                        data = []
-                    
-                    # Adiciona nova entrada
-                    data.append(entry)
-                    
-                    # Salva de volta
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    # Adiciona nova entrada ao final do log e atualiza os contadores
+                    history_log.append(entry)
+                    get_history_stats(PROJECT_ROOT, dia).refresh()
                     
                     # Log de confirmação
                     progress_callback(dia, f"📝 Histórico salvo: {nome} - {status}")
@@ -4306,10 +4597,17 @@ def run_automation_thread(dia):
                 board_data,
                 lambda msg: progress_callback(dia, msg),
                 history_callback,
-                lambda: app_state[f'automation_{dia}_running']
+                lambda: app_state[f'automation_{dia}_running'],
+                todoist_api=todoist_api if board_da_api else None
             )
             
             if stats:
+                _record_automation_status(
+                    dia,
+                    total_tasks=stats.get('total_tasks', 0),
+                    completed_tasks=stats.get('completed', 0),
+                    failed_tasks=stats.get('failed', 0)
+                )
                 socketio.emit('progress', {'dia': dia, 'value': 100, 'message': 'Concluído!'})
                 progress_callback(dia, f"🎉 Automação finalizada: {stats['completed']}/{stats['total_tasks']} sucesso")
             
@@ -4327,6 +4625,7 @@ def run_automation_thread(dia):
     
     finally:
         app_state[f'automation_{dia}_running'] = False
+        _record_automation_status(dia, is_running=False)
         socketio.emit('automation_status', {'dia': dia, 'running': False})
 
 # ========== MAIN ==========
@@ -4339,4 +4638,13 @@ if __name__ == '__main__':
     print('🌐 Acesse pelo navegador para usar a interface')
     print('=' * 60)
     
-    socketio.run(app, host='0.0.0.0', port=5000, debug=True, allow_unsafe_werkzeug=True)
+    # Limpeza periódica dos caches de PDF (idade + orçamento de disco)
+    CACHE_MANAGER.start_sweeper()
+    
+    # Com debug, o reloader executa este bloco no processo monitor e no filho:
+    # os workers da fila só rodam no filho, que atende as requisições
+    debug = True
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        WHATSAPP_QUEUE.start()
+    
+    socketio.run(app, host='0.0.0.0', port=5000, debug=debug, allow_unsafe_werkzeug=True)